@@ -12,6 +12,11 @@ echo "🚀 Deploying backend using Cloud Build (no local Docker needed)..."
 # Set project
 gcloud config set project ${PROJECT_ID}
 
+# Ship the FoodKeeper data with the build; the Dockerfile compiles it into the snapshot
+echo "🥫 Copying FoodKeeper data..."
+mkdir -p data
+cp ../frontend/public/foodkeeper.json data/foodkeeper.json
+
 # Deploy directly from source
 gcloud run deploy ${SERVICE_NAME} \
   --source . \
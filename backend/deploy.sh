@@ -21,6 +21,11 @@ fi
 echo "📋 Setting GCP project to ${PROJECT_ID}..."
 gcloud config set project ${PROJECT_ID}
 
+# Ship the FoodKeeper data with the build; the Dockerfile compiles it into the snapshot
+echo "🥫 Copying FoodKeeper data..."
+mkdir -p data
+cp ../frontend/public/foodkeeper.json data/foodkeeper.json
+
 # Build the Docker image for AMD64 (Cloud Run requirement)
 echo "🔨 Building Docker image for linux/amd64..."
 docker build --platform linux/amd64 -t ${IMAGE_NAME}:latest .
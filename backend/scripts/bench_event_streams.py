@@ -0,0 +1,113 @@
+"""Load test: 1000 idle SSE connections over ten households
+
+Opens the streams straight through the ASGI app (HTTP clients buffer
+streamed bodies) and reports memory per stream, idle CPU spent on
+heartbeats, and fan-out latency of one publish per household.
+
+Run from backend/:
+
+    STORAGE_BACKEND=memory python -m scripts.bench_event_streams
+"""
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Dict
+from src.config import firebase
+from src.config.settings import settings
+from src.main import app
+from src.services import event_hub as hub
+from src.utils.security import create_access_token
+
+HOUSEHOLDS = 10
+PER_HOUSEHOLD = 100
+HEARTBEAT = 0.5
+
+
+class Connection:
+    """One streaming request: collects body chunks until disconnected"""
+
+    def __init__(self, path: str, user_id: str):
+        headers = [(b"authorization", ("Bearer " + create_access_token({"sub": user_id})).encode())]
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "headers": headers, "client": ("bench", 1), "server": ("bench", 80),
+        }
+        self.body = bytearray()
+        self.received = asyncio.Event()
+        self._disconnect = asyncio.Event()
+        self._requested = False
+        self.task = asyncio.ensure_future(app(self.scope, self.receive, self.send))
+
+    async def receive(self) -> Dict[str, Any]:
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            self.body += message.get("body", b"")
+            self.received.set()
+
+    async def wait_for(self, marker: bytes) -> None:
+        while marker not in self.body:
+            self.received.clear()
+            await asyncio.wait_for(self.received.wait(), 10)
+
+    async def disconnect(self) -> None:
+        self._disconnect.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+async def run() -> None:
+    settings.event_heartbeat_seconds = HEARTBEAT
+    db = firebase.initialize_firebase()
+    for h in range(HOUSEHOLDS):
+        await db.collection("households").document(f"h{h}").set({
+            "name": f"Household {h}", "created_by": f"u{h}-0", "version": 1,
+        })
+        for m in range(PER_HOUSEHOLD):
+            await db.collection("users").document(f"u{h}-{m}").set({
+                "name": f"User {h}-{m}", "email": f"u{h}-{m}@example.com", "household_id": f"h{h}",
+            })
+
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    connections = [
+        Connection(f"/api/households/h{h}/events", f"u{h}-{m}")
+        for h in range(HOUSEHOLDS) for m in range(PER_HOUSEHOLD)
+    ]
+    await asyncio.gather(*(connection.wait_for(b"event: ready") for connection in connections))
+    print(f"opened {len(connections)} streams in {time.perf_counter() - started:.2f}s")
+    memory = tracemalloc.get_traced_memory()[0] - memory_before
+    print(f"memory: {memory / 1024:.0f} KiB for {len(connections)} idle streams "
+          f"({memory / len(connections) / 1024:.1f} KiB each)")
+    tracemalloc.stop()
+
+    # Idle cost: heartbeats only
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(HEARTBEAT * 4)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    print(f"idle cpu: {cpu / (wall / HEARTBEAT) * 1000:.1f} ms per heartbeat period per 1k streams")
+
+    # Fan-out: one write per household reaches all of its subscribers
+    started = time.perf_counter()
+    for h in range(HOUSEHOLDS):
+        hub.publish_members(f"h{h}", 2, joined=["someone"])
+    await asyncio.gather(*(connection.wait_for(b"event: members") for connection in connections))
+    print(f"fan-out: 1 publish x {HOUSEHOLDS} households -> {len(connections)} streams "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    await asyncio.gather(*(connection.disconnect() for connection in connections))
+    await firebase.close_firebase()
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
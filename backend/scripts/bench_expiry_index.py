@@ -0,0 +1,70 @@
+"""Benchmark: expiry index range lookups vs. scan-and-filter
+
+Run from backend/:
+
+    python -m scripts.bench_expiry_index
+"""
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from src.models.item import ItemResponse
+from src.services.expiry_index import ExpiryIndex
+from src.utils.validators import is_date_expired, is_expiring_soon
+
+
+def main() -> None:
+    rng = random.Random(42)
+    today = date.today()
+    now = datetime.now(timezone.utc)
+
+    for size in (10_000, 100_000):
+        items = [
+            ItemResponse(
+                id=f"item{i}",
+                household_id="bench",
+                name=f"Item {i}",
+                quantity=1,
+                expiry_date=today + timedelta(days=rng.randint(-60, 120)) if rng.random() > 0.1 else None,
+                is_communal=rng.random() < 0.5,
+                is_grocery=rng.random() < 0.05,
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(size)
+        ]
+
+        started = time.perf_counter()
+        index = ExpiryIndex(items)
+        build = time.perf_counter() - started
+
+        def naive():
+            expiring = [i for i in items if not i.is_grocery and is_expiring_soon(i.expiry_date, 3)]
+            expired = [i for i in items if not i.is_grocery and is_date_expired(i.expiry_date)]
+            return expiring, expired
+
+        def indexed():
+            return index.expiring(today, 3), index.expired(today)
+
+        rounds = 20
+        timings = {}
+        for label, query in (("naive", naive), ("indexed", indexed)):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                query()
+            timings[label] = (time.perf_counter() - started) / rounds
+
+        started = time.perf_counter()
+        for i in range(1000):
+            item = items[rng.randrange(size)]
+            index.upsert(item.model_copy(update={"expiry_date": today + timedelta(days=rng.randint(-60, 120))}))
+        upsert = (time.perf_counter() - started) / 1000
+
+        print(f"{size:>7} items: build {build * 1000:.1f} ms, "
+              f"naive {timings['naive'] * 1000:.2f} ms/query, "
+              f"indexed {timings['indexed'] * 1000:.3f} ms/query "
+              f"({timings['naive'] / timings['indexed']:.0f}x), "
+              f"upsert {upsert * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
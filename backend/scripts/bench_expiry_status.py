@@ -0,0 +1,55 @@
+"""Microbenchmark: batch expiry classification vs. the scalar helpers
+
+Run from backend/:
+
+    python -m scripts.bench_expiry_status
+"""
+import random
+import time
+from datetime import date, timedelta
+from src.config.settings import settings
+from src.utils.expiry_status import EXPIRED, EXPIRING_SOON, NO_DATE, SAFE, classify_ordinals, to_ordinals
+from src.utils.validators import days_until_expiry, is_date_expired, is_expiring_soon
+
+
+def scalar(dates):
+    """Days left and status per item with the validators helpers"""
+    result = []
+    for d in dates:
+        if d is None:
+            result.append((None, NO_DATE))
+        elif is_date_expired(d):
+            result.append((days_until_expiry(d), EXPIRED))
+        elif is_expiring_soon(d, settings.expiring_soon_days):
+            result.append((days_until_expiry(d), EXPIRING_SOON))
+        else:
+            result.append((days_until_expiry(d), SAFE))
+    return result
+
+
+def main() -> None:
+    rng = random.Random(7)
+    today = date.today()
+    for size in (1_000, 10_000, 100_000):
+        dates = [
+            today + timedelta(days=rng.randint(-30, 60)) if rng.random() > 0.1 else None
+            for _ in range(size)
+        ]
+        rounds = 10
+        timings = {}
+        for label, run in (
+            ("scalar", lambda: scalar(dates)),
+            ("batch", lambda: classify_ordinals(to_ordinals(dates), today)),
+        ):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                run()
+            timings[label] = (time.perf_counter() - started) / rounds
+
+        print(f"{size:>7} items: scalar {timings['scalar'] * 1000:.2f} ms, "
+              f"batch {timings['batch'] * 1000:.2f} ms "
+              f"({timings['scalar'] / timings['batch']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Benchmark: indexed FoodKeeper search vs. the linear scan
+
+Run from backend/:
+
+    python -m scripts.bench_foodkeeper_search
+"""
+import time
+from src.services.foodkeeper_service import default_json_path, load_foodkeeper_json
+
+
+def main() -> None:
+    index = load_foodkeeper_json(default_json_path())
+    queries = [p.name + (f" {p.name_subtitle}" if p.name_subtitle else "") for p in index.products]
+    queries += ["whole milk", "greek yogurt", "chicken breast boneless", "organic baby spinach",
+                "sharp cheddar cheese", "ground beef 80/20", "fresh strawberries", "sourdough bread"]
+
+    for label, search in (("linear", index.search_linear), ("indexed", index.search)):
+        started = time.perf_counter()
+        for query in queries:
+            search(query)
+        elapsed = time.perf_counter() - started
+        print(f"{label:>8}: {len(queries)} queries in {elapsed * 1000:.1f} ms "
+              f"({elapsed / len(queries) * 1e6:.0f} us/query)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark: FoodKeeper JSON parsing vs. the memory-mapped snapshot
+
+Each loader runs in a fresh interpreter so load time and RSS growth are not
+skewed by the other. Run from backend/ (builds the snapshot if missing):
+
+    python -m scripts.bench_foodkeeper_snapshot [--json PATH] [--out PATH]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from src.services.foodkeeper_service import default_json_path, load_foodkeeper_json
+from src.services.foodkeeper_snapshot import build_snapshot, default_snapshot_path, load_snapshot
+
+
+def _rss_kb() -> int:
+    """Resident set size of this process in KiB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_one(kind: str, json_path: str, snapshot_path: str) -> None:
+    """Load once in this (fresh) process and print timing + RSS as JSON"""
+    before = _rss_kb()
+    started = time.perf_counter()
+    index = load_foodkeeper_json(json_path) if kind == "json" else load_snapshot(snapshot_path).index
+    load_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    match = index.search("sharp cheddar cheese")
+    first_search_ms = (time.perf_counter() - started) * 1000
+    print(json.dumps({
+        "kind": kind,
+        "load_ms": round(load_ms, 2),
+        "first_search_ms": round(first_search_ms, 2),
+        "rss_delta_kb": _rss_kb() - before,
+        "match": match[0].name if match else None,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", nargs="?", choices=["json", "snapshot"], help=argparse.SUPPRESS)
+    parser.add_argument("--json", default=None, help="Source foodkeeper.json")
+    parser.add_argument("--out", default=None, help="Snapshot file")
+    args = parser.parse_args()
+    json_path = args.json or default_json_path()
+    snapshot_path = args.out or default_snapshot_path()
+
+    if args.kind:
+        measure_one(args.kind, json_path, snapshot_path)
+        return
+
+    if not Path(snapshot_path).exists():
+        print(json.dumps(build_snapshot(json_path, snapshot_path)))
+    for kind in ("json", "snapshot"):
+        result = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_foodkeeper_snapshot", kind,
+             "--json", json_path, "--out", snapshot_path],
+            check=True, capture_output=True, text=True,
+            cwd=str(Path(__file__).resolve().parents[1]),
+        )
+        print(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
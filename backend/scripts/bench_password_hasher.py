@@ -0,0 +1,87 @@
+"""Load test: an ordinary route's latency while a login storm keeps bcrypt busy
+
+Compares bcrypt called inline on the event loop with bcrypt on the
+password_hasher pool (p50/p99 of GET /api/households/{id}).
+
+Run from backend/:
+
+    STORAGE_BACKEND=memory python -m scripts.bench_password_hasher
+"""
+import asyncio
+import statistics
+import time
+from typing import Any, Callable, Dict, Tuple
+import httpx
+from src.config import firebase
+from src.config.settings import settings
+from src.main import app
+from src.services import auth_service
+from src.services.password_hasher import PasswordHasher, close_password_hasher, password_hasher
+from src.utils.security import create_access_token
+
+STORM_SECONDS = 3.0
+STORM_CLIENTS = 16
+PROBE_INTERVAL = 0.01
+CREDENTIALS = {"email": "a@example.com", "password": "secret"}
+
+
+class InlineHasher(PasswordHasher):
+    """The naive version: bcrypt called straight from the handler"""
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return fn(*args)
+
+
+async def storm(client: httpx.AsyncClient, hasher: PasswordHasher, path: str, headers: Dict[str, str]) -> Tuple[float, float, int]:
+    auth_service.password_hasher = hasher
+    deadline = time.perf_counter() + STORM_SECONDS
+    latencies = []
+    logins = 0
+
+    async def login() -> None:
+        nonlocal logins
+        while time.perf_counter() < deadline:
+            response = await client.post("/api/auth/login", json=CREDENTIALS)
+            assert response.status_code == 200, response.text
+            logins += 1
+
+    async def probe() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200, response.text
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    await asyncio.gather(probe(), *(login() for _ in range(STORM_CLIENTS)))
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99)] * 1000, logins
+
+
+async def run() -> None:
+    settings.password_bcrypt_rounds = 10
+    firebase.initialize_firebase()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        user = (await client.post("/api/auth/register", json={
+            **CREDENTIALS, "name": "A", "household_name": "Flat",
+        })).json()
+        headers = {"Authorization": "Bearer " + create_access_token({"sub": user["id"]})}
+        path = f"/api/households/{user['household_id']}"
+
+        print(f"{STORM_CLIENTS} clients logging in for {STORM_SECONDS:.0f}s (bcrypt cost {settings.password_bcrypt_rounds}, "
+              f"{password_hasher.workers} worker(s)); GET /api/households/{{id}} every {PROBE_INTERVAL * 1000:.0f}ms:")
+        for name, hasher in (("inline", InlineHasher(1, 10 ** 6)), ("pool", password_hasher)):
+            p50, p99, logins = await storm(client, hasher, path, headers)
+            print(f"  {name:>6}: p50 {p50:7.1f} ms   p99 {p99:7.1f} ms   ({logins} logins)")
+
+    close_password_hasher()
+    await firebase.close_firebase()
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: allocating a payment off the open-entry heaps vs. scanning and sorting
+
+Run from backend/:
+
+    python -m scripts.bench_payment_allocator
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+from src.services.payment_allocator import OPEN, OpenEntries
+
+USERS = [f"u{i}" for i in range(8)]
+PAYMENTS = 200
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def synthetic(rng: random.Random, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+    expenses = []
+    for i in range(count):
+        expenses.append((f"e{i}", {
+            "payerId": rng.choice(USERS), "status": OPEN, "createdAt": START + timedelta(minutes=rng.randrange(10 ** 6)),
+            "entries": [{"userId": user_id, "amountCents": rng.randint(100, 5000), "settledCents": 0} for user_id in USERS],
+        }))
+    return expenses
+
+
+def scan(expenses: List[Tuple[str, Dict[str, Any]]], debtor: str, creditor: str, cents: int) -> List[str]:
+    """The naive version: every open entry of the pair, sorted, walked"""
+    candidates = sorted(
+        (data["createdAt"], expense_id, entry) for expense_id, data in expenses if data["payerId"] == creditor
+        for entry in data["entries"] if entry["userId"] == debtor and entry["amountCents"] > entry["settledCents"]
+    )
+    touched = []
+    for _, expense_id, entry in candidates:
+        if cents <= 0:
+            break
+        amount = min(entry["amountCents"] - entry["settledCents"], cents)
+        entry["settledCents"] += amount
+        cents -= amount
+        touched.append(expense_id)
+    return touched
+
+
+def main() -> None:
+    rng = random.Random(25)
+    for count in (1000, 10000, 100000):
+        expenses = synthetic(rng, count)
+        index = OpenEntries(expenses)
+        naive = [(expense_id, {**data, "entries": [dict(entry) for entry in data["entries"]]}) for expense_id, data in expenses]
+        payments = []
+        for _ in range(PAYMENTS):
+            debtor, creditor = rng.sample(USERS, 2)
+            payments.append((debtor, creditor, rng.randint(1000, 10000)))
+
+        started = time.perf_counter()
+        heap_result = [[allocation.expense_id for allocation in index.allocate(*payment)] for payment in payments]
+        heap_ms = (time.perf_counter() - started) / PAYMENTS * 1000
+        started = time.perf_counter()
+        scan_result = [scan(naive, *payment) for payment in payments]
+        scan_ms = (time.perf_counter() - started) / PAYMENTS * 1000
+        assert heap_result == scan_result
+        print(f"{count:>7} open expenses: heap {heap_ms:.3f} ms/payment, scan {scan_ms:.2f} ms/payment")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark: transfers and runtime of each settle-up solver as the member count grows
+
+Balances are shaped like shared grocery bills: many members settling to
+round amounts, so zero-sum subgroups are common.
+
+Run from backend/:
+
+    python -m scripts.bench_settle_up
+"""
+import random
+import time
+from typing import Dict, Tuple
+from src.models.expense import SettleUpPlan
+from src.services.settle_service import settle_up
+
+MEMBERS = (5, 10, 12, 14, 16, 50, 100, 200, 500, 1000, 5000)
+EXACT_MAX_MEMBERS = 16
+
+
+def random_balances(rng: random.Random, members: int) -> Dict[str, int]:
+    users = [f"u{i}" for i in range(members)]
+    balances = {user_id: 0 for user_id in users}
+    for _ in range(members * 3):
+        payer = rng.choice(users)
+        participants = rng.sample(users, rng.randint(1, min(members, 6)))
+        share = rng.choice([250, 500, 1000, 1250, rng.randint(1, 5000)])
+        for user_id in participants:
+            if user_id != payer:
+                balances[user_id] -= share
+                balances[payer] += share
+    return balances
+
+
+def timed(balances: Dict[str, int], exact: bool, repeat: int) -> Tuple[SettleUpPlan, float]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        plan = settle_up("h1", balances, max_exact_members=len(balances), exact=exact)
+    return plan, (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    rng = random.Random(24)
+    print(f"{'members':>8} {'nonzero':>8} {'greedy':>8} {'ms':>8} {'exact':>8} {'ms':>8}")
+    for members in MEMBERS:
+        balances = random_balances(rng, members)
+        nonzero = sum(1 for cents in balances.values() if cents)
+        greedy_plan, greedy_ms = timed(balances, exact=False, repeat=10)
+        row = f"{members:>8} {nonzero:>8} {len(greedy_plan.transfers):>8} {greedy_ms:>8.2f}"
+        if members <= EXACT_MAX_MEMBERS:
+            exact_plan, exact_ms = timed(balances, exact=True, repeat=1)
+            row += f" {len(exact_plan.transfers):>8} {exact_ms:>8.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
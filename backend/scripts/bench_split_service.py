@@ -0,0 +1,43 @@
+"""Benchmark: canonicalizing batches of 10000 expenses per split method
+
+Run from backend/:
+
+    python -m scripts.bench_split_service
+"""
+import random
+import time
+from src.models.expense import ExpenseCreate
+from src.services.split_service import METHODS, split_expenses
+
+BATCH = 10000
+
+
+def random_expense(rng: random.Random, method: str) -> ExpenseCreate:
+    users = [f"u{i}" for i in range(rng.randint(1, 12))]
+    participants = rng.sample(users, rng.randint(1, len(users)))
+    total_cents = rng.randint(0, 10 ** 6)
+    shares = custom_amounts = None
+    if method == "shares":
+        shares = {user_id: rng.choice([1, 2, 0.5, 1 / 3, rng.random() * 10]) for user_id in participants}
+    if method == "custom":
+        cut = sorted(rng.randint(0, total_cents) for _ in participants[1:])
+        custom_amounts = {
+            user_id: b - a for user_id, a, b in zip(participants, [0] + cut, cut + [total_cents])
+        }
+    return ExpenseCreate(
+        household_id="h1", created_by="u0", payer_id=rng.choice(users), total_cents=total_cents,
+        participants=participants, method=method, shares=shares, custom_amounts=custom_amounts,
+    )
+
+
+def main() -> None:
+    rng = random.Random(20261017)
+    for method in METHODS:
+        batch = [random_expense(rng, method) for _ in range(BATCH)]
+        started = time.perf_counter()
+        split_expenses(batch)
+        print(f"split_expenses: {BATCH} '{method}' expenses in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
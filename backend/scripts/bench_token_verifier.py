@@ -0,0 +1,102 @@
+"""Benchmark: bearer token verification with and without the verified-token cache
+
+Times `verify_token` and a full authenticated request for both kinds of
+token; Firebase signing keys are served offline.
+
+Run from backend/:
+
+    STORAGE_BACKEND=memory python -m scripts.bench_token_verifier
+"""
+import asyncio
+import json
+import time
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from src.config import firebase
+from src.config.http_client import close_http_clients, initialize_http_clients
+from src.config.settings import settings
+from src.main import app
+from src.services import token_verifier as verifier
+from src.utils.security import create_access_token
+
+CALLS = 2000
+REQUESTS = 500
+PATH = "/api/households/h1/members"
+
+
+async def per_call(token: str, cached: bool) -> float:
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        if not cached:
+            verifier.verified_tokens.clear()
+        assert await verifier.verify_token(token) is not None
+    return (time.perf_counter() - started) / CALLS * 1e6
+
+
+async def per_request(client: httpx.AsyncClient, token: str) -> float:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = await client.get(PATH, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.text
+    return (time.perf_counter() - started) / REQUESTS * 1e6
+
+
+async def run() -> None:
+    private_pem = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_jwk = {
+        **jwk.construct(private_pem, algorithm=verifier.FIREBASE_ALGORITHM).public_key().to_dict(),
+        "kid": "k1", "use": "sig",
+    }
+
+    def google(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=json.dumps({"keys": [public_jwk]}),
+            headers={"Cache-Control": "public, max-age=21600, must-revalidate, no-transform"},
+        )
+
+    now = int(time.time())
+    firebase_token = jwt.encode({
+        "iss": verifier.FIREBASE_ISSUER + settings.firebase_project_id,
+        "aud": settings.firebase_project_id,
+        "sub": "u1", "iat": now, "auth_time": now, "exp": now + 3600,
+    }, private_pem.decode(), algorithm=verifier.FIREBASE_ALGORITHM, headers={"kid": "k1"})
+    tokens = {"api token": create_access_token({"sub": "u1"}), "firebase id token": firebase_token}
+
+    await initialize_http_clients(transport=httpx.MockTransport(google))
+    db = firebase.initialize_firebase()
+    await db.collection("users").document("u1").set({"name": "u1", "email": "u1@example.com", "household_id": "h1"})
+    await db.collection("households").document("h1").set({"name": "Flat", "created_by": "u1", "version": 1})
+
+    print(f"{'':>18} {'uncached':>10} {'cached':>10}   (verify_token, us per call)")
+    for name, token in tokens.items():
+        uncached, cached = await per_call(token, False), await per_call(token, True)
+        print(f"{name:>18} {uncached:>10.1f} {cached:>10.1f}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        print(f"{'':>18} {'uncached':>10} {'cached':>10}   (GET {PATH}, us per request)")
+        for name, token in tokens.items():
+            verifier.verified_tokens.max_entries = 0
+            await per_request(client, token)  # Warm-up
+            uncached = await per_request(client, token)
+            verifier.verified_tokens.max_entries = settings.token_cache_max_entries
+            cached = await per_request(client, token)
+            print(f"{name:>18} {uncached:>10.1f} {cached:>10.1f}")
+
+    print(f"signing key fetches: {verifier.signing_keys.fetches}, cache: {verifier.verified_tokens.snapshot()}")
+    await verifier.close_token_verifier()
+    await close_http_clients()
+    await firebase.close_firebase()
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark: the shared pooled upstream client vs. a new client per lookup
+
+Both variants call a FakeUpstream with injected latency, sequentially and
+in concurrent bursts. The fake has no sockets, so the per-call variant only
+pays client construction (TLS context, connection pool); against the real
+upstreams it also pays DNS, TCP and TLS handshakes on every scan.
+
+Run from backend/:
+
+    python -m scripts.bench_upstream_pool
+"""
+import asyncio
+import time
+import httpx
+from src.config.http_client import UPC_DATABASE, close_http_clients, get_upstream_client, initialize_http_clients
+from src.utils.fake_upstream import FakeUpstream
+
+BARCODE = "012345678905"
+LOOKUPS = 200
+BURST = 20
+LATENCY = 0.005
+
+
+async def pooled(fake: FakeUpstream) -> None:
+    response = await get_upstream_client(UPC_DATABASE).get("/prod/trial/lookup", params={"upc": BARCODE})
+    assert response.status_code == 200
+
+
+async def per_call(fake: FakeUpstream) -> None:
+    # What the proxy routes did before the pool: a throwaway client per request
+    async with httpx.AsyncClient(
+        base_url="https://api.upcitemdb.com", timeout=10.0, mounts={"all://": fake.transport()}
+    ) as client:
+        response = await client.get("/prod/trial/lookup", params={"upc": BARCODE})
+    assert response.status_code == 200
+
+
+async def timed(lookup, fake: FakeUpstream, concurrent: bool) -> float:
+    started = time.perf_counter()
+    if concurrent:
+        for _ in range(LOOKUPS // BURST):
+            await asyncio.gather(*(lookup(fake) for _ in range(BURST)))
+    else:
+        for _ in range(LOOKUPS):
+            await lookup(fake)
+    return (time.perf_counter() - started) / LOOKUPS * 1000
+
+
+async def run() -> None:
+    fake = FakeUpstream(latency=LATENCY, products={BARCODE: {"product_name": "Oat Milk"}})
+    await initialize_http_clients(transport=fake.transport())
+    print(f"{LOOKUPS} lookups, {LATENCY * 1000:.0f} ms upstream latency (ms per lookup)")
+    print(f"{'':>12} {'sequential':>11} {f'bursts of {BURST}':>13}")
+    for name, lookup in (("pooled", pooled), ("per call", per_call)):
+        sequential = await timed(lookup, fake, concurrent=False)
+        burst = await timed(lookup, fake, concurrent=True)
+        print(f"{name:>12} {sequential:>11.2f} {burst:>13.2f}")
+    await close_http_clients()
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,214 @@
-"""Firebase configuration and initialization"""
+"""Firebase configuration and initialization
+
+One process-wide async storage client is created by `startup_event` and
+closed by `shutdown_event`. `settings.storage_backend` picks where documents
+live:
+
+- "firestore": Cloud Firestore through the Firebase Admin SDK's AsyncClient (default)
+- "sqlite": the local embedded store in WAL mode at `settings.local_store_path`
+- "memory": the local embedded store in memory (lost on shutdown)
+
+Services only call `get_firestore_client()` and use the async Firestore API
+(`await ref.get()`, `async for doc in query.stream()`, ...), so nothing blocks
+the event loop on a sync gRPC call and the local backends are drop-in
+stand-ins. Multi-document work goes through the helpers here:
+
+- `get_documents` reads many documents in one `get_all` round trip (and
+  counts them against the current request, see utils/request_context)
+- `BatchWriter` queues writes and commits them as concurrent 500-write batches
+  (BulkWriter-style: each batch is atomic, the whole set is not)
+- `run_transaction` runs an async transaction function on any backend
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, firestore, firestore_async, auth
 from src.config.settings import settings
+from src.config.local_store import LocalClient
+from src.utils.request_context import collection_of, record_reads
+
+
+FIRESTORE = "firestore"
+SQLITE = "sqlite"
+MEMORY = "memory"
+
+FIRESTORE_BATCH_LIMIT = 500  # Max writes per Firestore batch
+
+_client: Any = None
+
+
+def _initialize_app() -> None:
+    """Initialize the Firebase Admin app once per process"""
+    if firebase_admin._apps:
+        return
+    if settings.firebase_credentials_path:
+        cred = credentials.Certificate(settings.firebase_credentials_path)
+    else:
+        # Cloud Run / GCE: use the default service account
+        cred = credentials.ApplicationDefault()
+    firebase_admin.initialize_app(cred, {"projectId": settings.firebase_project_id})
 
 
 def initialize_firebase():
-    """Initialize Firebase Admin SDK"""
-    # TODO: Implement Firebase initialization
-    pass
+    """Initialize Firebase Admin SDK (or the local store) and the storage client"""
+    global _client
+    if _client is not None:
+        return _client
+
+    backend = settings.storage_backend
+    if backend == FIRESTORE:
+        _initialize_app()
+        _client = firestore_async.client()
+    elif backend in (SQLITE, MEMORY):
+        path = ":memory:"
+        if backend == SQLITE:
+            path = settings.local_store_path
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        _client = LocalClient(path)
+    else:
+        raise ValueError(f"Unknown storage backend: {backend!r}")
+    return _client
+
+
+async def close_firebase():
+    """Close the storage client"""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        client.close()
 
 
 def get_firestore_client():
-    """Get Firestore database client"""
-    # TODO: Implement Firestore client retrieval
-    pass
+    """Get the process-wide async Firestore client, creating it lazily if needed"""
+    if _client is None:
+        return initialize_firebase()
+    return _client
 
 
 def get_auth_client():
     """Get Firebase Auth client"""
-    # TODO: Implement Auth client retrieval
-    pass
+    if settings.storage_backend == FIRESTORE:
+        _initialize_app()
+    return auth
+
+
+async def get_documents(references: Sequence[Any], field_paths: Optional[Iterable[str]] = None) -> List[Any]:
+    """
+    Read many documents in one batched round trip
+
+    Args:
+        references: Document references (duplicates are read once)
+        field_paths: Optional projection
+
+    Returns:
+        List: Snapshots in the order of `references`; missing documents have `exists == False`
+    """
+    if not references:
+        return []
+    db = get_firestore_client()
+    unique = list({reference.path: reference for reference in references}.values())
+    snapshots: Dict[str, Any] = {}
+    async for snapshot in db.get_all(unique, field_paths=list(field_paths) if field_paths is not None else None):
+        snapshots[snapshot.reference.path] = snapshot
+    counts: Dict[str, int] = {}
+    for reference in unique:
+        collection = collection_of(reference.path)
+        counts[collection] = counts.get(collection, 0) + 1
+    for collection, count in counts.items():
+        record_reads(collection, count)
+    return [snapshots[reference.path] for reference in references]
+
+
+class BatchWriter:
+    """
+    Queue writes and commit them as 500-write batches, several in flight at once
+
+    Use as an async context manager (pending writes are flushed on exit) or
+    call `flush()` explicitly:
+
+        async with BatchWriter() as writer:
+            for ref in refs:
+                writer.update(ref, {"isGrocery": False})
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None):
+        self._db = get_firestore_client()
+        self._batch = self._db.batch()
+        self._pending = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight or settings.firestore_max_batches_in_flight)
+        self._tasks: Set[asyncio.Task] = set()
+        self.writes = 0
+        self.batches = 0
+
+    def _queued(self) -> None:
+        self._pending += 1
+        self.writes += 1
+        if self._pending >= FIRESTORE_BATCH_LIMIT:
+            self._send()
+
+    def _send(self) -> None:
+        batch, self._batch, self._pending = self._batch, self._db.batch(), 0
+        self.batches += 1
+        task = asyncio.ensure_future(self._commit(batch))
+        self._tasks.add(task)
+
+    async def _commit(self, batch: Any) -> None:
+        async with self._semaphore:
+            await batch.commit()
+
+    def create(self, reference: Any, document_data: Dict[str, Any]) -> None:
+        self._batch.create(reference, document_data)
+        self._queued()
+
+    def set(self, reference: Any, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._batch.set(reference, document_data, merge=merge)
+        self._queued()
+
+    def update(self, reference: Any, field_updates: Dict[str, Any]) -> None:
+        self._batch.update(reference, field_updates)
+        self._queued()
+
+    def delete(self, reference: Any) -> None:
+        self._batch.delete(reference)
+        self._queued()
+
+    async def flush(self) -> None:
+        """Commit everything queued so far and wait for all batches"""
+        if self._pending:
+            self._send()
+        tasks, self._tasks = self._tasks, set()
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def __aenter__(self) -> "BatchWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.flush()
+            return
+        for task in self._tasks:
+            task.cancel()
+
+
+async def run_transaction(fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run `await fn(transaction, *args, **kwargs)` in a transaction on the active backend
+
+    Firestore retries the function on contention, so it must only write
+    through the transaction and must not have other side effects.
+
+    Args:
+        fn: Reads with `await ref.get(transaction=transaction)`, writes with
+            `transaction.set/update/delete`
+
+    Returns:
+        Whatever `fn` returns
+    """
+    db = get_firestore_client()
+    if isinstance(db, LocalClient):
+        return await db.run_transaction(fn, *args, **kwargs)
+    return await firestore.async_transactional(fn)(db.transaction(), *args, **kwargs)
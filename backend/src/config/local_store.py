@@ -0,0 +1,741 @@
+"""Local embedded Firestore stand-in
+
+Implements the part of the async Firestore client API (`AsyncClient`) the
+services use, on top of SQLite, so the whole API can run and be load-tested
+without the live service:
+
+    settings.storage_backend = "sqlite"   # WAL-mode file at settings.local_store_path
+    settings.storage_backend = "memory"   # in-memory SQLite, gone on shutdown
+
+Supported: collections and subcollections (users, households, items,
+households/{id}/expenses, households/{id}/payments, reminders, ...), document
+get/set/update/delete, `set(..., merge=True)`, dotted field paths, the
+SERVER_TIMESTAMP / DELETE_FIELD / Increment / ArrayUnion / ArrayRemove
+transforms, `get_all`, queries with where/order_by/limit/start_at/start_after/
+select, write batches and transactions.
+
+Semantics follow Firestore where the services can observe them: a batch or
+transaction commits atomically, `update` fails on a missing document,
+`order_by` skips documents without the field, and transactions are
+serializable (they hold the store's write lock).
+
+SQLite calls run on worker threads, so the event loop never blocks on them.
+`reads` / `writes` count document reads and writes the way Firestore bills
+them (a query costs at least one read).
+"""
+import asyncio
+import json
+import random
+import sqlite3
+import string
+import threading
+from datetime import date, datetime, timezone
+from functools import cmp_to_key
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud.firestore_v1 import DELETE_FIELD, SERVER_TIMESTAMP, ArrayRemove, ArrayUnion, Increment
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_ID_ALPHABET = string.ascii_letters + string.digits
+_random = random.SystemRandom()
+
+
+def _auto_id() -> str:
+    """20-character document ID, like Firestore's"""
+    return "".join(_random.choice(_ID_ALPHABET) for _ in range(20))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# -- value encoding ----------------------------------------------------------
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Stored as UTC, like Firestore timestamps
+        value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__datetime__": datetime(value.year, value.month, value.day, tzinfo=timezone.utc).isoformat()}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(_encode(data), separators=(",", ":"))
+
+
+def _loads(payload: str) -> Dict[str, Any]:
+    return _decode(json.loads(payload))
+
+
+# -- field paths and transforms ----------------------------------------------
+
+_MISSING = object()
+
+
+def _get_path(data: Optional[Dict[str, Any]], path: str) -> Any:
+    value: Any = data
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _apply(data: Dict[str, Any], path: str, value: Any, now: datetime) -> None:
+    """Write one (possibly dotted) field, resolving transforms"""
+    parts = path.split(".")
+    parent = data
+    for part in parts[:-1]:
+        child = parent.get(part)
+        if not isinstance(child, dict):
+            if value is DELETE_FIELD:
+                return
+            child = parent[part] = {}
+        parent = child
+    key = parts[-1]
+
+    if value is DELETE_FIELD:
+        parent.pop(key, None)
+    elif value is SERVER_TIMESTAMP:
+        parent[key] = now
+    elif isinstance(value, Increment):
+        current = parent.get(key)
+        parent[key] = (current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0) + value.value
+    elif isinstance(value, ArrayUnion):
+        current = list(parent.get(key) or []) if isinstance(parent.get(key), list) else []
+        current.extend(item for item in value.values if item not in current)
+        parent[key] = current
+    elif isinstance(value, ArrayRemove):
+        existing = parent.get(key)
+        parent[key] = [item for item in existing if item not in value.values] if isinstance(existing, list) else []
+    elif isinstance(value, dict):
+        nested: Dict[str, Any] = {}
+        for nested_key, nested_value in value.items():
+            _apply(nested, nested_key, nested_value, now)
+        parent[key] = nested
+    else:
+        parent[key] = value
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any], now: datetime) -> None:
+    """set(..., merge=True): deep-merge maps, replace everything else"""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value, now)
+        else:
+            _apply(target, key, value, now)
+
+
+# Firestore's cross-type ordering: null < bool < number < timestamp < string < list < map
+def _type_rank(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, list):
+        return 6
+    return 7
+
+
+def _compare(a: Any, b: Any) -> int:
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == 0:
+        return 0
+    if rank_a == 6:
+        for x, y in zip(a, b):
+            result = _compare(x, y)
+            if result:
+                return result
+        return (len(a) > len(b)) - (len(a) < len(b))
+    if rank_a == 7:
+        return _compare(json.dumps(_encode(a), sort_keys=True), json.dumps(_encode(b), sort_keys=True))
+    return (a > b) - (a < b)
+
+
+def _pushed_down(op: str, value: Any) -> bool:
+    """Whether a filter is evaluated by SQLite (simple equality on a scalar)"""
+    return op == "==" and isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def _matches(value: Any, op: str, operand: Any) -> bool:
+    if op == "array_contains":
+        return isinstance(value, list) and operand in value
+    if op == "array_contains_any":
+        return isinstance(value, list) and any(item in value for item in operand)
+    if op == "in":
+        return value is not _MISSING and any(_compare(value, item) == 0 for item in operand)
+    if op == "not-in":
+        return value is not _MISSING and value is not None and all(_compare(value, item) != 0 for item in operand)
+    if value is _MISSING:
+        return False
+    if op == "==":
+        return _compare(value, operand) == 0
+    if op == "!=":
+        return value is not None and _compare(value, operand) != 0
+    # Range filters only match values of the same type
+    if _type_rank(value) != _type_rank(operand):
+        return False
+    result = _compare(value, operand)
+    return {"<": result < 0, "<=": result <= 0, ">": result > 0, ">=": result >= 0}[op]
+
+
+# -- snapshots and references ------------------------------------------------
+
+class LocalDocumentSnapshot:
+    """Point-in-time copy of one document"""
+
+    def __init__(
+        self,
+        reference: "LocalDocumentReference",
+        data: Optional[Dict[str, Any]],
+        create_time: Optional[datetime] = None,
+        update_time: Optional[datetime] = None,
+    ):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = _now()
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        """Document fields, or None if the document does not exist"""
+        return _decode(_encode(self._data)) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        """One (possibly dotted) field; raises KeyError if absent"""
+        if self._data is None:
+            return None
+        value = _get_path(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return value
+
+
+def _project(data: Optional[Dict[str, Any]], field_paths: Sequence[str]) -> Dict[str, Any]:
+    projected: Dict[str, Any] = {}
+    for path in field_paths:
+        value = _get_path(data, path)
+        if value is not _MISSING:
+            _apply(projected, path, value, _now())
+    return projected
+
+
+class LocalDocumentReference:
+    """Reference to one document path"""
+
+    def __init__(self, client: "LocalClient", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> "LocalCollectionReference":
+        return LocalCollectionReference(self._client, self.path.rsplit("/", 1)[0])
+
+    def collection(self, collection_id: str) -> "LocalCollectionReference":
+        return LocalCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    async def get(self, field_paths: Optional[Sequence[str]] = None, transaction: Optional["LocalTransaction"] = None) -> LocalDocumentSnapshot:
+        snapshot = await asyncio.to_thread(self._client._read, self.path)
+        if field_paths is not None and snapshot.exists:
+            snapshot._data = _project(snapshot._data, field_paths)
+        return snapshot
+
+    async def create(self, document_data: Dict[str, Any]) -> None:
+        await self._client._commit([("create", self.path, document_data)])
+
+    async def set(self, document_data: Dict[str, Any], merge: bool = False) -> None:
+        await self._client._commit([("merge" if merge else "set", self.path, document_data)])
+
+    async def update(self, field_updates: Dict[str, Any]) -> None:
+        await self._client._commit([("update", self.path, field_updates)])
+
+    async def delete(self) -> None:
+        await self._client._commit([("delete", self.path, None)])
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, LocalDocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+
+async def _iterate(snapshots: Awaitable[List[LocalDocumentSnapshot]]) -> AsyncIterator[LocalDocumentSnapshot]:
+    for snapshot in await snapshots:
+        yield snapshot
+
+
+class LocalQuery:
+    """Immutable query over one collection"""
+
+    def __init__(
+        self,
+        collection: "LocalCollectionReference",
+        filters: Tuple[Tuple[str, str, Any], ...] = (),
+        orders: Tuple[Tuple[str, str], ...] = (),
+        limit: Optional[int] = None,
+        limit_to_last: bool = False,
+        start: Optional[Tuple[Any, bool]] = None,
+        end: Optional[Tuple[Any, bool]] = None,
+        projection: Optional[Tuple[str, ...]] = None,
+        offset: int = 0,
+    ):
+        self._collection = collection
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._limit_to_last = limit_to_last
+        self._start = start
+        self._end = end
+        self._projection = projection
+        self._offset = offset
+
+    def _copy(self, **changes: Any) -> "LocalQuery":
+        fields: Dict[str, Any] = dict(
+            filters=self._filters, orders=self._orders, limit=self._limit,
+            limit_to_last=self._limit_to_last, start=self._start, end=self._end,
+            projection=self._projection, offset=self._offset,
+        )
+        fields.update(changes)
+        return LocalQuery(self._collection, **fields)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None, *, filter: Any = None) -> "LocalQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "LocalQuery":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "LocalQuery":
+        return self._copy(limit=count, limit_to_last=False)
+
+    def limit_to_last(self, count: int) -> "LocalQuery":
+        return self._copy(limit=count, limit_to_last=True)
+
+    def offset(self, num_to_skip: int) -> "LocalQuery":
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths: Iterable[str]) -> "LocalQuery":
+        return self._copy(projection=tuple(field_paths))
+
+    def start_at(self, document_fields_or_snapshot: Any) -> "LocalQuery":
+        return self._copy(start=(document_fields_or_snapshot, True))
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "LocalQuery":
+        return self._copy(start=(document_fields_or_snapshot, False))
+
+    def end_at(self, document_fields_or_snapshot: Any) -> "LocalQuery":
+        return self._copy(end=(document_fields_or_snapshot, True))
+
+    def end_before(self, document_fields_or_snapshot: Any) -> "LocalQuery":
+        return self._copy(end=(document_fields_or_snapshot, False))
+
+    def _order_fields(self) -> List[Tuple[str, str]]:
+        orders = list(self._orders)
+        # Inequality filters imply an order on their field, as in Firestore
+        if not orders:
+            for field_path, op, _ in self._filters:
+                if op in ("<", "<=", ">", ">=", "!=", "not-in"):
+                    orders.append((field_path, ASCENDING))
+                    break
+        direction = orders[-1][1] if orders else ASCENDING
+        return orders + [("__name__", direction)]
+
+    def _cursor_values(self, cursor: Any, orders: List[Tuple[str, str]]) -> List[Any]:
+        if isinstance(cursor, LocalDocumentSnapshot):
+            data = cursor._data or {}
+            return [cursor.id if path == "__name__" else _get_path(data, path) for path, _ in orders]
+        if isinstance(cursor, dict):
+            return [cursor[path] for path, _ in orders if path in cursor]
+        return list(cursor)
+
+    def _run(self) -> List[LocalDocumentSnapshot]:
+        """Evaluate the query (on a worker thread)"""
+        if self._is_top_n():
+            field_path, direction = self._orders[0]
+            results = self._collection._client._scan_top(
+                self._collection.path, self._filters, field_path, direction, self._limit or 0
+            )
+        else:
+            results = self._scan_sorted()
+        if self._projection is not None:
+            for snapshot in results:
+                snapshot._data = _project(snapshot._data, self._projection)
+        # Billed like Firestore: documents returned, at least one per query
+        self._collection._client._count_reads(max(len(results), 1))
+        return results
+
+    def _is_top_n(self) -> bool:
+        """First `limit` documents by one field, with every filter pushed down to SQLite"""
+        return (
+            self._limit is not None and not self._limit_to_last and self._start is None and self._end is None
+            and not self._offset and len(self._orders) == 1 and self._orders[0][0] != "__name__"
+            and all(_pushed_down(op, value) for _, op, value in self._filters)
+        )
+
+    def _scan_sorted(self) -> List[LocalDocumentSnapshot]:
+        """Load, filter and sort every candidate document"""
+        snapshots = self._collection._client._scan(self._collection.path, self._filters)
+        snapshots = [
+            snapshot for snapshot in snapshots
+            if all(_matches(_get_path(snapshot._data, path), op, value) for path, op, value in self._filters)
+        ]
+
+        orders = self._order_fields()
+        snapshots = [
+            snapshot for snapshot in snapshots
+            if all(path == "__name__" or _get_path(snapshot._data, path) is not _MISSING for path, _ in orders)
+        ]
+
+        def key(snapshot: LocalDocumentSnapshot) -> List[Any]:
+            return [snapshot.id if path == "__name__" else _get_path(snapshot._data, path) for path, _ in orders]
+
+        def compare_keys(a: List[Any], b: List[Any]) -> int:
+            for (_, direction), x, y in zip(orders, a, b):
+                result = _compare(x, y)
+                if result:
+                    return -result if direction == DESCENDING else result
+            return 0
+
+        sort_key = cmp_to_key(compare_keys)
+        keyed = sorted(((key(s), s) for s in snapshots), key=lambda entry: sort_key(entry[0]))
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            values = self._cursor_values(cursor, orders)
+            keyed = [
+                (k, s) for k, s in keyed
+                if (compare_keys(k[:len(values)], values) >= 0 if inclusive else compare_keys(k[:len(values)], values) > 0)
+            ]
+        if self._end is not None:
+            cursor, inclusive = self._end
+            values = self._cursor_values(cursor, orders)
+            keyed = [
+                (k, s) for k, s in keyed
+                if (compare_keys(k[:len(values)], values) <= 0 if inclusive else compare_keys(k[:len(values)], values) < 0)
+            ]
+
+        results = [s for _, s in keyed][self._offset:]
+        if self._limit is not None:
+            results = results[-self._limit:] if self._limit_to_last else results[:self._limit]
+        return results
+
+    def stream(self, transaction: Optional["LocalTransaction"] = None) -> AsyncIterator[LocalDocumentSnapshot]:
+        return _iterate(asyncio.to_thread(self._run))
+
+    async def get(self, transaction: Optional["LocalTransaction"] = None) -> List[LocalDocumentSnapshot]:
+        return await asyncio.to_thread(self._run)
+
+
+class LocalCollectionReference(LocalQuery):
+    """Reference to one (sub)collection path"""
+
+    def __init__(self, client: "LocalClient", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        super().__init__(self)
+
+    def document(self, document_id: Optional[str] = None) -> LocalDocumentReference:
+        return LocalDocumentReference(self._client, f"{self.path}/{document_id or _auto_id()}")
+
+    async def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> Tuple[datetime, LocalDocumentReference]:
+        reference = self.document(document_id)
+        await reference.create(document_data)
+        return _now(), reference
+
+    async def list_documents(self) -> AsyncIterator[LocalDocumentReference]:
+        snapshots = await asyncio.to_thread(self._client._scan, self.path, ())
+        self._client._count_reads(len(snapshots))
+        for snapshot in snapshots:
+            yield snapshot.reference
+
+
+# -- batches and transactions ------------------------------------------------
+
+class LocalWriteBatch:
+    """Writes applied atomically on commit (same interface as AsyncWriteBatch)"""
+
+    MAX_WRITES = 500
+
+    def __init__(self, client: "LocalClient"):
+        self._client = client
+        self._writes: List[Tuple[str, str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def _add(self, op: str, reference: LocalDocumentReference, data: Any) -> None:
+        if len(self._writes) >= self.MAX_WRITES:
+            raise ValueError(f"A batch can contain at most {self.MAX_WRITES} writes")
+        self._writes.append((op, reference.path, data))
+
+    def create(self, reference: LocalDocumentReference, document_data: Dict[str, Any]) -> None:
+        self._add("create", reference, document_data)
+
+    def set(self, reference: LocalDocumentReference, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._add("merge" if merge else "set", reference, document_data)
+
+    def update(self, reference: LocalDocumentReference, field_updates: Dict[str, Any]) -> None:
+        self._add("update", reference, field_updates)
+
+    def delete(self, reference: LocalDocumentReference) -> None:
+        self._add("delete", reference, None)
+
+    async def commit(self) -> List[datetime]:
+        writes, self._writes = self._writes, []
+        await self._client._commit(writes)
+        return [_now() for _ in writes]
+
+
+class LocalTransaction(LocalWriteBatch):
+    """Read-then-write transaction; use `run_transaction` to execute one"""
+
+    async def get(self, ref_or_query: Any) -> AsyncIterator[LocalDocumentSnapshot]:
+        if isinstance(ref_or_query, LocalDocumentReference):
+            return self._client.get_all([ref_or_query])
+        return ref_or_query.stream()
+
+    def get_all(self, references: Iterable[LocalDocumentReference]) -> AsyncIterator[LocalDocumentSnapshot]:
+        return self._client.get_all(references)
+
+    async def commit(self) -> List[datetime]:
+        # Runs while run_transaction holds the write lock
+        writes, self._writes = self._writes, []
+        await asyncio.to_thread(self._client._apply_writes, writes)
+        return [_now() for _ in writes]
+
+
+# -- client ------------------------------------------------------------------
+
+class LocalClient:
+    """SQLite-backed client with the AsyncClient surface the services use"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.project = "local"
+        self._lock = threading.RLock()
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " path TEXT PRIMARY KEY,"
+            " collection TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " create_time TEXT NOT NULL,"
+            " update_time TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_collection ON documents (collection)")
+        self.reads = 0
+        self.writes = 0
+
+    # Public surface ---------------------------------------------------------
+
+    def collection(self, *path: str) -> LocalCollectionReference:
+        return LocalCollectionReference(self, "/".join(path))
+
+    def document(self, *path: str) -> LocalDocumentReference:
+        return LocalDocumentReference(self, "/".join(path))
+
+    async def get_all(self, references: Iterable[LocalDocumentReference], field_paths: Optional[Sequence[str]] = None, transaction: Any = None) -> AsyncIterator[LocalDocumentSnapshot]:
+        references = list(references)
+        if not references:
+            return
+        snapshots = await asyncio.to_thread(self._read_many, [reference.path for reference in references])
+        for snapshot in snapshots:
+            if field_paths is not None and snapshot.exists:
+                snapshot._data = _project(snapshot._data, field_paths)
+            yield snapshot
+
+    def batch(self) -> LocalWriteBatch:
+        return LocalWriteBatch(self)
+
+    def transaction(self, **kwargs: Any) -> LocalTransaction:
+        return LocalTransaction(self)
+
+    async def run_transaction(self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Run `await fn(transaction, ...)` serializably and commit its writes atomically"""
+        async with self._writer():
+            transaction = self.transaction()
+            result = await fn(transaction, *args, **kwargs)
+            await transaction.commit()
+            return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Storage (runs on worker threads) ------------------------------------------
+
+    def _writer(self) -> asyncio.Lock:
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        return self._write_lock
+
+    def _snapshot(self, path: str, row: Optional[tuple]) -> LocalDocumentSnapshot:
+        reference = LocalDocumentReference(self, path)
+        if row is None:
+            return LocalDocumentSnapshot(reference, None)
+        return LocalDocumentSnapshot(
+            reference, _loads(row[1]), datetime.fromisoformat(row[2]), datetime.fromisoformat(row[3])
+        )
+
+    def _read(self, path: str) -> LocalDocumentSnapshot:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, data, create_time, update_time FROM documents WHERE path = ?", (path,)
+            ).fetchone()
+            self.reads += 1
+        return self._snapshot(path, row)
+
+    def _read_many(self, paths: List[str]) -> List[LocalDocumentSnapshot]:
+        rows: Dict[str, tuple] = {}
+        with self._lock:
+            for start in range(0, len(paths), 500):
+                chunk = paths[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self._conn.execute(
+                    f"SELECT path, data, create_time, update_time FROM documents WHERE path IN ({placeholders})", chunk
+                ):
+                    rows[row[0]] = row
+            self.reads += len(paths)
+        return [self._snapshot(path, rows.get(path)) for path in paths]
+
+    def _count_reads(self, documents: int) -> None:
+        with self._lock:
+            self.reads += documents
+
+    def _scan(self, collection: str, filters: Sequence[Tuple[str, str, Any]]) -> List[LocalDocumentSnapshot]:
+        sql = "SELECT path, data, create_time, update_time FROM documents WHERE collection = ?"
+        params: List[Any] = [collection]
+        # Push simple equality filters down to SQLite; everything else is
+        # evaluated in Python by the query
+        for path, op, value in filters:
+            if _pushed_down(op, value):
+                sql += " AND json_extract(data, ?) = ?"
+                params += ["$." + path, value]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._snapshot(row[0], row) for row in rows]
+
+    def _scan_top(self, collection: str, filters: Sequence[Tuple[str, str, Any]], field_path: str, direction: str, limit: int) -> List[LocalDocumentSnapshot]:
+        """
+        The first `limit` documents ordered by one field (then by ID), sorted
+        by SQLite, for queries whose filters all run there. Timestamps are
+        stored as UTC ISO strings, which sort in time order; maps and arrays
+        sort by their JSON text.
+        """
+        field = "$." + field_path
+        sql = "SELECT path, data, create_time, update_time FROM documents WHERE collection = ?"
+        params: List[Any] = [collection]
+        for path, _, value in filters:
+            sql += " AND json_extract(data, ?) = ?"
+            params += ["$." + path, value]
+            if not isinstance(value, str):
+                # SQLite reads true / false as 1 / 0
+                sql += " AND json_type(data, ?) IN ('integer', 'real')"
+                params.append("$." + path)
+        order = "DESC" if direction == DESCENDING else "ASC"
+        # Firestore's type order, as in _type_rank
+        sql += (
+            " AND json_type(data, ?) IS NOT NULL ORDER BY CASE json_type(data, ?) WHEN 'null' THEN 0"
+            " WHEN 'true' THEN 1 WHEN 'false' THEN 1 WHEN 'integer' THEN 2 WHEN 'real' THEN 2 WHEN 'text' THEN 4"
+            f" WHEN 'array' THEN 6 ELSE CASE WHEN json_type(data, ?) = 'text' THEN 3 ELSE 7 END END {order},"
+            f" COALESCE(json_extract(data, ?), json_extract(data, ?)) {order}, path {order} LIMIT ?"
+        )
+        params += [field, field, field + ".__datetime__", field + ".__datetime__", field, limit]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._snapshot(row[0], row) for row in rows]
+
+    async def _commit(self, writes: List[Tuple[str, str, Any]]) -> None:
+        """Apply writes atomically, after any running transaction"""
+        if not writes:
+            return
+        async with self._writer():
+            await asyncio.to_thread(self._apply_writes, writes)
+
+    def _apply_writes(self, writes: List[Tuple[str, str, Any]]) -> None:
+        if not writes:
+            return
+        now = _now()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for op, path, data in writes:
+                    self._write(op, path, data, now)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self.writes += len(writes)
+
+    def _write(self, op: str, path: str, data: Any, now: datetime) -> None:
+        row = self._conn.execute(
+            "SELECT data, create_time FROM documents WHERE path = ?", (path,)
+        ).fetchone()
+
+        if op == "delete":
+            self._conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+            return
+        if op == "create" and row is not None:
+            raise AlreadyExists(f"Document already exists: {path}")
+        if op == "update" and row is None:
+            raise NotFound(f"No document to update: {path}")
+
+        if op in ("set", "create"):
+            document: Dict[str, Any] = {}
+            for key, value in data.items():
+                _apply(document, key, value, now)
+        elif op == "merge":
+            document = _loads(row[0]) if row is not None else {}
+            _merge(document, data, now)
+        else:
+            document = _loads(row[0])
+            for key, value in data.items():
+                _apply(document, key, value, now)
+
+        create_time = row[1] if row is not None else now.isoformat()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (path, collection, data, create_time, update_time)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (path, path.rsplit("/", 1)[0], _dumps(document), create_time, now.isoformat()),
+        )
@@ -15,6 +15,11 @@ class Settings(BaseSettings):
     firebase_project_id: str
     firebase_credentials_path: str | None = None  # Optional - Cloud Run uses default service account
 
+    # Storage: "firestore", or the local embedded store ("sqlite" file or "memory") for offline runs
+    storage_backend: str = "firestore"
+    local_store_path: str = "/tmp/shelfmates/local_store.sqlite3"
+    firestore_max_batches_in_flight: int = 4  # Concurrent 500-write batches per BatchWriter
+
     # CORS - can be comma-separated string or list
     allowed_origins: Union[str, List[str]] = ["http://localhost:8080", "http://localhost:5173"]
 
@@ -33,6 +38,112 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # Password hashing: bcrypt runs on a thread pool, off the event loop
+    password_bcrypt_rounds: int = 12  # Changing it rehashes passwords at their next login
+    password_hash_workers: int | None = None  # Defaults to the number of CPUs
+    password_hash_max_pending: int = 64  # Queued + running jobs before new ones get 503
+
+    # Bearer token verification: the API's own JWTs and Firebase ID tokens
+    firebase_auth_enabled: bool = True  # Accept Firebase ID tokens (RS256) from the frontend
+    token_cache_max_entries: int = 10000  # Verified tokens kept until their `exp`
+    firebase_signing_keys_timeout_seconds: float = 10.0
+    firebase_signing_keys_refresh_margin_seconds: float = 300.0  # Refresh this long before max-age runs out
+    firebase_signing_keys_min_refresh_seconds: float = 30.0  # Floor between fetches (unknown `kid`s, errors)
+
+    # Upstream HTTP clients (barcode lookup proxies)
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 20
+    upstream_keepalive_expiry: float = 30.0
+    upstream_http2: bool = True  # Only used when the optional `h2` package is installed
+    upc_timeout_seconds: float = 10.0
+    openfoodfacts_timeout_seconds: float = 10.0
+
+    # Upstream resilience (per upstream): adaptive concurrency, circuit breaker, retry budget
+    upstream_limit_initial: int = 20
+    upstream_limit_min: int = 2
+    upstream_limit_max: int = 100
+    upstream_limit_latency_threshold_seconds: float = 3.0
+    upstream_breaker_failure_threshold: int = 5
+    upstream_breaker_reset_seconds: float = 30.0
+    upstream_retry_budget_ratio: float = 0.1
+    upstream_max_retries: int = 1
+
+    # Barcode lookup cache
+    barcode_cache_max_entries: int = 5000
+    barcode_cache_ttl_seconds: int = 7 * 24 * 3600
+    barcode_cache_negative_ttl_seconds: int = 6 * 3600
+    barcode_cache_path: str | None = "/tmp/shelfmates/barcode_cache.sqlite3"  # Empty disables the disk tier
+    barcode_cache_disk_max_entries: int = 100000
+    barcode_cache_disk_prune_every: int = 1000  # Prune expired/excess disk rows every N stores (0: only at startup)
+
+    # Merged product lookup: how long to wait for Open Food Facts once UPC Database has a usable answer
+    barcode_hedge_delay_seconds: float = 0.25
+
+    # Batch barcode lookups
+    barcode_batch_max_size: int = 100
+    barcode_batch_concurrency: int = 8
+    barcode_batch_item_timeout_seconds: float = 12.0
+
+    # USDA FoodKeeper data (defaults to the frontend's public/foodkeeper.json)
+    foodkeeper_json_path: str | None = None
+    foodkeeper_snapshot_path: str | None = None  # Defaults to backend/data/foodkeeper.snapshot
+
+    # Bulk expiry estimation and grocery -> pantry conversion
+    expiry_estimate_max_items: int = 500
+    expiry_estimate_memo_max_entries: int = 10000
+
+    # Per-household expiry index. The frontend writes items directly, bypassing
+    # the API: indexes pick up items changed since their last sync every
+    # `refresh` seconds, and are reloaded in full (catching deletes that left
+    # no tombstone) after the TTL
+    expiry_index_max_households: int = 1000
+    expiry_index_refresh_seconds: float = 5.0
+    expiry_index_ttl_seconds: float = 600.0
+
+    # Expiry status badges: "today" is taken in the household's timezone
+    # (households/{id}.timezone), falling back to this one
+    default_timezone: str = "UTC"
+    expiring_soon_days: int = 3
+
+    # Item listing pages (GET /items and the household item routes)
+    items_page_default_limit: int = 100
+    items_page_max_limit: int = 500
+
+    # Item change feed (GET /items/changes): how long deletes are remembered
+    item_tombstone_retention_days: int = 30
+    item_tombstone_prune_batch: int = 100
+
+    # Household member documents used to enrich item owners and member lists
+    member_cache_max_households: int = 1000
+    member_cache_ttl_seconds: float = 30.0
+
+    # Membership/admin answers of verify_household_access / verify_admin_access,
+    # per (user, household); the TTL bounds staleness from writes made outside the API
+    access_cache_max_entries: int = 10000
+    access_cache_ttl_seconds: float = 30.0
+
+    # Household event streams (GET /households/{id}/events)
+    event_queue_max_events: int = 256
+    event_heartbeat_seconds: float = 15.0
+    event_max_subscribers_per_household: int = 200
+
+    # Expense splits (POST /expenses/split)
+    expense_split_max_batch: int = 5000
+
+    # Household balances: periodic recomputation from full expense/payment history
+    # (0 disables it; POST /households/{id}/balances/verify runs it on demand)
+    balance_verify_interval_seconds: float = 0.0
+    balance_verify_repair: bool = False  # Overwrite drifted ledgers with the recomputed balances
+
+    # Settle-up suggestions (GET /households/{id}/settle-up): members with non-zero
+    # balances beyond this get the greedy plan instead of the exponential exact search
+    settle_up_exact_max_members: int = 12
+
+    # FIFO payment allocation: per-household open expense entry indexes
+    # (reloaded after the TTL to pick up entries settled outside the API)
+    payment_allocator_max_households: int = 1000
+    payment_allocator_ttl_seconds: float = 300.0
+
     class Config:
         env_file = ".env"
         case_sensitive = False
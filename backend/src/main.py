@@ -6,8 +6,15 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from src.config.settings import settings
-from src.config.firebase import initialize_firebase
-from src.routes import auth, households, items, barcode
+from src.config.firebase import initialize_firebase, close_firebase
+from src.middleware.request_scope import RequestScopeMiddleware
+from src.config.http_client import initialize_http_clients, close_http_clients
+from src.services.barcode_cache import initialize_barcode_cache, close_barcode_cache
+from src.services.foodkeeper_service import initialize_foodkeeper
+from src.services.token_verifier import initialize_token_verifier, close_token_verifier
+from src.services.password_hasher import initialize_password_hasher, close_password_hasher
+from src.services.balance_service import initialize_balance_verifier, close_balance_verifier
+from src.routes import auth, households, items, barcode, foodkeeper, expenses
 
 
 # Initialize FastAPI app
@@ -30,26 +37,40 @@ app.add_middleware(
 )
 
 
+# Per-request storage read accounting and loaders
+app.add_middleware(RequestScopeMiddleware, expose_headers=settings.environment == "development")
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(households.router, prefix="/api")
 app.include_router(items.router, prefix="/api")
 app.include_router(barcode.router, prefix="/api")
+app.include_router(foodkeeper.router, prefix="/api")
+app.include_router(expenses.router, prefix="/api")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    # TODO: Implement startup initialization
-    # initialize_firebase()
-    pass
+    initialize_firebase()
+    await initialize_http_clients()
+    initialize_token_verifier()
+    initialize_password_hasher()
+    initialize_barcode_cache()
+    initialize_foodkeeper()
+    initialize_balance_verifier()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    # TODO: Implement cleanup
-    pass
+    await close_balance_verifier()
+    await close_token_verifier()
+    close_password_hasher()
+    await close_http_clients()
+    close_barcode_cache()
+    await close_firebase()
 
 
 @app.get("/")
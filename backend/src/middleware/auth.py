@@ -1,15 +1,18 @@
 """Authentication middleware"""
-from fastapi import Request, HTTPException, status
+from fastapi import Depends, Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
+from src.services import auth_service
+from src.services.access_cache import access_cache
 
 
 security = HTTPBearer()
 
 
-async def get_current_user_id(credentials: HTTPAuthorizationCredentials) -> str:
+async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """
-    Extract and validate user ID from JWT token
+    Extract and validate user ID from JWT token (an API access token or a
+    Firebase ID token)
 
     Args:
         credentials: HTTP authorization credentials
@@ -20,14 +23,23 @@ async def get_current_user_id(credentials: HTTPAuthorizationCredentials) -> str:
     Raises:
         HTTPException: If token is invalid
     """
-    # TODO: Implement get current user ID
-    pass
+    user_id = await auth_service.verify_token(credentials.credentials)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
 
 
 async def verify_household_access(user_id: str, household_id: str) -> bool:
     """
     Verify user has access to household
 
+    Answered from the authorization cache while it is warm (see
+    services/access_cache).
+
     Args:
         user_id: User ID
         household_id: Household ID
@@ -38,8 +50,12 @@ async def verify_household_access(user_id: str, household_id: str) -> bool:
     Raises:
         HTTPException: If access denied
     """
-    # TODO: Implement verify household access
-    pass
+    if not await access_cache.is_member(user_id, household_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this household"
+        )
+    return True
 
 
 async def verify_admin_access(user_id: str, household_id: str) -> bool:
@@ -56,5 +72,10 @@ async def verify_admin_access(user_id: str, household_id: str) -> bool:
     Raises:
         HTTPException: If not admin
     """
-    # TODO: Implement verify admin access
-    pass
+    await verify_household_access(user_id, household_id)
+    if not await access_cache.is_admin(user_id, household_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return True
@@ -0,0 +1,75 @@
+"""Conditional GET for household-scoped reads
+
+Read endpoints tag their responses with a strong ETag derived from:
+
+- the household's version counter, bumped by every write made through
+  household_service / item_service (see services/sync_service) and by the
+  frontend's direct item writes (firestore.rules rejects ones that don't)
+- the request path and query string
+- the requesting user (personal listings differ per member)
+- the household's current date (expiry status and days left change at midnight)
+
+A matching `If-None-Match` is answered with 304 after reading only the
+household's version (one document), before any item or member is loaded.
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+from src.services import sync_service
+from src.utils.expiry_status import household_today
+
+
+CACHE_CONTROL = "private, no-cache"
+
+
+async def household_etag(request: Request, household_id: str, user_id: str) -> str:
+    """
+    Build the ETag of a household-scoped read from its current version
+
+    Args:
+        request: Incoming request (path and query are part of the tag)
+        household_id: Household ID
+        user_id: Requesting user ID
+
+    Returns:
+        str: Quoted strong ETag
+    """
+    state = await sync_service.read_versions(household_id)
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    digest = hashlib.sha256(
+        f"{request.url.path}?{query}|{user_id}|{household_today(state.timezone).isoformat()}".encode()
+    ).hexdigest()[:20]
+    return f'"{household_id}.{state.version}.{digest}"'
+
+
+def _matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    The 304 response for a request whose If-None-Match matches `etag`
+
+    Returns:
+        Optional[Response]: 304 response, or None if the client's copy is stale
+    """
+    if not _matches(request.headers.get("if-none-match"), etag):
+        return None
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def tag(response: Response, etag: str) -> Response:
+    """Attach the ETag and revalidation policy to a full response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
@@ -0,0 +1,36 @@
+"""Request scope middleware"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.utils.request_context import request_scope
+
+
+class RequestScopeMiddleware:
+    """
+    Open a `RequestScope` per HTTP request (pure ASGI, so route handlers run
+    in the same context) and report its storage reads in response headers
+
+    Args:
+        app: Wrapped ASGI app
+        expose_headers: Add `X-Storage-Reads` / `X-Storage-Round-Trips` /
+            `X-Storage-Reads-Saved`
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = True):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_scope() as current:
+            async def send_with_reads(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.expose_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-storage-reads", str(current.total_reads).encode()))
+                    headers.append((b"x-storage-round-trips", str(current.total_round_trips).encode()))
+                    headers.append((b"x-storage-reads-saved", str(current.total_saved_reads).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_reads)
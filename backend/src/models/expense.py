@@ -65,6 +65,26 @@ class ExpenseCreate(ExpenseBase):
     note: Optional[str] = None
 
 
+class ExpenseSplit(BaseModel):
+    """Canonical breakdown of one `ExpenseCreate` (see services/split_service).
+
+    Fields:
+    - participants: the expense's participants, de-duplicated, in order.
+    - entries: one entry per participant; the amounts always sum to
+      `total_cents`.
+    - rounding_adjustment_cents: cents handed out on top of the rounded-down
+      proportional shares (largest remainder first), 0 for exact splits.
+    """
+    participants: List[str]
+    entries: List[ExpenseEntry]
+    rounding_adjustment_cents: int = 0
+
+
+class ExpenseSplitRequest(BaseModel):
+    """Batch of expenses to canonicalize (imports, recomputation)."""
+    expenses: List[ExpenseCreate]
+
+
 class Expense(ExpenseBase):
     """Canonical expense stored in the database.
 
@@ -105,7 +125,8 @@ class PaymentCreate(BaseModel):
     - to_user: who received (credited)
     - total_cents: total amount of the payment
     - applies_to: optional list describing which expense entries this payment
-      should be applied against. If omitted the server can apply heuristics.
+      should be applied against. If omitted the server applies it to the
+      payer's oldest open entries owed to the receiver (FIFO).
     """
     household_id: str
     from_user: str
@@ -117,10 +138,89 @@ class PaymentCreate(BaseModel):
 
 
 class Payment(PaymentCreate):
-    """Canonical payment record stored in DB with metadata."""
+    """Canonical payment record stored in DB with metadata. `processed_at`
+    marks the time the ledger was updated (balances adjusted);
+    `allocated_cents` is how much the server has applied to expense entries
+    (see services/payment_allocator).
+    """
     id: str
     status: str = "completed"  # pending | completed | failed
     created_at: datetime
+    processed_at: Optional[datetime] = None
+    allocated_cents: int = 0
 
     class Config:
         from_attributes = True
+
+
+class MemberBalance(BaseModel):
+    """A member's net position in the household ledger.
+
+    Positive `net_cents`: the others owe this member; negative: this member
+    owes the others.
+    """
+    user_id: str
+    net_cents: int
+
+
+class PairwiseBalance(BaseModel):
+    """Outstanding debt between two members: `from_user` owes `to_user`."""
+    from_user: str
+    to_user: str
+    amount_cents: int
+
+
+class HouseholdBalances(BaseModel):
+    """Materialized balances of a household (see services/balance_service).
+
+    Fields:
+    - members: net per member who has appeared in a processed expense or
+      payment, zero balances included.
+    - debts: netted pairwise debts, one per pair that doesn't cancel out.
+    - expenses_processed / payments_processed: how many records the ledger
+      has absorbed.
+    """
+    household_id: str
+    members: List[MemberBalance] = Field(default_factory=list)
+    debts: List[PairwiseBalance] = Field(default_factory=list)
+    expenses_processed: int = 0
+    payments_processed: int = 0
+    updated_at: Optional[datetime] = None
+
+
+class BalanceVerification(BaseModel):
+    """Result of recomputing a household's balances from full history.
+
+    `net_drift` and `pair_drift` hold stored minus recomputed values (only
+    the ones that differ; pairs as "from_user owes to_user" differences).
+    Unprocessed records are reported but not part of either side.
+    """
+    household_id: str
+    consistent: bool
+    net_drift: Dict[str, int] = Field(default_factory=dict)
+    pair_drift: List[PairwiseBalance] = Field(default_factory=list)
+    expenses_checked: int = 0
+    payments_checked: int = 0
+    unprocessed_expenses: int = 0
+    unprocessed_payments: int = 0
+    repaired: bool = False
+
+
+class Transfer(BaseModel):
+    """A suggested payment: `from_user` pays `to_user` `amount_cents`."""
+    from_user: str
+    to_user: str
+    amount_cents: int
+
+
+class SettleUpPlan(BaseModel):
+    """Transfers that bring every balance in a household to zero.
+
+    `method` is "exact" when the fewest possible transfers were searched
+    for, "greedy" for the largest-creditor/largest-debtor heuristic on
+    larger groups; `optimal` is True when the plan is known to be minimal.
+    """
+    household_id: str
+    transfers: List[Transfer] = Field(default_factory=list)
+    method: str = "exact"  # exact | greedy
+    optimal: bool = True
@@ -0,0 +1,81 @@
+"""USDA FoodKeeper data models"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date
+
+
+class FoodKeeperProduct(BaseModel):
+    """One row of the FoodKeeper Product sheet"""
+    id: int
+    name: str
+    name_subtitle: Optional[str] = None
+    category_id: Optional[int] = None
+    subcategory_id: Optional[int] = None
+    keywords: Optional[str] = None
+    pantry_min: Optional[float] = None
+    pantry_max: Optional[float] = None
+    pantry_metric: Optional[str] = None
+    pantry_tips: Optional[str] = None
+    dop_pantry_min: Optional[float] = None
+    dop_pantry_max: Optional[float] = None
+    dop_pantry_metric: Optional[str] = None
+    dop_pantry_tips: Optional[str] = None
+    refrigerate_min: Optional[float] = None
+    refrigerate_max: Optional[float] = None
+    refrigerate_metric: Optional[str] = None
+    refrigerate_tips: Optional[str] = None
+    dop_refrigerate_min: Optional[float] = None
+    dop_refrigerate_max: Optional[float] = None
+    dop_refrigerate_metric: Optional[str] = None
+    dop_refrigerate_tips: Optional[str] = None
+    freeze_min: Optional[float] = None
+    freeze_max: Optional[float] = None
+    freeze_metric: Optional[str] = None
+    freeze_tips: Optional[str] = None
+
+
+class FoodKeeperSearchResponse(BaseModel):
+    """Best FoodKeeper match for a product name"""
+    query: str
+    found: bool
+    score: Optional[float] = None
+    product: Optional[FoodKeeperProduct] = None
+    shelf_life_days: Optional[int] = None
+    storage_tips: Optional[str] = None
+
+
+class ShelfLifeResponse(BaseModel):
+    """Shelf life for a product name"""
+    query: str
+    found: bool
+    product_id: Optional[int] = None
+    product_name: Optional[str] = None
+    shelf_life_days: int = 0
+    storage_tips: Optional[str] = None
+
+
+class ExpiryEstimateItem(BaseModel):
+    """One item to estimate an expiry date for"""
+    name: str = Field(..., min_length=1)
+    category: Optional[str] = None
+    item_id: Optional[str] = None
+
+
+class ExpiryEstimateRequest(BaseModel):
+    """Bulk expiry estimation request"""
+    items: List[ExpiryEstimateItem] = Field(..., min_length=1)
+    purchase_date: Optional[date] = None
+
+
+class ExpiryEstimate(BaseModel):
+    """Estimated expiry date for one item"""
+    item_id: Optional[str] = None
+    name: str
+    category: Optional[str] = None
+    expiry_date: Optional[date] = None
+    shelf_life_days: Optional[int] = None
+    confidence: str  # high, medium or none
+    message: str
+    storage_tips: Optional[str] = None
+    foodkeeper_product_id: Optional[int] = None
+    foodkeeper_product_name: Optional[str] = None
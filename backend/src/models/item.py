@@ -1,6 +1,6 @@
 """Food item data models"""
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime, date
 
 
@@ -34,6 +34,9 @@ class ItemResponse(ItemBase):
     owner_name: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+    # Computed per response against the household's current date
+    days_until_expiry: Optional[int] = None
+    expiry_status: Optional[str] = None  # safe | expiring_soon | expired | no_date
 
     class Config:
         from_attributes = True
@@ -45,3 +48,41 @@ class ItemFilter(BaseModel):
     owner_id: Optional[str] = None
     expiring_soon: Optional[bool] = None  # Within 3 days
     expired: Optional[bool] = None
+
+
+ItemOrder = Literal["expiry_date", "created_at", "-created_at"]
+
+
+class ItemPageRequest(BaseModel):
+    """Cursor pagination and field projection for item listings"""
+    order: Optional[ItemOrder] = None  # Default depends on the listing
+    limit: int = Field(100, ge=1)
+    cursor: Optional[str] = None  # next_cursor of the previous page
+    fields: Optional[List[str]] = None  # ItemResponse fields to return ("id" is always included)
+
+
+class ItemPage(BaseModel):
+    """One page of items"""
+    items: List[ItemResponse]
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+class ItemChanges(BaseModel):
+    """Items changed since a change token"""
+    items: List[ItemResponse]  # Created or updated (all items on a full resync)
+    deleted: List[str]  # IDs of deleted items
+    token: str  # Pass as `since` on the next call
+    full_resync: bool  # True when `items` is the whole inventory and local state should be replaced
+
+
+class GroceryConversion(BaseModel):
+    """One grocery item to move to the pantry"""
+    item_id: str
+    expiry_date: Optional[date] = None  # Estimated from the item name when omitted
+    category: Optional[str] = None  # Helps the estimate when omitted
+
+
+class GroceryConversionRequest(BaseModel):
+    """Bulk grocery -> pantry conversion request"""
+    items: List[GroceryConversion] = Field(..., min_length=1)
+    purchase_date: Optional[date] = None
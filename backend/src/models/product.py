@@ -0,0 +1,33 @@
+"""Barcode product data models"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class ProductInfo(BaseModel):
+    """Product information merged from the barcode upstreams"""
+    name: str = ""
+    product_name: Optional[str] = None
+    generic_name: Optional[str] = None
+    brands: Optional[str] = None
+    quantity: Optional[str] = None
+    image_url: Optional[str] = None
+    nutriments: Optional[Dict[str, Any]] = None
+    categories: Optional[str] = None
+    categories_tags: Optional[List[str]] = None
+    ingredients_text: Optional[str] = None
+    allergens: Optional[str] = None
+    expiration_date: Optional[str] = None
+
+
+class ProductLookupResponse(BaseModel):
+    """Merged barcode lookup result"""
+    barcode: str
+    found: bool
+    source: Optional[str] = None  # openfoodfacts | upcitemdb | merged
+    product: Optional[ProductInfo] = None
+    error: Optional[str] = None  # Set when the lookup failed (batch results only)
+
+
+class BarcodeBatchRequest(BaseModel):
+    """Batch barcode lookup request"""
+    barcodes: List[str] = Field(..., min_length=1)
@@ -10,15 +10,13 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate):
     """Register a new user"""
-    # TODO: Implement register endpoint
-    pass
+    return await auth_service.register_user(user_data)
 
 
 @router.post("/login", response_model=Token)
 async def login(credentials: UserLogin):
     """Login with email and password"""
-    # TODO: Implement login endpoint
-    pass
+    return await auth_service.login_user(credentials)
 
 
 @router.post("/google", response_model=Token)
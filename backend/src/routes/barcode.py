@@ -2,9 +2,12 @@
 Barcode API Routes
 Proxy endpoints for barcode product lookup services
 """
-from fastapi import APIRouter, HTTPException
-import httpx
-from typing import Optional
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from src.config.settings import settings
+from src.models.product import ProductLookupResponse, BarcodeBatchRequest
+from src.services import barcode_service
+from src.services.barcode_cache import get_barcode_cache
 
 router = APIRouter()
 
@@ -15,46 +18,7 @@ async def lookup_upc(barcode: str):
     Proxy endpoint for UPC Database API lookup
     Bypasses CORS restrictions by making request from backend
     """
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.upcitemdb.com/prod/trial/lookup",
-                params={"upc": barcode},
-                headers={
-                    "Content-Type": "application/json",
-                },
-                timeout=10.0
-            )
-
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return {
-                    "code": "NOT_FOUND",
-                    "total": 0,
-                    "items": []
-                }
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"UPC Database API error: {response.text}"
-                )
-
-    except httpx.TimeoutException:
-        raise HTTPException(
-            status_code=504,
-            detail="UPC Database API request timed out"
-        )
-    except httpx.RequestError as e:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Error connecting to UPC Database API: {str(e)}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Internal server error: {str(e)}"
-        )
+    return await barcode_service.lookup_upc(barcode)
 
 
 @router.get("/barcode/openfoodfacts/{barcode}")
@@ -62,41 +26,49 @@ async def lookup_openfoodfacts(barcode: str):
     """
     Proxy endpoint for Open Food Facts API lookup (optional, for consistency)
     """
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://world.openfoodfacts.org/api/v2/product/{barcode}.json",
-                headers={
-                    "User-Agent": "ShelfMates - Food Inventory App - Version 1.0",
-                },
-                timeout=10.0
-            )
-
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return {
-                    "status": 0,
-                    "status_verbose": "product not found"
-                }
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Open Food Facts API error: {response.text}"
-                )
-
-    except httpx.TimeoutException:
-        raise HTTPException(
-            status_code=504,
-            detail="Open Food Facts API request timed out"
-        )
-    except httpx.RequestError as e:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Error connecting to Open Food Facts API: {str(e)}"
-        )
-    except Exception as e:
+    return await barcode_service.lookup_openfoodfacts(barcode)
+
+
+@router.get("/barcode/product/{barcode}", response_model=ProductLookupResponse)
+async def lookup_product(barcode: str):
+    """
+    Look up a barcode in Open Food Facts and UPC Database concurrently
+    and return the merged product data
+    """
+    return await barcode_service.lookup_product(barcode)
+
+
+@router.post("/barcode/batch")
+async def lookup_batch(batch: BarcodeBatchRequest):
+    """
+    Look up many barcodes at once
+
+    Streams one ProductLookupResponse per unique barcode as newline-delimited
+    JSON, in the order the lookups finish
+    """
+    if len(batch.barcodes) > settings.barcode_batch_max_size:
         raise HTTPException(
-            status_code=500,
-            detail=f"Internal server error: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many barcodes (max {settings.barcode_batch_max_size})"
         )
+
+    async def stream():
+        async for result in barcode_service.lookup_products(batch.barcodes):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get("/barcode/cache/stats")
+async def barcode_cache_stats():
+    """Barcode cache hit/miss/eviction counters"""
+    return {
+        **await get_barcode_cache().snapshot(),
+        "single_flight": barcode_service.inflight.snapshot(),
+    }
+
+
+@router.get("/barcode/upstreams")
+async def barcode_upstream_status():
+    """Circuit breaker, concurrency limit and retry budget state per upstream"""
+    return barcode_service.upstream_status()
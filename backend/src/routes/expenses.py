@@ -0,0 +1,63 @@
+"""Expense routes"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
+from src.config.settings import settings
+from src.middleware.auth import get_current_user_id, verify_household_access
+from src.models.expense import Expense, ExpenseCreate, ExpenseSplit, ExpenseSplitRequest, Payment, PaymentCreate
+from src.services import expense_service, split_service
+
+
+router = APIRouter(prefix="/expenses", tags=["Expenses"])
+
+
+@router.post("", response_model=Expense, status_code=status.HTTP_201_CREATED)
+async def create_expense(expense_data: ExpenseCreate, user_id: str = Depends(get_current_user_id)):
+    """Create an expense and add it to the household's balances"""
+    await verify_household_access(user_id, expense_data.household_id)
+    return await expense_service.create_expense(expense_data, user_id)
+
+
+@router.post("/split", response_model=List[ExpenseSplit])
+async def split_expenses(request: ExpenseSplitRequest, user_id: str = Depends(get_current_user_id)):
+    """
+    Compute the canonical entries of many expenses at once (imports, recomputation)
+
+    Results are returned in request order
+    """
+    if len(request.expenses) > settings.expense_split_max_batch:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many expenses (max {settings.expense_split_max_batch})"
+        )
+    for household_id in dict.fromkeys(expense.household_id for expense in request.expenses):
+        await verify_household_access(user_id, household_id)
+    return split_service.split_expenses(request.expenses)
+
+
+@router.post("/payments", response_model=Payment, status_code=status.HTTP_201_CREATED)
+async def record_payment(payment_data: PaymentCreate, user_id: str = Depends(get_current_user_id)):
+    """Record a payment and add it to the household's balances"""
+    await verify_household_access(user_id, payment_data.household_id)
+    return await expense_service.record_payment(payment_data, user_id)
+
+
+@router.post("/payments/{payment_id}/process", response_model=Payment)
+async def process_payment(
+    payment_id: str,
+    household_id: str = Query(..., description="Household the payment belongs to"),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Add a payment written directly to Firestore to the household's balances"""
+    await verify_household_access(user_id, household_id)
+    return await expense_service.process_payment(household_id, payment_id)
+
+
+@router.post("/{expense_id}/process", response_model=Expense)
+async def process_expense(
+    expense_id: str,
+    household_id: str = Query(..., description="Household the expense belongs to"),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Add an expense written directly to Firestore to the household's balances"""
+    await verify_household_access(user_id, household_id)
+    return await expense_service.process_expense(household_id, expense_id)
@@ -0,0 +1,73 @@
+"""USDA FoodKeeper routes"""
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List, Optional
+from src.config.settings import settings
+from src.models.foodkeeper import (
+    ExpiryEstimate,
+    ExpiryEstimateRequest,
+    FoodKeeperSearchResponse,
+    ShelfLifeResponse,
+)
+from src.services import expiry_service, foodkeeper_service
+
+
+router = APIRouter(prefix="/foodkeeper", tags=["FoodKeeper"])
+
+
+@router.get("/search", response_model=FoodKeeperSearchResponse)
+async def search_foodkeeper(
+    q: str = Query(..., min_length=1, max_length=100, description="Product name"),
+    category: Optional[str] = Query(None, description="Optional product category")
+):
+    """Find the best FoodKeeper match for a product name"""
+    index = foodkeeper_service.get_foodkeeper_index()
+    match = index.search(q, category)
+    if match is None:
+        return FoodKeeperSearchResponse(query=q, found=False)
+
+    product, score = match
+    return FoodKeeperSearchResponse(
+        query=q,
+        found=True,
+        score=round(score, 3),
+        product=product,
+        shelf_life_days=foodkeeper_service.get_shelf_life_days(product),
+        storage_tips=foodkeeper_service.get_storage_tips(product),
+    )
+
+
+@router.get("/shelf-life", response_model=ShelfLifeResponse)
+async def get_shelf_life(
+    q: str = Query(..., min_length=1, max_length=100, description="Product name"),
+    category: Optional[str] = Query(None, description="Optional product category")
+):
+    """Get the shelf life in days for a product name"""
+    index = foodkeeper_service.get_foodkeeper_index()
+    match = index.search(q, category)
+    if match is None:
+        return ShelfLifeResponse(query=q, found=False)
+
+    product, _ = match
+    return ShelfLifeResponse(
+        query=q,
+        found=True,
+        product_id=product.id,
+        product_name=product.name,
+        shelf_life_days=foodkeeper_service.get_shelf_life_days(product),
+        storage_tips=foodkeeper_service.get_storage_tips(product),
+    )
+
+
+@router.post("/estimate-expiry", response_model=List[ExpiryEstimate])
+async def estimate_expiry(request: ExpiryEstimateRequest):
+    """
+    Estimate expiry dates, confidence and storage tips for many items at once
+
+    Results are returned in request order
+    """
+    if len(request.items) > settings.expiry_estimate_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many items (max {settings.expiry_estimate_max_items})"
+        )
+    return expiry_service.estimate_expiries(request.items, request.purchase_date)
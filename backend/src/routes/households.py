@@ -1,6 +1,11 @@
 """Household routes"""
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from src.config.settings import settings
+from src.middleware import conditional
+from src.middleware.auth import get_current_user_id, verify_admin_access, verify_household_access
+from src.models.expense import BalanceVerification, HouseholdBalances, SettleUpPlan
 from src.models.household import (
     HouseholdCreate,
     HouseholdResponse,
@@ -8,56 +13,137 @@ from src.models.household import (
     InviteCodeRequest,
     RegenerateInviteCodeResponse
 )
-from src.services import household_service
+from src.services import balance_service, event_service, household_service, item_service, settle_service
 
 
 router = APIRouter(prefix="/households", tags=["Households"])
 
 
 @router.post("", response_model=HouseholdResponse, status_code=status.HTTP_201_CREATED)
-async def create_household(household_data: HouseholdCreate):
+async def create_household(household_data: HouseholdCreate, user_id: str = Depends(get_current_user_id)):
     """Create a new household"""
-    # TODO: Implement create household endpoint
-    pass
+    return await household_service.create_household(household_data, user_id)
 
 
 @router.get("/{household_id}", response_model=HouseholdResponse)
-async def get_household(household_id: str):
+async def get_household(
+    household_id: str,
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id)
+):
     """Get household details"""
-    # TODO: Implement get household endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    etag = await conditional.household_etag(request, household_id, user_id)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    conditional.tag(response, etag)
+    return await household_service.get_household(household_id, user_id)
 
 
 @router.post("/join", response_model=HouseholdResponse)
-async def join_household(invite_data: InviteCodeRequest):
+async def join_household(invite_data: InviteCodeRequest, user_id: str = Depends(get_current_user_id)):
     """Join a household using invite code"""
-    # TODO: Implement join household endpoint
-    pass
+    return await household_service.join_household(invite_data.invite_code, user_id)
 
 
 @router.post("/{household_id}/leave", status_code=status.HTTP_204_NO_CONTENT)
-async def leave_household(household_id: str):
+async def leave_household(household_id: str, user_id: str = Depends(get_current_user_id)):
     """Leave a household"""
-    # TODO: Implement leave household endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    await household_service.leave_household(household_id, user_id)
 
 
 @router.post("/{household_id}/regenerate-code", response_model=RegenerateInviteCodeResponse)
-async def regenerate_invite_code(household_id: str):
+async def regenerate_invite_code(household_id: str, user_id: str = Depends(get_current_user_id)):
     """Regenerate household invite code (admin only)"""
-    # TODO: Implement regenerate invite code endpoint
-    pass
+    await verify_admin_access(user_id, household_id)
+    invite_code = await household_service.regenerate_invite_code(household_id, user_id)
+    return RegenerateInviteCodeResponse(invite_code=invite_code)
 
 
 @router.get("/{household_id}/members", response_model=List[HouseholdMember])
-async def get_household_members(household_id: str):
+async def get_household_members(
+    household_id: str,
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id)
+):
     """Get all household members"""
-    # TODO: Implement get household members endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    etag = await conditional.household_etag(request, household_id, user_id)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    conditional.tag(response, etag)
+    return await household_service.get_household_members(household_id, user_id)
+
+
+@router.get("/{household_id}/events")
+async def household_events(
+    household_id: str,
+    since: Optional[str] = Query(None, description="Change token to resume from"),
+    last_event_id: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Stream item, member and household changes as Server-Sent Events
+
+    Authenticated with the `Authorization` header like every other route. A
+    native browser `EventSource` cannot send that header, and there is no
+    token query parameter to fall back on: clients need a fetch-based
+    EventSource (or another HTTP client that streams the body).
+    """
+    await verify_household_access(user_id, household_id)
+    token = last_event_id or since
+    if token:
+        # Rejected here, while a 400 can still be sent
+        item_service.parse_change_token(token, household_id)
+    return StreamingResponse(
+        event_service.open_event_stream(household_id, user_id, token),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{household_id}/balances", response_model=HouseholdBalances)
+async def get_balances(household_id: str, user_id: str = Depends(get_current_user_id)):
+    """Get members' net balances and pairwise debts (from the materialized ledger)"""
+    await verify_household_access(user_id, household_id)
+    return await balance_service.get_balances(household_id)
+
+
+@router.get("/{household_id}/settle-up", response_model=SettleUpPlan)
+async def settle_up(
+    household_id: str,
+    exact: bool = Query(True, description="Search for the fewest transfers in small groups (False: always greedy)"),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Suggest the transfers that settle every member's current balance"""
+    await verify_household_access(user_id, household_id)
+    balances = await balance_service.get_balances(household_id)
+    return settle_service.settle_up(
+        household_id,
+        {member.user_id: member.net_cents for member in balances.members},
+        max_exact_members=settings.settle_up_exact_max_members,
+        exact=exact,
+    )
+
+
+@router.post("/{household_id}/balances/verify", response_model=BalanceVerification)
+async def verify_balances(
+    household_id: str,
+    repair: bool = Query(False, description="Overwrite drifted balances with the recomputed ones"),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Recompute balances from the full expense and payment history and report drift (admin only)"""
+    await verify_admin_access(user_id, household_id)
+    return await balance_service.verify_balances(household_id, repair=repair)
 
 
 @router.delete("/{household_id}/members/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def remove_member(household_id: str, member_id: str):
+async def remove_member(household_id: str, member_id: str, user_id: str = Depends(get_current_user_id)):
     """Remove a member from household (admin only)"""
-    # TODO: Implement remove member endpoint
-    pass
+    await verify_admin_access(user_id, household_id)
+    await household_service.remove_member(household_id, member_id, user_id)
@@ -1,76 +1,200 @@
 """Food item routes"""
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import JSONResponse
 from typing import List, Optional
-from src.models.item import ItemCreate, ItemUpdate, ItemResponse, ItemFilter
+from src.config.settings import settings
+from src.middleware import conditional
+from src.middleware.auth import get_current_user_id, verify_household_access
+from src.models.item import (
+    GroceryConversionRequest,
+    ItemCreate,
+    ItemUpdate,
+    ItemResponse,
+    ItemChanges,
+    ItemFilter,
+    ItemOrder,
+    ItemPage,
+    ItemPageRequest,
+)
 from src.services import item_service
 
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
 
+def page_params(
+    order: Optional[ItemOrder] = Query(None, description="expiry_date, created_at or -created_at (newest first)"),
+    limit: int = Query(settings.items_page_default_limit, ge=1, le=settings.items_page_max_limit),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated item fields to return, e.g. name,quantity,expiry_date,owner_name"),
+) -> ItemPageRequest:
+    """Pagination and projection query parameters shared by the item listings"""
+    return ItemPageRequest(
+        order=order,
+        limit=limit,
+        cursor=cursor,
+        fields=item_service.validate_fields(fields.split(",")) if fields else None,
+    )
+
+
+def page_response(page: ItemPage, params: ItemPageRequest) -> JSONResponse:
+    """
+    Serialize a page as a JSON list of (projected) items
+
+    The next page's cursor is sent in the X-Next-Cursor header, so the body
+    stays the plain item list.
+    """
+    include = {"id", *params.fields} if params.fields is not None else None
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return JSONResponse(
+        content=[item.model_dump(mode="json", include=include) for item in page.items],
+        headers=headers,
+    )
+
+
 @router.post("", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
-async def create_item(item_data: ItemCreate):
+async def create_item(
+    item_data: ItemCreate,
+    household_id: str = Query(..., description="Household ID"),
+    user_id: str = Depends(get_current_user_id)
+):
     """Create a new food item"""
-    # TODO: Implement create item endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    return await item_service.create_item(item_data, user_id, household_id)
+
+
+@router.get("/changes", response_model=ItemChanges)
+async def get_item_changes(
+    household_id: str = Query(..., description="Household ID"),
+    since: Optional[str] = Query(None, description="Token from the previous call; omit for a full download"),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get items created, updated or deleted since a change token"""
+    await verify_household_access(user_id, household_id)
+    return await item_service.get_item_changes(household_id, user_id, since)
 
 
 @router.get("/{item_id}", response_model=ItemResponse)
-async def get_item(item_id: str):
+async def get_item(item_id: str, user_id: str = Depends(get_current_user_id)):
     """Get a specific item"""
-    # TODO: Implement get item endpoint
-    pass
+    return await item_service.get_item(item_id, user_id)
 
 
 @router.get("", response_model=List[ItemResponse])
 async def get_items(
+    request: Request,
     household_id: str = Query(..., description="Household ID"),
     is_communal: Optional[bool] = Query(None, description="Filter by communal status"),
     expiring_soon: Optional[bool] = Query(None, description="Filter expiring soon"),
-    expired: Optional[bool] = Query(None, description="Filter expired items")
+    expired: Optional[bool] = Query(None, description="Filter expired items"),
+    params: ItemPageRequest = Depends(page_params),
+    user_id: str = Depends(get_current_user_id)
 ):
-    """Get all items for a household with optional filters"""
-    # TODO: Implement get items endpoint
-    pass
+    """Get a page of a household's items with optional filters"""
+    await verify_household_access(user_id, household_id)
+    etag = await conditional.household_etag(request, household_id, user_id)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    filters = ItemFilter(is_communal=is_communal, expiring_soon=expiring_soon, expired=expired)
+    page = await item_service.get_items(household_id, user_id, filters, params)
+    return conditional.tag(page_response(page, params), etag)
 
 
 @router.put("/{item_id}", response_model=ItemResponse)
-async def update_item(item_id: str, item_data: ItemUpdate):
+async def update_item(item_id: str, item_data: ItemUpdate, user_id: str = Depends(get_current_user_id)):
     """Update an existing item"""
-    # TODO: Implement update item endpoint
-    pass
+    return await item_service.update_item(item_id, item_data, user_id)
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_item(item_id: str):
+async def delete_item(item_id: str, user_id: str = Depends(get_current_user_id)):
     """Delete an item"""
-    # TODO: Implement delete item endpoint
-    pass
+    await item_service.delete_item(item_id, user_id)
 
 
 @router.get("/household/{household_id}/expiring", response_model=List[ItemResponse])
-async def get_expiring_items(household_id: str, days: int = Query(3, ge=1, le=30)):
+async def get_expiring_items(
+    request: Request,
+    household_id: str,
+    days: int = Query(3, ge=1, le=30),
+    params: ItemPageRequest = Depends(page_params),
+    user_id: str = Depends(get_current_user_id)
+):
     """Get items expiring within specified days"""
-    # TODO: Implement get expiring items endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    etag = await conditional.household_etag(request, household_id, user_id)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    page = await item_service.get_expiring_items(household_id, user_id, days, params)
+    return conditional.tag(page_response(page, params), etag)
 
 
 @router.get("/household/{household_id}/expired", response_model=List[ItemResponse])
-async def get_expired_items(household_id: str):
+async def get_expired_items(
+    request: Request,
+    household_id: str,
+    params: ItemPageRequest = Depends(page_params),
+    user_id: str = Depends(get_current_user_id)
+):
     """Get expired items"""
-    # TODO: Implement get expired items endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    etag = await conditional.household_etag(request, household_id, user_id)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    page = await item_service.get_expired_items(household_id, user_id, params)
+    return conditional.tag(page_response(page, params), etag)
 
 
 @router.get("/household/{household_id}/personal", response_model=List[ItemResponse])
-async def get_personal_items(household_id: str):
+async def get_personal_items(
+    request: Request,
+    household_id: str,
+    params: ItemPageRequest = Depends(page_params),
+    user_id: str = Depends(get_current_user_id)
+):
     """Get personal (non-communal) items for current user"""
-    # TODO: Implement get personal items endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    etag = await conditional.household_etag(request, household_id, user_id)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    page = await item_service.get_personal_items(household_id, user_id, params)
+    return conditional.tag(page_response(page, params), etag)
 
 
 @router.get("/household/{household_id}/communal", response_model=List[ItemResponse])
-async def get_communal_items(household_id: str):
+async def get_communal_items(
+    request: Request,
+    household_id: str,
+    params: ItemPageRequest = Depends(page_params),
+    user_id: str = Depends(get_current_user_id)
+):
     """Get communal items for household"""
-    # TODO: Implement get communal items endpoint
-    pass
+    await verify_household_access(user_id, household_id)
+    etag = await conditional.household_etag(request, household_id, user_id)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    page = await item_service.get_communal_items(household_id, user_id, params)
+    return conditional.tag(page_response(page, params), etag)
+
+
+@router.post("/household/{household_id}/convert-groceries", response_model=List[ItemResponse])
+async def convert_groceries(
+    household_id: str,
+    request: GroceryConversionRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Move grocery items to the pantry, estimating missing expiry dates"""
+    if len(request.items) > settings.expiry_estimate_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many items (max {settings.expiry_estimate_max_items})"
+        )
+    await verify_household_access(user_id, household_id)
+    return await item_service.convert_groceries_to_pantry(
+        household_id, user_id, request.items, request.purchase_date
+    )
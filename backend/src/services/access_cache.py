@@ -0,0 +1,174 @@
+"""Household authorization cache
+
+`verify_household_access` and `verify_admin_access` answer two questions on
+almost every request: is the user a member of the household, and is the user
+its admin. The answers are cached per (user_id, household_id):
+
+- membership comes from users/{id}.household_id (one read)
+- admin comes from households/{id}.created_by or users/{id}.is_admin (one
+  more read, loaded the first time an admin route asks)
+
+household_service invalidates a user's entries when their membership changes
+(create, join, leave, removal) and a household's entries when its admin may
+have changed. Writes made elsewhere (the frontend writing to Firestore
+directly, other API instances) are picked up once an entry is
+`access_cache_ttl_seconds` old.
+
+Answers served from the cache are counted as saved reads on the request
+(`X-Storage-Reads-Saved` in development) and in `access_cache.snapshot()`.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from src.config.firebase import get_firestore_client
+from src.config.settings import settings
+from src.services.user_loader import USERS_COLLECTION, get_user_loader
+from src.utils.request_context import record_reads, record_saved_reads
+from src.utils.singleflight import SingleFlight
+
+
+HOUSEHOLDS_COLLECTION = "households"
+
+
+class Access(NamedTuple):
+    """What a user may do in a household"""
+    member: bool
+    admin: Optional[bool]  # None until an admin check loads it
+
+
+class AccessCache:
+    """Bounded LRU of (user, household) authorization answers with a TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Access]]" = OrderedDict()
+        self._loads = SingleFlight()
+        # Bumped by every invalidation, so a load that started before it
+        # doesn't store a stale answer
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.reads_saved = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: Tuple[str, str]) -> Optional[Access]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: Tuple[str, str], access: Access, generation: int) -> None:
+        if generation != self._generation or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), access)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _hit(self, collection: str) -> None:
+        self.hits += 1
+        self.reads_saved += 1
+        record_saved_reads(collection, 1)
+
+    async def _load_member(self, user_id: str, household_id: str) -> bool:
+        user = await get_user_loader().load(user_id)
+        return user is not None and user.get("household_id") == household_id
+
+    async def _load_admin(self, user_id: str, household_id: str) -> bool:
+        household = await get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document(household_id).get(
+            field_paths=["created_by"]
+        )
+        record_reads(HOUSEHOLDS_COLLECTION, 1)
+        if (household.to_dict() or {}).get("created_by") == user_id:
+            return True
+        user = await get_user_loader().load(user_id) or {}
+        return bool(user.get("is_admin", False))
+
+    async def is_member(self, user_id: str, household_id: str) -> bool:
+        """
+        Whether a user belongs to a household
+
+        Args:
+            user_id: User ID
+            household_id: Household ID
+
+        Returns:
+            bool: True if users/{user_id}.household_id is the household
+        """
+        key = (user_id, household_id)
+        access = self._get(key)
+        if access is not None:
+            self._hit(USERS_COLLECTION)
+            return access.member
+        self.misses += 1
+        generation = self._generation
+        member = await self._loads.do(("member", key), lambda: self._load_member(user_id, household_id))
+        self._store(key, Access(member, None if member else False), generation)
+        return member
+
+    async def is_admin(self, user_id: str, household_id: str) -> bool:
+        """
+        Whether a user is a member and the admin of a household
+
+        Args:
+            user_id: User ID
+            household_id: Household ID
+
+        Returns:
+            bool: True if the user created (or was handed) the household, or
+            is a global admin
+        """
+        key = (user_id, household_id)
+        access = self._get(key)
+        if access is not None and access.admin is not None:
+            self._hit(HOUSEHOLDS_COLLECTION if access.member else USERS_COLLECTION)
+            return access.admin
+        if not await self.is_member(user_id, household_id):
+            return False
+        self.misses += 1
+        generation = self._generation
+        admin = await self._loads.do(("admin", key), lambda: self._load_admin(user_id, household_id))
+        self._store(key, Access(True, admin), generation)
+        return admin
+
+    def invalidate(self, user_id: Optional[str] = None, household_id: Optional[str] = None) -> None:
+        """
+        Forget the answers for a user, a household, or everything
+
+        Entries matching every given ID are dropped; with no IDs the whole
+        cache is cleared. Runs after membership and admin changes, which
+        are rare enough for a scan of the entries.
+        """
+        self._generation += 1
+        self.invalidations += 1
+        if user_id is None and household_id is None:
+            self._entries.clear()
+            return
+        stale = [
+            key for key in self._entries
+            if (user_id is None or key[0] == user_id) and (household_id is None or key[1] == household_id)
+        ]
+        for key in stale:
+            del self._entries[key]
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reads_saved": self.reads_saved,
+            "invalidations": self.invalidations,
+        }
+
+
+access_cache = AccessCache(
+    max_entries=settings.access_cache_max_entries,
+    ttl_seconds=settings.access_cache_ttl_seconds,
+)
+
@@ -1,6 +1,42 @@
 """Authentication service"""
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Optional
+from urllib.parse import quote
+from fastapi import HTTPException, status
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.config.firebase import get_firestore_client, run_transaction
+from src.models.household import HouseholdCreate
 from src.models.user import UserCreate, UserLogin, UserResponse, Token
+from src.services import household_service, token_verifier
+from src.services.password_hasher import password_hasher
+from src.services.user_loader import USERS_COLLECTION
+from src.utils.request_context import record_reads
+from src.utils.security import create_access_token
+
+
+PASSWORD_HASH_FIELD = "password_hash"
+# One document per registered email (ID: the URL-quoted email), created in
+# the same transaction as the user, so concurrent sign-ups can't both claim it
+USER_EMAILS_COLLECTION = "user_emails"
+
+
+def _email_taken() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered"
+    )
+
+
+async def _find_user_by_email(email: str) -> Optional[Any]:
+    """The user document registered with an email, if any"""
+    query = get_firestore_client().collection(USERS_COLLECTION).where(
+        filter=FieldFilter("email", "==", email)
+    ).limit(1)
+    docs = [doc async for doc in query.stream()]
+    record_reads(USERS_COLLECTION, len(docs))
+    return docs[0] if docs else None
 
 
 async def register_user(user_data: UserCreate) -> UserResponse:
@@ -12,9 +48,52 @@ async def register_user(user_data: UserCreate) -> UserResponse:
 
     Returns:
         UserResponse: Created user data
+
+    Raises:
+        HTTPException: If the email is already registered, or 503 when
+            too many password hashes are queued
     """
-    # TODO: Implement user registration
-    pass
+    # Accounts registered before user_emails existed have no reservation
+    if await _find_user_by_email(user_data.email) is not None:
+        raise _email_taken()
+    password_hash = await password_hasher.hash(user_data.password)
+
+    db = get_firestore_client()
+    ref = db.collection(USERS_COLLECTION).document()
+    email_ref = db.collection(USER_EMAILS_COLLECTION).document(quote(user_data.email, safe="@"))
+
+    async def write(transaction: Any) -> None:
+        if (await email_ref.get(transaction=transaction)).exists:
+            raise _email_taken()
+        transaction.create(email_ref, {"user_id": ref.id, "created_at": SERVER_TIMESTAMP})
+        transaction.create(ref, {
+            "email": user_data.email,
+            "name": user_data.name,
+            PASSWORD_HASH_FIELD: password_hash,
+            "household_id": None,
+            "is_admin": False,
+            "created_at": SERVER_TIMESTAMP,
+            "updated_at": SERVER_TIMESTAMP,
+        })
+
+    try:
+        await run_transaction(write)
+    except AlreadyExists:
+        raise _email_taken()
+    household_id = None
+    if user_data.household_name:
+        household = await household_service.create_household(HouseholdCreate(name=user_data.household_name), ref.id)
+        household_id = household.id
+
+    now = datetime.now(timezone.utc)
+    return UserResponse(
+        id=ref.id,
+        email=user_data.email,
+        name=user_data.name,
+        household_id=household_id,
+        created_at=now,
+        updated_at=now,
+    )
 
 
 async def login_user(credentials: UserLogin) -> Token:
@@ -26,9 +105,24 @@ async def login_user(credentials: UserLogin) -> Token:
 
     Returns:
         Token: JWT access token
+
+    Raises:
+        HTTPException: If the email or password is wrong, or 503 when too
+            many password checks are queued
     """
-    # TODO: Implement user login
-    pass
+    doc = await _find_user_by_email(credentials.email)
+    stored_hash = (doc.to_dict() or {}).get(PASSWORD_HASH_FIELD) if doc is not None else None
+    matches, new_hash = await password_hasher.verify_and_update(credentials.password, stored_hash)
+    if not matches or doc is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if new_hash is not None:
+        # The cost factor changed since this password was hashed
+        await doc.reference.update({PASSWORD_HASH_FIELD: new_hash, "updated_at": SERVER_TIMESTAMP})
+    return Token(access_token=create_access_token({"sub": doc.id}))
 
 
 async def login_with_google(id_token: str) -> Token:
@@ -63,11 +157,14 @@ async def verify_token(token: str) -> Optional[str]:
     """
     Verify JWT token and return user ID
 
+    Accepts the API's own access tokens and Firebase ID tokens; verified
+    tokens are cached until they expire (see token_verifier).
+
     Args:
-        token: JWT access token
+        token: JWT access token or Firebase ID token
 
     Returns:
         Optional[str]: User ID if valid, None otherwise
     """
-    # TODO: Implement token verification
-    pass
+    claims = await token_verifier.verify_token(token)
+    return claims.get("sub") if claims else None
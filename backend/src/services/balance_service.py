@@ -0,0 +1,367 @@
+"""Materialized household balances
+
+Every processed expense and payment is folded into one ledger document per
+household, households/{id}/ledger/balances:
+
+    net:   {user_id: cents}      positive = the others owe them
+    pairs: {a: {b: cents}}       a < b; positive = a owes b, negative = b owes a
+    expensesProcessed, paymentsProcessed, updatedAt
+
+Both kinds of record reduce to debts (debtor, creditor, cents):
+
+- expense: each entry's user owes the payer `amount_cents` (the payer's own
+  entry is no debt)
+- payment from A to B: B owes A the amount, which cancels A's debt to B
+
+`settled_cents` only records which entries a payment went to; the payment
+itself moves the balances, so entries are counted at their full amount.
+
+The debts are written as `Increment` transforms (set with merge) in the same
+transaction that stamps `processedAt` on the record (see expense_service).
+So each record changes the ledger exactly once, and the ledger is never
+read on the write path, which means concurrent writes don't contend on it.
+`GET /households/{id}/balances` is one document read.
+
+Expenses and payments that the frontend writes straight to Firestore carry
+no `processedAt` and stay out of the ledger until they are processed.
+Deleting or editing a processed record outside the API makes the ledger
+drift. `verify_balances` recomputes it from the full history and reports the
+drift, or repairs it. It runs on demand (POST
+/households/{id}/balances/verify) and, when `balance_verify_interval_seconds`
+is set, periodically over every household.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP, Increment
+from src.config.firebase import get_firestore_client, run_transaction
+from src.config.settings import settings
+from src.models.expense import BalanceVerification, HouseholdBalances, MemberBalance, PairwiseBalance
+from src.utils.request_context import record_reads
+
+
+logger = logging.getLogger(__name__)
+
+HOUSEHOLDS_COLLECTION = "households"
+EXPENSES_COLLECTION = "expenses"
+PAYMENTS_COLLECTION = "payments"
+LEDGER_COLLECTION = "ledger"
+BALANCES_DOCUMENT = "balances"
+
+# A debt: (debtor, creditor, cents)
+Debt = Tuple[str, str, int]
+
+
+def ledger_ref(household_id: str) -> Any:
+    """Reference to a household's balances document"""
+    return (
+        get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document(household_id)
+        .collection(LEDGER_COLLECTION).document(BALANCES_DOCUMENT)
+    )
+
+
+def expense_debts(payer_id: str, entries: Iterable[Dict[str, Any]]) -> List[Debt]:
+    """
+    Debts created by an expense
+
+    Args:
+        payer_id: User who paid up front
+        entries: Expense document entries (`userId`, `amountCents`)
+
+    Returns:
+        List[Debt]: One debt per entry of another user with a non-zero amount
+    """
+    debts = []
+    for entry in entries:
+        user_id = entry.get("userId")
+        amount = int(entry.get("amountCents") or 0)
+        if user_id and user_id != payer_id and amount:
+            debts.append((user_id, payer_id, amount))
+    return debts
+
+
+def payment_debts(from_user: str, to_user: str, total_cents: int) -> List[Debt]:
+    """
+    Debts created by a payment (the receiver now owes the payer)
+
+    Args:
+        from_user: User who paid
+        to_user: User who received
+        total_cents: Payment amount
+
+    Returns:
+        List[Debt]: The offsetting debt, if any
+    """
+    if from_user == to_user or not total_cents:
+        return []
+    return [(to_user, from_user, total_cents)]
+
+
+def _fold(debts: Iterable[Debt]) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]]]:
+    """Net and canonical pairwise changes of some debts"""
+    net: Dict[str, int] = {}
+    pairs: Dict[str, Dict[str, int]] = {}
+    for debtor, creditor, cents in debts:
+        net[creditor] = net.get(creditor, 0) + cents
+        net[debtor] = net.get(debtor, 0) - cents
+        low, high, sign = (debtor, creditor, 1) if debtor < creditor else (creditor, debtor, -1)
+        row = pairs.setdefault(low, {})
+        row[high] = row.get(high, 0) + sign * cents
+    return net, pairs
+
+
+def apply_debts(transaction: Any, household_id: str, debts: List[Debt], expenses: int = 0, payments: int = 0) -> None:
+    """
+    Add debts to a household's ledger inside a transaction
+
+    Only writes (increment transforms), so call it after the transaction's
+    reads.
+
+    Args:
+        transaction: Active transaction
+        household_id: Household ID
+        debts: Debts to add
+        expenses: Processed expenses to count
+        payments: Processed payments to count
+    """
+    net, pairs = _fold(debts)
+    # Empty maps are left out: merging one would replace the stored map
+    update: Dict[str, Any] = {"updatedAt": SERVER_TIMESTAMP}
+    net_update = {user_id: Increment(cents) for user_id, cents in net.items() if cents}
+    if net_update:
+        update["net"] = net_update
+    pair_update = {}
+    for low, row in pairs.items():
+        row_update = {high: Increment(cents) for high, cents in row.items() if cents}
+        if row_update:
+            pair_update[low] = row_update
+    if pair_update:
+        update["pairs"] = pair_update
+    if expenses:
+        update["expensesProcessed"] = Increment(expenses)
+    if payments:
+        update["paymentsProcessed"] = Increment(payments)
+    transaction.set(ledger_ref(household_id), update, merge=True)
+
+
+def balances_from_doc(household_id: str, data: Dict[str, Any]) -> HouseholdBalances:
+    """
+    Convert a ledger document to `HouseholdBalances`
+
+    Args:
+        household_id: Household ID
+        data: Ledger document data ({} when there is none yet)
+
+    Returns:
+        HouseholdBalances: Members by user ID, debts largest first
+    """
+    debts = []
+    for low, row in (data.get("pairs") or {}).items():
+        for high, cents in row.items():
+            if cents > 0:
+                debts.append(PairwiseBalance(from_user=low, to_user=high, amount_cents=cents))
+            elif cents < 0:
+                debts.append(PairwiseBalance(from_user=high, to_user=low, amount_cents=-cents))
+    debts.sort(key=lambda debt: (-debt.amount_cents, debt.from_user, debt.to_user))
+    return HouseholdBalances(
+        household_id=household_id,
+        members=[
+            MemberBalance(user_id=user_id, net_cents=cents)
+            for user_id, cents in sorted((data.get("net") or {}).items())
+        ],
+        debts=debts,
+        expenses_processed=data.get("expensesProcessed", 0),
+        payments_processed=data.get("paymentsProcessed", 0),
+        updated_at=data.get("updatedAt"),
+    )
+
+
+async def get_balances(household_id: str) -> HouseholdBalances:
+    """
+    Read a household's balances (one document read)
+
+    Args:
+        household_id: Household ID
+
+    Returns:
+        HouseholdBalances: Current balances, empty before the first
+        processed expense or payment
+    """
+    snapshot = await ledger_ref(household_id).get()
+    record_reads(LEDGER_COLLECTION, 1)
+    return balances_from_doc(household_id, snapshot.to_dict() or {})
+
+
+def _nonzero(net: Dict[str, int], pairs: Dict[str, Dict[str, int]]) -> Tuple[Dict[str, int], Dict[Tuple[str, str], int]]:
+    return (
+        {user_id: cents for user_id, cents in net.items() if cents},
+        {(low, high): cents for low, row in pairs.items() for high, cents in row.items() if cents},
+    )
+
+
+async def verify_balances(household_id: str, repair: bool = False) -> BalanceVerification:
+    """
+    Recompute a household's balances from every processed expense and payment
+
+    Runs in a transaction so the history and the ledger are read at the same
+    point (writers wait for it), which makes it a full scan of the
+    household's expenses and payments: an occasional job, not a request path.
+
+    Args:
+        household_id: Household ID
+        repair: Overwrite the ledger with the recomputed balances if they drifted
+
+    Returns:
+        BalanceVerification: The drift found, if any
+    """
+    household = get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document(household_id)
+
+    async def check(transaction: Any) -> BalanceVerification:
+        ledger = (await ledger_ref(household_id).get(transaction=transaction)).to_dict() or {}
+        debts: List[Debt] = []
+        result = BalanceVerification(household_id=household_id, consistent=True)
+        async for doc in household.collection(EXPENSES_COLLECTION).stream(transaction=transaction):
+            data = doc.to_dict()
+            if not data.get("processedAt"):
+                result.unprocessed_expenses += 1
+                continue
+            debts.extend(expense_debts(data.get("payerId"), data.get("entries") or []))
+            result.expenses_checked += 1
+        async for doc in household.collection(PAYMENTS_COLLECTION).stream(transaction=transaction):
+            data = doc.to_dict()
+            if not data.get("processedAt"):
+                result.unprocessed_payments += 1
+                continue
+            debts.extend(payment_debts(data.get("fromUser"), data.get("toUser"), int(data.get("totalCents") or 0)))
+            result.payments_checked += 1
+        record_reads(EXPENSES_COLLECTION, result.expenses_checked + result.unprocessed_expenses)
+        record_reads(PAYMENTS_COLLECTION, result.payments_checked + result.unprocessed_payments)
+        record_reads(LEDGER_COLLECTION, 1)
+
+        net, pairs = _fold(debts)
+        expected_net, expected_pairs = _nonzero(net, pairs)
+        stored_net, stored_pairs = _nonzero(ledger.get("net") or {}, ledger.get("pairs") or {})
+        for user_id in sorted(expected_net.keys() | stored_net.keys()):
+            drift = stored_net.get(user_id, 0) - expected_net.get(user_id, 0)
+            if drift:
+                result.net_drift[user_id] = drift
+        for low, high in sorted(expected_pairs.keys() | stored_pairs.keys()):
+            drift = stored_pairs.get((low, high), 0) - expected_pairs.get((low, high), 0)
+            if drift > 0:
+                result.pair_drift.append(PairwiseBalance(from_user=low, to_user=high, amount_cents=drift))
+            elif drift < 0:
+                result.pair_drift.append(PairwiseBalance(from_user=high, to_user=low, amount_cents=-drift))
+        counts_match = (
+            ledger.get("expensesProcessed", 0) == result.expenses_checked
+            and ledger.get("paymentsProcessed", 0) == result.payments_checked
+        )
+        result.consistent = not result.net_drift and not result.pair_drift and counts_match
+
+        if repair and not result.consistent:
+            transaction.set(ledger_ref(household_id), {
+                "net": net,
+                "pairs": pairs,
+                "expensesProcessed": result.expenses_checked,
+                "paymentsProcessed": result.payments_checked,
+                "updatedAt": SERVER_TIMESTAMP,
+            })
+            result.repaired = True
+        return result
+
+    return await run_transaction(check)
+
+
+class BalanceVerifier:
+    """Periodic `verify_balances` over every household"""
+
+    def __init__(self, interval_seconds: float, repair: bool):
+        self.interval_seconds = interval_seconds
+        self.repair = repair
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.checked = 0
+        self.drifted = 0
+        self.repaired = 0
+        self.failures = 0
+
+    async def run_once(self) -> List[BalanceVerification]:
+        """
+        Verify every household that has a ledger, one at a time
+
+        Returns:
+            List[BalanceVerification]: Results for households that drifted
+        """
+        drifted = []
+        households = get_firestore_client().collection(HOUSEHOLDS_COLLECTION).select([])
+        async for household in households.stream():
+            if not (await ledger_ref(household.id).get(field_paths=["updatedAt"])).exists:
+                continue
+            try:
+                result = await verify_balances(household.id, repair=self.repair)
+            except Exception:
+                self.failures += 1
+                logger.exception("Balance verification failed for household %s", household.id)
+                continue
+            self.checked += 1
+            if not result.consistent:
+                self.drifted += 1
+                self.repaired += result.repaired
+                drifted.append(result)
+                logger.warning(
+                    "Balances of household %s drifted (%s): net %s, pairs %s",
+                    household.id, "repaired" if result.repaired else "not repaired",
+                    result.net_drift, [debt.model_dump() for debt in result.pair_drift],
+                )
+        self.runs += 1
+        return drifted
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception:
+                self.failures += 1
+                logger.exception("Balance verification run failed")
+
+    def start(self) -> None:
+        """Run the verification every `interval_seconds` in the background"""
+        if self.interval_seconds > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background verification"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "runs": self.runs,
+            "checked": self.checked,
+            "drifted": self.drifted,
+            "repaired": self.repaired,
+            "failures": self.failures,
+        }
+
+
+balance_verifier = BalanceVerifier(
+    interval_seconds=settings.balance_verify_interval_seconds,
+    repair=settings.balance_verify_repair,
+)
+
+
+def initialize_balance_verifier() -> None:
+    """Start the periodic balance verification, if enabled"""
+    balance_verifier.start()
+
+
+async def close_balance_verifier() -> None:
+    """Stop the periodic balance verification"""
+    await balance_verifier.stop()
+
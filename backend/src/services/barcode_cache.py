@@ -0,0 +1,308 @@
+"""Barcode lookup cache
+
+Read-through cache in front of the barcode upstreams with two tiers:
+
+- an in-process LRU bounded by entry count, with per-entry TTL
+- an optional on-disk SQLite tier that survives process restarts (point
+  `barcode_cache_path` at a mounted volume to also survive Cloud Run cold
+  starts)
+
+"Not found" answers are cached too, under a shorter TTL, so repeated scans of
+unknown barcodes don't keep hitting the upstream quota.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from src.config.settings import settings
+
+
+class CacheStats:
+    """Hit/miss/eviction counters"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.negative_stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Counters as a plain dict"""
+        return dict(vars(self))
+
+
+class LRUCache:
+    """In-process LRU with per-entry expiry (wall-clock seconds)"""
+
+    def __init__(self, max_entries: int, stats: CacheStats):
+        self.max_entries = max_entries
+        self.stats = stats
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._expired: Set[str] = set()  # Keys already counted in `stats.expirations`
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: float, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Get a live entry
+
+        Expired entries are kept (until refreshed or evicted) so they can
+        still be served with `allow_stale` while the upstream is failing.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now and not allow_stale:
+            if key not in self._expired:
+                self._expired.add(key)
+                self.stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert or refresh an entry, evicting the least recently used"""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        self._expired.discard(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._expired.discard(evicted)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._entries.clear()
+        self._expired.clear()
+
+
+class DiskCache:
+    """SQLite-backed persistent tier"""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS barcode_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS barcode_cache_expires_at ON barcode_cache (expires_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, now: float, allow_stale: bool = False) -> Optional[Tuple[float, Any]]:
+        """Get a live (or, with `allow_stale`, expired) entry as (expires_at, value)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM barcode_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] <= now and not allow_stale):
+            return None
+        return row[1], json.loads(row[0])
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert or replace an entry"""
+        payload = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO barcode_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            self._conn.commit()
+
+    def prune(self, now: float) -> int:
+        """Delete expired rows and trim to `max_entries`, soonest-expiring first"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM barcode_cache WHERE expires_at <= ?", (now,)
+            ).rowcount
+            if self.max_entries > 0:
+                deleted += self._conn.execute(
+                    "DELETE FROM barcode_cache WHERE key IN ("
+                    " SELECT key FROM barcode_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def count(self) -> int:
+        """Number of stored rows"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM barcode_cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class BarcodeCache:
+    """Two-tier (memory + disk) cache for upstream barcode payloads"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 0,
+        disk_prune_every: int = 0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.stats = CacheStats()
+        self.memory = LRUCache(max_entries, self.stats)
+        self.disk = DiskCache(disk_path, disk_max_entries) if disk_path else None
+        self.disk_prune_every = disk_prune_every
+        self._disk_sets = 0
+        if self.disk is not None:
+            self.stats.evictions += self.disk.prune(time.time())
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached payload, promoting disk hits into memory
+
+        Args:
+            key: Cache key (see `make_key`)
+
+        Returns:
+            Optional[Any]: Cached payload or None on miss
+        """
+        now = time.time()
+        value = self.memory.get(key, now)
+        if value is not None:
+            self.stats.memory_hits += 1
+            return value
+
+        if self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get, key, now)
+            if entry is not None:
+                expires_at, value = entry
+                self.memory.set(key, value, expires_at)
+                self.stats.disk_hits += 1
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """
+        Look up a payload ignoring expiry, as a fallback while the upstream is down
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[Any]: Cached payload (possibly expired) or None
+        """
+        now = time.time()
+        value = self.memory.get(key, now, allow_stale=True)
+        if value is None and self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get, key, now, True)
+            if entry is not None:
+                value = entry[1]
+        if value is not None:
+            self.stats.stale_hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, negative: bool = False) -> None:
+        """
+        Store a payload in both tiers
+
+        Args:
+            key: Cache key
+            value: JSON-serializable payload
+            negative: True for "not found" answers (shorter TTL)
+        """
+        ttl = self.negative_ttl_seconds if negative else self.ttl_seconds
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self.memory.set(key, value, expires_at)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, expires_at)
+            self._disk_sets += 1
+            if self.disk_prune_every > 0 and self._disk_sets % self.disk_prune_every == 0:
+                self.stats.evictions += await asyncio.to_thread(self.disk.prune, time.time())
+        self.stats.stores += 1
+        if negative:
+            self.stats.negative_stores += 1
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Counters and sizes for monitoring"""
+        lookups = self.stats.memory_hits + self.stats.disk_hits + self.stats.misses
+        hits = self.stats.memory_hits + self.stats.disk_hits
+        return {
+            **self.stats.as_dict(),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_max_entries": self.memory.max_entries,
+            "disk_entries": await asyncio.to_thread(self.disk.count) if self.disk is not None else None,
+        }
+
+    def close(self) -> None:
+        """Release the disk tier"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+
+def make_key(source: str, barcode: str) -> str:
+    """Cache key for one upstream's answer about one barcode"""
+    return f"{source}:{barcode}"
+
+
+_cache: Optional[BarcodeCache] = None
+
+
+def initialize_barcode_cache() -> BarcodeCache:
+    """Open the barcode cache using the configured sizes and TTLs"""
+    global _cache
+    close_barcode_cache()
+    _cache = BarcodeCache(
+        max_entries=settings.barcode_cache_max_entries,
+        ttl_seconds=settings.barcode_cache_ttl_seconds,
+        negative_ttl_seconds=settings.barcode_cache_negative_ttl_seconds,
+        disk_path=settings.barcode_cache_path or None,
+        disk_max_entries=settings.barcode_cache_disk_max_entries,
+        disk_prune_every=settings.barcode_cache_disk_prune_every,
+    )
+    return _cache
+
+
+def close_barcode_cache() -> None:
+    """Close the barcode cache"""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def get_barcode_cache() -> BarcodeCache:
+    """Get the barcode cache, opening it lazily if needed"""
+    if _cache is None:
+        return initialize_barcode_cache()
+    return _cache
@@ -0,0 +1,510 @@
+"""Barcode lookup service
+
+Fetches product data from the UPC Database and Open Food Facts upstreams
+through the shared HTTP clients, with a read-through cache in front and
+concurrent identical lookups coalesced into one upstream call. Each upstream
+sits behind its own circuit breaker / adaptive concurrency limit, and the
+cache (even expired entries) is served when an upstream is failing.
+"""
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import HTTPException
+import httpx
+from src.config.http_client import get_upstream_client, UPC_DATABASE, OPEN_FOOD_FACTS
+from src.config.settings import settings
+from src.models.product import ProductInfo, ProductLookupResponse
+from src.services.barcode_cache import get_barcode_cache, make_key
+from src.utils.resilience import (
+    AIMDLimiter,
+    CircuitBreaker,
+    RetryBudget,
+    UpstreamGuard,
+    UpstreamRejected
+)
+from src.utils.singleflight import SingleFlight
+from src.utils.validators import normalize_barcode
+
+
+UPC_NOT_FOUND = {
+    "code": "NOT_FOUND",
+    "total": 0,
+    "items": []
+}
+
+OPENFOODFACTS_NOT_FOUND = {
+    "status": 0,
+    "status_verbose": "product not found"
+}
+
+# Shared by all lookups; keys are cache keys, so each upstream is coalesced separately
+inflight = SingleFlight()
+
+UPSTREAM_NAMES = {
+    UPC_DATABASE: "UPC Database",
+    OPEN_FOOD_FACTS: "Open Food Facts",
+}
+
+
+def _build_guard(name: str) -> UpstreamGuard:
+    """Resilience guard for one upstream, configured from settings"""
+    return UpstreamGuard(
+        name=name,
+        limiter=AIMDLimiter(
+            initial=settings.upstream_limit_initial,
+            minimum=settings.upstream_limit_min,
+            maximum=settings.upstream_limit_max,
+            latency_threshold=settings.upstream_limit_latency_threshold_seconds,
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=settings.upstream_breaker_failure_threshold,
+            reset_timeout=settings.upstream_breaker_reset_seconds,
+        ),
+        budget=RetryBudget(
+            ratio=settings.upstream_retry_budget_ratio,
+            max_tokens=max(1.0, settings.upstream_limit_max * settings.upstream_retry_budget_ratio),
+        ),
+        max_retries=settings.upstream_max_retries,
+    )
+
+
+guards = {name: _build_guard(name) for name in UPSTREAM_NAMES}
+
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """Errors that count against upstream health (throttling, 5xx, timeouts)"""
+    return isinstance(error, HTTPException) and (
+        error.status_code == 429 or error.status_code >= 500
+    )
+
+
+def _is_upstream_overload(error: Exception) -> bool:
+    """Errors that mean "send less" (throttling, gateway timeouts)"""
+    return isinstance(error, HTTPException) and error.status_code in (429, 503, 504)
+
+
+async def _guarded_fetch(source: str, fetch, barcode: str) -> dict:
+    """Call an upstream through its guard, turning local rejections into 503s"""
+    try:
+        return await guards[source].call(
+            lambda: fetch(barcode),
+            is_failure=_is_upstream_failure,
+            is_overload=_is_upstream_overload,
+        )
+    except UpstreamRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{UPSTREAM_NAMES[source]} API temporarily unavailable ({e.reason})"
+        )
+
+
+def upstream_status() -> dict:
+    """Resilience state of each upstream for monitoring"""
+    return {source: guard.snapshot() for source, guard in guards.items()}
+
+
+def is_upc_not_found(payload: dict) -> bool:
+    """Check if a UPC Database payload is a "not found" answer"""
+    return payload.get("code") == "NOT_FOUND" or not payload.get("items")
+
+
+def is_openfoodfacts_not_found(payload: dict) -> bool:
+    """Check if an Open Food Facts payload is a "not found" answer"""
+    return payload.get("status") == 0 or not payload.get("product")
+
+
+async def fetch_upc(barcode: str) -> dict:
+    """
+    Fetch a barcode from the UPC Database API (uncached)
+
+    Args:
+        barcode: UPC/EAN barcode
+
+    Returns:
+        dict: Upstream payload, or UPC_NOT_FOUND on 404
+
+    Raises:
+        HTTPException: On upstream errors or timeouts
+    """
+    try:
+        client = get_upstream_client(UPC_DATABASE)
+        response = await client.get("/prod/trial/lookup", params={"upc": barcode})
+
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 404:
+            return dict(UPC_NOT_FOUND)
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"UPC Database API error: {response.text}"
+            )
+
+    except HTTPException:
+        raise
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504,
+            detail="UPC Database API request timed out"
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Error connecting to UPC Database API: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+async def fetch_openfoodfacts(barcode: str) -> dict:
+    """
+    Fetch a barcode from the Open Food Facts API (uncached)
+
+    Args:
+        barcode: UPC/EAN barcode
+
+    Returns:
+        dict: Upstream payload, or OPENFOODFACTS_NOT_FOUND on 404
+
+    Raises:
+        HTTPException: On upstream errors or timeouts
+    """
+    try:
+        client = get_upstream_client(OPEN_FOOD_FACTS)
+        response = await client.get(f"/api/v2/product/{barcode}.json")
+
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 404:
+            return dict(OPENFOODFACTS_NOT_FOUND)
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Open Food Facts API error: {response.text}"
+            )
+
+    except HTTPException:
+        raise
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504,
+            detail="Open Food Facts API request timed out"
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Error connecting to Open Food Facts API: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+async def _cached_lookup(source: str, barcode: str, fetch, is_not_found) -> dict:
+    """Read-through cache lookup with single-flight upstream fetches"""
+    barcode = normalize_barcode(barcode)
+    cache = get_barcode_cache()
+    key = make_key(source, barcode)
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def fetch_and_store() -> dict:
+        payload = await _guarded_fetch(source, fetch, barcode)
+        await cache.set(key, payload, negative=is_not_found(payload))
+        return payload
+
+    try:
+        return await inflight.do(key, fetch_and_store)
+    except HTTPException as e:
+        if not _is_upstream_failure(e):
+            raise
+        stale = await cache.get_stale(key)
+        if stale is None:
+            raise
+        return stale
+
+
+async def lookup_upc(barcode: str) -> dict:
+    """
+    Look up a barcode in the UPC Database, serving from cache when possible
+
+    Args:
+        barcode: UPC/EAN barcode
+
+    Returns:
+        dict: UPC Database payload
+    """
+    return await _cached_lookup(UPC_DATABASE, barcode, fetch_upc, is_upc_not_found)
+
+
+async def lookup_openfoodfacts(barcode: str) -> dict:
+    """
+    Look up a barcode in Open Food Facts, serving from cache when possible
+
+    Args:
+        barcode: UPC/EAN barcode
+
+    Returns:
+        dict: Open Food Facts payload
+    """
+    return await _cached_lookup(OPEN_FOOD_FACTS, barcode, fetch_openfoodfacts, is_openfoodfacts_not_found)
+
+
+def _text(value) -> Optional[str]:
+    """Coerce an upstream scalar to a string (upstreams are not strict about types)"""
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+def product_from_openfoodfacts(payload: dict) -> Optional[ProductInfo]:
+    """
+    Convert an Open Food Facts payload to ProductInfo
+
+    Args:
+        payload: Open Food Facts API payload
+
+    Returns:
+        Optional[ProductInfo]: Product or None if not found
+    """
+    if is_openfoodfacts_not_found(payload):
+        return None
+    product = payload["product"]
+    tags = product.get("categories_tags")
+    nutriments = product.get("nutriments")
+    return ProductInfo(
+        name=_text(product.get("product_name")) or "",
+        product_name=_text(product.get("product_name")),
+        generic_name=_text(product.get("generic_name")),
+        brands=_text(product.get("brands")),
+        quantity=_text(product.get("quantity")),
+        image_url=_text(product.get("image_url")),
+        nutriments=nutriments if isinstance(nutriments, dict) else None,
+        categories=_text(product.get("categories")),
+        categories_tags=[str(tag) for tag in tags] if isinstance(tags, list) else None,
+        ingredients_text=_text(product.get("ingredients_text")),
+        allergens=_text(product.get("allergens")),
+        expiration_date=_text(product.get("expiration_date")),
+    )
+
+
+def product_from_upc(payload: dict) -> Optional[ProductInfo]:
+    """
+    Convert a UPC Database payload to ProductInfo (first item only)
+
+    Args:
+        payload: UPC Database API payload
+
+    Returns:
+        Optional[ProductInfo]: Product or None if not found
+    """
+    if is_upc_not_found(payload):
+        return None
+    item = payload["items"][0]
+    images = item.get("images") or []
+    return ProductInfo(
+        name=_text(item.get("title")) or "",
+        product_name=_text(item.get("title")),
+        brands=_text(item.get("brand")),
+        categories=_text(item.get("category")),
+        quantity=_text(item.get("size")),
+        image_url=_text(images[0]) if images else None,
+    )
+
+
+def is_generic_product_data(product: Optional[ProductInfo]) -> bool:
+    """
+    Check if product data is too generic or incomplete to use on its own
+
+    Args:
+        product: Product information
+
+    Returns:
+        bool: True if the name is generic or categories are missing
+    """
+    if product is None:
+        return True
+
+    name = (product.product_name or product.name or "").lower()
+    has_generic_name = (
+        not name
+        or "unknown" in name
+        or name in ("dishes", "product", "food")
+        or len(name) < 3
+    )
+    has_no_categories = not product.categories or len(product.categories) < 5
+
+    return has_generic_name or has_no_categories
+
+
+def merge_product_data(
+    primary: Optional[ProductInfo],
+    fallback: Optional[ProductInfo]
+) -> Optional[ProductInfo]:
+    """
+    Merge product data from two sources, preferring the primary
+
+    Args:
+        primary: Open Food Facts product (has nutrition data)
+        fallback: UPC Database product
+
+    Returns:
+        Optional[ProductInfo]: Merged product or None if neither exists
+    """
+    if primary is None:
+        return fallback
+    if fallback is None:
+        return primary
+
+    return ProductInfo(
+        name=primary.name or fallback.name,
+        product_name=primary.product_name or fallback.product_name or primary.name or fallback.name,
+        generic_name=primary.generic_name,
+        brands=primary.brands or fallback.brands,
+        quantity=primary.quantity or fallback.quantity,
+        image_url=primary.image_url or fallback.image_url,
+        nutriments=primary.nutriments,  # Only from Open Food Facts
+        categories=primary.categories or fallback.categories,
+        categories_tags=primary.categories_tags,
+        ingredients_text=primary.ingredients_text,
+        allergens=primary.allergens,
+        expiration_date=primary.expiration_date,
+    )
+
+
+async def _lookup_product_from(lookup, convert, barcode: str) -> Tuple[Optional[ProductInfo], Optional[HTTPException]]:
+    """Run one upstream lookup, returning (product, error) instead of raising"""
+    try:
+        return convert(await lookup(barcode)), None
+    except HTTPException as e:
+        return None, e
+
+
+async def lookup_product(barcode: str) -> ProductLookupResponse:
+    """
+    Look up a barcode in both upstreams concurrently and merge the result
+
+    Open Food Facts is preferred and returned as soon as it has usable data.
+    If UPC Database answers usefully first, Open Food Facts only gets
+    `barcode_hedge_delay_seconds` more to contribute before we merge with
+    whatever has arrived, so latency is bounded by the slower upstream rather
+    than the sum of both.
+
+    Args:
+        barcode: UPC/EAN barcode
+
+    Returns:
+        ProductLookupResponse: Merged product data
+
+    Raises:
+        HTTPException: If both upstreams failed
+    """
+    barcode = normalize_barcode(barcode)
+    off_task = asyncio.ensure_future(
+        _lookup_product_from(lookup_openfoodfacts, product_from_openfoodfacts, barcode)
+    )
+    upc_task = asyncio.ensure_future(
+        _lookup_product_from(lookup_upc, product_from_upc, barcode)
+    )
+
+    try:
+        pending = {off_task, upc_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if off_task in done and not is_generic_product_data(off_task.result()[0]):
+                return ProductLookupResponse(
+                    barcode=barcode,
+                    found=True,
+                    source=OPEN_FOOD_FACTS,
+                    product=off_task.result()[0],
+                )
+            if upc_task in done and off_task in pending and upc_task.result()[0] is not None:
+                await asyncio.wait(pending, timeout=settings.barcode_hedge_delay_seconds)
+                break
+    finally:
+        # Lookups run under single flight, so cancelling our wrapper leaves the
+        # shared upstream call running to fill the cache for the next scan
+        for task in (off_task, upc_task):
+            if not task.done():
+                task.cancel()
+
+    off_product, off_error = off_task.result() if off_task.done() and not off_task.cancelled() else (None, None)
+    upc_product, upc_error = upc_task.result() if upc_task.done() and not upc_task.cancelled() else (None, None)
+
+    if off_error is not None and upc_error is not None:
+        raise off_error
+
+    merged = merge_product_data(off_product, upc_product)
+    if off_product is not None and upc_product is not None:
+        source = "merged"
+    elif off_product is not None:
+        source = OPEN_FOOD_FACTS
+    elif upc_product is not None:
+        source = UPC_DATABASE
+    else:
+        source = None
+
+    return ProductLookupResponse(barcode=barcode, found=merged is not None, source=source, product=merged)
+
+
+def dedupe_barcodes(barcodes: List[str]) -> List[str]:
+    """
+    Normalize and de-duplicate barcodes, keeping first-seen order
+
+    Args:
+        barcodes: Raw barcodes
+
+    Returns:
+        List[str]: Unique, non-empty normalized barcodes
+    """
+    seen = set()
+    unique = []
+    for barcode in barcodes:
+        barcode = normalize_barcode(barcode)
+        if barcode and barcode not in seen:
+            seen.add(barcode)
+            unique.append(barcode)
+    return unique
+
+
+async def lookup_products(barcodes: List[str]) -> AsyncIterator[ProductLookupResponse]:
+    """
+    Resolve many barcodes with bounded concurrency, yielding results as they finish
+
+    Each barcode gets its own timeout, so one slow lookup can't hold up the
+    rest of the batch; failures are reported per barcode instead of raised.
+
+    Args:
+        barcodes: Barcodes to look up (normalized and de-duplicated here)
+
+    Yields:
+        ProductLookupResponse: One result per unique barcode, in completion order
+    """
+    semaphore = asyncio.Semaphore(settings.barcode_batch_concurrency)
+
+    async def resolve(barcode: str) -> ProductLookupResponse:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    lookup_product(barcode),
+                    timeout=settings.barcode_batch_item_timeout_seconds,
+                )
+            except asyncio.TimeoutError:
+                return ProductLookupResponse(barcode=barcode, found=False, error="Lookup timed out")
+            except HTTPException as e:
+                return ProductLookupResponse(barcode=barcode, found=False, error=str(e.detail))
+
+    tasks = [asyncio.ensure_future(resolve(barcode)) for barcode in dedupe_barcodes(barcodes)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away mid-stream: stop the lookups that haven't started
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,210 @@
+"""In-process household event fan-out
+
+Services publish one event per committed write (item changes, membership
+changes, household updates) to the household's channel. Every open event
+stream of that household holds a `Subscription` on the channel, so N
+connected clients share one publish: the event is serialized to its SSE
+frame once and the same bytes are queued for each subscriber.
+
+Publishing never waits on a subscriber. Each subscription has a bounded
+queue (`event_queue_max_events`); when a slow consumer lets it fill up, its
+backlog is dropped and replaced by a single `resync` marker, and the stream
+tells the client to catch up through `GET /items/changes` from the last
+token it received.
+
+Channels are per process: with several API instances, a client only sees
+writes made through the instance it is connected to until its next resync.
+
+Load test (idle connections, heartbeats and fan-out):
+
+    STORAGE_BACKEND=memory python -m scripts.bench_event_streams
+"""
+import asyncio
+import json
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set
+from src.config.settings import settings
+from src.utils.cursors import encode_cursor
+
+
+# Event types
+CHANGES = "changes"  # Item upserts/deletes, same shape as GET /items/changes
+MEMBERS = "members"  # Users joined or left the household
+HOUSEHOLD = "household"  # Household fields changed (name, invite code)
+RESYNC = "resync"  # The subscriber fell behind; catch up from the last token
+READY = "ready"  # Stream start, carries the current token
+
+
+def change_token(household_id: str, version: int) -> str:
+    """Resume token for a household version (same format as /items/changes tokens)"""
+    return encode_cursor("changes", version, household_id)
+
+
+class HouseholdEvent(NamedTuple):
+    """One published event, already framed for SSE"""
+    type: str
+    version: int
+    frame: bytes
+    left: frozenset  # User IDs that lost access with this event
+
+
+def frame(event_type: str, token: Optional[str], data: Dict[str, Any]) -> bytes:
+    """Encode one SSE event"""
+    lines = []
+    if token is not None:
+        lines.append(f"id: {token}")
+    lines.append(f"event: {event_type}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), default=str))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscription:
+    """One open stream's bounded queue on a household channel"""
+
+    def __init__(self, household_id: str, user_id: str, max_events: int):
+        self.household_id = household_id
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[HouseholdEvent]" = asyncio.Queue(maxsize=max_events)
+        self.lagged = False
+        self.dropped = 0
+
+    def offer(self, event: HouseholdEvent) -> None:
+        """Queue an event without blocking; on overflow keep only a resync marker"""
+        if self.lagged:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(HouseholdEvent(RESYNC, event.version, b"", event.left))
+
+    async def next(self, timeout: float) -> Optional[HouseholdEvent]:
+        """
+        Wait for the next event
+
+        Args:
+            timeout: Seconds to wait before giving up (time for a heartbeat)
+
+        Returns:
+            Optional[HouseholdEvent]: The event, or None on timeout
+        """
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event.type == RESYNC:
+            self.lagged = False
+        return event
+
+
+class EventHub:
+    """Per-household channels of subscriptions"""
+
+    def __init__(self, max_events: int, max_subscribers_per_household: int):
+        self.max_events = max_events
+        self.max_subscribers_per_household = max_subscribers_per_household
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, household_id: str, user_id: str) -> Optional[Subscription]:
+        """
+        Open a subscription on a household channel
+
+        Returns:
+            Optional[Subscription]: The subscription, or None if the household
+            is at `event_max_subscribers_per_household`
+        """
+        if self.is_full(household_id):
+            return None
+        subscription = Subscription(household_id, user_id, self.max_events)
+        self._channels.setdefault(household_id, set()).add(subscription)
+        return subscription
+
+    def is_full(self, household_id: str) -> bool:
+        """Whether a household is at `event_max_subscribers_per_household`"""
+        return self.subscribers(household_id) >= self.max_subscribers_per_household
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Close a subscription, dropping the channel when it was the last one"""
+        channel = self._channels.get(subscription.household_id)
+        if channel is None:
+            return
+        channel.discard(subscription)
+        if not channel:
+            del self._channels[subscription.household_id]
+
+    def subscribers(self, household_id: str) -> int:
+        return len(self._channels.get(household_id, ()))
+
+    def publish(
+        self,
+        household_id: str,
+        event_type: str,
+        version: int,
+        data: Dict[str, Any],
+        left: Iterable[str] = (),
+    ) -> None:
+        """
+        Send an event to every subscriber of a household
+
+        The frame is encoded once and only when someone is listening.
+
+        Args:
+            household_id: Household ID
+            event_type: One of CHANGES, MEMBERS, HOUSEHOLD
+            version: Household version the write committed at
+            data: JSON-serializable payload
+            left: Users who no longer belong to the household (their streams close)
+        """
+        channel = self._channels.get(household_id)
+        if not channel:
+            return
+        # No `id:` line: each stream prefixes its own resume token
+        event = HouseholdEvent(event_type, version, frame(event_type, None, data), frozenset(left))
+        self.published += 1
+        for subscription in list(channel):
+            subscription.offer(event)
+        self.delivered += len(channel)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "households": len(self._channels),
+            "subscribers": sum(len(channel) for channel in self._channels.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+event_hub = EventHub(
+    max_events=settings.event_queue_max_events,
+    max_subscribers_per_household=settings.event_max_subscribers_per_household,
+)
+
+
+def publish_item_changes(household_id: str, version: int, items: Iterable[Any] = (), deleted: Iterable[str] = ()) -> None:
+    """Publish upserted items (ItemResponse) and deleted item IDs committed at `version`"""
+    if not event_hub.subscribers(household_id):
+        return
+    event_hub.publish(household_id, CHANGES, version, {
+        "items": [item.model_dump(mode="json") for item in items],
+        "deleted": list(deleted),
+        "token": change_token(household_id, version),
+        "full_resync": False,
+    })
+
+
+def publish_members(household_id: str, version: int, joined: Iterable[str] = (), left: Iterable[str] = ()) -> None:
+    """Publish a membership change committed at `version`"""
+    left = list(left)
+    event_hub.publish(household_id, MEMBERS, version, {"joined": list(joined), "left": left}, left=left)
+
+
+def publish_household(household_id: str, version: int, fields: Iterable[str]) -> None:
+    """Publish which household fields changed at `version`"""
+    event_hub.publish(household_id, HOUSEHOLD, version, {"fields": list(fields)})
+
@@ -0,0 +1,107 @@
+"""Household event streams (Server-Sent Events)
+
+`open_event_stream` returns the SSE body, which subscribes to the
+household's channel on the event hub and sends:
+
+- `ready` with the current token, or, when resuming (`Last-Event-ID` or
+  `since=`), one `changes` event catching up from the token (the same
+  payload as `GET /items/changes`, including a full resync when the token is
+  too old)
+- live `changes` / `members` / `household` events; every event's `id` is a
+  token the client can resume from
+- `resync` when the client fell behind: fetch `/items/changes?since=<token>`
+- a `: ping` comment every `event_heartbeat_seconds` of silence
+
+The stream ends when the user leaves or is removed from the household.
+"""
+from typing import AsyncIterator, Optional, Set
+from fastapi import HTTPException, status
+from src.config.settings import settings
+from src.services import item_service, sync_service
+from src.services.event_hub import (
+    CHANGES,
+    READY,
+    RESYNC,
+    change_token,
+    event_hub,
+    frame,
+)
+
+
+RETRY_MILLISECONDS = 3000  # Reconnect delay suggested to EventSource clients
+
+
+def open_event_stream(household_id: str, user_id: str, since: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    Get a household's event stream
+
+    The subscription is opened by the stream itself, as its first step and
+    before the catch-up read, so no event committed after that read can be
+    missed, and a client that disconnects before the body is iterated leaves
+    nothing behind. A household that fills up in between gets a stream that
+    ends straight away; the client's reconnect is then refused here.
+
+    Args:
+        household_id: Household ID (access already verified)
+        user_id: Subscribing user ID
+        since: Resume token (Last-Event-ID), already checked with
+            `item_service.parse_change_token`, or None for live events only
+
+    Returns:
+        AsyncIterator[bytes]: SSE body
+
+    Raises:
+        HTTPException: If the household already has too many open streams
+    """
+    if event_hub.is_full(household_id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open event streams for this household"
+        )
+    return _stream(household_id, user_id, since)
+
+
+async def _stream(household_id: str, user_id: str, since: Optional[str]) -> AsyncIterator[bytes]:
+    subscription = event_hub.subscribe(household_id, user_id)
+    if subscription is None:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode()
+        return
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode()
+        if since:
+            changes = await item_service.get_item_changes(household_id, user_id, since)
+            token = changes.token
+            yield frame(CHANGES, token, changes.model_dump(mode="json"))
+        else:
+            state = await sync_service.read_versions(household_id)
+            token = change_token(household_id, state.version)
+            yield frame(READY, token, {"token": token})
+        floor = item_service.parse_change_token(token, household_id)
+
+        # Versions are consecutive per household, but concurrent writes may
+        # publish out of order: only advance the resume token over a gap-free
+        # prefix (gaps are given up on at the next heartbeat)
+        delivered = floor
+        ahead: Set[int] = set()
+        while True:
+            event = await subscription.next(settings.event_heartbeat_seconds)
+            if event is None:
+                if ahead:
+                    delivered, ahead = max(ahead), set()
+                yield b": ping\n\n"
+                continue
+            if event.type == RESYNC:
+                yield frame(RESYNC, None, {"token": change_token(household_id, delivered)})
+                if subscription.user_id in event.left:
+                    return
+                continue
+            if event.version > floor:
+                ahead.add(event.version)
+                while delivered + 1 in ahead:
+                    delivered += 1
+                    ahead.discard(delivered)
+                yield b"id: " + change_token(household_id, delivered).encode() + b"\n" + event.frame
+            if subscription.user_id in event.left:
+                return
+    finally:
+        event_hub.unsubscribe(subscription)
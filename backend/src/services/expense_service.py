@@ -0,0 +1,412 @@
+"""Expense and payment processing
+
+Expenses and payments live in households/{id}/expenses and
+households/{id}/payments, in the frontend's camelCase document shape.
+Processing one stamps `processedAt` and adds its debts to the household's
+balances (see balance_service) in the same transaction, so the ledger takes
+every record exactly once:
+
+- `create_expense` / `record_payment` write and process a new record
+- `process_expense` / `process_payment` process a record the frontend wrote
+  directly; processing an already processed record changes nothing
+
+Processed payments are then applied to expense entries (see
+payment_allocator).
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from fastapi import HTTPException, status
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from src.config.firebase import get_firestore_client, run_transaction
+from src.models.expense import Expense, ExpenseCreate, ExpenseEntry, Payment, PaymentApply, PaymentCreate
+from src.services import balance_service, payment_allocator, split_service
+from src.services.balance_service import EXPENSES_COLLECTION, HOUSEHOLDS_COLLECTION, PAYMENTS_COLLECTION
+from src.services.user_loader import member_cache
+from src.utils.request_context import record_reads
+
+
+logger = logging.getLogger(__name__)
+
+
+def _collection(household_id: str, name: str) -> Any:
+    return get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document(household_id).collection(name)
+
+
+def _not_found(what: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"{what} not found"
+    )
+
+
+def _entries_to_doc(entries: Iterable[ExpenseEntry]) -> List[Dict[str, Any]]:
+    return [
+        {"userId": entry.user_id, "amountCents": entry.amount_cents, "settledCents": entry.settled_cents}
+        for entry in entries
+    ]
+
+
+def expense_from_doc(expense_id: str, household_id: str, data: Dict[str, Any]) -> Expense:
+    """
+    Convert an expense document to an `Expense`
+
+    Args:
+        expense_id: Expense document ID
+        household_id: Household the expense belongs to
+        data: Expense document data
+
+    Returns:
+        Expense: Expense model
+    """
+    return Expense(
+        id=expense_id,
+        household_id=household_id,
+        created_by=data.get("createdBy") or "",
+        payer_id=data.get("payerId") or "",
+        total_cents=int(data.get("totalCents") or 0),
+        currency=data.get("currency") or "USD",
+        participants=data.get("participants") or [],
+        method=data.get("method") or "equal",
+        shares=data.get("shares"),
+        custom_amounts=data.get("customAmounts"),
+        item_id=data.get("itemId"),
+        entries=[
+            ExpenseEntry(
+                user_id=entry.get("userId", ""),
+                amount_cents=int(entry.get("amountCents") or 0),
+                settled_cents=int(entry.get("settledCents") or 0),
+            )
+            for entry in data.get("entries") or []
+        ],
+        rounding_adjustment_cents=int(data.get("roundingAdjustmentCents") or 0),
+        note=data.get("note"),
+        status=data.get("status") or "open",
+        created_at=data.get("createdAt") or datetime.now(timezone.utc),
+        processed_at=data.get("processedAt"),
+    )
+
+
+def payment_from_doc(payment_id: str, household_id: str, data: Dict[str, Any]) -> Payment:
+    """
+    Convert a payment document to a `Payment`
+
+    Args:
+        payment_id: Payment document ID
+        household_id: Household the payment belongs to
+        data: Payment document data
+
+    Returns:
+        Payment: Payment model
+    """
+    applies_to = data.get("appliesTo")
+    return Payment(
+        id=payment_id,
+        household_id=household_id,
+        from_user=data.get("fromUser") or "",
+        to_user=data.get("toUser") or "",
+        total_cents=int(data.get("totalCents") or 0),
+        currency=data.get("currency") or "USD",
+        applies_to=[
+            PaymentApply(
+                expense_id=apply.get("expenseId", ""),
+                user_id=apply.get("userId", ""),
+                amount_cents=int(apply.get("amountCents") or 0),
+            )
+            for apply in applies_to
+        ] if applies_to is not None else None,
+        note=data.get("note"),
+        status=data.get("status") or "completed",
+        created_at=data.get("createdAt") or datetime.now(timezone.utc),
+        processed_at=data.get("processedAt"),
+        allocated_cents=int(data.get(payment_allocator.ALLOCATED_FIELD) or 0),
+    )
+
+
+async def _check_members(household_id: str, user_ids: Iterable[str]) -> None:
+    """
+    Raises:
+        HTTPException: If any of the users isn't a member of the household
+    """
+    members = await member_cache.get(household_id)
+    outsiders = sorted(set(user_ids) - set(members))
+    if outsiders:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not members of this household: {', '.join(outsiders)}"
+        )
+
+
+def _canonical_entries(expense_id: str, household_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entries to process an expense document with
+
+    Documents without entries are split here; entries the frontend computed
+    are kept if they add up to the total.
+
+    Returns:
+        Dict: Document fields to write (`participants`, `entries`,
+        `roundingAdjustmentCents`)
+    """
+    expense = expense_from_doc(expense_id, household_id, data)
+    if expense.entries:
+        total = sum(entry.amount_cents for entry in expense.entries)
+        if total != expense.total_cents:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Expense entries add up to {total} cents, expected {expense.total_cents}"
+            )
+        return {}
+    split = split_service.split_expense(ExpenseCreate(**expense.model_dump(exclude={"entries"})))
+    return {
+        "participants": split.participants,
+        "entries": _entries_to_doc(split.entries),
+        "roundingAdjustmentCents": split.rounding_adjustment_cents,
+    }
+
+
+async def create_expense(expense_data: ExpenseCreate, user_id: str) -> Expense:
+    """
+    Create an expense and add it to the household's balances
+
+    Args:
+        expense_data: Expense to create (access to its household already verified)
+        user_id: ID of the user creating it
+
+    Returns:
+        Expense: Created, processed expense
+
+    Raises:
+        HTTPException: If the creator isn't the user, the payer or a
+            participant isn't a household member, or the split is invalid
+    """
+    if expense_data.created_by != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Expenses can only be created by the authenticated user"
+        )
+    household_id = expense_data.household_id
+    split = split_service.split_expense(expense_data)
+    await _check_members(household_id, [expense_data.payer_id, *split.participants])
+
+    ref = _collection(household_id, EXPENSES_COLLECTION).document()
+    data: Dict[str, Any] = {
+        "createdBy": user_id,
+        "payerId": expense_data.payer_id,
+        "totalCents": expense_data.total_cents,
+        "currency": expense_data.currency,
+        "participants": split.participants,
+        "method": expense_data.method,
+        "shares": expense_data.shares,
+        "customAmounts": expense_data.custom_amounts,
+        "entries": _entries_to_doc(split.entries),
+        "roundingAdjustmentCents": split.rounding_adjustment_cents,
+        "note": expense_data.note,
+        "status": "open",
+        "itemId": expense_data.item_id,
+        "createdAt": SERVER_TIMESTAMP,
+        "processedAt": SERVER_TIMESTAMP,
+    }
+
+    async def write(transaction: Any) -> None:
+        transaction.set(ref, data)
+        balance_service.apply_debts(
+            transaction, household_id, balance_service.expense_debts(expense_data.payer_id, data["entries"]), expenses=1
+        )
+
+    await run_transaction(write)
+    now = datetime.now(timezone.utc)
+    data = {**data, "createdAt": now, "processedAt": now}
+    payment_allocator.open_entries.add_expense(household_id, ref.id, data)
+    return expense_from_doc(ref.id, household_id, data)
+
+
+async def process_expense(household_id: str, expense_id: str) -> Expense:
+    """
+    Add an expense written by the frontend to the household's balances
+
+    Args:
+        household_id: Household ID (access already verified)
+        expense_id: Expense document ID
+
+    Returns:
+        Expense: Processed expense (unchanged if it already was)
+
+    Raises:
+        HTTPException: If the expense doesn't exist, is cancelled or its
+            entries don't describe a valid split
+    """
+    ref = _collection(household_id, EXPENSES_COLLECTION).document(expense_id)
+
+    async def write(transaction: Any) -> Dict[str, Any]:
+        snapshot = await ref.get(transaction=transaction)
+        record_reads(EXPENSES_COLLECTION, 1)
+        if not snapshot.exists:
+            raise _not_found("Expense")
+        data = snapshot.to_dict()
+        if data.get("processedAt"):
+            return data
+        if data.get("status") == "cancelled":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Cancelled expenses are not added to balances"
+            )
+        updates = {**_canonical_entries(expense_id, household_id, data), "processedAt": SERVER_TIMESTAMP}
+        transaction.update(ref, updates)
+        entries = updates.get("entries", data.get("entries") or [])
+        balance_service.apply_debts(
+            transaction, household_id, balance_service.expense_debts(data.get("payerId"), entries), expenses=1
+        )
+        return {**data, **updates, "processedAt": datetime.now(timezone.utc)}
+
+    data = await run_transaction(write)
+    payment_allocator.open_entries.add_expense(household_id, expense_id, data)
+    return expense_from_doc(expense_id, household_id, data)
+
+
+def _with_allocations(data: Dict[str, Any], allocations: List[payment_allocator.Allocation]) -> Dict[str, Any]:
+    """Payment document data after `allocate_payment` applied some allocations"""
+    if not allocations:
+        return data
+    return {
+        **data,
+        "appliesTo": (data.get("appliesTo") or []) + [
+            {"expenseId": allocation.expense_id, "userId": allocation.user_id, "amountCents": allocation.amount_cents}
+            for allocation in allocations
+        ],
+        payment_allocator.ALLOCATED_FIELD: int(data.get(payment_allocator.ALLOCATED_FIELD) or 0)
+        + sum(allocation.amount_cents for allocation in allocations),
+    }
+
+
+async def _allocate(household_id: str, payment_id: str, applies_to: Optional[List[PaymentApply]] = None) -> List[payment_allocator.Allocation]:
+    """
+    Apply a processed payment to expense entries, keeping what was applied if allocation fails
+
+    The payment and its balances are already committed, so a failure is
+    logged rather than raised; the rest stays unallocated until the payment
+    is processed again.
+    """
+    allocations: List[payment_allocator.Allocation] = []
+    try:
+        await payment_allocator.allocate_payment(household_id, payment_id, applies_to, applied=allocations)
+    except Exception:
+        logger.exception("Allocating payment %s of household %s failed after %d allocations", payment_id, household_id, len(allocations))
+    return allocations
+
+
+def _check_payment(from_user: str, to_user: str, total_cents: int) -> None:
+    if from_user == to_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A payment needs two different users"
+        )
+    if total_cents <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Payment amount must be positive"
+        )
+
+
+async def record_payment(payment_data: PaymentCreate, user_id: str) -> Payment:
+    """
+    Record a payment, add it to the household's balances and apply it to
+    expense entries (`applies_to`, or the oldest open ones)
+
+    Args:
+        payment_data: Payment to record (access to its household already verified)
+        user_id: ID of the user recording it (the payer or the receiver)
+
+    Returns:
+        Payment: Recorded, processed payment
+
+    Raises:
+        HTTPException: If the user isn't a party to the payment, either party
+            isn't a household member, the amount isn't positive, or
+            `applies_to` names entries the payment can't settle
+    """
+    if user_id not in (payment_data.from_user, payment_data.to_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Payments can only be recorded by the payer or the receiver"
+        )
+    _check_payment(payment_data.from_user, payment_data.to_user, payment_data.total_cents)
+    household_id = payment_data.household_id
+    await _check_members(household_id, [payment_data.from_user, payment_data.to_user])
+    if payment_data.applies_to:
+        await payment_allocator.validate_applies_to(
+            household_id, payment_data.from_user, payment_data.to_user, payment_data.total_cents, payment_data.applies_to
+        )
+
+    ref = _collection(household_id, PAYMENTS_COLLECTION).document()
+    data = {
+        "fromUser": payment_data.from_user,
+        "toUser": payment_data.to_user,
+        "totalCents": payment_data.total_cents,
+        "currency": payment_data.currency,
+        "appliesTo": [],  # Filled in by payment_allocator
+        payment_allocator.ALLOCATED_FIELD: 0,
+        "note": payment_data.note,
+        "status": "completed",
+        "createdAt": SERVER_TIMESTAMP,
+        "processedAt": SERVER_TIMESTAMP,
+    }
+
+    async def write(transaction: Any) -> None:
+        transaction.set(ref, data)
+        balance_service.apply_debts(
+            transaction, household_id,
+            balance_service.payment_debts(payment_data.from_user, payment_data.to_user, payment_data.total_cents),
+            payments=1,
+        )
+
+    await run_transaction(write)
+    now = datetime.now(timezone.utc)
+    allocations = await _allocate(household_id, ref.id, payment_data.applies_to or None)
+    return payment_from_doc(ref.id, household_id, _with_allocations({**data, "createdAt": now, "processedAt": now}, allocations))
+
+
+async def process_payment(household_id: str, payment_id: str) -> Payment:
+    """
+    Add a payment written by the frontend to the household's balances
+
+    A payment without `appliesTo` is then applied to the payer's oldest open
+    entries; an interrupted allocation picks up where it stopped.
+
+    Args:
+        household_id: Household ID (access already verified)
+        payment_id: Payment document ID
+
+    Returns:
+        Payment: Processed payment (unchanged if it already was)
+
+    Raises:
+        HTTPException: If the payment doesn't exist, isn't completed or is invalid
+    """
+    ref = _collection(household_id, PAYMENTS_COLLECTION).document(payment_id)
+
+    async def write(transaction: Any) -> Dict[str, Any]:
+        snapshot = await ref.get(transaction=transaction)
+        record_reads(PAYMENTS_COLLECTION, 1)
+        if not snapshot.exists:
+            raise _not_found("Payment")
+        data = snapshot.to_dict()
+        if data.get("processedAt"):
+            return data
+        if (data.get("status") or "completed") != "completed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Only completed payments are added to balances"
+            )
+        from_user, to_user = data.get("fromUser"), data.get("toUser")
+        total_cents = int(data.get("totalCents") or 0)
+        _check_payment(from_user, to_user, total_cents)
+        transaction.update(ref, {"processedAt": SERVER_TIMESTAMP})
+        balance_service.apply_debts(
+            transaction, household_id, balance_service.payment_debts(from_user, to_user, total_cents), payments=1
+        )
+        return {**data, "processedAt": datetime.now(timezone.utc)}
+
+    data = await run_transaction(write)
+    allocations = await _allocate(household_id, payment_id)
+    return payment_from_doc(payment_id, household_id, _with_allocations(data, allocations))
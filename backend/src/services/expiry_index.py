@@ -0,0 +1,210 @@
+"""Per-household expiry index
+
+Keeps each household's items ordered by expiry date so "expired",
+"expiring within N days" and the `expiring_soon` / `expired` filters are
+bisect range lookups instead of a scan over every item calling
+`is_expiring_soon` / `is_date_expired` (and `date.today()`) per item.
+
+An index is loaded from Firestore the first time a household is queried and
+is kept current by item_service's create/update/delete. Items written
+directly by the frontend (or by another API instance) bypass those hooks, so
+once an index is `expiry_index_refresh_seconds` old it is refreshed
+incrementally: only items whose `updated_at` is past the index's sync time
+and tombstones past its household version are read and applied. Deletes
+that leave no tombstone (the console, admin scripts) have nothing to replay,
+so the whole index is still reloaded every `expiry_index_ttl_seconds` as a
+safety net.
+
+Grocery-list items and items without an expiry date are kept out of the
+ordered keys (the frontend never shows them as expiring or expired), but are
+still returned by `items()`.
+
+Benchmark against the naive filter:
+
+    python -m scripts.bench_expiry_index
+"""
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from src.config.settings import settings
+from src.models.item import ItemResponse
+from src.utils.expiry_status import household_today
+from src.utils.singleflight import SingleFlight
+
+
+class ExpiryIndex:
+    """One household's items, with dated pantry items ordered by expiry"""
+
+    def __init__(
+        self,
+        items: Iterable[ItemResponse] = (),
+        timezone_name: Optional[str] = None,
+        version: int = 0,
+        synced_at: Optional[datetime] = None,
+    ):
+        self.timezone_name = timezone_name
+        self.version = version  # Household version the index has caught up with
+        self.synced_at = synced_at  # Items updated after this may be missing
+        self._items: Dict[str, ItemResponse] = {}
+        self._keys: List[Tuple[int, str]] = []  # (expiry ordinal, item id), sorted
+        self.loaded_at = self.refreshed_at = time.monotonic()
+        for item in items:
+            self._items[item.id] = item
+        self._keys = sorted(
+            key for key in (self._key(item) for item in self._items.values()) if key is not None
+        )
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def _key(item: ItemResponse) -> Optional[Tuple[int, str]]:
+        if item.expiry_date is None or item.is_grocery:
+            return None
+        return item.expiry_date.toordinal(), item.id
+
+    def _remove_key(self, key: Optional[Tuple[int, str]]) -> None:
+        if key is None:
+            return
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def today(self) -> date:
+        """Current date in the household's timezone"""
+        return household_today(self.timezone_name)
+
+    def get(self, item_id: str) -> Optional[ItemResponse]:
+        """Get an indexed item"""
+        return self._items.get(item_id)
+
+    def upsert(self, item: ItemResponse) -> None:
+        """Insert or replace an item, moving it if its expiry date changed"""
+        previous = self._items.get(item.id)
+        if previous is not None:
+            self._remove_key(self._key(previous))
+        self._items[item.id] = item
+        key = self._key(item)
+        if key is not None:
+            insort(self._keys, key)
+
+    def remove(self, item_id: str) -> None:
+        """Drop an item if present"""
+        previous = self._items.pop(item_id, None)
+        if previous is not None:
+            self._remove_key(self._key(previous))
+
+    def items(self) -> List[ItemResponse]:
+        """Every item, in insertion order"""
+        return list(self._items.values())
+
+    def between(self, start: Optional[date], end: Optional[date]) -> List[ItemResponse]:
+        """
+        Dated pantry items expiring in [start, end], soonest first
+
+        Args:
+            start: First day of the range (None for unbounded)
+            end: Last day of the range (None for unbounded)
+
+        Returns:
+            List[ItemResponse]: Matching items ordered by expiry date
+        """
+        lo = 0 if start is None else bisect_left(self._keys, (start.toordinal(),))
+        hi = len(self._keys) if end is None else bisect_right(self._keys, (end.toordinal() + 1,))
+        return [self._items[item_id] for _, item_id in self._keys[lo:hi]]
+
+    def expired(self, today: date) -> List[ItemResponse]:
+        """Items whose expiry date is before today"""
+        return self.between(None, today - timedelta(days=1))
+
+    def expiring(self, today: date, days: int) -> List[ItemResponse]:
+        """Items expiring between today and today + days, inclusive"""
+        return self.between(today, today + timedelta(days=days))
+
+
+class ExpiryIndexRegistry:
+    """Bounded LRU of per-household indexes"""
+
+    def __init__(self, max_households: int, ttl_seconds: float, refresh_seconds: float):
+        self.max_households = max_households
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = refresh_seconds
+        self._indexes: "OrderedDict[str, ExpiryIndex]" = OrderedDict()
+        self._loads = SingleFlight()
+
+    def _fresh(self, index: ExpiryIndex) -> bool:
+        now = time.monotonic()
+        return now - index.loaded_at < self.ttl_seconds and now - index.refreshed_at < self.refresh_seconds
+
+    async def get(
+        self,
+        household_id: str,
+        load: Callable[[], Awaitable[ExpiryIndex]],
+        refresh: Optional[Callable[[ExpiryIndex], Awaitable[ExpiryIndex]]] = None,
+    ) -> ExpiryIndex:
+        """
+        Get a household's index, refreshing it when older than the refresh
+        interval and loading it when missing or older than the TTL
+
+        Concurrent requests for the same household share one load or refresh.
+
+        Args:
+            household_id: Household ID
+            load: Builds the household's index from storage
+            refresh: Catches an index up with storage, returning it (or a
+                freshly loaded one); without it stale indexes are reloaded
+
+        Returns:
+            ExpiryIndex: The household's index
+        """
+        index = self._indexes.get(household_id)
+        if index is not None and self._fresh(index):
+            self._indexes.move_to_end(household_id)
+            return index
+
+        if index is not None and refresh is not None and time.monotonic() - index.loaded_at < self.ttl_seconds:
+            stale = index
+            loaded: ExpiryIndex = await self._loads.do(household_id, lambda: refresh(stale))
+        else:
+            loaded = await self._loads.do(household_id, load)
+        self._indexes[household_id] = loaded
+        self._indexes.move_to_end(household_id)
+        while len(self._indexes) > self.max_households:
+            self._indexes.popitem(last=False)
+        return loaded
+
+    def peek(self, household_id: str) -> Optional[ExpiryIndex]:
+        """Get a household's index only if it is already loaded and needs no refresh"""
+        index = self._indexes.get(household_id)
+        if index is None or not self._fresh(index):
+            return None
+        return index
+
+    def upsert(self, item: ItemResponse) -> None:
+        """Apply a created or updated item to its household's loaded index"""
+        index = self._indexes.get(item.household_id)
+        if index is not None:
+            index.upsert(item)
+
+    def remove(self, household_id: str, item_id: str) -> None:
+        """Apply a deleted item to its household's loaded index"""
+        index = self._indexes.get(household_id)
+        if index is not None:
+            index.remove(item_id)
+
+    def invalidate(self, household_id: Optional[str] = None) -> None:
+        """Forget one household's index, or all of them"""
+        if household_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(household_id, None)
+
+
+expiry_indexes = ExpiryIndexRegistry(
+    max_households=settings.expiry_index_max_households,
+    ttl_seconds=settings.expiry_index_ttl_seconds,
+    refresh_seconds=settings.expiry_index_refresh_seconds,
+)
+
@@ -0,0 +1,226 @@
+"""Expiry date estimation service
+
+Server-side port of `estimateExpiryDate` in the frontend's barcodeService.ts:
+FoodKeeper shelf life first, then the category heuristics for perishables.
+Estimates are resolved through a memo keyed by the normalized name and
+category, so a shopping trip with "Milk", "milk " and "MILK" runs the
+FoodKeeper matcher once.
+"""
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from src.config.settings import settings
+from src.models.foodkeeper import ExpiryEstimate, ExpiryEstimateItem
+from src.services import foodkeeper_service
+
+
+PRESERVED_WORDS = (
+    "spread", "jam", "jelly", "preserve", "jarred", "canned", "sauce", "syrup",
+    "honey", "marmalade", "chutney", "paste",
+)
+
+PERISHABLE_WORDS = (
+    "milk", "yogurt", "dairy", "meat", "fish", "seafood", "bread", "fresh",
+    "fruit", "vegetable", "produce", "cheese", "egg", "deli",
+)
+
+# Name words -> inferred category, checked in order when no category is given
+INFERRED_CATEGORIES = (
+    (("milk", "yogurt", "dairy"), "dairy"),
+    (("cheese",), "cheese"),
+    (("meat", "beef", "pork", "chicken"), "meat"),
+    (("fish", "seafood"), "fish"),
+    (("bread", "bakery"), "bread"),
+    (("fresh fruit", "fresh berry"), "fruit"),
+    (("fresh vegetable", "lettuce", "carrot"), "vegetable"),
+    (("egg",), "egg"),
+    (("deli", "sandwich"), "deli"),
+)
+
+# Category words -> days in the fridge, checked in order
+CATEGORY_DAYS = (
+    (("milk", "yogurt", "dairy"), 7),
+    (("meat", "fish", "seafood"), 3),
+    (("bread",), 5),
+    (("fruit", "vegetable", "produce"), 5),
+    (("cheese",), 14),
+    (("egg",), 21),
+    (("deli",), 3),
+)
+DEFAULT_PERISHABLE_DAYS = 7
+
+SHELF_STABLE_MESSAGE = (
+    'This is a shelf-stable product. Please check the "Best By" or "Use By" date on the package.'
+)
+UNKNOWN_TYPE_MESSAGE = (
+    "Could not determine product type. If perishable, please enter expiry date manually."
+)
+
+
+class ShelfLife(NamedTuple):
+    """Date-independent part of an estimate (what the memo stores)"""
+    days: Optional[int]
+    confidence: str
+    message: str
+    storage_tips: Optional[str] = None
+    foodkeeper_product_id: Optional[int] = None
+    foodkeeper_product_name: Optional[str] = None
+
+
+def _contains_any(text: str, words: Iterable[str]) -> bool:
+    return any(word in text for word in words)
+
+
+def memo_key(name: str, category: Optional[str]) -> Tuple[str, str]:
+    """Normalized (name, category) used to share estimates between spellings"""
+    return " ".join(name.lower().split()), " ".join((category or "").lower().split())
+
+
+def estimate_shelf_life(name: str, category: Optional[str] = None) -> ShelfLife:
+    """
+    Estimate how many days a product keeps, without the memo
+
+    Args:
+        name: Product name
+        category: Optional comma-separated product categories
+
+    Returns:
+        ShelfLife: Days (None when the date should be left blank), confidence and message
+    """
+    index = foodkeeper_service.get_foodkeeper_index()
+    primary_category = category.split(",")[0].strip() if category else None
+    storage_tips = None
+    product_id = None
+    product_name = None
+
+    match = index.search(name, primary_category or None)
+    if match is not None:
+        product, _ = match
+        storage_tips = foodkeeper_service.get_storage_tips(product)
+        product_id = product.id
+        product_name = product.name
+        days = foodkeeper_service.get_shelf_life_days(product)
+        if days > 0:
+            return ShelfLife(
+                days, "high", f"Estimated from USDA data for {product.name}",
+                storage_tips, product_id, product_name,
+            )
+
+    categories = (category or "").lower()
+    name_lower = name.lower()
+
+    if _contains_any(name_lower, PRESERVED_WORDS):
+        return ShelfLife(None, "none", SHELF_STABLE_MESSAGE, storage_tips, product_id, product_name)
+
+    category_to_check = categories
+    if not category_to_check:
+        for words, inferred in INFERRED_CATEGORIES:
+            if _contains_any(name_lower, words):
+                category_to_check = inferred
+                break
+
+    if not category_to_check or not _contains_any(category_to_check, PERISHABLE_WORDS):
+        return ShelfLife(None, "none", UNKNOWN_TYPE_MESSAGE, storage_tips, product_id, product_name)
+
+    days = DEFAULT_PERISHABLE_DAYS
+    for words, category_days in CATEGORY_DAYS:
+        if _contains_any(category_to_check, words):
+            days = category_days
+            break
+    return ShelfLife(
+        days,
+        "medium",
+        f"Estimated based on product category (approximately {days} days). "
+        "Please verify with package date if available.",
+        storage_tips, product_id, product_name,
+    )
+
+
+class ShelfLifeMemo:
+    """Bounded LRU of shelf-life estimates keyed by normalized name and category"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], ShelfLife]" = OrderedDict()
+        self._index: Optional[foodkeeper_service.FoodKeeperIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, name: str, category: Optional[str] = None) -> ShelfLife:
+        """Get the estimate for a product, computing it on first sight"""
+        # A reloaded FoodKeeper index can change every answer
+        index = foodkeeper_service.get_foodkeeper_index()
+        if index is not self._index:
+            self._entries.clear()
+            self._index = index
+
+        key = memo_key(name, category)
+        shelf_life = self._entries.get(key)
+        if shelf_life is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return shelf_life
+
+        self.misses += 1
+        shelf_life = estimate_shelf_life(*key)
+        if self.max_entries > 0:
+            self._entries[key] = shelf_life
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return shelf_life
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """Counters and size for monitoring"""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+memo = ShelfLifeMemo(settings.expiry_estimate_memo_max_entries)
+
+
+def estimate_expiry(item: ExpiryEstimateItem, today: Optional[date] = None) -> ExpiryEstimate:
+    """
+    Estimate the expiry date for one item
+
+    Args:
+        item: Item name and optional category
+        today: Purchase date the shelf life counts from (default: today)
+
+    Returns:
+        ExpiryEstimate: Estimated date, confidence, message and storage tips
+    """
+    shelf_life = memo.get(item.name, item.category)
+    start = today or date.today()
+    return ExpiryEstimate(
+        item_id=item.item_id,
+        name=item.name,
+        category=item.category,
+        expiry_date=start + timedelta(days=shelf_life.days) if shelf_life.days is not None else None,
+        shelf_life_days=shelf_life.days,
+        confidence=shelf_life.confidence,
+        message=shelf_life.message,
+        storage_tips=shelf_life.storage_tips,
+        foodkeeper_product_id=shelf_life.foodkeeper_product_id,
+        foodkeeper_product_name=shelf_life.foodkeeper_product_name,
+    )
+
+
+def estimate_expiries(items: List[ExpiryEstimateItem], today: Optional[date] = None) -> List[ExpiryEstimate]:
+    """
+    Estimate expiry dates for many items at once, in request order
+
+    Args:
+        items: Item names and optional categories
+        today: Purchase date the shelf life counts from (default: today)
+
+    Returns:
+        List[ExpiryEstimate]: One estimate per item
+    """
+    start = today or date.today()
+    return [estimate_expiry(item, start) for item in items]
@@ -0,0 +1,581 @@
+"""USDA FoodKeeper shelf-life service
+
+Loads the FoodKeeper Product sheet once and answers "what is this and how
+long does it keep" server-side, instead of every client downloading
+foodkeeper.json and running the matcher in the browser.
+
+Matching follows `searchFoodKeeperProduct` in the frontend's
+foodKeeperService.ts exactly, but only scores products that can possibly
+reach the match threshold. Candidates come from three precomputed indexes:
+
+- word -> products (word overlap with name/subtitle/keywords)
+- normalized field -> products (field is a substring of the query)
+- trigram -> products (query is a substring of a field)
+
+Any product outside those sets scores at most 0.1 (the category boost), below
+the minimum match score, so the result is identical to the linear scan.
+
+Benchmark (indexed search vs. the linear scan):
+
+    python -m scripts.bench_foodkeeper_search
+"""
+import json
+import logging
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from fastapi import HTTPException
+from src.config.settings import settings
+from src.models.foodkeeper import FoodKeeperProduct
+
+
+# FoodKeeper column name -> FoodKeeperProduct field
+PRODUCT_COLUMNS = {
+    "ID": "id",
+    "Name": "name",
+    "Name_subtitle": "name_subtitle",
+    "Category_ID": "category_id",
+    "Subcategory_ID": "subcategory_id",
+    "Keywords": "keywords",
+    "Pantry_Min": "pantry_min",
+    "Pantry_Max": "pantry_max",
+    "Pantry_Metric": "pantry_metric",
+    "Pantry_tips": "pantry_tips",
+    "DOP_Pantry_Min": "dop_pantry_min",
+    "DOP_Pantry_Max": "dop_pantry_max",
+    "DOP_Pantry_Metric": "dop_pantry_metric",
+    "DOP_Pantry_tips": "dop_pantry_tips",
+    "Refrigerate_Min": "refrigerate_min",
+    "Refrigerate_Max": "refrigerate_max",
+    "Refrigerate_Metric": "refrigerate_metric",
+    "Refrigerate_tips": "refrigerate_tips",
+    "DOP_Refrigerate_Min": "dop_refrigerate_min",
+    "DOP_Refrigerate_Max": "dop_refrigerate_max",
+    "DOP_Refrigerate_Metric": "dop_refrigerate_metric",
+    "DOP_Refrigerate_tips": "dop_refrigerate_tips",
+    "Freeze_Min": "freeze_min",
+    "Freeze_Max": "freeze_max",
+    "Freeze_Metric": "freeze_metric",
+    "Freeze_Tips": "freeze_tips",
+}
+
+CONDIMENT_WORDS = ("sauce", "ketchup", "mustard", "mayo", "dressing", "condiment", "spread", "syrup")
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_PENALTY = 0.7
+CATEGORY_BOOST = 0.1
+
+_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for fuzzy matching
+
+    Args:
+        text: Raw text
+
+    Returns:
+        str: Lowercase alphanumeric words separated by single spaces
+    """
+    return _WHITESPACE.sub(" ", _NON_ALNUM.sub("", text.lower())).strip()
+
+
+def _similarity(s1: str, s2: str) -> float:
+    """Similarity (0-1) between two already-normalized strings"""
+    if s1 == s2:
+        return 1.0
+    if s2 in s1 or s1 in s2:
+        return 0.8
+
+    words1 = s1.split(" ")
+    words2 = s2.split(" ")
+    lookup = set(words2)
+    common = sum(1 for word in words1 if word in lookup)
+    if common > 0:
+        return 0.5 + (common / max(len(words1), len(words2))) * 0.3
+    return 0.0
+
+
+def calculate_similarity(str1: str, str2: str) -> float:
+    """
+    Calculate similarity score between two strings (0-1)
+
+    Args:
+        str1: First string
+        str2: Second string
+
+    Returns:
+        float: 1.0 exact, 0.8 containment, 0.5-0.8 word overlap, else 0
+    """
+    return _similarity(normalize_text(str1), normalize_text(str2))
+
+
+def should_skip_search(product_name: str) -> bool:
+    """
+    Check if a product shouldn't be matched against FoodKeeper
+
+    Condiments and shelf-stable packaged goods match poorly, and single short
+    words are too generic to match reliably.
+
+    Args:
+        product_name: Product name
+
+    Returns:
+        bool: True if the search should be skipped
+    """
+    lower = product_name.lower()
+    if any(word in lower for word in CONDIMENT_WORDS):
+        return True
+    words = product_name.strip().split()
+    return len(words) == 1 and len(product_name) < 6
+
+
+def convert_to_days(value: float, metric: str) -> float:
+    """
+    Convert a FoodKeeper duration to days
+
+    Args:
+        value: Duration value
+        metric: Unit (Days, Weeks, Months, Years, ...)
+
+    Returns:
+        float: Duration in days (value as-is for unknown units)
+    """
+    metric = metric.lower()
+    if "day" in metric:
+        return value
+    if "week" in metric:
+        return value * 7
+    if "month" in metric:
+        return value * 30
+    if "year" in metric:
+        return value * 365
+    return value
+
+
+def get_shelf_life_days(product: FoodKeeperProduct) -> int:
+    """
+    Get shelf life in days, preferring refrigerated storage
+
+    Priority: DOP refrigerate > refrigerate > pantry > DOP pantry
+
+    Args:
+        product: FoodKeeper product
+
+    Returns:
+        int: Shelf life in days, 0 if unknown
+    """
+    for value, metric in (
+        (product.dop_refrigerate_max, product.dop_refrigerate_metric),
+        (product.refrigerate_max, product.refrigerate_metric),
+        (product.pantry_max, product.pantry_metric),
+        (product.dop_pantry_max, product.dop_pantry_metric),
+    ):
+        if value and metric:
+            days = convert_to_days(value, metric)
+            if days > 0:
+                return int(round(days))
+    return 0
+
+
+def get_storage_tips(product: FoodKeeperProduct) -> Optional[str]:
+    """
+    Get storage tips for a product
+
+    Args:
+        product: FoodKeeper product
+
+    Returns:
+        Optional[str]: Storage tips, refrigerated first
+    """
+    return (
+        product.dop_refrigerate_tips
+        or product.refrigerate_tips
+        or product.dop_pantry_tips
+        or product.pantry_tips
+        or None
+    )
+
+
+def sheet_rows(data: dict, sheet_name: str) -> List[dict]:
+    """
+    Rows of one sheet of the FoodKeeper JSON export
+
+    Each row is stored as a list of single-key dicts; they are merged into one
+    dict per row.
+
+    Args:
+        data: Parsed foodkeeper.json
+        sheet_name: Sheet name (Product, Category, CookingTips, ...)
+
+    Returns:
+        List[dict]: Merged rows in sheet order
+    """
+    sheet = next((s for s in data.get("sheets", []) if s.get("name") == sheet_name), None)
+    if sheet is None:
+        return []
+
+    rows = []
+    for row in sheet["data"]:
+        merged = {}
+        for cell in row:
+            merged.update(cell)
+        rows.append(merged)
+    return rows
+
+
+def product_from_row(row: dict) -> Optional[FoodKeeperProduct]:
+    """
+    Convert a merged Product sheet row to a FoodKeeperProduct
+
+    Args:
+        row: Merged row keyed by FoodKeeper column names
+
+    Returns:
+        Optional[FoodKeeperProduct]: Product, or None for rows without an ID
+    """
+    record: Dict[str, Any] = {
+        field: row.get(column)
+        for column, field in PRODUCT_COLUMNS.items()
+        if row.get(column) is not None
+    }
+    if "id" not in record:
+        return None
+    record["id"] = int(record["id"])
+    for field in ("category_id", "subcategory_id"):
+        if field in record:
+            record[field] = int(record[field])
+    record.setdefault("name", "")
+    for field in ("name", "name_subtitle", "keywords"):
+        if field in record:
+            record[field] = str(record[field])
+    return FoodKeeperProduct(**record)
+
+
+def parse_product_sheet(data: dict) -> List[FoodKeeperProduct]:
+    """
+    Parse the Product sheet out of the FoodKeeper JSON export
+
+    Args:
+        data: Parsed foodkeeper.json
+
+    Returns:
+        List[FoodKeeperProduct]: Products in sheet order
+    """
+    products = (product_from_row(row) for row in sheet_rows(data, "Product"))
+    return [product for product in products if product is not None]
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Character trigrams of a string"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FoodKeeperIndex:
+    """FoodKeeper products with precomputed search indexes
+
+    The structures only need sequence / `.get()` access, so they can be plain
+    lists and dicts (`build`) or views over a memory-mapped snapshot (see
+    foodkeeper_snapshot).
+    """
+
+    def __init__(
+        self,
+        products: Sequence[FoodKeeperProduct],
+        names: Sequence[str],
+        subtitles: Sequence[Optional[str]],
+        keywords: Sequence[Tuple[str, ...]],
+        lower_names: Sequence[str],
+        word_index,
+        field_index,
+        trigram_index,
+        always: List[int],
+        max_field_length: int,
+        version: Optional[int] = None,
+    ):
+        self.products = products
+        self.names = names
+        self.subtitles = subtitles
+        self.keywords = keywords
+        self.lower_names = lower_names
+        self.word_index = word_index
+        self.field_index = field_index
+        self.trigram_index = trigram_index
+        # An empty name is "contained" in every query, so it always scores
+        self.always = always
+        self.max_field_length = max_field_length
+        self.version = version
+
+    @classmethod
+    def build(cls, products: List[FoodKeeperProduct], version: Optional[int] = None) -> "FoodKeeperIndex":
+        """
+        Normalize product fields and build the search indexes
+
+        Args:
+            products: Products in sheet order
+            version: FoodKeeper Data_Version_Number
+
+        Returns:
+            FoodKeeperIndex: In-memory index
+        """
+        names, subtitles, keywords, lower_names, always = [], [], [], [], []
+        word_index: Dict[str, List[int]] = defaultdict(list)
+        field_index: Dict[str, List[int]] = defaultdict(list)
+        trigram_index: Dict[str, List[int]] = defaultdict(list)
+        max_field_length = 0
+
+        for i, product in enumerate(products):
+            name = normalize_text(product.name)
+            subtitle = normalize_text(product.name_subtitle) if product.name_subtitle else None
+            product_keywords = tuple(
+                normalize_text(keyword.strip()) for keyword in product.keywords.split(",")
+            ) if product.keywords else ()
+            names.append(name)
+            subtitles.append(subtitle)
+            keywords.append(product_keywords)
+            lower_names.append(product.name.lower())
+            if not name:
+                always.append(i)
+
+            words, grams, exact = set(), set(), set()
+            for field in (name, subtitle, *product_keywords):
+                if not field:
+                    continue
+                exact.add(field)
+                words.update(field.split(" "))
+                grams.update(_trigrams(field))
+                max_field_length = max(max_field_length, len(field))
+            for word in words:
+                word_index[word].append(i)
+            for field in exact:
+                field_index[field].append(i)
+            for gram in grams:
+                trigram_index[gram].append(i)
+
+        return cls(
+            products=products,
+            names=names,
+            subtitles=subtitles,
+            keywords=keywords,
+            lower_names=lower_names,
+            word_index=dict(word_index),
+            field_index=dict(field_index),
+            trigram_index=dict(trigram_index),
+            always=always,
+            max_field_length=max_field_length,
+            version=version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def candidates(self, query: str) -> List[int]:
+        """
+        Products that can score above zero for a normalized query
+
+        Args:
+            query: Normalized query
+
+        Returns:
+            List[int]: Product indexes in sheet order
+        """
+        if len(query) < 3:
+            return list(range(len(self.products)))
+
+        found: Set[int] = set(self.always)
+        for word in set(query.split(" ")):
+            found.update(self.word_index.get(word, ()))
+
+        # Fields contained in the query (no field is longer than max_field_length)
+        for start in range(len(query)):
+            for end in range(start + 1, min(len(query), start + self.max_field_length) + 1):
+                found.update(self.field_index.get(query[start:end], ()))
+
+        # Fields containing the query: intersect trigram postings
+        postings = sorted(
+            (self.trigram_index.get(gram, ()) for gram in _trigrams(query)),
+            key=len,
+        )
+        if postings and postings[0]:
+            containing = set(postings[0])
+            for posting in postings[1:]:
+                containing.intersection_update(posting)
+                if not containing:
+                    break
+            found.update(containing)
+
+        return sorted(found)
+
+    def _score(self, i: int, query: str, category: Optional[str]) -> Tuple[float, float]:
+        """Score one product as (score, name score)"""
+        name_score = _similarity(query, self.names[i])
+        score = name_score
+        subtitle = self.subtitles[i]
+        if subtitle is not None:
+            score = max(score, _similarity(query, subtitle))
+        for keyword in self.keywords[i]:
+            score = max(score, _similarity(query, keyword) * KEYWORD_PENALTY)
+        if category and category.lower() in self.lower_names[i]:
+            score += CATEGORY_BOOST
+        return score, name_score
+
+    def _best(self, indexes: Iterable[int], product_name: str, category: Optional[str]):
+        """Highest scoring product above the threshold, first one wins ties"""
+        query = normalize_text(product_name)
+        best: Optional[Tuple[FoodKeeperProduct, float]] = None
+        for i in indexes:
+            score, name_score = self._score(i, query, category)
+            min_score = 0.6 if name_score > 0.5 else 0.75
+            if score >= min_score and (best is None or score > best[1]):
+                best = (self.products[i], score)
+        return best
+
+    def search(
+        self,
+        product_name: str,
+        category: Optional[str] = None
+    ) -> Optional[Tuple[FoodKeeperProduct, float]]:
+        """
+        Find the best matching product using the indexes
+
+        Args:
+            product_name: Product name to search for
+            category: Optional category to boost matching product names
+
+        Returns:
+            Optional[Tuple[FoodKeeperProduct, float]]: Best match and its score
+        """
+        if not self.products or should_skip_search(product_name):
+            return None
+        return self._best(self.candidates(normalize_text(product_name)), product_name, category)
+
+    def search_linear(
+        self,
+        product_name: str,
+        category: Optional[str] = None
+    ) -> Optional[Tuple[FoodKeeperProduct, float]]:
+        """Reference O(products x keywords) scan, as done in the browser"""
+        if not self.products or should_skip_search(product_name):
+            return None
+        return self._best(range(len(self.products)), product_name, category)
+
+
+def load_foodkeeper_json(path: str) -> FoodKeeperIndex:
+    """
+    Load and index the FoodKeeper JSON export
+
+    Args:
+        path: Path to foodkeeper.json
+
+    Returns:
+        FoodKeeperIndex: Indexed products
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return FoodKeeperIndex.build(parse_product_sheet(data), version=data_version(data))
+
+
+def data_version(data: dict) -> Optional[int]:
+    """
+    Latest Data_Version_Number in the Version sheet
+
+    Args:
+        data: Parsed foodkeeper.json
+
+    Returns:
+        Optional[int]: Data version, None if the sheet is missing
+    """
+    sheet = next((s for s in data.get("sheets", []) if s.get("name") == "Version"), None)
+    if sheet is None:
+        return None
+    versions = [
+        int(cell["Data_Version_Number"])
+        for row in sheet["data"]
+        for cell in row
+        if cell.get("Data_Version_Number") is not None
+    ]
+    return max(versions) if versions else None
+
+
+_VERSION_PATTERN = re.compile(rb'"Data_Version_Number"\s*:\s*([0-9.]+)')
+
+
+def peek_data_version(path: str) -> Optional[int]:
+    """
+    Read the latest Data_Version_Number from foodkeeper.json without parsing it
+
+    Args:
+        path: Path to foodkeeper.json
+
+    Returns:
+        Optional[int]: Data version, None if not found
+    """
+    with open(path, "rb") as f:
+        versions = [int(float(match)) for match in _VERSION_PATTERN.findall(f.read())]
+    return max(versions) if versions else None
+
+
+def default_json_path() -> str:
+    """foodkeeper.json location: settings override or the frontend's public copy"""
+    if settings.foodkeeper_json_path:
+        return settings.foodkeeper_json_path
+    return str(Path(__file__).resolve().parents[3] / "frontend" / "public" / "foodkeeper.json")
+
+
+_index: Optional[FoodKeeperIndex] = None
+
+
+def initialize_foodkeeper() -> Optional[FoodKeeperIndex]:
+    """
+    Load the FoodKeeper index
+
+    Prefers the memory-mapped snapshot; falls back to parsing foodkeeper.json
+    when the snapshot is missing, unreadable or older than the JSON data.
+    Leaves the index unset if neither is available.
+    """
+    global _index
+    from src.services.foodkeeper_snapshot import SnapshotError, default_snapshot_path, load_snapshot
+
+    json_path = default_json_path()
+    json_exists = Path(json_path).exists()
+    snapshot_path = default_snapshot_path()
+
+    if Path(snapshot_path).exists():
+        try:
+            snapshot = load_snapshot(snapshot_path)
+        except SnapshotError as e:
+            logger.warning("Ignoring FoodKeeper snapshot: %s", e)
+        else:
+            json_version = peek_data_version(json_path) if json_exists else None
+            if json_version is None or json_version == snapshot.data_version:
+                _index = snapshot.index
+                return _index
+            logger.warning(
+                "FoodKeeper snapshot is data version %s but %s is %s; rebuild it with "
+                "`python -m src.services.foodkeeper_snapshot build`",
+                snapshot.data_version, json_path, json_version,
+            )
+
+    _index = load_foodkeeper_json(json_path) if json_exists else None
+    return _index
+
+
+def get_foodkeeper_index() -> FoodKeeperIndex:
+    """
+    Get the loaded FoodKeeper index, loading it lazily if needed
+
+    Raises:
+        HTTPException: If the FoodKeeper data is not available
+    """
+    index = _index if _index is not None else initialize_foodkeeper()
+    if index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="FoodKeeper data not available"
+        )
+    return index
+
@@ -0,0 +1,458 @@
+"""Compact binary FoodKeeper snapshot
+
+Compiles foodkeeper.json into a single binary file that is memory-mapped at
+startup instead of parsing ~630KB of row-per-list-of-dicts JSON. The mapping
+is read-only, so uvicorn workers on one host share the same page-cache pages.
+
+Layout (all integers little-endian):
+
+    b"SMFK" | u32 format version | u32 header length | header JSON | sections
+
+The header JSON records the FoodKeeper Data_Version_Number, table schemas and
+the (offset, length, typecode) of every section. Sections are 8-byte aligned
+flat arrays:
+
+- strings: every distinct string once (u32 offsets + UTF-8 bytes)
+- one columnar table per sheet (Product, Category, CookingTips,
+  CookingMethods): numeric columns as float64 with NaN for empty cells,
+  text columns as u32 string ids
+- the precomputed search index: normalized fields per product and the
+  word/field/trigram posting lists, each behind an open-addressing hash table
+
+The Docker image builds it (`python -m src.services.foodkeeper_snapshot build
+[--json PATH] [--out PATH]`); compare load time and memory against the JSON
+with `python -m scripts.bench_foodkeeper_snapshot`.
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from src.config.settings import settings
+from src.services.foodkeeper_service import (
+    FoodKeeperIndex,
+    data_version,
+    default_json_path,
+    product_from_row,
+    sheet_rows,
+)
+
+
+MAGIC = b"SMFK"
+FORMAT_VERSION = 1
+NULL = 0xFFFFFFFF
+TABLES = ("Product", "Category", "CookingTips", "CookingMethods")
+_PREAMBLE = struct.Struct("<4sII")
+
+Sections = Dict[str, Union[array, bytes]]  # Section name -> payload, in file order
+
+
+class SnapshotError(Exception):
+    """Snapshot file is missing, corrupt or built by an incompatible version"""
+
+
+def default_snapshot_path() -> str:
+    """Snapshot location: settings override or backend/data/foodkeeper.snapshot"""
+    if settings.foodkeeper_snapshot_path:
+        return settings.foodkeeper_snapshot_path
+    return str(Path(__file__).resolve().parents[2] / "data" / "foodkeeper.snapshot")
+
+
+# ---------------------------------------------------------------------------
+# Building
+# ---------------------------------------------------------------------------
+
+class _StringInterner:
+    """Assigns one id per distinct string"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NULL
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.ids)
+        return sid
+
+    def encode(self) -> Tuple[array, bytes]:
+        offsets, chunks, position = array("I", [0]), [], 0
+        for value in self.ids:
+            raw = value.encode("utf-8")
+            chunks.append(raw)
+            position += len(raw)
+            offsets.append(position)
+        return offsets, b"".join(chunks)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _encode_table(rows: List[dict], strings: _StringInterner, sections: Sections, name: str) -> dict:
+    """Store one sheet column by column, returning its schema"""
+    columns = []
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+
+    schema = []
+    for i, column in enumerate(columns):
+        values = [row.get(column) for row in rows]
+        if all(value is None or _is_number(value) for value in values):
+            sections[f"{name}.{i}"] = array("d", [math.nan if v is None else float(v) for v in values])
+            schema.append([column, "d"])
+        else:
+            sections[f"{name}.{i}"] = array("I", [strings.intern(None if v is None else str(v)) for v in values])
+            schema.append([column, "s"])
+    return {"rows": len(rows), "columns": schema}
+
+
+def _encode_postings(index: Dict[str, List[int]], strings: _StringInterner, sections: Sections, name: str) -> None:
+    """Store a str -> [product index] mapping as an open-addressing hash table"""
+    keys = list(index)
+    size = 1
+    while size < len(keys) * 2:
+        size *= 2
+
+    slots = array("I", [0]) * size
+    key_ids, offsets, postings = array("I"), array("I", [0]), array("I")
+    for position, key in enumerate(keys):
+        key_ids.append(strings.intern(key))
+        postings.extend(index[key])
+        offsets.append(len(postings))
+        slot = zlib.crc32(key.encode("utf-8")) & (size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = position + 1
+
+    sections[f"{name}.slots"] = slots
+    sections[f"{name}.keys"] = key_ids
+    sections[f"{name}.offsets"] = offsets
+    sections[f"{name}.postings"] = postings
+
+
+def build_snapshot(json_path: str, out_path: str) -> dict:
+    """
+    Compile foodkeeper.json into a snapshot file
+
+    Args:
+        json_path: Source foodkeeper.json
+        out_path: Snapshot file to write (replaced atomically)
+
+    Returns:
+        dict: Summary (data version, product count, file size)
+    """
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    version = data_version(data)
+    strings = _StringInterner()
+    sections: Sections = {}
+    tables = {}
+
+    product_rows, products = [], []
+    for row in sheet_rows(data, "Product"):
+        product = product_from_row(row)
+        if product is not None:
+            product_rows.append(row)
+            products.append(product)
+    for table in TABLES:
+        rows = product_rows if table == "Product" else sheet_rows(data, table)
+        tables[table] = _encode_table(rows, strings, sections, table)
+
+    index = FoodKeeperIndex.build(products, version=version)
+    sections["search.names"] = array("I", [strings.intern(v) for v in index.names])
+    sections["search.subtitles"] = array("I", [strings.intern(v) for v in index.subtitles])
+    sections["search.lower_names"] = array("I", [strings.intern(v) for v in index.lower_names])
+    keyword_offsets, keyword_ids = array("I", [0]), array("I")
+    for keywords in index.keywords:
+        keyword_ids.extend(strings.intern(keyword) for keyword in keywords)
+        keyword_offsets.append(len(keyword_ids))
+    sections["search.keyword_offsets"] = keyword_offsets
+    sections["search.keyword_ids"] = keyword_ids
+    sections["search.always"] = array("I", index.always)
+    _encode_postings(index.word_index, strings, sections, "words")
+    _encode_postings(index.field_index, strings, sections, "fields")
+    _encode_postings(index.trigram_index, strings, sections, "trigrams")
+
+    # Interned last, after every section had a chance to add strings
+    string_offsets, string_data = strings.encode()
+    sections["strings.offsets"] = string_offsets
+    sections["strings.data"] = string_data
+
+    section_offsets: Dict[str, list] = {}
+    header = {
+        "data_version": version,
+        "products": len(product_rows),
+        "max_field_length": index.max_field_length,
+        "tables": tables,
+        "sections": section_offsets,
+    }
+    payloads = []
+    position = 0
+    for name, payload in sections.items():
+        raw = payload.tobytes() if isinstance(payload, array) else payload
+        typecode = payload.typecode if isinstance(payload, array) else "B"
+        section_offsets[name] = [position, len(raw), typecode]
+        payloads.append(raw)
+        position += len(raw)
+        padding = -position % 8
+        payloads.append(b"\0" * padding)
+        position += padding
+
+    header_raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    header_raw += b" " * (-(len(header_raw) + _PREAMBLE.size) % 8)
+
+    directory = os.path.dirname(out_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_raw)))
+        f.write(header_raw)
+        for raw in payloads:
+            f.write(raw)
+    os.replace(tmp_path, out_path)
+
+    return {
+        "data_version": version,
+        "products": len(product_rows),
+        "strings": len(strings.ids),
+        "bytes": os.path.getsize(out_path),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+class _Strings:
+    """Interned string table view"""
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def raw(self, sid: int) -> bytes:
+        return bytes(self.data[self.offsets[sid]:self.offsets[sid + 1]])
+
+    def get(self, sid: int) -> Optional[str]:
+        if sid == NULL:
+            return None
+        return self.raw(sid).decode("utf-8")
+
+
+class _StringColumn(Sequence):
+    """Sequence of strings stored as string ids"""
+
+    def __init__(self, ids: memoryview, strings: _Strings):
+        self.ids = ids
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return self.strings.get(self.ids[i])
+
+
+class _KeywordColumn(Sequence):
+    """Per-product tuples of normalized keywords"""
+
+    def __init__(self, offsets: memoryview, ids: memoryview, strings: _Strings):
+        self.offsets = offsets
+        self.ids = ids
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return tuple(self.strings.get(sid) for sid in self.ids[self.offsets[i]:self.offsets[i + 1]])
+
+
+class _Postings:
+    """Read-only str -> posting list hash table"""
+
+    def __init__(self, slots: memoryview, keys: memoryview, offsets: memoryview, postings: memoryview, strings: _Strings):
+        self.slots = slots
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+        self.strings = strings
+        self.mask = len(slots) - 1
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, key: str, default=()):
+        raw = key.encode("utf-8")
+        slot = zlib.crc32(raw) & self.mask
+        while True:
+            position = self.slots[slot]
+            if not position:
+                return default
+            position -= 1
+            if self.strings.raw(self.keys[position]) == raw:
+                return self.postings[self.offsets[position]:self.offsets[position + 1]]
+            slot = (slot + 1) & self.mask
+
+
+class SnapshotTable:
+    """Columnar view of one sheet"""
+
+    def __init__(self, schema: dict, columns: List[memoryview], strings: _Strings):
+        self.rows = schema["rows"]
+        self.names = [name for name, _ in schema["columns"]]
+        self.kinds = [kind for _, kind in schema["columns"]]
+        self.columns = columns
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> memoryview:
+        """Raw column array (float64 values or u32 string ids)"""
+        return self.columns[self.names.index(name)]
+
+    def row(self, i: int) -> dict:
+        """One row as a dict of non-empty cells"""
+        record: Dict[str, Any] = {}
+        for name, kind, column in zip(self.names, self.kinds, self.columns):
+            value = column[i]
+            if kind == "d":
+                if not math.isnan(value):
+                    record[name] = value
+            elif value != NULL:
+                record[name] = self.strings.get(value)
+        return record
+
+
+class _ProductColumn(Sequence):
+    """Products decoded on access from the Product table"""
+
+    def __init__(self, table: SnapshotTable):
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self.table):
+            raise IndexError(i)
+        product = product_from_row(self.table.row(i))
+        if product is None:
+            raise SnapshotError(f"Product row {i} has no ID")
+        return product
+
+
+class FoodKeeperSnapshot:
+    """Memory-mapped snapshot exposing the search index and sheet tables"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise SnapshotError(f"Empty snapshot file: {path}") from e
+
+        if len(self._mmap) < _PREAMBLE.size:
+            raise SnapshotError(f"Truncated snapshot file: {path}")
+        magic, format_version, header_length = _PREAMBLE.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise SnapshotError(f"Not a FoodKeeper snapshot: {path}")
+        if format_version != FORMAT_VERSION:
+            raise SnapshotError(f"Snapshot format {format_version}, expected {FORMAT_VERSION}: {path}")
+
+        if len(self._mmap) < _PREAMBLE.size + header_length:
+            raise SnapshotError(f"Truncated snapshot header: {path}")
+        try:
+            self.header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        except ValueError as e:  # JSONDecodeError and UnicodeDecodeError
+            raise SnapshotError(f"Corrupt snapshot header: {path}") from e
+        if not isinstance(self.header, dict) or not {"data_version", "tables", "sections", "max_field_length"} <= self.header.keys():
+            raise SnapshotError(f"Incomplete snapshot header: {path}")
+        self.data_version: Optional[int] = self.header["data_version"]
+        self._base = _PREAMBLE.size + header_length
+        self._view = memoryview(self._mmap)
+
+        self.strings = _Strings(self._array("strings.offsets"), self._array("strings.data"))
+        self.tables = {
+            name: SnapshotTable(
+                schema,
+                [self._array(f"{name}.{i}") for i in range(len(schema["columns"]))],
+                self.strings,
+            )
+            for name, schema in self.header["tables"].items()
+        }
+        self.index = FoodKeeperIndex(
+            products=_ProductColumn(self.tables["Product"]),
+            names=_StringColumn(self._array("search.names"), self.strings),
+            subtitles=_StringColumn(self._array("search.subtitles"), self.strings),
+            keywords=_KeywordColumn(
+                self._array("search.keyword_offsets"),
+                self._array("search.keyword_ids"),
+                self.strings,
+            ),
+            lower_names=_StringColumn(self._array("search.lower_names"), self.strings),
+            word_index=self._postings("words"),
+            field_index=self._postings("fields"),
+            trigram_index=self._postings("trigrams"),
+            always=list(self._array("search.always")),
+            max_field_length=self.header["max_field_length"],
+            version=self.data_version,
+        )
+
+    def _array(self, name: str) -> memoryview:
+        try:
+            offset, length, typecode = self.header["sections"][name]
+        except KeyError as e:
+            raise SnapshotError(f"Snapshot is missing section {name}") from e
+        start = self._base + offset
+        if start + length > len(self._mmap):
+            raise SnapshotError(f"Truncated snapshot section {name}")
+        return self._view[start:start + length].cast(typecode)
+
+    def _postings(self, name: str) -> _Postings:
+        return _Postings(
+            self._array(f"{name}.slots"),
+            self._array(f"{name}.keys"),
+            self._array(f"{name}.offsets"),
+            self._array(f"{name}.postings"),
+            self.strings,
+        )
+
+
+def load_snapshot(path: str) -> FoodKeeperSnapshot:
+    """
+    Memory-map a snapshot file
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        FoodKeeperSnapshot: Mapped snapshot
+
+    Raises:
+        SnapshotError: If the file is corrupt or from another format version
+    """
+    return FoodKeeperSnapshot(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the FoodKeeper snapshot")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--json", default=None, help="Source foodkeeper.json")
+    parser.add_argument("--out", default=None, help="Snapshot file")
+    args = parser.parse_args()
+    print(json.dumps(build_snapshot(args.json or default_json_path(), args.out or default_snapshot_path())))
@@ -1,11 +1,104 @@
 """Household service"""
-from typing import List
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException, status
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.config.firebase import get_firestore_client, run_transaction
 from src.models.household import (
     HouseholdCreate,
     HouseholdResponse,
     HouseholdMember,
     InviteCodeRequest
 )
+from src.services import sync_service
+from src.services.access_cache import access_cache
+from src.services.event_hub import publish_household, publish_members
+from src.services.user_loader import USERS_COLLECTION, member_cache
+from src.utils.generators import generate_invite_code
+from src.utils.request_context import record_reads
+from src.utils.validators import is_valid_invite_code
+
+
+HOUSEHOLDS_COLLECTION = "households"
+INVITE_CODE_LENGTH = 6  # Same format as the codes the frontend generates
+INVITE_CODE_ATTEMPTS = 10
+
+
+async def _get_household_doc(household_id: str) -> Dict[str, Any]:
+    """
+    Read a household document
+
+    Raises:
+        HTTPException: If the household does not exist
+    """
+    doc = await get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document(household_id).get()
+    record_reads(HOUSEHOLDS_COLLECTION, 1)
+    if not doc.exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Household not found"
+        )
+    return doc.to_dict()
+
+
+def member_from_doc(user_id: str, data: Dict[str, Any], created_by: Optional[str]) -> HouseholdMember:
+    """
+    Build a HouseholdMember from a user document
+
+    The household's creator is its admin (the frontend stores no role field).
+    """
+    joined_at = data.get("joined_at") or data.get("created_at") or datetime.now(timezone.utc)
+    return HouseholdMember(
+        id=user_id,
+        name=data.get("name", ""),
+        email=data.get("email", ""),
+        is_admin=user_id == created_by or bool(data.get("is_admin", False)),
+        joined_at=joined_at,
+    )
+
+
+async def _members(household_id: str, household: Dict[str, Any]) -> List[HouseholdMember]:
+    """Members of a household, oldest first, from the member cache"""
+    members = await member_cache.get(household_id)
+    created_by = household.get("created_by")
+    return sorted(
+        (member_from_doc(user_id, data, created_by) for user_id, data in members.items()),
+        key=lambda member: (member.joined_at, member.id),
+    )
+
+
+async def _unique_invite_code() -> str:
+    """
+    Generate an invite code no household uses yet
+
+    Raises:
+        HTTPException: If no free code was found
+    """
+    collection = get_firestore_client().collection(HOUSEHOLDS_COLLECTION)
+    for _ in range(INVITE_CODE_ATTEMPTS):
+        code = generate_invite_code(INVITE_CODE_LENGTH)
+        query = collection.where(filter=FieldFilter("invite_code", "==", code)).limit(1)
+        taken = [doc async for doc in query.stream()]
+        record_reads(HOUSEHOLDS_COLLECTION, len(taken))
+        if not taken:
+            return code
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Failed to generate a unique invite code"
+    )
+
+
+def _membership_changed(user_id: str, *household_ids: Optional[str]) -> None:
+    """Drop cached member lists and the user's authorization after they joined or left"""
+    access_cache.invalidate(user_id=user_id)
+    for household_id in household_ids:
+        if household_id:
+            member_cache.invalidate(household_id)
+
+
+def _user_ref(user_id: str) -> Any:
+    return get_firestore_client().collection(USERS_COLLECTION).document(user_id)
 
 
 async def create_household(household_data: HouseholdCreate, user_id: str) -> HouseholdResponse:
@@ -19,8 +112,40 @@ async def create_household(household_data: HouseholdCreate, user_id: str) -> Hou
     Returns:
         HouseholdResponse: Created household data
     """
-    # TODO: Implement household creation
-    pass
+    name = household_data.name.strip()
+    if not name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Household name is required"
+        )
+    invite_code = await _unique_invite_code()
+    household_ref = get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document()
+    user_ref = _user_ref(user_id)
+
+    async def write(transaction: Any) -> Dict[str, int]:
+        user = await user_ref.get(transaction=transaction)
+        previous = (user.to_dict() or {}).get("household_id") if user.exists else None
+        versions = await sync_service.next_versions(transaction, [previous]) if previous else {}
+        transaction.set(household_ref, {
+            "name": name,
+            "invite_code": invite_code,
+            "created_at": SERVER_TIMESTAMP,
+            "updated_at": SERVER_TIMESTAMP,
+            "created_by": user_id,
+            sync_service.VERSION_FIELD: 1,
+        })
+        transaction.set(user_ref, {
+            "household_id": household_ref.id,
+            "joined_at": SERVER_TIMESTAMP,
+            "updated_at": SERVER_TIMESTAMP,
+        }, merge=True)
+        return versions
+
+    left = await run_transaction(write)
+    _membership_changed(user_id, *left, household_ref.id)
+    for previous, version in left.items():
+        publish_members(previous, version, left=[user_id])
+    return await get_household(household_ref.id, user_id)
 
 
 async def get_household(household_id: str, user_id: str) -> HouseholdResponse:
@@ -34,8 +159,17 @@ async def get_household(household_id: str, user_id: str) -> HouseholdResponse:
     Returns:
         HouseholdResponse: Household data
     """
-    # TODO: Implement get household
-    pass
+    household = await _get_household_doc(household_id)
+    now = datetime.now(timezone.utc)
+    created_at = household.get("created_at") or now
+    return HouseholdResponse(
+        id=household_id,
+        name=household.get("name", ""),
+        invite_code=household.get("invite_code", ""),
+        members=await _members(household_id, household),
+        created_at=created_at,
+        updated_at=household.get("updated_at") or created_at,
+    )
 
 
 async def join_household(invite_code: str, user_id: str) -> HouseholdResponse:
@@ -49,8 +183,43 @@ async def join_household(invite_code: str, user_id: str) -> HouseholdResponse:
     Returns:
         HouseholdResponse: Joined household data
     """
-    # TODO: Implement join household
-    pass
+    code = invite_code.strip().upper()
+    households = get_firestore_client().collection(HOUSEHOLDS_COLLECTION)
+    matches = []
+    if is_valid_invite_code(code):
+        query = households.where(filter=FieldFilter("invite_code", "==", code)).limit(1)
+        matches = [doc async for doc in query.stream()]
+        record_reads(HOUSEHOLDS_COLLECTION, len(matches))
+    if not matches:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid invite code"
+        )
+    household_id = matches[0].id
+    user_ref = _user_ref(user_id)
+
+    async def write(transaction: Any) -> Dict[str, int]:
+        user = await user_ref.get(transaction=transaction)
+        previous = (user.to_dict() or {}).get("household_id") if user.exists else None
+        if previous == household_id:
+            return {}
+        versions = await sync_service.next_versions(transaction, [h for h in (previous, household_id) if h])
+        transaction.set(user_ref, {
+            "household_id": household_id,
+            "joined_at": SERVER_TIMESTAMP,
+            "updated_at": SERVER_TIMESTAMP,
+        }, merge=True)
+        return versions
+
+    versions = await run_transaction(write)
+    if versions:
+        _membership_changed(user_id, *versions)
+        for changed, version in versions.items():
+            if changed == household_id:
+                publish_members(changed, version, joined=[user_id])
+            else:
+                publish_members(changed, version, left=[user_id])
+    return await get_household(household_id, user_id)
 
 
 async def leave_household(household_id: str, user_id: str) -> bool:
@@ -64,8 +233,40 @@ async def leave_household(household_id: str, user_id: str) -> bool:
     Returns:
         bool: True if successful
     """
-    # TODO: Implement leave household
-    pass
+    household_ref = sync_service.household_ref(household_id)
+    user_ref = _user_ref(user_id)
+    members_query = get_firestore_client().collection(USERS_COLLECTION).where(
+        filter=FieldFilter("household_id", "==", household_id)
+    )
+
+    async def write(transaction: Any) -> int:
+        user = await user_ref.get(transaction=transaction)
+        if (user.to_dict() or {}).get("household_id") != household_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Not a member of this household"
+            )
+        household = await household_ref.get(transaction=transaction)
+        fields: Dict[str, Any] = {"updated_at": SERVER_TIMESTAMP}
+        if (household.to_dict() or {}).get("created_by") == user_id:
+            # Hand the admin role to the longest-standing remaining member
+            others = [doc async for doc in members_query.stream(transaction=transaction) if doc.id != user_id]
+            record_reads(USERS_COLLECTION, len(others))
+            if others:
+                successor = min(
+                    others,
+                    key=lambda doc: (member_from_doc(doc.id, doc.to_dict(), None).joined_at, doc.id),
+                )
+                fields["created_by"] = successor.id
+        version = await sync_service.next_version(transaction, household_id, fields=fields)
+        transaction.update(user_ref, {"household_id": None, "updated_at": SERVER_TIMESTAMP})
+        return version
+
+    version = await run_transaction(write)
+    _membership_changed(user_id, household_id)
+    access_cache.invalidate(household_id=household_id)  # The admin role may have been handed over
+    publish_members(household_id, version, left=[user_id])
+    return True
 
 
 async def regenerate_invite_code(household_id: str, user_id: str) -> str:
@@ -79,8 +280,17 @@ async def regenerate_invite_code(household_id: str, user_id: str) -> str:
     Returns:
         str: New invite code
     """
-    # TODO: Implement regenerate invite code
-    pass
+    invite_code = await _unique_invite_code()
+
+    async def write(transaction: Any) -> int:
+        return await sync_service.next_version(transaction, household_id, fields={
+            "invite_code": invite_code,
+            "updated_at": SERVER_TIMESTAMP,
+        })
+
+    version = await run_transaction(write)
+    publish_household(household_id, version, ["invite_code"])
+    return invite_code
 
 
 async def get_household_members(household_id: str, user_id: str) -> List[HouseholdMember]:
@@ -94,8 +304,8 @@ async def get_household_members(household_id: str, user_id: str) -> List[Househo
     Returns:
         List[HouseholdMember]: List of household members
     """
-    # TODO: Implement get household members
-    pass
+    household = await _get_household_doc(household_id)
+    return await _members(household_id, household)
 
 
 async def remove_member(household_id: str, member_id: str, admin_id: str) -> bool:
@@ -110,5 +320,25 @@ async def remove_member(household_id: str, member_id: str, admin_id: str) -> boo
     Returns:
         bool: True if successful
     """
-    # TODO: Implement remove member
-    pass
+    if member_id == admin_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Admins leave a household instead of removing themselves"
+        )
+    member_ref = _user_ref(member_id)
+
+    async def write(transaction: Any) -> int:
+        member = await member_ref.get(transaction=transaction)
+        if (member.to_dict() or {}).get("household_id") != household_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Member not found"
+            )
+        version = await sync_service.next_version(transaction, household_id)
+        transaction.update(member_ref, {"household_id": None, "updated_at": SERVER_TIMESTAMP})
+        return version
+
+    version = await run_transaction(write)
+    _membership_changed(member_id, household_id)
+    publish_members(household_id, version, left=[member_id])
+    return True
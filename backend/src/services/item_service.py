@@ -1,6 +1,336 @@
 """Food item service"""
-from typing import List, Optional
-from src.models.item import ItemCreate, ItemUpdate, ItemResponse, ItemFilter
+import heapq
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.config.firebase import FIRESTORE_BATCH_LIMIT, get_documents, get_firestore_client, run_transaction
+from src.config.settings import settings
+from src.middleware.auth import verify_household_access
+from src.models.foodkeeper import ExpiryEstimateItem
+from src.models.item import (
+    GroceryConversion,
+    ItemCreate,
+    ItemUpdate,
+    ItemResponse,
+    ItemChanges,
+    ItemFilter,
+    ItemPage,
+    ItemPageRequest,
+)
+from src.services import expiry_service, sync_service
+from src.services.event_hub import publish_item_changes
+from src.services.expiry_index import ExpiryIndex, expiry_indexes
+from src.services.user_loader import get_user_loader, resolve_owner_names
+from src.utils.cursors import decode_cursor, encode_cursor
+from src.utils.expiry_status import classify_items, household_today
+from src.utils.request_context import record_reads
+
+
+ITEMS_COLLECTION = "items"
+
+# Overlap between incremental expiry index refreshes, covering clock skew
+# against Firestore's server timestamps and commits still in flight
+SYNC_OVERLAP = timedelta(seconds=2)
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+# Listing order -> (document field, direction); ties are broken by document ID
+ORDER_FIELDS = {
+    "expiry_date": ("expiryDate", ASCENDING),
+    "created_at": ("created_at", ASCENDING),
+    "-created_at": ("created_at", DESCENDING),
+}
+
+# ItemResponse field -> item document fields it is built from
+DOCUMENT_FIELDS = {
+    "id": (),
+    "household_id": ("householdId",),
+    "name": ("name",),
+    "quantity": ("quantity",),
+    "expiry_date": ("expiryDate",),
+    "is_communal": ("isCommunal",),
+    "is_grocery": ("isGrocery",),
+    "owner_id": ("ownerId",),
+    "owner_name": ("ownerName", "ownerId"),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at", "created_at"),
+    "days_until_expiry": ("expiryDate",),
+    "expiry_status": ("expiryDate",),
+}
+
+# Page queries with a composite index in firestore.indexes.json (all also
+# filter householdId ==): (other equality fields, order field, direction).
+# Other shapes are paged from the household's in-memory expiry index.
+INDEXED_QUERIES = {
+    (frozenset(), "created_at", DESCENDING),
+    (frozenset(), "created_at", ASCENDING),
+    (frozenset(), "expiryDate", ASCENDING),
+    (frozenset({"isCommunal"}), "created_at", DESCENDING),
+    (frozenset({"isCommunal"}), "created_at", ASCENDING),
+    (frozenset({"isCommunal"}), "expiryDate", ASCENDING),
+    (frozenset({"isGrocery"}), "expiryDate", ASCENDING),
+    (frozenset({"isCommunal", "isGrocery"}), "expiryDate", ASCENDING),
+    (frozenset({"isCommunal", "isGrocery", "ownerId"}), "expiryDate", ASCENDING),
+}
+
+
+def parse_expiry_date(value: Any) -> Optional[date]:
+    """Item documents store expiryDate as an ISO "YYYY-MM-DD" string (or blank)"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def item_from_doc(item_id: str, data: Dict[str, Any]) -> ItemResponse:
+    """
+    Build an ItemResponse from a Firestore item document
+
+    Args:
+        item_id: Document ID
+        data: Document fields, as written by the frontend's itemService
+
+    Returns:
+        ItemResponse: Item data
+    """
+    now = datetime.now(timezone.utc)
+    created_at = data.get("created_at") or now
+    return ItemResponse(
+        id=item_id,
+        household_id=data.get("householdId", ""),
+        name=data.get("name", ""),
+        quantity=data.get("quantity", 1),
+        expiry_date=parse_expiry_date(data.get("expiryDate")),
+        is_communal=data.get("isCommunal", False),
+        is_grocery=data.get("isGrocery", False),
+        owner_id=data.get("ownerId"),
+        owner_name=data.get("ownerName"),
+        created_at=created_at,
+        updated_at=data.get("updated_at") or created_at,
+    )
+
+
+async def _load_household_index(household_id: str) -> ExpiryIndex:
+    """Read every item in a household, and its timezone, from Firestore"""
+    db = get_firestore_client()
+    household = await db.collection("households").document(household_id).get()
+    data = (household.to_dict() or {}) if household.exists else {}
+    synced_at = datetime.now(timezone.utc)
+    query = db.collection(ITEMS_COLLECTION).where(filter=FieldFilter("householdId", "==", household_id))
+    items = [item_from_doc(doc.id, doc.to_dict()) async for doc in query.stream()]
+    record_reads("households", 1)
+    record_reads(ITEMS_COLLECTION, len(items))
+    return ExpiryIndex(items, data.get("timezone"), data.get(sync_service.VERSION_FIELD, 0), synced_at)
+
+
+async def _refresh_household_index(household_id: str, index: ExpiryIndex) -> ExpiryIndex:
+    """
+    Catch a loaded index up with Firestore, reading only what changed
+
+    Items are re-read when their `updated_at` is past the index's last sync
+    (less SYNC_OVERLAP), which catches direct frontend writes too; deletes
+    come from the tombstones written after the index's household version.
+    Falls back to a full load when those tombstones may have been pruned.
+    """
+    state = await sync_service.read_versions(household_id)
+    if index.synced_at is None or sync_service.needs_full_resync(index.version, state.version, state.pruned_through):
+        return await _load_household_index(household_id)
+
+    synced_at = datetime.now(timezone.utc)
+    query = get_firestore_client().collection(ITEMS_COLLECTION).where(
+        filter=FieldFilter("householdId", "==", household_id)
+    ).where(filter=FieldFilter("updated_at", ">", index.synced_at - SYNC_OVERLAP))
+    items = [item_from_doc(doc.id, doc.to_dict()) async for doc in query.stream()]
+    record_reads(ITEMS_COLLECTION, len(items))
+    deleted: List[str] = []
+    if state.version > index.version:
+        tombstones = sync_service.tombstones(household_id).where(
+            filter=FieldFilter(sync_service.VERSION_FIELD, ">", index.version)
+        )
+        deleted = [doc.id async for doc in tombstones.stream()]
+        record_reads(sync_service.TOMBSTONES_COLLECTION, len(deleted))
+
+    for item_id in deleted:
+        index.remove(item_id)
+    for item in items:
+        index.upsert(item)
+    index.timezone_name = state.timezone
+    index.version = state.version
+    index.synced_at = synced_at
+    index.refreshed_at = time.monotonic()
+    return index
+
+
+async def get_household_index(household_id: str) -> ExpiryIndex:
+    """Get a household's expiry index, loading or refreshing it from Firestore if needed"""
+    return await expiry_indexes.get(
+        household_id,
+        lambda: _load_household_index(household_id),
+        lambda index: _refresh_household_index(household_id, index),
+    )
+
+
+async def with_status(
+    items: List[ItemResponse],
+    household_id: str,
+    today: Optional[date] = None,
+) -> List[ItemResponse]:
+    """
+    Finish items for a response: expiry status and days left against the
+    household's current date, and owner names from the owners' user documents
+    (batched, see user_loader)
+    """
+    if today is None:
+        today = (await get_household_index(household_id)).today()
+    classify_items(items, today)
+    return await resolve_owner_names(items, household_id)
+
+
+def validate_fields(fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """
+    Check a `fields=` projection against ItemResponse
+
+    Raises:
+        HTTPException: If a field does not exist
+    """
+    if fields is None:
+        return None
+    fields = list(dict.fromkeys(field for field in fields if field))
+    unknown = [field for field in fields if field not in DOCUMENT_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return fields
+
+
+def _order_key(item: ItemResponse, order: str) -> Tuple[Any, str]:
+    """Sort key of an item under a listing order, matching the Firestore ordering"""
+    if order == "expiry_date":
+        return item.expiry_date.isoformat() if item.expiry_date else "", item.id
+    created_at = item.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at, item.id
+
+
+def _select_page(items: Iterable[ItemResponse], order: str, page: ItemPageRequest) -> List[ItemResponse]:
+    """The first `limit + 1` items after the cursor, in order (an extra item means there is a next page)"""
+    descending = ORDER_FIELDS[order][1] == DESCENDING
+    keyed = ((_order_key(item, order), item) for item in items)
+    if page.cursor:
+        after = decode_cursor(page.cursor, order)
+        keyed = (entry for entry in keyed if (entry[0] < after if descending else entry[0] > after))
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    return [item for _, item in pick(page.limit + 1, keyed, key=lambda entry: entry[0])]
+
+
+async def _household_date(household_id: str) -> date:
+    """Today for a household, from its loaded index or its timezone"""
+    index = expiry_indexes.peek(household_id)
+    if index is not None:
+        return index.today()
+    household = await get_firestore_client().collection("households").document(household_id).get()
+    record_reads("households", 1)
+    return household_today((household.to_dict() or {}).get("timezone") if household.exists else None)
+
+
+async def _query_page(
+    household_id: str,
+    equals: Dict[str, Any],
+    expiry_filters: List[Tuple[str, str]],
+    order: str,
+    page: ItemPageRequest,
+) -> Optional[List[ItemResponse]]:
+    """
+    Read one page straight from Firestore when the household's index is not
+    loaded and the query shape has a composite index
+
+    Returns:
+        Optional[List[ItemResponse]]: Up to `limit + 1` items, or None to page from the index instead
+    """
+    field, direction = ORDER_FIELDS[order]
+    if expiry_indexes.peek(household_id) is not None:
+        return None
+    if (frozenset(equals), field, direction) not in INDEXED_QUERIES:
+        return None
+    if expiry_filters and field != "expiryDate":
+        return None
+
+    query = get_firestore_client().collection(ITEMS_COLLECTION).where(
+        filter=FieldFilter("householdId", "==", household_id)
+    )
+    for name, value in equals.items():
+        query = query.where(filter=FieldFilter(name, "==", value))
+    for op, value in expiry_filters:
+        query = query.where(filter=FieldFilter("expiryDate", op, value))
+    query = query.order_by(field, direction=direction).order_by("__name__", direction=direction)
+    if page.cursor:
+        value, document_id = decode_cursor(page.cursor, order)
+        query = query.start_after({field: value, "__name__": document_id})
+    if page.fields is not None:
+        selected: Set[str] = {field, "householdId"}
+        for name in page.fields:
+            selected.update(DOCUMENT_FIELDS[name])
+        query = query.select(sorted(selected))
+    query = query.limit(page.limit + 1)
+
+    items = [item_from_doc(doc.id, doc.to_dict()) async for doc in query.stream()]
+    record_reads(ITEMS_COLLECTION, len(items))
+    return items
+
+
+async def _finish_page(
+    items: List[ItemResponse],
+    household_id: str,
+    today: date,
+    order: str,
+    page: ItemPageRequest,
+) -> ItemPage:
+    """Trim the look-ahead item, issue the next cursor and fill in computed fields"""
+    next_cursor = None
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        next_cursor = encode_cursor(order, *_order_key(items[-1], order))
+    classify_items(items, today)
+    if page.fields is None or "owner_name" in page.fields:
+        await resolve_owner_names(items, household_id)
+    return ItemPage(items=items, next_cursor=next_cursor)
+
+
+async def _get_item_doc(item_id: str, user_id: str) -> Tuple[Any, str, Dict[str, Any]]:
+    """
+    Read an item document and check the user belongs to its household
+
+    Returns:
+        Tuple[Any, str, Dict[str, Any]]: Document reference, household ID and fields
+
+    Raises:
+        HTTPException: If the item does not exist (or has no household) or access is denied
+    """
+    ref = get_firestore_client().collection(ITEMS_COLLECTION).document(item_id)
+    doc = await ref.get()
+    record_reads(ITEMS_COLLECTION, 1)
+    data = doc.to_dict() if doc.exists else None
+    household_id = data.get("householdId") if data else None
+    if data is None or not household_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found"
+        )
+    await verify_household_access(user_id, household_id)
+    return ref, household_id, data
 
 
 async def create_item(item_data: ItemCreate, user_id: str, household_id: str) -> ItemResponse:
@@ -15,8 +345,36 @@ async def create_item(item_data: ItemCreate, user_id: str, household_id: str) ->
     Returns:
         ItemResponse: Created item data
     """
-    # TODO: Implement create item
-    pass
+    db = get_firestore_client()
+    owner_name = ((await get_user_loader().load(user_id)) or {}).get("name")
+
+    ref = db.collection(ITEMS_COLLECTION).document()
+    data = {
+        "name": item_data.name,
+        "quantity": item_data.quantity,
+        "expiryDate": item_data.expiry_date.isoformat() if item_data.expiry_date else "",
+        "isCommunal": item_data.is_communal,
+        "isGrocery": item_data.is_grocery,
+        "ownerId": user_id,
+        "ownerName": owner_name,
+        "householdId": household_id,
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+
+    async def write(transaction: Any) -> int:
+        version = await sync_service.next_version(transaction, household_id)
+        transaction.set(ref, {**data, sync_service.VERSION_FIELD: version})
+        return version
+
+    version = await run_transaction(write)
+
+    now = datetime.now(timezone.utc)
+    item = item_from_doc(ref.id, {**data, "created_at": now, "updated_at": now})
+    expiry_indexes.upsert(item)
+    created = (await with_status([item], household_id))[0]
+    publish_item_changes(household_id, version, items=[created])
+    return created
 
 
 async def get_item(item_id: str, user_id: str) -> ItemResponse:
@@ -30,24 +388,56 @@ async def get_item(item_id: str, user_id: str) -> ItemResponse:
     Returns:
         ItemResponse: Item data
     """
-    # TODO: Implement get item
-    pass
+    ref, household_id, data = await _get_item_doc(item_id, user_id)
+    return (await with_status([item_from_doc(ref.id, data)], household_id))[0]
 
 
-async def get_items(household_id: str, user_id: str, filters: Optional[ItemFilter] = None) -> List[ItemResponse]:
+async def get_items(
+    household_id: str,
+    user_id: str,
+    filters: Optional[ItemFilter] = None,
+    page: Optional[ItemPageRequest] = None,
+) -> ItemPage:
     """
-    Get all items for a household with optional filters
+    Get one page of a household's items with optional filters
 
     Args:
         household_id: Household ID
         user_id: Requesting user ID
         filters: Optional filters for items
+        page: Ordering (default: newest first), limit, cursor and field projection
 
     Returns:
-        List[ItemResponse]: List of items
+        ItemPage: Items and the cursor of the next page
     """
-    # TODO: Implement get items with filters
-    pass
+    filters = filters or ItemFilter()
+    page = page or ItemPageRequest(limit=settings.items_page_default_limit)
+    order = page.order or "-created_at"
+
+    if filters.expiring_soon is None and filters.expired is None:
+        equals: Dict[str, Any] = {}
+        if filters.is_communal is not None:
+            equals["isCommunal"] = filters.is_communal
+        if filters.owner_id is not None:
+            equals["ownerId"] = filters.owner_id
+        items = await _query_page(household_id, equals, [], order, page)
+        if items is not None:
+            return await _finish_page(items, household_id, await _household_date(household_id), order, page)
+
+    index = await get_household_index(household_id)
+    today = index.today()
+    items = index.items()
+    if filters.expiring_soon is not None:
+        expiring = {item.id for item in index.expiring(today, settings.expiring_soon_days)}
+        items = [item for item in items if (item.id in expiring) == filters.expiring_soon]
+    if filters.expired is not None:
+        expired = {item.id for item in index.expired(today)}
+        items = [item for item in items if (item.id in expired) == filters.expired]
+    if filters.is_communal is not None:
+        items = [item for item in items if item.is_communal == filters.is_communal]
+    if filters.owner_id is not None:
+        items = [item for item in items if item.owner_id == filters.owner_id]
+    return await _finish_page(_select_page(items, order, page), household_id, today, order, page)
 
 
 async def update_item(item_id: str, item_data: ItemUpdate, user_id: str) -> ItemResponse:
@@ -62,8 +452,32 @@ async def update_item(item_id: str, item_data: ItemUpdate, user_id: str) -> Item
     Returns:
         ItemResponse: Updated item data
     """
-    # TODO: Implement update item
-    pass
+    ref, household_id, data = await _get_item_doc(item_id, user_id)
+
+    changes = item_data.model_dump(exclude_unset=True)
+    updates: Dict[str, Any] = {}
+    if "name" in changes:
+        updates["name"] = changes["name"]
+    if "quantity" in changes:
+        updates["quantity"] = changes["quantity"]
+    if "expiry_date" in changes:
+        updates["expiryDate"] = changes["expiry_date"].isoformat() if changes["expiry_date"] else ""
+    if "is_communal" in changes:
+        updates["isCommunal"] = changes["is_communal"]
+    updates["updated_at"] = firestore.SERVER_TIMESTAMP
+
+    async def write(transaction: Any) -> int:
+        version = await sync_service.next_version(transaction, household_id)
+        transaction.update(ref, {**updates, sync_service.VERSION_FIELD: version})
+        return version
+
+    version = await run_transaction(write)
+
+    item = item_from_doc(ref.id, {**data, **updates, "updated_at": datetime.now(timezone.utc)})
+    expiry_indexes.upsert(item)
+    updated = (await with_status([item], item.household_id))[0]
+    publish_item_changes(item.household_id, version, items=[updated])
+    return updated
 
 
 async def delete_item(item_id: str, user_id: str) -> bool:
@@ -77,11 +491,26 @@ async def delete_item(item_id: str, user_id: str) -> bool:
     Returns:
         bool: True if successful
     """
-    # TODO: Implement delete item
-    pass
-
-
-async def get_expiring_items(household_id: str, user_id: str, days: int = 3) -> List[ItemResponse]:
+    ref, household_id, _ = await _get_item_doc(item_id, user_id)
+
+    async def write(transaction: Any) -> int:
+        version = await sync_service.next_version(transaction, household_id, prune_tombstones=True)
+        transaction.delete(ref)
+        sync_service.write_tombstone(transaction, household_id, item_id, version)
+        return version
+
+    version = await run_transaction(write)
+    expiry_indexes.remove(household_id, item_id)
+    publish_item_changes(household_id, version, deleted=[item_id])
+    return True
+
+
+async def get_expiring_items(
+    household_id: str,
+    user_id: str,
+    days: int = 3,
+    page: Optional[ItemPageRequest] = None,
+) -> ItemPage:
     """
     Get items expiring within specified days
 
@@ -89,54 +518,286 @@ async def get_expiring_items(household_id: str, user_id: str, days: int = 3) ->
         household_id: Household ID
         user_id: Requesting user ID
         days: Number of days to check (default: 3)
+        page: Ordering (default: soonest first), limit, cursor and field projection
 
     Returns:
-        List[ItemResponse]: List of expiring items
+        ItemPage: Expiring items and the cursor of the next page
     """
-    # TODO: Implement get expiring items
-    pass
-
-
-async def get_expired_items(household_id: str, user_id: str) -> List[ItemResponse]:
+    page = page or ItemPageRequest(limit=settings.items_page_default_limit)
+    order = page.order or "expiry_date"
+    today = await _household_date(household_id)
+    items = await _query_page(
+        household_id,
+        {"isGrocery": False},
+        [(">=", today.isoformat()), ("<=", (today + timedelta(days=days)).isoformat())],
+        order,
+        page,
+    )
+    if items is None:
+        index = await get_household_index(household_id)
+        today = index.today()
+        items = _select_page(index.expiring(today, days), order, page)
+    return await _finish_page(items, household_id, today, order, page)
+
+
+async def get_expired_items(
+    household_id: str,
+    user_id: str,
+    page: Optional[ItemPageRequest] = None,
+) -> ItemPage:
     """
     Get expired items
 
     Args:
         household_id: Household ID
         user_id: Requesting user ID
+        page: Ordering (default: longest expired first), limit, cursor and field projection
 
     Returns:
-        List[ItemResponse]: List of expired items
+        ItemPage: Expired items and the cursor of the next page
     """
-    # TODO: Implement get expired items
-    pass
-
-
-async def get_personal_items(household_id: str, user_id: str) -> List[ItemResponse]:
+    page = page or ItemPageRequest(limit=settings.items_page_default_limit)
+    order = page.order or "expiry_date"
+    today = await _household_date(household_id)
+    items = await _query_page(
+        household_id, {"isGrocery": False}, [(">", ""), ("<", today.isoformat())], order, page
+    )
+    if items is None:
+        index = await get_household_index(household_id)
+        today = index.today()
+        items = _select_page(index.expired(today), order, page)
+    return await _finish_page(items, household_id, today, order, page)
+
+
+async def get_personal_items(
+    household_id: str,
+    user_id: str,
+    page: Optional[ItemPageRequest] = None,
+) -> ItemPage:
     """
     Get personal (non-communal) items for a user
 
     Args:
         household_id: Household ID
         user_id: User ID
+        page: Ordering (default: soonest expiry first), limit, cursor and field projection
 
     Returns:
-        List[ItemResponse]: List of personal items
+        ItemPage: Personal items and the cursor of the next page
     """
-    # TODO: Implement get personal items
-    pass
+    page = page or ItemPageRequest(limit=settings.items_page_default_limit)
+    order = page.order or "expiry_date"
+    items = await _query_page(
+        household_id, {"isCommunal": False, "isGrocery": False, "ownerId": user_id}, [], order, page
+    )
+    if items is not None:
+        return await _finish_page(items, household_id, await _household_date(household_id), order, page)
+
+    index = await get_household_index(household_id)
+    items = [
+        item for item in index.items()
+        if not item.is_communal and not item.is_grocery and item.owner_id == user_id
+    ]
+    return await _finish_page(_select_page(items, order, page), household_id, index.today(), order, page)
+
+
+async def get_communal_items(
+    household_id: str,
+    user_id: str,
+    page: Optional[ItemPageRequest] = None,
+) -> ItemPage:
+    """
+    Get communal items for a household
 
+    Args:
+        household_id: Household ID
+        user_id: Requesting user ID
+        page: Ordering (default: soonest expiry first), limit, cursor and field projection
 
-async def get_communal_items(household_id: str, user_id: str) -> List[ItemResponse]:
+    Returns:
+        ItemPage: Communal items and the cursor of the next page
     """
-    Get communal items for a household
+    page = page or ItemPageRequest(limit=settings.items_page_default_limit)
+    order = page.order or "expiry_date"
+    items = await _query_page(household_id, {"isCommunal": True, "isGrocery": False}, [], order, page)
+    if items is not None:
+        return await _finish_page(items, household_id, await _household_date(household_id), order, page)
+
+    index = await get_household_index(household_id)
+    items = [item for item in index.items() if item.is_communal and not item.is_grocery]
+    return await _finish_page(_select_page(items, order, page), household_id, index.today(), order, page)
+
+
+def parse_change_token(token: str, household_id: str) -> int:
+    """
+    Read the household version out of a change token
+
+    Args:
+        token: Token from /items/changes or an event stream
+        household_id: Household the token must belong to
+
+    Returns:
+        int: Household version the token stands for
+
+    Raises:
+        HTTPException: If the token is malformed or belongs to another household
+    """
+    version, token_household = decode_cursor(token, "changes")
+    if token_household != household_id or not isinstance(version, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid change token"
+        )
+    return version
+
+
+async def get_item_changes(household_id: str, user_id: str, since: Optional[str] = None) -> ItemChanges:
+    """
+    Get items created, updated or deleted after a change token
+
+    The household version is read before the changes, so everything up to
+    the returned token is included; writes that land meanwhile may show up
+    again on the next call, which is harmless for upserts and deletes.
+
+    Args:
+        household_id: Household ID
+        user_id: Requesting user ID
+        since: Token from a previous call (None for a full download)
+
+    Returns:
+        ItemChanges: Changed items, deleted item IDs and the next token; a
+        full resync when the token is missing, foreign or older than the
+        tombstone retention
+    """
+    since_version = parse_change_token(since, household_id) if since else None
+
+    state = await sync_service.read_versions(household_id)
+    token = encode_cursor("changes", state.version, household_id)
+    full_resync = sync_service.needs_full_resync(since_version, state.version, state.pruned_through)
+
+    items_query = get_firestore_client().collection(ITEMS_COLLECTION).where(
+        filter=FieldFilter("householdId", "==", household_id)
+    )
+    deleted: List[str] = []
+    if not full_resync:
+        version_filter = FieldFilter(sync_service.VERSION_FIELD, ">", since_version)
+        items_query = items_query.where(filter=version_filter).order_by(sync_service.VERSION_FIELD)
+        tombstones = sync_service.tombstones(household_id).where(filter=version_filter)
+        deleted = [doc.id async for doc in tombstones.stream()]
+        record_reads(sync_service.TOMBSTONES_COLLECTION, len(deleted))
+    items = [item_from_doc(doc.id, doc.to_dict()) async for doc in items_query.stream()]
+    record_reads(ITEMS_COLLECTION, len(items))
+
+    # An item deleted and then recreated under the same ID is live again
+    live = {item.id for item in items}
+    deleted = [item_id for item_id in deleted if item_id not in live]
+    return ItemChanges(
+        items=await with_status(items, household_id, household_today(state.timezone)),
+        deleted=deleted,
+        token=token,
+        full_resync=full_resync,
+    )
+
+
+async def convert_groceries_to_pantry(
+    household_id: str,
+    user_id: str,
+    conversions: List[GroceryConversion],
+    purchase_date: Optional[date] = None,
+) -> List[ItemResponse]:
+    """
+    Move grocery-list items to the pantry after a shopping trip
+
+    Items without an expiry date get one estimated from their name (see
+    expiry_service); unnamed items are left without one. Then every item is flipped to `isGrocery: false` with its
+    expiry date in versioned transactions of up to 499 items rather than one
+    update per item.
 
     Args:
         household_id: Household ID
         user_id: Requesting user ID
+        conversions: Items to convert, with optional expiry dates
+        purchase_date: Date the shelf-life estimates count from (default: today)
 
     Returns:
-        List[ItemResponse]: List of communal items
+        List[ItemResponse]: Converted items, in request order
+
+    Raises:
+        HTTPException: If an item is missing, in another household or not a grocery item
     """
-    # TODO: Implement get communal items
-    pass
+    collection = get_firestore_client().collection(ITEMS_COLLECTION)
+
+    by_id: Dict[str, GroceryConversion] = {}
+    for conversion in conversions:
+        by_id[conversion.item_id] = conversion
+    refs = {item_id: collection.document(item_id) for item_id in by_id}
+
+    docs = await get_documents(list(refs.values()))
+    items: Dict[str, Dict[str, Any]] = {}
+    for item_id, doc in zip(by_id, docs):
+        data = doc.to_dict() if doc.exists else None
+        if data is None or data.get("householdId") != household_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Item {item_id} not found"
+            )
+        if not data.get("isGrocery", False):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Item {item_id} is not a grocery item"
+            )
+        items[item_id] = data
+
+    # Items written straight from the frontend may have no usable name to estimate from
+    names = {item_id: str(items[item_id].get("name") or "").strip() for item_id in by_id}
+    missing = [item_id for item_id, conversion in by_id.items() if conversion.expiry_date is None and names[item_id]]
+    estimates = expiry_service.estimate_expiries(
+        [
+            ExpiryEstimateItem(item_id=item_id, name=names[item_id], category=by_id[item_id].category)
+            for item_id in missing
+        ],
+        purchase_date,
+    )
+    expiry_dates = {item_id: conversion.expiry_date for item_id, conversion in by_id.items()}
+    for item_id, estimate in zip(missing, estimates):
+        expiry_dates[item_id] = estimate.expiry_date
+
+    item_ids = list(by_id)
+
+    async def write(transaction: Any, chunk: List[str]) -> int:
+        version = await sync_service.next_version(transaction, household_id)
+        for item_id in chunk:
+            expiry_date = expiry_dates[item_id]
+            transaction.update(refs[item_id], {
+                "isGrocery": False,
+                "expiryDate": expiry_date.isoformat() if expiry_date else "",
+                "updated_at": firestore.SERVER_TIMESTAMP,
+                sync_service.VERSION_FIELD: version,
+            })
+        return version
+
+    # One versioned transaction per chunk (one write is the household's version bump)
+    chunk_size = FIRESTORE_BATCH_LIMIT - 1
+    versions = []
+    for start in range(0, len(item_ids), chunk_size):
+        versions.append(await run_transaction(write, item_ids[start:start + chunk_size]))
+
+    now = datetime.now(timezone.utc)
+    converted = [
+        item_from_doc(item_id, {
+            **items[item_id],
+            "isGrocery": False,
+            "expiryDate": expiry_dates[item_id],
+            "updated_at": now,
+        })
+        for item_id in item_ids
+    ]
+    for item in converted:
+        expiry_indexes.upsert(item)
+    converted = await with_status(converted, household_id)
+    for chunk, version in enumerate(versions):
+        publish_item_changes(
+            household_id, version, items=converted[chunk * chunk_size:(chunk + 1) * chunk_size]
+        )
+    return converted
+
@@ -0,0 +1,165 @@
+"""Non-blocking password hashing
+
+A bcrypt round takes 100-300ms of CPU. Run inline in an `async def` handler
+it stalls every other request on the worker for that long, so register and
+login hash and verify through `password_hasher`, which runs bcrypt on a
+bounded thread pool (bcrypt releases the GIL while it works).
+
+- cost: `password_bcrypt_rounds`; hashes made with another cost are
+  replaced on the user's next successful login (`verify_and_update`)
+- back-pressure: at most `password_hash_max_pending` jobs may be queued or
+  running; beyond that callers get 503 with Retry-After instead of piling up
+  behind a login storm
+
+Load test (other routes' latency while logins saturate the pool):
+
+    STORAGE_BACKEND=memory python -m scripts.bench_password_hasher
+"""
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from src.config.settings import settings
+from src.utils.security import hash_password, password_needs_rehash, verify_password
+
+
+RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHasher:
+    """bcrypt on a thread pool with a cap on outstanding jobs"""
+
+    def __init__(self, workers: Optional[int], max_pending: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dummy_hash: Optional[str] = None
+        self.pending = 0
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking bcrypt call on the pool
+
+        The slot is released when the job finishes (or is dropped before
+        starting), not when the caller stops waiting, so cancelled requests
+        can't push more work into the pool than the cap allows.
+
+        Raises:
+            HTTPException: 503 if `max_pending` jobs are already outstanding
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-ins in progress, please retry",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        job: Future = self._get_executor().submit(fn, *args)
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(job)
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password at the current cost
+
+        Args:
+            password: Plain text password
+
+        Returns:
+            str: bcrypt hash
+        """
+        hashed = await self._run(hash_password, password, settings.password_bcrypt_rounds)
+        self.hashed += 1
+        return hashed
+
+    async def verify(self, password: str, hashed_password: Optional[str]) -> bool:
+        """
+        Check a password against a stored hash
+
+        Without a hash (unknown user) a dummy hash is checked instead, so
+        the response time doesn't reveal which emails have accounts.
+
+        Args:
+            password: Plain text password
+            hashed_password: Stored bcrypt hash, or None
+
+        Returns:
+            bool: True if the password matches
+        """
+        if hashed_password is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = await self._run(hash_password, "", settings.password_bcrypt_rounds)
+            await self._run(verify_password, password, self._dummy_hash)
+            return False
+        matches = await self._run(verify_password, password, hashed_password)
+        self.verified += 1
+        return matches
+
+    async def verify_and_update(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password and rehash it if its cost is out of date
+
+        Args:
+            password: Plain text password
+            hashed_password: Stored bcrypt hash, or None
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether the password matches, and the
+            replacement hash to store when it matches but used another cost
+        """
+        if not await self.verify(password, hashed_password) or hashed_password is None:
+            return False, None
+        if not password_needs_rehash(hashed_password, settings.password_bcrypt_rounds):
+            return True, None
+        self.rehashed += 1
+        return True, await self.hash(password)
+
+    def close(self) -> None:
+        """Stop the worker threads (queued jobs are dropped)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._dummy_hash = None
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rehashed": self.rehashed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
+
+
+def initialize_password_hasher() -> None:
+    """Start the bcrypt worker threads"""
+    password_hasher._get_executor()
+
+
+def close_password_hasher() -> None:
+    """Stop the bcrypt worker threads"""
+    password_hasher.close()
+
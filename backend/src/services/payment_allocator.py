@@ -0,0 +1,414 @@
+"""FIFO payment allocation
+
+A payment from A to B that doesn't say which expenses it settles
+(`applies_to` omitted) is applied to A's open entries in expenses B paid
+for, oldest expense first, until the payment is used up. The ledger already
+counted the payment (see balance_service); allocation only keeps each
+entry's `settled_cents` and each expense's `status` (open ->
+partially_settled -> settled) in step with it.
+
+Open entries are indexed per household in memory: one heap per
+(debtor, creditor) ordered by expense creation time. A payment that covers k
+entries costs O(k log n) instead of a scan of the household's expenses.
+An index is loaded with one query the first time a household allocates.
+expense_service adds expenses as it processes them, and the index is
+reloaded after `payment_allocator_ttl_seconds`.
+
+Allocations are reserved in the index first. They are then written in
+transactions of up to FIRESTORE_BATCH_LIMIT writes. Each transaction
+rewrites the touched expenses' `entries` and `status`, and adds to the
+payment's `appliesTo` and `allocatedCents`. It first checks that every entry
+still has the `settledCents` the index expected. If another writer changed
+one (the frontend, another API instance), the index is reloaded and the rest
+of the payment is allocated again.
+
+Payments the frontend wrote with its own `appliesTo` (it settles the entries
+itself) are left alone. Whatever a payment can't be applied to stays
+unallocated (`allocated_cents` < `total_cents`), as credit the ledger
+already holds.
+
+Benchmark (heap vs. scan):
+
+    python -m scripts.bench_payment_allocator
+"""
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, status
+from google.cloud.firestore_v1 import ArrayUnion, Increment
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.config.firebase import FIRESTORE_BATCH_LIMIT, get_firestore_client, run_transaction
+from src.config.settings import settings
+from src.models.expense import PaymentApply
+from src.services.balance_service import EXPENSES_COLLECTION, HOUSEHOLDS_COLLECTION, PAYMENTS_COLLECTION
+from src.utils.request_context import record_reads
+from src.utils.singleflight import SingleFlight
+
+
+OPEN = "open"
+PARTIALLY_SETTLED = "partially_settled"
+SETTLED = "settled"
+OPEN_STATUSES = (OPEN, PARTIALLY_SETTLED)
+
+ALLOCATED_FIELD = "allocatedCents"
+MAX_ATTEMPTS = 3
+CHUNK_SIZE = FIRESTORE_BATCH_LIMIT - 1  # Expense updates per transaction, plus the payment
+
+
+class Allocation(NamedTuple):
+    """Part of a payment applied to one expense entry"""
+    expense_id: str
+    user_id: str
+    amount_cents: int
+    settled_before: int  # The entry's settledCents the allocation was planned on
+
+
+class _Stale(Exception):
+    """An entry or the payment changed since the index was loaded"""
+
+
+def _open_cents(entry: Dict[str, Any]) -> int:
+    return int(entry.get("amountCents") or 0) - int(entry.get("settledCents") or 0)
+
+
+def expense_status(payer_id: Optional[str], entries: Iterable[Dict[str, Any]]) -> str:
+    """
+    Settlement status of an expense from its entries
+
+    The payer's own entry never needs settling.
+
+    Args:
+        payer_id: User who paid up front
+        entries: Expense document entries
+
+    Returns:
+        str: "settled" when every other entry is paid in full,
+        "partially_settled" when anything is paid, "open" otherwise
+    """
+    owed = [entry for entry in entries if entry.get("userId") != payer_id and int(entry.get("amountCents") or 0) > 0]
+    if all(_open_cents(entry) <= 0 for entry in owed):
+        return SETTLED
+    if any(int(entry.get("settledCents") or 0) > 0 for entry in owed):
+        return PARTIALLY_SETTLED
+    return OPEN
+
+
+def _order(created_at: Any) -> float:
+    return created_at.timestamp() if hasattr(created_at, "timestamp") else 0.0
+
+
+class OpenEntries:
+    """One household's open entries, a FIFO heap per (debtor, creditor)"""
+
+    def __init__(self, expenses: Iterable[Tuple[str, Dict[str, Any]]] = ()):
+        self._expenses: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}  # id -> (payer, entries)
+        self._heaps: Dict[Tuple[str, str], List[Tuple[float, str]]] = {}
+        self.loaded_at = time.monotonic()
+        for expense_id, data in expenses:
+            self._add(expense_id, data, push=False)
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def __len__(self) -> int:
+        return len(self._expenses)
+
+    def _add(self, expense_id: str, data: Dict[str, Any], push: bool) -> None:
+        if expense_id in self._expenses or data.get("status", OPEN) not in OPEN_STATUSES:
+            return
+        payer_id = data.get("payerId") or ""
+        entries = [dict(entry) for entry in data.get("entries") or []]
+        self._expenses[expense_id] = (payer_id, entries)
+        key = (_order(data.get("createdAt")), expense_id)
+        for entry in entries:
+            if entry.get("userId") != payer_id and _open_cents(entry) > 0:
+                heap = self._heaps.setdefault((entry["userId"], payer_id), [])
+                if push:
+                    heapq.heappush(heap, key)
+                else:
+                    heap.append(key)
+
+    def add(self, expense_id: str, data: Dict[str, Any]) -> None:
+        """Index a newly processed expense (no-op if already indexed)"""
+        self._add(expense_id, data, push=True)
+
+    def _entry(self, expense_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        expense = self._expenses.get(expense_id)
+        if expense is None:
+            return None
+        return next((entry for entry in expense[1] if entry.get("userId") == user_id), None)
+
+    def _reserve(self, expense_id: str, entry: Dict[str, Any], amount: int) -> Allocation:
+        settled = int(entry.get("settledCents") or 0)
+        entry["settledCents"] = settled + amount
+        return Allocation(expense_id, entry["userId"], amount, settled)
+
+    def allocate(self, debtor: str, creditor: str, cents: int) -> List[Allocation]:
+        """
+        Reserve up to `cents` of the debtor's oldest open entries owed to the creditor
+
+        Args:
+            debtor: Paying user (the entries' user)
+            creditor: Receiving user (the expenses' payer)
+            cents: Amount to apply
+
+        Returns:
+            List[Allocation]: Allocations, oldest expense first; they add up
+            to less than `cents` if the debtor owes the creditor less
+        """
+        heap = self._heaps.get((debtor, creditor))
+        allocations = []
+        while cents > 0 and heap:
+            expense_id = heap[0][1]
+            entry = self._entry(expense_id, debtor)
+            if entry is None or _open_cents(entry) <= 0:
+                heapq.heappop(heap)  # Settled through `take`, or dropped
+                continue
+            open_cents = _open_cents(entry)
+            amount = min(open_cents, cents)
+            allocations.append(self._reserve(expense_id, entry, amount))
+            cents -= amount
+            if amount == open_cents:
+                heapq.heappop(heap)
+        return allocations
+
+    def open_cents(self, expense_id: str, user_id: str, creditor: str) -> int:
+        """Unsettled cents of one entry owed to the creditor (0 if not open)"""
+        expense = self._expenses.get(expense_id)
+        entry = self._entry(expense_id, user_id)
+        if expense is None or entry is None or expense[0] != creditor or user_id == creditor:
+            return 0
+        return max(_open_cents(entry), 0)
+
+    def take(self, applies_to: Iterable[PaymentApply], creditor: str) -> List[Allocation]:
+        """
+        Reserve explicitly requested amounts, skipping ones no longer open
+
+        Args:
+            applies_to: Entries and amounts to settle
+            creditor: Receiving user (the expenses' payer)
+
+        Returns:
+            List[Allocation]: The requested allocations that still fit
+        """
+        allocations = []
+        for apply in applies_to:
+            entry = self._entry(apply.expense_id, apply.user_id)
+            if entry is not None and 0 < apply.amount_cents <= self.open_cents(apply.expense_id, apply.user_id, creditor):
+                allocations.append(self._reserve(apply.expense_id, entry, apply.amount_cents))
+        return allocations
+
+
+class OpenEntriesRegistry:
+    """Bounded LRU of per-household open entry indexes"""
+
+    def __init__(self, max_households: int, ttl_seconds: float):
+        self.max_households = max_households
+        self.ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[str, OpenEntries]" = OrderedDict()
+        self._loads = SingleFlight()
+        self.loads = 0
+        self.conflicts = 0
+
+    async def get(self, household_id: str, load: Callable[[], Awaitable[OpenEntries]]) -> OpenEntries:
+        """
+        Get a household's index, loading it when missing or older than the TTL
+
+        Args:
+            household_id: Household ID
+            load: Builds the household's index from storage
+
+        Returns:
+            OpenEntries: The household's index
+        """
+        cached = self._indexes.get(household_id)
+        if cached is not None and time.monotonic() - cached.loaded_at < self.ttl_seconds:
+            self._indexes.move_to_end(household_id)
+            return cached
+
+        async def counted() -> OpenEntries:
+            self.loads += 1
+            return await load()
+
+        index: OpenEntries = await self._loads.do(household_id, counted)
+        self._indexes[household_id] = index
+        self._indexes.move_to_end(household_id)
+        while len(self._indexes) > self.max_households:
+            self._indexes.popitem(last=False)
+        return index
+
+    def add_expense(self, household_id: str, expense_id: str, data: Dict[str, Any]) -> None:
+        """Apply a processed expense to its household's loaded index"""
+        index = self._indexes.get(household_id)
+        if index is not None:
+            index.add(expense_id, data)
+
+    def invalidate(self, household_id: Optional[str] = None) -> None:
+        """Forget one household's index, or all of them"""
+        if household_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(household_id, None)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {"households": len(self._indexes), "loads": self.loads, "conflicts": self.conflicts}
+
+
+open_entries = OpenEntriesRegistry(
+    max_households=settings.payment_allocator_max_households,
+    ttl_seconds=settings.payment_allocator_ttl_seconds,
+)
+
+
+def _household(household_id: str) -> Any:
+    return get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document(household_id)
+
+
+async def _load(household_id: str) -> OpenEntries:
+    """Index a household's processed expenses that aren't settled yet"""
+    query = _household(household_id).collection(EXPENSES_COLLECTION).where(
+        filter=FieldFilter("status", "in", list(OPEN_STATUSES))
+    ).select(["payerId", "entries", "status", "createdAt", "processedAt"])
+    expenses = [(doc.id, doc.to_dict()) async for doc in query.stream()]
+    record_reads(EXPENSES_COLLECTION, len(expenses))
+    return OpenEntries((expense_id, data) for expense_id, data in expenses if data.get("processedAt"))
+
+
+async def get_open_entries(household_id: str) -> OpenEntries:
+    """A household's open entry index, loading it if needed"""
+    return await open_entries.get(household_id, lambda: _load(household_id))
+
+
+async def _commit(transaction: Any, household_id: str, payment_ref: Any, allocations: List[Allocation], allocated_before: int) -> None:
+    """Write one chunk of allocations, checking they were planned on current data"""
+    payment = await payment_ref.get(transaction=transaction)
+    if int((payment.to_dict() or {}).get(ALLOCATED_FIELD) or 0) != allocated_before:
+        raise _Stale()
+    expenses = _household(household_id).collection(EXPENSES_COLLECTION)
+    refs = [expenses.document(allocation.expense_id) for allocation in allocations]
+    snapshots = {}
+    async for snapshot in get_firestore_client().get_all(refs, transaction=transaction):
+        snapshots[snapshot.id] = snapshot
+    record_reads(EXPENSES_COLLECTION, len(refs))
+    record_reads(PAYMENTS_COLLECTION, 1)
+
+    updated: Dict[str, Dict[str, Any]] = {}
+    for allocation in allocations:
+        snapshot = snapshots.get(allocation.expense_id)
+        if snapshot is None or not snapshot.exists:
+            raise _Stale()
+        data = updated.setdefault(allocation.expense_id, snapshot.to_dict())
+        entry = next((entry for entry in data.get("entries") or [] if entry.get("userId") == allocation.user_id), None)
+        if entry is None or int(entry.get("settledCents") or 0) != allocation.settled_before:
+            raise _Stale()
+        entry["settledCents"] = allocation.settled_before + allocation.amount_cents
+    for ref in refs:
+        data = updated[ref.id]
+        transaction.update(ref, {"entries": data["entries"], "status": expense_status(data.get("payerId"), data["entries"])})
+    transaction.update(payment_ref, {
+        "appliesTo": ArrayUnion([
+            {"expenseId": allocation.expense_id, "userId": allocation.user_id, "amountCents": allocation.amount_cents}
+            for allocation in allocations
+        ]),
+        ALLOCATED_FIELD: Increment(sum(allocation.amount_cents for allocation in allocations)),
+    })
+
+
+async def validate_applies_to(household_id: str, from_user: str, to_user: str, total_cents: int, applies_to: List[PaymentApply]) -> None:
+    """
+    Check explicit allocations before a payment is recorded
+
+    Raises:
+        HTTPException: If an allocation isn't one of the payer's open entries
+            owed to the receiver, exceeds what is open, or they add up to
+            more than the payment
+    """
+    index = await get_open_entries(household_id)
+    seen = set()
+    for apply in applies_to:
+        key = (apply.expense_id, apply.user_id)
+        if apply.user_id != from_user or key in seen:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"applies_to may only name the payer's entries, once each: {apply.expense_id}"
+            )
+        seen.add(key)
+        open_cents = index.open_cents(apply.expense_id, apply.user_id, to_user)
+        if not 0 < apply.amount_cents <= open_cents:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Expense {apply.expense_id} has {open_cents} open cents owed by {apply.user_id} to {to_user}"
+            )
+    if sum(apply.amount_cents for apply in applies_to) > total_cents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="applies_to adds up to more than the payment"
+        )
+
+
+async def allocate_payment(
+    household_id: str,
+    payment_id: str,
+    applies_to: Optional[List[PaymentApply]] = None,
+    applied: Optional[List[Allocation]] = None,
+) -> List[Allocation]:
+    """
+    Apply a processed payment to expense entries
+
+    Without `applies_to` the payment goes to the payer's oldest open entries
+    owed to the receiver. Allocation resumes where an interrupted one
+    stopped; payments the frontend allocated itself are left alone.
+
+    Args:
+        household_id: Household ID
+        payment_id: Payment document ID
+        applies_to: Explicit allocations (validated with `validate_applies_to`)
+        applied: List to collect committed allocations in, which keeps
+            what was applied if a later chunk fails
+
+    Returns:
+        List[Allocation]: What this call applied
+    """
+    payment_ref = _household(household_id).collection(PAYMENTS_COLLECTION).document(payment_id)
+    requested = list(applies_to) if applies_to is not None else None
+    if applied is None:
+        applied = []
+    for _ in range(MAX_ATTEMPTS):
+        snapshot = await payment_ref.get()
+        record_reads(PAYMENTS_COLLECTION, 1)
+        data = snapshot.to_dict() or {}
+        if not data.get("processedAt") or (data.get("status") or "completed") != "completed":
+            return applied
+        if ALLOCATED_FIELD not in data and data.get("appliesTo") is not None:
+            return applied
+        allocated = int(data.get(ALLOCATED_FIELD) or 0)
+        remaining = int(data.get("totalCents") or 0) - allocated
+        if remaining <= 0:
+            return applied
+
+        index = await get_open_entries(household_id)
+        creditor = data.get("toUser") or ""
+        if requested is None:
+            allocations = index.allocate(data.get("fromUser") or "", creditor, remaining)
+        else:
+            allocations = index.take(requested, creditor)
+        try:
+            for start in range(0, len(allocations), CHUNK_SIZE):
+                chunk = allocations[start:start + CHUNK_SIZE]
+                await run_transaction(_commit, household_id, payment_ref, chunk, allocated)
+                allocated += sum(allocation.amount_cents for allocation in chunk)
+                applied.extend(chunk)
+            return applied
+        except _Stale:
+            open_entries.conflicts += 1
+            open_entries.invalidate(household_id)
+            if requested is not None:
+                done = {(allocation.expense_id, allocation.user_id) for allocation in applied}
+                requested = [apply for apply in requested if (apply.expense_id, apply.user_id) not in done]
+        except Exception:
+            # The index already holds this attempt's reservations
+            open_entries.invalidate(household_id)
+            raise
+    return applied
+
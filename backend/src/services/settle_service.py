@@ -0,0 +1,171 @@
+"""Settle-up suggestions
+
+Turns net balances (positive = owed money, negative = owes money, summing to
+zero) into a short list of transfers that settles everyone.
+
+Settling a zero-sum group of k members takes k - 1 transfers, so the fewest
+transfers for n members with a non-zero balance is n minus the largest number
+of disjoint zero-sum groups they split into. Finding that is NP-hard, so:
+
+1. members whose balances cancel exactly (+x / -x) settle each other in
+   one transfer (always part of some optimal plan)
+2. up to `settle_up_exact_max_members` remaining members: exact solver, a
+   dynamic program over subsets (O(2^n * n)) for the most zero-sum groups
+3. otherwise, or when asked for: greedy matching of the largest creditor
+   with the largest debtor off two heaps (O(n log n), at most n - 1
+   transfers)
+
+The exact cap keeps the worst case inside a fixed latency budget; large
+households get the greedy plan in well under a millisecond per hundred
+members.
+
+Benchmark (transfers and runtime as the member count grows):
+
+    python -m scripts.bench_settle_up
+"""
+import heapq
+from typing import Dict, List, Tuple
+from src.models.expense import SettleUpPlan, Transfer
+
+
+EXACT = "exact"
+GREEDY = "greedy"
+
+
+def _cancel_pairs(balances: Dict[str, int]) -> Tuple[List[Transfer], Dict[str, int]]:
+    """Settle members whose balances cancel exactly; return the rest"""
+    transfers = []
+    waiting: Dict[int, List[str]] = {}  # Creditor amount -> creditors
+    rest: Dict[str, int] = {}
+    for user_id, cents in balances.items():
+        if cents > 0:
+            waiting.setdefault(cents, []).append(user_id)
+    for user_id, cents in balances.items():
+        if cents < 0 and waiting.get(-cents):
+            transfers.append(Transfer(from_user=user_id, to_user=waiting[-cents].pop(), amount_cents=-cents))
+        elif cents < 0:
+            rest[user_id] = cents
+    for cents, user_ids in waiting.items():
+        for user_id in user_ids:
+            rest[user_id] = cents
+    return transfers, rest
+
+
+def greedy_transfers(balances: Dict[str, int]) -> List[Transfer]:
+    """
+    Settle balances by repeatedly matching the largest creditor and debtor
+
+    Every transfer settles at least one of the two, so there are at most
+    n - 1 transfers.
+
+    Args:
+        balances: Non-zero net cents per user, summing to zero
+
+    Returns:
+        List[Transfer]: Transfers, largest first
+    """
+    creditors = [(-cents, user_id) for user_id, cents in balances.items() if cents > 0]
+    debtors = [(cents, user_id) for user_id, cents in balances.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append(Transfer(from_user=debtor, to_user=creditor, amount_cents=amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    return transfers
+
+
+def exact_transfers(balances: Dict[str, int]) -> List[Transfer]:
+    """
+    Settle balances in the fewest possible transfers
+
+    dp[mask] is the most zero-sum groups that can be peeled off, in some
+    order, from the members in `mask`; following the argmax back splits the
+    members into that many zero-sum groups, each settled greedily in
+    size - 1 transfers. Exponential: keep it to small groups.
+
+    Args:
+        balances: Non-zero net cents per user, summing to zero
+
+    Returns:
+        List[Transfer]: A minimum set of transfers
+    """
+    users = list(balances)
+    amounts = [balances[user_id] for user_id in users]
+    count = len(users)
+    full = (1 << count) - 1
+    sums = [0] * (full + 1)
+    dp = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + amounts[low.bit_length() - 1]
+        best = 0
+        bits = mask
+        while bits:
+            bit = bits & -bits
+            if dp[mask ^ bit] > best:
+                best = dp[mask ^ bit]
+            bits ^= bit
+        dp[mask] = best + (sums[mask] == 0)
+
+    # Walk back from everyone: members removed after the mask last summed to
+    # zero form one group
+    groups = []
+    group: List[int] = []
+    mask = full
+    while mask:
+        target = dp[mask] - (sums[mask] == 0)
+        if sums[mask] == 0 and group:
+            groups.append(group)
+            group = []
+        bits = mask
+        while bits:
+            bit = bits & -bits
+            if dp[mask ^ bit] == target:
+                break
+            bits ^= bit
+        group.append(bit.bit_length() - 1)
+        mask ^= bit
+    groups.append(group)
+
+    transfers = []
+    for group in groups:
+        transfers.extend(greedy_transfers({users[index]: amounts[index] for index in group}))
+    return transfers
+
+
+def settle_up(household_id: str, balances: Dict[str, int], max_exact_members: int, exact: bool = True) -> SettleUpPlan:
+    """
+    Suggest transfers that settle a household's balances
+
+    Args:
+        household_id: Household ID
+        balances: Net cents per user (positive = owed money), summing to zero
+        max_exact_members: Largest group handed to the exact solver after
+            exact pairs are settled
+        exact: Allow the exact solver (False: always greedy)
+
+    Returns:
+        SettleUpPlan: Transfers, largest first, and how they were found
+    """
+    transfers, rest = _cancel_pairs({user_id: cents for user_id, cents in balances.items() if cents})
+    if exact and len(rest) <= max_exact_members:
+        transfers.extend(exact_transfers(rest))
+        method = EXACT
+    else:
+        transfers.extend(greedy_transfers(rest))
+        method = GREEDY
+    transfers.sort(key=lambda transfer: (-transfer.amount_cents, transfer.from_user, transfer.to_user))
+    return SettleUpPlan(
+        household_id=household_id,
+        transfers=transfers,
+        method=method,
+        optimal=method == EXACT or not rest,
+    )
+
@@ -0,0 +1,179 @@
+"""Expense split canonicalization
+
+Turns an `ExpenseCreate` into its canonical `entries`: one integer-cent
+amount per participant, always summing exactly to `total_cents`.
+
+- equal: every participant weighs the same
+- shares: participants weigh `shares[user_id]` (0 when missing)
+- custom: `custom_amounts` are taken as-is and must add up to the total
+- payer: the payer covers the whole amount
+
+Proportional splits use largest-remainder allocation. Each participant
+gets the rounded-down exact share, computed on integers (float weights are
+converted exactly, so 1/3 weights don't drift). The cents left over go one
+each to the largest remainders, ties to the earlier participant. The
+frontend's equal split gives the whole remainder to the first participant;
+here nobody gets more than one cent above their exact share.
+
+Batch benchmark:
+
+    python -m scripts.bench_split_service
+"""
+import heapq
+import math
+from fractions import Fraction
+from typing import Iterable, List, Sequence, Tuple
+from fastapi import HTTPException, status
+from src.models.expense import ExpenseCreate, ExpenseEntry, ExpenseSplit
+
+
+METHODS = ("equal", "shares", "custom", "payer")
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=detail
+    )
+
+
+def integer_weights(weights: Sequence[float]) -> List[int]:
+    """
+    Scale weights to integers with the same exact ratios
+
+    Args:
+        weights: Non-negative finite weights (floats are converted exactly)
+
+    Returns:
+        List[int]: Integer weights proportional to the input
+    """
+    fractions = [Fraction(weight) for weight in weights]
+    denominator = math.lcm(*(fraction.denominator for fraction in fractions)) if fractions else 1
+    return [int(fraction * denominator) for fraction in fractions]
+
+
+def allocate_cents(total_cents: int, weights: Sequence[int]) -> Tuple[List[int], int]:
+    """
+    Split an amount in proportion to integer weights (largest remainder)
+
+    Args:
+        total_cents: Amount to split (may be negative, e.g. a refund)
+        weights: Non-negative integer weights with a positive sum
+
+    Returns:
+        Tuple[List[int], int]: Amounts in weight order, summing to
+        `total_cents`, and the cents handed out on top of the rounded-down
+        shares (negative for negative totals)
+    """
+    weight_sum = sum(weights)
+    magnitude = abs(total_cents)
+    amounts = []
+    remainders = []
+    for weight in weights:
+        amount, remainder = divmod(magnitude * weight, weight_sum)
+        amounts.append(amount)
+        remainders.append(remainder)
+    leftover = magnitude - sum(amounts)
+    if leftover:
+        for index in heapq.nlargest(leftover, range(len(weights)), key=lambda i: (remainders[i], -i)):
+            amounts[index] += 1
+    if total_cents < 0:
+        return [-amount for amount in amounts], -leftover
+    return amounts, leftover
+
+
+def _equal(total_cents: int, count: int) -> Tuple[List[int], int]:
+    """`allocate_cents` with equal weights, without the heap"""
+    base, leftover = divmod(abs(total_cents), count)
+    amounts = [base + 1] * leftover + [base] * (count - leftover)
+    if total_cents < 0:
+        return [-amount for amount in amounts], -leftover
+    return amounts, leftover
+
+
+def _check_users(users: Iterable[str], participants: List[str], field: str) -> None:
+    outsiders = sorted(set(users) - set(participants))
+    if outsiders:
+        raise _invalid(f"{field} has users who are not participants: {', '.join(outsiders)}")
+
+
+def split_expense(expense: ExpenseCreate) -> ExpenseSplit:
+    """
+    Compute the canonical entries of an expense
+
+    Args:
+        expense: Expense to split
+
+    Returns:
+        ExpenseSplit: Participants, entries in participant order and the
+        rounding adjustment
+
+    Raises:
+        HTTPException: If the method is unknown or its inputs don't describe
+            a valid split
+    """
+    method = expense.method
+    total_cents = expense.total_cents
+    participants = list(dict.fromkeys(expense.participants))
+    rounding = 0
+
+    if method == "equal":
+        if not participants:
+            raise _invalid("Expense has no participants")
+        amounts, rounding = _equal(total_cents, len(participants))
+    elif method == "shares":
+        if not participants:
+            raise _invalid("Expense has no participants")
+        if not expense.shares:
+            raise _invalid("shares are required for method 'shares'")
+        _check_users(expense.shares, participants, "shares")
+        weights = [expense.shares.get(user_id, 0) for user_id in participants]
+        if any(not math.isfinite(weight) or weight < 0 for weight in weights):
+            raise _invalid("shares must be non-negative numbers")
+        integers = integer_weights(weights)
+        if not any(integers):
+            raise _invalid("shares must not all be zero")
+        amounts, rounding = allocate_cents(total_cents, integers)
+    elif method == "custom":
+        if expense.custom_amounts is None:
+            raise _invalid("custom_amounts are required for method 'custom'")
+        participants = participants or list(expense.custom_amounts)
+        _check_users(expense.custom_amounts, participants, "custom_amounts")
+        amounts = [expense.custom_amounts.get(user_id, 0) for user_id in participants]
+        if sum(amounts) != total_cents:
+            raise _invalid(f"custom_amounts add up to {sum(amounts)} cents, expected {total_cents}")
+    elif method == "payer":
+        if expense.payer_id not in participants:
+            participants.append(expense.payer_id)
+        amounts = [total_cents if user_id == expense.payer_id else 0 for user_id in participants]
+    else:
+        raise _invalid(f"Unknown split method: {method} (expected one of {', '.join(METHODS)})")
+
+    return ExpenseSplit(
+        participants=participants,
+        entries=[ExpenseEntry(user_id=user_id, amount_cents=amount) for user_id, amount in zip(participants, amounts)],
+        rounding_adjustment_cents=rounding,
+    )
+
+
+def split_expenses(expenses: List[ExpenseCreate]) -> List[ExpenseSplit]:
+    """
+    Canonicalize many expenses at once (imports, recomputation)
+
+    Args:
+        expenses: Expenses to split
+
+    Returns:
+        List[ExpenseSplit]: Splits in request order
+
+    Raises:
+        HTTPException: On the first invalid expense, naming its position
+    """
+    splits = []
+    for index, expense in enumerate(expenses):
+        try:
+            splits.append(split_expense(expense))
+        except HTTPException as error:
+            raise _invalid(f"Expense {index}: {error.detail}")
+    return splits
+
@@ -0,0 +1,167 @@
+"""Household change versions
+
+Every write made through the API to a household or its items runs in a
+transaction that bumps the household's `version` counter
+(households/{id}.version). Item writes also stamp the new value on the
+written item (items/{id}.version). Deleted items leave a
+tombstone in households/{id}/itemTombstones/{item_id} carrying the version of
+the delete. Together these let `GET /items/changes` return exactly what
+changed after a client's last version, and the read endpoints use the
+version for their ETags (see middleware/conditional).
+
+Tombstones are kept for `item_tombstone_retention_days`. Older ones are
+pruned a few at a time by later deletes, and the highest pruned version is
+recorded as households/{id}.tombstonesPrunedThrough: a client whose version
+is older than that may have missed a delete and must resync in full.
+
+The frontend's direct item writes follow the same protocol in their own
+transactions (frontend/src/services/itemService.ts), and firestore.rules
+rejects item writes that don't bump the version. Writes that bypass both
+(the console, admin scripts) carry no version.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.config.firebase import get_firestore_client
+from src.config.settings import settings
+from src.utils.request_context import record_reads
+
+
+HOUSEHOLDS_COLLECTION = "households"
+TOMBSTONES_COLLECTION = "itemTombstones"
+VERSION_FIELD = "version"
+PRUNED_THROUGH_FIELD = "tombstonesPrunedThrough"
+
+
+def household_ref(household_id: str) -> Any:
+    """Reference to a household document"""
+    return get_firestore_client().collection(HOUSEHOLDS_COLLECTION).document(household_id)
+
+
+def tombstones(household_id: str) -> Any:
+    """A household's item tombstone collection"""
+    return household_ref(household_id).collection(TOMBSTONES_COLLECTION)
+
+
+class HouseholdVersion(NamedTuple):
+    """A household's change state, from one document read"""
+    exists: bool
+    version: int
+    pruned_through: int  # Highest pruned tombstone version
+    timezone: Optional[str]
+
+
+async def read_versions(household_id: str) -> HouseholdVersion:
+    """
+    Read a household's current version and tombstone horizon
+
+    Args:
+        household_id: Household ID
+
+    Returns:
+        HouseholdVersion: Version state of the household
+    """
+    snapshot = await household_ref(household_id).get(
+        field_paths=[VERSION_FIELD, PRUNED_THROUGH_FIELD, "timezone"]
+    )
+    record_reads(HOUSEHOLDS_COLLECTION, 1)
+    data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    return HouseholdVersion(
+        exists=snapshot.exists,
+        version=data.get(VERSION_FIELD, 0),
+        pruned_through=data.get(PRUNED_THROUGH_FIELD, 0),
+        timezone=data.get("timezone"),
+    )
+
+
+async def next_versions(transaction: Any, household_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    Reserve the next version of several households inside one transaction
+    (e.g. a member moving from one household to another)
+
+    Args:
+        transaction: Transaction from `run_transaction`
+        household_ids: Household IDs
+
+    Returns:
+        Dict[str, int]: New version per household
+    """
+    references = {household_id: household_ref(household_id) for household_id in dict.fromkeys(household_ids)}
+    versions: Dict[str, int] = {}
+    for household_id, reference in references.items():
+        snapshot = await reference.get(transaction=transaction)
+        record_reads(HOUSEHOLDS_COLLECTION, 1)
+        versions[household_id] = ((snapshot.to_dict() or {}) if snapshot.exists else {}).get(VERSION_FIELD, 0) + 1
+    for household_id, reference in references.items():
+        transaction.set(reference, {VERSION_FIELD: versions[household_id]}, merge=True)
+    return versions
+
+
+async def next_version(
+    transaction: Any,
+    household_id: str,
+    prune_tombstones: bool = False,
+    fields: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Reserve the household's next version inside a transaction
+
+    Does all of its reads before queueing writes, so callers must finish
+    their own transactional reads first.
+
+    Args:
+        transaction: Transaction from `run_transaction`
+        household_id: Household ID
+        prune_tombstones: Also delete up to `item_tombstone_prune_batch`
+            tombstones older than the retention period
+        fields: Other household fields to write along with the version
+
+    Returns:
+        int: Version to stamp on the documents written by this transaction
+    """
+    reference = household_ref(household_id)
+    snapshot = await reference.get(transaction=transaction)
+    record_reads(HOUSEHOLDS_COLLECTION, 1)
+    data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    updates = {**(fields or {}), VERSION_FIELD: data.get(VERSION_FIELD, 0) + 1}
+
+    expired = []
+    if prune_tombstones:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.item_tombstone_retention_days)
+        query = (
+            reference.collection(TOMBSTONES_COLLECTION)
+            .where(filter=FieldFilter("deletedAt", "<", cutoff))
+            .order_by("deletedAt")
+            .limit(settings.item_tombstone_prune_batch)
+        )
+        expired = [doc async for doc in query.stream(transaction=transaction)]
+        record_reads(TOMBSTONES_COLLECTION, len(expired))
+    if expired:
+        updates[PRUNED_THROUGH_FIELD] = max(
+            data.get(PRUNED_THROUGH_FIELD, 0), *((doc.to_dict() or {}).get(VERSION_FIELD, 0) for doc in expired)
+        )
+        for doc in expired:
+            transaction.delete(doc.reference)
+
+    transaction.set(reference, updates, merge=True)
+    return updates[VERSION_FIELD]
+
+
+def write_tombstone(transaction: Any, household_id: str, item_id: str, version: int) -> None:
+    """Record an item delete at `version`"""
+    transaction.set(tombstones(household_id).document(item_id), {
+        VERSION_FIELD: version,
+        "deletedAt": SERVER_TIMESTAMP,
+    })
+
+
+def needs_full_resync(since: Optional[int], version: int, pruned_through: int) -> bool:
+    """
+    Whether a client at version `since` must re-download everything
+
+    True without a version, when tombstones the client may not have seen
+    were pruned, or when the version is ahead of the household's (the
+    token belongs to another store).
+    """
+    return since is None or since < pruned_through or since > version
@@ -0,0 +1,255 @@
+"""Bearer token verification
+
+Requests carry either a JWT issued by this API (HS256, see
+`utils.security.create_access_token`) or a Firebase ID token from the
+frontend (RS256, signed with Google's rotating securetoken keys). Both are
+verified here, behind two caches:
+
+- a bounded LRU of verified claims keyed by the token's SHA-256, each entry
+  expiring at the token's own `exp`, so repeated requests with the same
+  token skip signature verification
+- Google's signing keys, refetched in the background shortly before the
+  `Cache-Control: max-age` of the last response runs out, so requests only
+  wait on a key fetch for a `kid` that has not been seen yet
+
+Benchmark (authenticated request overhead with and without the cache):
+
+    STORAGE_BACKEND=memory python -m scripts.bench_token_verifier
+"""
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from jose import JWTError, jwk, jwt
+from src.config.http_client import GOOGLE_APIS, get_upstream_client
+from src.config.settings import settings
+from src.utils.security import decode_access_token
+from src.utils.singleflight import SingleFlight
+
+
+FIREBASE_KEYS_PATH = "/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com"
+FIREBASE_ISSUER = "https://securetoken.google.com/"
+FIREBASE_ALGORITHM = "RS256"
+DEFAULT_KEYS_MAX_AGE = 3600.0  # When the key response has no max-age
+
+
+def _max_age(cache_control: Optional[str]) -> float:
+    """Seconds a response may be cached according to its Cache-Control header"""
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return float(match.group(1)) if match else DEFAULT_KEYS_MAX_AGE
+
+
+class SigningKeys:
+    """Google's public keys for Firebase ID tokens, by `kid`"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._keys: Dict[str, Any] = {}
+        self._refreshes = SingleFlight()
+        self._task: Optional[asyncio.Task] = None
+        self.fetched_at = float("-inf")  # time.monotonic() of the last attempt
+        self.expires_at = float("-inf")
+        self.fetches = 0
+        self.failures = 0
+
+    async def _fetch(self) -> None:
+        self.fetched_at = time.monotonic()
+        try:
+            response = await get_upstream_client(GOOGLE_APIS).get(self.path)
+            response.raise_for_status()
+            keys = {
+                data["kid"]: jwk.construct(data, algorithm=FIREBASE_ALGORITHM)
+                for data in response.json().get("keys", [])
+                if data.get("kid")
+            }
+        except (httpx.HTTPError, ValueError, JWTError):
+            self.failures += 1
+            raise
+        self.fetches += 1
+        self._keys = keys
+        self.expires_at = self.fetched_at + _max_age(response.headers.get("cache-control"))
+
+    async def refresh(self) -> bool:
+        """
+        Fetch the current keys (concurrent callers share one fetch)
+
+        Returns:
+            bool: False if the fetch failed; the previous keys are kept
+        """
+        try:
+            await self._refreshes.do(self.path, self._fetch)
+        except (httpx.HTTPError, ValueError, JWTError):
+            return False
+        return True
+
+    async def get(self, kid: str) -> Optional[Any]:
+        """
+        Get the key a token was signed with
+
+        Only fetches when the keys are past their max-age (the background
+        refresh isn't running) or when `kid` is unknown, at most once per
+        `firebase_signing_keys_min_refresh_seconds` so tokens with made-up
+        `kid`s can't hammer Google.
+
+        Args:
+            kid: Key ID from the token header
+
+        Returns:
+            Optional[Any]: The public key, or None if no such key
+        """
+        now = time.monotonic()
+        throttled = now - self.fetched_at < settings.firebase_signing_keys_min_refresh_seconds
+        if (now >= self.expires_at or kid not in self._keys) and not throttled:
+            await self.refresh()
+        return self._keys.get(kid)
+
+    async def _run(self) -> None:
+        while True:
+            refreshed = await self.refresh()
+            delay = self.expires_at - time.monotonic() - settings.firebase_signing_keys_refresh_margin_seconds
+            if not refreshed:
+                delay = 0
+            await asyncio.sleep(max(delay, settings.firebase_signing_keys_min_refresh_seconds))
+
+    def start(self) -> None:
+        """Keep the keys fresh in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def clear(self) -> None:
+        self._keys = {}
+        self.fetched_at = self.expires_at = float("-inf")
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified token claims, each kept until the token's `exp`"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a previously verified token that hasn't expired yet"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, token: str, claims: Dict[str, Any]) -> None:
+        """Remember verified claims; tokens without a numeric `exp` are not cached"""
+        expires_at = claims.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token)
+        self._entries[key] = (float(expires_at), claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+signing_keys = SigningKeys(FIREBASE_KEYS_PATH)
+verified_tokens = VerifiedTokenCache(settings.token_cache_max_entries)
+
+
+async def _verify_firebase_token(token: str, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Check a Firebase ID token's signature and claims (see the Firebase Admin SDK docs)"""
+    key = await signing_keys.get(kid) if kid else None
+    if key is None:
+        return None
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[FIREBASE_ALGORITHM],
+            audience=settings.firebase_project_id,
+            issuer=FIREBASE_ISSUER + settings.firebase_project_id,
+        )
+    except JWTError:
+        return None
+    now = time.time()
+    if not claims.get("sub") or not isinstance(claims.get("iat"), (int, float)) or claims["iat"] > now:
+        return None
+    if claims.get("auth_time", 0) > now:
+        return None
+    return claims
+
+
+async def _verify(token: str) -> Optional[Dict[str, Any]]:
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        return None
+    if header.get("alg") == settings.algorithm:
+        return decode_access_token(token)
+    if header.get("alg") == FIREBASE_ALGORITHM and settings.firebase_auth_enabled:
+        return await _verify_firebase_token(token, header.get("kid"))
+    return None
+
+
+async def verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify a bearer token
+
+    Args:
+        token: API-issued JWT or Firebase ID token
+
+    Returns:
+        Optional[Dict[str, Any]]: Verified claims (`sub` is the user ID), or
+        None if the token is invalid or expired
+    """
+    claims = verified_tokens.get(token)
+    if claims is not None:
+        return claims
+    claims = await _verify(token)
+    if claims is not None:
+        verified_tokens.set(token, claims)
+    return claims
+
+
+def initialize_token_verifier() -> None:
+    """Start refreshing the Firebase signing keys in the background"""
+    if settings.firebase_auth_enabled:
+        signing_keys.start()
+
+
+async def close_token_verifier() -> None:
+    """Stop the key refresh and forget verified tokens"""
+    await signing_keys.stop()
+    signing_keys.clear()
+    verified_tokens.clear()
+
@@ -0,0 +1,206 @@
+"""Batched user lookups
+
+Item owner names and household member details come from `users/{uid}`
+documents. Reading them one at a time per item or member is an N+1 pattern,
+so lookups go through two layers:
+
+- `MemberCache`: process-wide, short-TTL cache of each household's member
+  documents, loaded with one `users where household_id == ...` query
+- `UserLoader`: request-scoped DataLoader. `load()` calls made in the same
+  event loop tick are coalesced into one `get_all` round trip, and every
+  document is memoized for the rest of the request
+
+A response that needs user data therefore costs at most one member query
+(zero while the cache is warm) plus one batched read for users outside the
+household (e.g. owners of items left behind by former members).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.config.firebase import get_documents, get_firestore_client
+from src.config.settings import settings
+from src.utils.request_context import record_reads, scoped
+from src.utils.singleflight import SingleFlight
+
+
+USERS_COLLECTION = "users"
+
+
+class UserLoader:
+    """Request-scoped, batching and memoizing loader for user documents"""
+
+    def __init__(self):
+        self._cache: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+        self._queue: List[str] = []
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.documents = 0
+
+    def prime(self, user_id: str, data: Optional[Dict[str, Any]]) -> None:
+        """Seed the memo with a document read elsewhere (e.g. by the member cache)"""
+        if user_id in self._cache:
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(data)
+        self._cache[user_id] = future
+
+    async def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get one user document, batched with other loads in the same tick
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Optional[Dict[str, Any]]: Document fields, or None if the user does not exist
+        """
+        future = self._cache.get(user_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[user_id] = future
+            self._queue.append(user_id)
+            if len(self._queue) == 1:
+                self._dispatcher = asyncio.ensure_future(self._dispatch())
+        return await asyncio.shield(future)
+
+    async def load_many(self, user_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get several user documents in (at most) one round trip
+
+        Args:
+            user_ids: User IDs (duplicates allowed)
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Document fields by user ID (None for missing users)
+        """
+        unique = list(dict.fromkeys(user_ids))
+        results = await asyncio.gather(*(self.load(user_id) for user_id in unique))
+        return dict(zip(unique, results))
+
+    async def _dispatch(self) -> None:
+        # Let every coroutine that is ready this tick queue its keys first
+        await asyncio.sleep(0)
+        user_ids, self._queue = self._queue, []
+        collection = get_firestore_client().collection(USERS_COLLECTION)
+        try:
+            snapshots = await get_documents([collection.document(user_id) for user_id in user_ids])
+        except Exception as exc:
+            for user_id in user_ids:
+                future = self._cache.pop(user_id)
+                if not future.done():
+                    future.set_exception(exc)
+                # Mark the exception as retrieved even if every waiter was cancelled
+                future.exception()
+            return
+        self.batches += 1
+        self.documents += len(user_ids)
+        for user_id, snapshot in zip(user_ids, snapshots):
+            future = self._cache[user_id]
+            if not future.done():
+                future.set_result(snapshot.to_dict() if snapshot.exists else None)
+
+
+def get_user_loader() -> UserLoader:
+    """The current request's user loader"""
+    return scoped("users", UserLoader)
+
+
+class MemberCache:
+    """Bounded LRU of household member documents with a short TTL"""
+
+    def __init__(self, max_households: int, ttl_seconds: float):
+        self.max_households = max_households
+        self.ttl_seconds = ttl_seconds
+        self._members: "OrderedDict[str, tuple]" = OrderedDict()  # household -> (loaded_at, members)
+        self._loads = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    async def _load(self, household_id: str) -> Dict[str, Dict[str, Any]]:
+        query = get_firestore_client().collection(USERS_COLLECTION).where(
+            filter=FieldFilter("household_id", "==", household_id)
+        )
+        members = {doc.id: doc.to_dict() async for doc in query.stream()}
+        record_reads(USERS_COLLECTION, len(members))
+        return members
+
+    async def get(self, household_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get a household's member documents, querying them when missing or stale
+
+        Concurrent requests for the same household share one query, and the
+        documents are primed into the current request's `UserLoader`.
+
+        Args:
+            household_id: Household ID
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Member user documents by user ID
+        """
+        entry = self._members.get(household_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            self.hits += 1
+            self._members.move_to_end(household_id)
+            members = entry[1]
+        else:
+            self.misses += 1
+            members = await self._loads.do(household_id, lambda: self._load(household_id))
+            self._members[household_id] = (time.monotonic(), members)
+            self._members.move_to_end(household_id)
+            while len(self._members) > self.max_households:
+                self._members.popitem(last=False)
+
+        loader = get_user_loader()
+        for user_id, data in members.items():
+            loader.prime(user_id, data)
+        return members
+
+    def invalidate(self, household_id: Optional[str] = None) -> None:
+        """Forget one household's members (after a join/leave/removal), or all of them"""
+        if household_id is None:
+            self._members.clear()
+        else:
+            self._members.pop(household_id, None)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {"households": len(self._members), "hits": self.hits, "misses": self.misses}
+
+
+member_cache = MemberCache(
+    max_households=settings.member_cache_max_households,
+    ttl_seconds=settings.member_cache_ttl_seconds,
+)
+
+
+async def resolve_owner_names(items: List[Any], household_id: str) -> List[Any]:
+    """
+    Set `owner_name` on items from their owners' current user documents
+
+    Members come from the member cache; owners who are no longer in the
+    household are read in one batch. Items keep the name stored on the item
+    document when the owner's user document is gone.
+
+    Args:
+        items: ItemResponse objects (updated in place)
+        household_id: Household the items belong to
+
+    Returns:
+        List: The same items
+    """
+    owner_ids = {item.owner_id for item in items if item.owner_id}
+    if not owner_ids:
+        return items
+    members = await member_cache.get(household_id)
+    users: Dict[str, Optional[Dict[str, Any]]] = dict(members)
+    outside = [owner_id for owner_id in owner_ids if owner_id not in members]
+    if outside:
+        users.update(await get_user_loader().load_many(outside))
+    for item in items:
+        name = (users.get(item.owner_id) or {}).get("name") if item.owner_id else None
+        if name:
+            item.owner_name = name
+    return items
+
@@ -0,0 +1,65 @@
+"""Opaque pagination cursors
+
+A cursor names the last row of a page by its sort key: the ordering it was
+issued for, the value of the ordered field and the document ID (the
+tie-breaker). Clients treat it as an opaque string and send it back as
+`cursor=` to get the next page.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Tuple
+from fastapi import HTTPException, status
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+
+def encode_cursor(order: str, value: Any, document_id: str) -> str:
+    """
+    Encode a page boundary
+
+    Args:
+        order: Ordering the cursor belongs to (e.g. "expiry_date")
+        value: Value of the ordered field on the last row (str or datetime)
+        document_id: ID of the last row
+
+    Returns:
+        str: URL-safe cursor
+    """
+    if isinstance(value, datetime):
+        value = {"t": value.isoformat()}
+    payload = json.dumps([order, value, document_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, order: str) -> Tuple[Any, str]:
+    """
+    Decode a cursor issued for `order`
+
+    Args:
+        cursor: Cursor from a previous page
+        order: Ordering of the current request
+
+    Returns:
+        Tuple[Any, str]: Ordered field value and document ID
+
+    Raises:
+        HTTPException: If the cursor is malformed or belongs to another ordering
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order, value, document_id = json.loads(payload)
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["t"])
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+    except (ValueError, TypeError, KeyError):
+        raise _invalid_cursor()
+    if cursor_order != order or not isinstance(document_id, str):
+        raise _invalid_cursor()
+    return value, document_id
@@ -0,0 +1,134 @@
+"""Offline stand-in for the barcode upstream APIs
+
+Builds an `httpx.MockTransport` that answers UPC Database and Open Food Facts
+requests with canned payloads, so the barcode routes and the shared client
+pool can be exercised and benchmarked without network access:
+
+    fake = FakeUpstream(latency=0.05)
+    await initialize_http_clients(transport=fake.transport())
+
+Latency, timeouts and throttling (429s) can be injected to exercise the
+upstream circuit breakers and concurrency limits. A latency beyond the
+client's read timeout raises `httpx.ReadTimeout` once the timeout has
+passed, as a real slow upstream would.
+"""
+import asyncio
+import random
+from collections import Counter
+from typing import Dict, Optional
+import httpx
+
+
+UPC_HOST = "api.upcitemdb.com"
+OPEN_FOOD_FACTS_HOST = "world.openfoodfacts.org"
+
+
+class FakeUpstream:
+    """Canned UPC Database / Open Food Facts responses with request counting"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        products: Optional[Dict[str, dict]] = None,
+        throttle_rate: float = 0.0,
+        seed: Optional[int] = None,
+        latencies: Optional[Dict[str, float]] = None,
+        upc_products: Optional[Dict[str, dict]] = None,
+        barcode_latencies: Optional[Dict[str, float]] = None,
+        throttle_rates: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            latency: Seconds to wait before answering each request
+            products: Barcode -> product dict; unknown barcodes answer 404
+            throttle_rate: Fraction of requests answered with 429
+            seed: Random seed for reproducible throttling
+            latencies: Host -> latency, overriding `latency` for that upstream
+            upc_products: UPC Database answers, where they differ from `products`
+            barcode_latencies: Barcode -> latency, overriding the host's for that barcode
+            throttle_rates: Host -> throttle rate, overriding `throttle_rate` for that upstream
+        """
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.barcode_latencies = barcode_latencies or {}
+        self.products = products if products is not None else {}
+        self.upc_products = upc_products if upc_products is not None else self.products
+        self.throttle_rate = throttle_rate
+        self.throttle_rates = throttle_rates or {}
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.timed_out: Counter = Counter()
+        self.in_flight: Counter = Counter()
+        self.max_in_flight: Counter = Counter()
+        self._random = random.Random(seed)
+
+    def transport(self) -> httpx.MockTransport:
+        """Build a transport that routes requests to this fake"""
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """Answer one upstream request"""
+        host = request.url.host
+        if host == UPC_HOST:
+            barcode = request.url.params.get("upc", "")
+        else:
+            barcode = request.url.path.rsplit("/", 1)[-1].removesuffix(".json")
+        latency = self.barcode_latencies.get(barcode, self.latencies.get(host, self.latency))
+        timeout = (request.extensions.get("timeout") or {}).get("read")
+
+        self.in_flight[host] += 1
+        self.max_in_flight[host] = max(self.max_in_flight[host], self.in_flight[host])
+        try:
+            if timeout is not None and latency > timeout:
+                await asyncio.sleep(timeout)
+                self.calls[host] += 1
+                self.timed_out[host] += 1
+                raise httpx.ReadTimeout("Fake upstream timed out", request=request)
+            if latency:
+                await asyncio.sleep(latency)
+        finally:
+            self.in_flight[host] -= 1
+
+        self.calls[host] += 1
+
+        throttle_rate = self.throttle_rates.get(host, self.throttle_rate)
+        if throttle_rate and self._random.random() < throttle_rate:
+            self.throttled[host] += 1
+            return httpx.Response(429, text="Too Many Requests")
+
+        if host == UPC_HOST:
+            return self._upc_response(barcode)
+        if host == OPEN_FOOD_FACTS_HOST:
+            return self._openfoodfacts_response(barcode)
+        return httpx.Response(404)
+
+    def _upc_response(self, barcode: str) -> httpx.Response:
+        """UPC Database style payload"""
+        product = self.upc_products.get(barcode)
+        if product is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json={
+            "code": "OK",
+            "total": 1,
+            "offset": 0,
+            "items": [{
+                "ean": barcode,
+                "title": product.get("product_name", ""),
+                "brand": product.get("brands"),
+                "category": product.get("categories"),
+                "size": product.get("quantity"),
+                "images": [product["image_url"]] if product.get("image_url") else [],
+            }],
+        })
+
+    def _openfoodfacts_response(self, barcode: str) -> httpx.Response:
+        """Open Food Facts style payload"""
+        product = self.products.get(barcode)
+        if product is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json={
+            "code": barcode,
+            "status": 1,
+            "status_verbose": "product found",
+            "product": product,
+        })
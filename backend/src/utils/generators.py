@@ -1,7 +1,9 @@
 """Data generator utilities"""
-import random
+import secrets
 import string
 
+INVITE_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
 
 def generate_invite_code(length: int = 8) -> str:
     """
@@ -13,8 +15,7 @@ def generate_invite_code(length: int = 8) -> str:
     Returns:
         str: Random invite code
     """
-    # TODO: Implement invite code generation
-    pass
+    return "".join(secrets.choice(INVITE_CODE_ALPHABET) for _ in range(length))
 
 
 def generate_user_id() -> str:
@@ -0,0 +1,117 @@
+"""Request-scoped state
+
+`RequestScopeMiddleware` opens one `RequestScope` per HTTP request and keeps
+it in a context variable, so anything the request awaits can reach it
+without threading it through every call:
+
+- storage read accounting (`record_reads`): documents read and round trips,
+  per collection, reported back in the `X-Storage-Reads` /
+  `X-Storage-Round-Trips` response headers, and reads answered from a
+  process-wide cache instead (`record_saved_reads`, `X-Storage-Reads-Saved`)
+- per-request loaders (`scoped`), e.g. the user DataLoader, which must not
+  outlive the request that filled them
+
+Outside a request (startup, scripts) there is no scope: reads are not
+counted and `scoped` builds a throwaway instance.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RequestScope:
+    """Read counters and loaders for one request"""
+
+    def __init__(self):
+        self.reads: Dict[str, int] = {}  # collection -> documents read
+        self.round_trips: Dict[str, int] = {}  # collection -> storage calls
+        self.saved_reads: Dict[str, int] = {}  # collection -> reads a cache answered instead
+        self._loaders: Dict[str, Any] = {}
+
+    @property
+    def total_reads(self) -> int:
+        return sum(self.reads.values())
+
+    @property
+    def total_round_trips(self) -> int:
+        return sum(self.round_trips.values())
+
+    @property
+    def total_saved_reads(self) -> int:
+        return sum(self.saved_reads.values())
+
+    def record_reads(self, collection: str, documents: int, round_trips: int = 1) -> None:
+        """Count documents read from a collection (a query costs at least one read)"""
+        self.reads[collection] = self.reads.get(collection, 0) + max(documents, round_trips)
+        self.round_trips[collection] = self.round_trips.get(collection, 0) + round_trips
+
+    def record_saved_reads(self, collection: str, documents: int) -> None:
+        """Count document reads a cache made unnecessary"""
+        self.saved_reads[collection] = self.saved_reads.get(collection, 0) + documents
+
+    def scoped(self, name: str, factory: Callable[[], T]) -> T:
+        """Get this request's instance of a loader, creating it on first use"""
+        instance = self._loaders.get(name)
+        if instance is None:
+            instance = self._loaders[name] = factory()
+        return instance
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters for logging and tests"""
+        return {
+            "reads": dict(self.reads),
+            "round_trips": dict(self.round_trips),
+            "total_reads": self.total_reads,
+            "total_round_trips": self.total_round_trips,
+            "saved_reads": dict(self.saved_reads),
+            "total_saved_reads": self.total_saved_reads,
+        }
+
+
+_current: ContextVar[Optional[RequestScope]] = ContextVar("request_scope", default=None)
+
+
+def current_scope() -> Optional[RequestScope]:
+    """The active request's scope, if any"""
+    return _current.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestScope]:
+    """Open a fresh scope for the duration of the block"""
+    scope = RequestScope()
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+
+
+def record_reads(collection: str, documents: int, round_trips: int = 1) -> None:
+    """Count reads against the active request (no-op outside a request)"""
+    scope = _current.get()
+    if scope is not None:
+        scope.record_reads(collection, documents, round_trips)
+
+
+def record_saved_reads(collection: str, documents: int) -> None:
+    """Count reads a cache answered for the active request (no-op outside a request)"""
+    scope = _current.get()
+    if scope is not None:
+        scope.record_saved_reads(collection, documents)
+
+
+def scoped(name: str, factory: Callable[[], T]) -> T:
+    """The active request's instance of a loader, or a fresh one outside a request"""
+    scope = _current.get()
+    if scope is None:
+        return factory()
+    return scope.scoped(name, factory)
+
+
+def collection_of(path: str) -> str:
+    """Collection ID of a document path ("households/h1/expenses/e1" -> "expenses")"""
+    parts = path.split("/")
+    return parts[-2] if len(parts) >= 2 else path
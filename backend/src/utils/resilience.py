@@ -0,0 +1,256 @@
+"""Resilience primitives for calling flaky upstream APIs
+
+- AIMDLimiter: adaptive concurrency limit (additive increase on healthy
+  responses, multiplicative decrease on throttling/timeouts/slow responses)
+- CircuitBreaker: fails fast after consecutive failures, probes again after
+  a cool-down
+- RetryBudget: caps retries to a fraction of regular traffic so retries
+  can't amplify an upstream outage
+- UpstreamGuard: the three combined around one upstream
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamRejected(Exception):
+    """Call rejected locally without reaching the upstream"""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(reason)
+
+
+class AIMDLimiter:
+    """Adaptive concurrency limit"""
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_threshold: float,
+        backoff_ratio: float = 0.5,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free under the current limit"""
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Return a slot"""
+        self.in_flight -= 1
+
+    def on_success(self, latency: float) -> None:
+        """Grow by roughly one slot per window of healthy calls; shrink if slow"""
+        if latency > self.latency_threshold:
+            self.on_overload()
+            return
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_overload(self) -> None:
+        """Back off multiplicatively"""
+        self.limit = max(self.minimum, self.limit * self.backoff_ratio)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State for monitoring"""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Check if a call may go through right now"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def on_success(self) -> None:
+        """Record a healthy call"""
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self._probe_in_flight = False
+
+    def on_failure(self) -> None:
+        """Record a failed call, opening the breaker past the threshold"""
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def abandon_probe(self) -> None:
+        """Let another caller probe if the current probe was cancelled"""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State for monitoring"""
+        retry_in = 0.0
+        if self.state == OPEN:
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": round(retry_in, 1),
+        }
+
+
+class RetryBudget:
+    """Token bucket that earns `ratio` retries per regular call"""
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        """Earn budget for one regular call"""
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Spend budget on one retry"""
+        if self.tokens < 1.0:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1.0
+        self.retries += 1
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State for monitoring"""
+        return {
+            "tokens": round(self.tokens, 2),
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+        }
+
+
+class UpstreamGuard:
+    """Circuit breaker + adaptive limiter + retry budget for one upstream"""
+
+    def __init__(
+        self,
+        name: str,
+        limiter: AIMDLimiter,
+        breaker: CircuitBreaker,
+        budget: RetryBudget,
+        max_retries: int = 1,
+        retry_backoff: float = 0.1,
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.budget = budget
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        is_failure: Callable[[Exception], bool],
+        is_overload: Callable[[Exception], bool],
+    ) -> Any:
+        """
+        Call the upstream through the guard
+
+        Args:
+            fn: Zero-argument coroutine function making one upstream call
+            is_failure: Whether an exception counts against upstream health
+            is_overload: Whether an exception means "slow down" (429/timeout)
+
+        Returns:
+            Any: Result of `fn`
+
+        Raises:
+            UpstreamRejected: If the breaker is open or the limit is reached
+            Exception: The last error from `fn` once retries are exhausted
+        """
+        if not self.limiter.try_acquire():
+            raise UpstreamRejected("concurrency limit reached")
+        if not self.breaker.allow():
+            self.limiter.release()
+            raise UpstreamRejected("circuit open")
+
+        self.budget.deposit()
+        try:
+            attempt = 0
+            while True:
+                started = time.monotonic()
+                try:
+                    result = await fn()
+                except asyncio.CancelledError:
+                    self.breaker.abandon_probe()
+                    raise
+                except Exception as e:
+                    if not is_failure(e):
+                        self.breaker.on_success()
+                        raise
+                    if is_overload(e):
+                        self.limiter.on_overload()
+                    self.breaker.on_failure()
+                    if (
+                        attempt >= self.max_retries
+                        or self.breaker.state == OPEN
+                        or not self.budget.try_withdraw()
+                    ):
+                        raise
+                    attempt += 1
+                    await asyncio.sleep(self.retry_backoff * attempt)
+                    continue
+
+                self.limiter.on_success(time.monotonic() - started)
+                self.breaker.on_success()
+                return result
+        finally:
+            self.limiter.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State for monitoring"""
+        return {
+            "name": self.name,
+            "breaker": self.breaker.snapshot(),
+            "limiter": self.limiter.snapshot(),
+            "retry_budget": self.budget.snapshot(),
+        }
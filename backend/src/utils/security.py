@@ -1,32 +1,42 @@
 """Security utilities"""
 from datetime import datetime, timedelta
 from typing import Optional
+import bcrypt
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from src.config.settings import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_MAX_PASSWORD_BYTES = 72  # bcrypt ignores anything longer
 
 
-def hash_password(password: str) -> str:
+def _password_bytes(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash a password using bcrypt
 
+    Blocks for the whole bcrypt round (100ms+ at the default cost): async
+    code goes through `services.password_hasher` instead.
+
     Args:
         password: Plain text password
+        rounds: bcrypt cost factor (default: `password_bcrypt_rounds`)
 
     Returns:
         str: Hashed password
     """
-    # TODO: Implement password hashing
-    pass
+    salt = bcrypt.gensalt(rounds or settings.password_bcrypt_rounds)
+    return bcrypt.hashpw(_password_bytes(password), salt).decode("ascii")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against its hash
 
+    Blocking, like `hash_password`.
+
     Args:
         plain_password: Plain text password
         hashed_password: Hashed password
@@ -34,8 +44,27 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if password matches
     """
-    # TODO: Implement password verification
-    pass
+    try:
+        return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode("ascii"))
+    except ValueError:  # Not a bcrypt hash
+        return False
+
+
+def password_needs_rehash(hashed_password: str, rounds: Optional[int] = None) -> bool:
+    """
+    Whether a hash was made with another cost factor than the current one
+
+    Args:
+        hashed_password: bcrypt hash ("$2b$<cost>$...")
+        rounds: Current cost factor (default: `password_bcrypt_rounds`)
+
+    Returns:
+        bool: True if the password should be hashed again
+    """
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return True
+    return int(parts[2]) != (rounds or settings.password_bcrypt_rounds)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -49,8 +78,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         str: Encoded JWT token
     """
-    # TODO: Implement JWT token creation
-    pass
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
 def decode_access_token(token: str) -> Optional[dict]:
@@ -63,5 +94,7 @@ def decode_access_token(token: str) -> Optional[dict]:
     Returns:
         Optional[dict]: Decoded token data or None if invalid
     """
-    # TODO: Implement JWT token decoding
-    pass
+    try:
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
@@ -0,0 +1,63 @@
+"""Single-flight request coalescing
+
+Concurrent callers asking for the same key share one in-flight call: the
+first caller starts it, everyone else awaits the same task and receives the
+same result or exception.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Keyed de-duplication of concurrent async calls"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn` once for all concurrent callers with the same key
+
+        The shared task is shielded, so a caller that gets cancelled (e.g. a
+        client disconnect) doesn't cancel the call for the others.
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument coroutine function doing the actual work
+
+        Returns:
+            Any: Result of `fn`
+
+        Raises:
+            Exception: Whatever `fn` raised, re-raised in every caller
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Drop a finished call so the next caller starts a fresh one"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._inflight),
+        }
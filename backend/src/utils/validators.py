@@ -27,8 +27,7 @@ def is_valid_invite_code(code: str) -> bool:
     Returns:
         bool: True if valid format
     """
-    # TODO: Implement invite code validation
-    pass
+    return bool(code) and 4 <= len(code) <= 12 and all(c.isascii() and c.isalnum() for c in code)
 
 
 def is_date_expired(expiry_date: Optional[date]) -> bool:
@@ -81,3 +80,16 @@ def is_expiring_soon(expiry_date: Optional[date], threshold_days: int = 3) -> bo
     if days is None:
         return False
     return 0 <= days <= threshold_days
+
+
+def normalize_barcode(barcode: str) -> str:
+    """
+    Normalize a scanned barcode for lookups and caching
+
+    Args:
+        barcode: Raw barcode as scanned or typed
+
+    Returns:
+        str: Barcode with whitespace and separators removed
+    """
+    return "".join(ch for ch in barcode.strip() if ch not in " -_")
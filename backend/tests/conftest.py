@@ -0,0 +1,149 @@
+"""Shared fixtures: in-memory storage and an HTTP client for the app"""
+import os
+
+# Settings are read at import time; run against the local in-memory store
+os.environ.setdefault("FIREBASE_PROJECT_ID", "test-project")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+import asyncio  # noqa: E402
+import time  # noqa: E402
+from typing import Any, Awaitable, Callable, Dict, Sequence  # noqa: E402
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from src.config import firebase  # noqa: E402
+from src.config.http_client import close_http_clients, initialize_http_clients  # noqa: E402
+from src.config.settings import settings  # noqa: E402
+from src.main import app  # noqa: E402
+from src.services import barcode_service  # noqa: E402
+from src.services.access_cache import access_cache  # noqa: E402
+from src.services.barcode_cache import close_barcode_cache, initialize_barcode_cache  # noqa: E402
+from src.services.expiry_index import expiry_indexes  # noqa: E402
+from src.services.payment_allocator import open_entries  # noqa: E402
+from src.services.token_verifier import verified_tokens  # noqa: E402
+from src.services.user_loader import member_cache  # noqa: E402
+from src.utils.fake_upstream import FakeUpstream  # noqa: E402
+from src.utils.singleflight import SingleFlight  # noqa: E402
+from src.utils.security import create_access_token  # noqa: E402
+
+
+@pytest.fixture
+async def db():
+    """Fresh in-memory store, with the process-wide caches in front of it emptied"""
+    assert firebase.settings.storage_backend != firebase.FIRESTORE, "tests need STORAGE_BACKEND=memory or sqlite"
+    client = firebase.initialize_firebase()
+    yield client
+    await firebase.close_firebase()
+    access_cache.invalidate()
+    expiry_indexes.invalidate()
+    open_entries.invalidate()
+    member_cache.invalidate()
+    verified_tokens.clear()
+
+
+@pytest.fixture
+async def client(db):
+    """HTTP client calling the app in-process"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+
+
+@pytest.fixture
+def auth_headers() -> Callable[[str], Dict[str, str]]:
+    """Build bearer token headers for a user ID"""
+    def build(user_id: str) -> Dict[str, str]:
+        return {"Authorization": "Bearer " + create_access_token({"sub": user_id})}
+    return build
+
+
+@pytest.fixture
+def create_household(db, client, auth_headers) -> Callable[..., Awaitable[Dict[str, Any]]]:
+    """
+    Create a household through the API: `members[0]` creates it and the rest
+    join with its invite code. `outsiders` only get a user document.
+    """
+    async def create(members: Sequence[str], outsiders: Sequence[str] = ()) -> Dict[str, Any]:
+        for user_id in (*members, *outsiders):
+            await db.collection("users").document(user_id).set({"name": user_id, "email": f"{user_id}@example.com"})
+        response = await client.post("/api/households", json={"name": "Flat"}, headers=auth_headers(members[0]))
+        assert response.status_code == 201, response.text
+        household = response.json()
+        for user_id in members[1:]:
+            response = await client.post(
+                "/api/households/join", json={"invite_code": household["invite_code"]}, headers=auth_headers(user_id),
+            )
+            assert response.status_code == 200, response.text
+        return household
+    return create
+
+
+@pytest.fixture
+async def fake_upstream(monkeypatch) -> Callable[..., Awaitable[FakeUpstream]]:
+    """
+    Build a FakeUpstream (same options) behind the shared upstream clients,
+    with a fresh, memory-only barcode cache in front
+    """
+    monkeypatch.setattr(settings, "barcode_cache_path", None)
+    initialize_barcode_cache()
+    inflight = SingleFlight()
+    monkeypatch.setattr(barcode_service, "inflight", inflight)
+
+    async def build(**options: Any) -> FakeUpstream:
+        fake = FakeUpstream(**options)
+        await initialize_http_clients(transport=fake.transport())
+        return fake
+
+    yield build
+    # Lookups a test stopped waiting for keep running under single flight
+    await asyncio.gather(*inflight._inflight.values(), return_exceptions=True)
+    await close_http_clients()
+    close_barcode_cache()
+
+
+class CallbackTimer:
+    """Slowest single event loop callback seen while installed"""
+
+    def __init__(self):
+        self.slowest = 0.0
+        self.slowest_name = ""
+
+    def record(self, handle: asyncio.Handle, elapsed: float) -> None:
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_name = self.describe(handle)
+
+    @staticmethod
+    def describe(handle: asyncio.Handle) -> str:
+        """Where a task step ended up suspended (innermost awaiting coroutine), else the handle"""
+        task = getattr(handle._callback, "__self__", None)
+        if not isinstance(task, asyncio.Task):
+            return repr(handle)[:200]
+        frames = []
+        coro = task.get_coro()
+        while coro is not None and hasattr(coro, "cr_code"):
+            frames.append(coro.cr_code.co_qualname)
+            coro = coro.cr_await
+        return " > ".join(frames[-4:]) or repr(task)[:200]
+
+
+@pytest.fixture
+def loop_blocking(monkeypatch) -> CallbackTimer:
+    """
+    Time every callback the event loop runs during the test
+
+    A sync call made inside an `async def` (a blocking storage call, file
+    I/O, heavy CPU) shows up as one slow callback.
+    """
+    timer = CallbackTimer()
+    run = asyncio.Handle._run
+
+    def timed_run(handle: asyncio.Handle) -> None:
+        started = time.perf_counter()
+        try:
+            run(handle)
+        finally:
+            timer.record(handle, time.perf_counter() - started)
+
+    monkeypatch.setattr(asyncio.Handle, "_run", timed_run)
+    return timer
@@ -0,0 +1,61 @@
+"""Tests for the household authorization cache"""
+from typing import Tuple
+import httpx
+import pytest
+from src.services.access_cache import access_cache
+
+
+def reads(response: httpx.Response) -> Tuple[int, int]:
+    return int(response.headers["x-storage-reads"]), int(response.headers["x-storage-reads-saved"])
+
+
+@pytest.fixture
+async def household(client, auth_headers, create_household):
+    """A household created by u1 with one item; u2 and u3 are outsiders"""
+    household = await create_household(["u1"], outsiders=["u2", "u3"])
+    household["item"] = (await client.post(
+        f"/api/items?household_id={household['id']}", headers=auth_headers("u1"),
+        json={"name": "Milk", "quantity": 1, "is_communal": True},
+    )).json()
+    return household
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/api/items/{item}"),
+    ("GET", "/api/households/{household}"),
+    ("POST", "/api/households/{household}/regenerate-code"),
+])
+async def test_warm_requests_skip_the_authorization_reads(client, auth_headers, household, method, path):
+    path = path.format(item=household["item"]["id"], household=household["id"])
+    access_cache.invalidate()
+
+    cold = await client.request(method, path, headers=auth_headers("u1"))
+    warm = await client.request(method, path, headers=auth_headers("u1"))
+
+    assert cold.status_code == warm.status_code == 200, (cold.text, warm.text)
+    (cold_reads, _), (warm_reads, saved) = reads(cold), reads(warm)
+    assert saved >= 1
+    assert warm_reads == cold_reads - saved
+
+
+async def test_join_and_removal_apply_immediately(client, auth_headers, household):
+    path = f"/api/households/{household['id']}"
+    assert (await client.get(path, headers=auth_headers("u2"))).status_code == 403
+
+    await client.post("/api/households/join", json={"invite_code": household["invite_code"]}, headers=auth_headers("u2"))
+    assert (await client.get(path, headers=auth_headers("u2"))).status_code == 200
+
+    await client.delete(f"{path}/members/u2", headers=auth_headers("u1"))
+    assert (await client.get(path, headers=auth_headers("u2"))).status_code == 403
+
+
+async def test_admin_handover_on_leave_applies_immediately(client, auth_headers, household):
+    path = f"/api/households/{household['id']}"
+    regenerate = f"{path}/regenerate-code"
+    await client.post("/api/households/join", json={"invite_code": household["invite_code"]}, headers=auth_headers("u3"))
+    assert (await client.post(regenerate, headers=auth_headers("u3"))).status_code == 403
+
+    await client.post(f"{path}/leave", headers=auth_headers("u1"))
+
+    assert (await client.post(regenerate, headers=auth_headers("u3"))).status_code == 200
+    assert (await client.get(path, headers=auth_headers("u1"))).status_code == 403
@@ -0,0 +1,108 @@
+"""Tests for materialized household balances"""
+import asyncio
+import random
+from typing import Any, Dict
+import pytest
+from src.services.balance_service import (
+    EXPENSES_COLLECTION, HOUSEHOLDS_COLLECTION, balance_verifier, expense_debts, verify_balances,
+)
+
+USERS = ["u1", "u2", "u3", "u4", "u5"]
+
+
+@pytest.fixture
+async def household(create_household):
+    """A household created by u1 that every user in USERS has joined"""
+    return await create_household(USERS)
+
+
+async def record(client, auth_headers, household_id: str, rounds: int, rng: random.Random) -> None:
+    """Concurrent expenses and payments through the API"""
+    async def one() -> None:
+        creator = rng.choice(USERS)
+        if rng.random() < 0.7:
+            method = rng.choice(["equal", "shares", "payer"])
+            participants = rng.sample(USERS, rng.randint(1, len(USERS)))
+            response = await client.post("/api/expenses", headers=auth_headers(creator), json={
+                "household_id": household_id, "created_by": creator, "payer_id": creator,
+                "total_cents": rng.randint(1, 10 ** 5), "participants": participants, "method": method,
+                "shares": {user_id: rng.randint(1, 4) for user_id in participants} if method == "shares" else None,
+            })
+        else:
+            receiver = rng.choice([user_id for user_id in USERS if user_id != creator])
+            response = await client.post("/api/expenses/payments", headers=auth_headers(creator), json={
+                "household_id": household_id, "from_user": creator, "to_user": receiver,
+                "total_cents": rng.randint(1, 10 ** 4),
+            })
+        assert response.status_code == 201, response.text
+
+    await asyncio.gather(*(one() for _ in range(rounds)))
+
+
+async def test_incremental_ledger_matches_a_recomputation(client, auth_headers, household):
+    await record(client, auth_headers, household["id"], 60, random.Random(23))
+
+    balances = (await client.get(f"/api/households/{household['id']}/balances", headers=auth_headers("u3"))).json()
+
+    assert sum(member["net_cents"] for member in balances["members"]) == 0, balances
+    owed: Dict[str, int] = {}
+    for debt in balances["debts"]:
+        owed[debt["to_user"]] = owed.get(debt["to_user"], 0) + debt["amount_cents"]
+        owed[debt["from_user"]] = owed.get(debt["from_user"], 0) - debt["amount_cents"]
+    assert owed == {m["user_id"]: m["net_cents"] for m in balances["members"] if m["net_cents"] or m["user_id"] in owed}
+    verification = await verify_balances(household["id"])
+    assert verification.consistent and verification.unprocessed_expenses == 0, verification
+    assert verification.expenses_checked + verification.payments_checked == 60
+
+
+async def test_balance_reads_do_not_grow_with_history(client, auth_headers, household):
+    path = f"/api/households/{household['id']}/balances"
+    rng = random.Random(23)
+    reads = []
+    for rounds in (10, 100):
+        await record(client, auth_headers, household["id"], rounds, rng)
+        response = await client.get(path, headers=auth_headers("u3"))
+        assert response.status_code == 200
+        reads.append(response.headers["x-storage-reads"])
+
+    assert reads[0] == reads[1]
+
+
+async def test_frontend_expense_is_counted_once_when_processed_twice(db, client, auth_headers, household):
+    ref = db.collection(HOUSEHOLDS_COLLECTION).document(household["id"]).collection(EXPENSES_COLLECTION).document()
+    await ref.set({
+        "createdBy": "u2", "payerId": "u2", "totalCents": 1001, "participants": ["u1", "u2", "u3"],
+        "method": "equal", "entries": [], "status": "open", "processedAt": None,
+    })
+    path = f"/api/expenses/{ref.id}/process?household_id={household['id']}"
+
+    processed = (await client.post(path, headers=auth_headers("u2"))).json()
+    again = (await client.post(path, headers=auth_headers("u2"))).json()
+
+    assert [entry["amount_cents"] for entry in processed["entries"]] == [334, 334, 333], processed
+    assert again["entries"] == processed["entries"]
+    verification = await verify_balances(household["id"])
+    assert verification.consistent and verification.expenses_checked == 1, verification
+
+
+async def test_expense_deleted_outside_the_api_is_flagged_then_repaired(db, client, auth_headers, household):
+    await record(client, auth_headers, household["id"], 20, random.Random(23))
+    expenses = db.collection(HOUSEHOLDS_COLLECTION).document(household["id"]).collection(EXPENSES_COLLECTION)
+    deleted: Dict[str, Any] = {}
+    async for doc in expenses.stream():
+        deleted = doc.to_dict()
+        if expense_debts(deleted["payerId"], deleted["entries"]):
+            await doc.reference.delete()
+            break
+    path = f"/api/households/{household['id']}/balances/verify"
+
+    assert (await client.post(path, headers=auth_headers("u2"))).status_code == 403
+    drift = (await client.post(path, headers=auth_headers("u1"))).json()
+    assert not drift["consistent"] and not drift["repaired"] and drift["pair_drift"], drift
+    assert drift["net_drift"].get(deleted["payerId"], 0) == sum(
+        entry["amountCents"] for entry in deleted["entries"] if entry["userId"] != deleted["payerId"]
+    ), (drift, deleted)
+
+    repaired = (await client.post(path + "?repair=true", headers=auth_headers("u1"))).json()
+    assert repaired["repaired"] and (await verify_balances(household["id"])).consistent
+    assert await balance_verifier.run_once() == []
@@ -0,0 +1,80 @@
+"""Tests for the two-tier barcode cache"""
+import time
+from src.services.barcode_cache import BarcodeCache
+
+
+def make_cache(tmp_path, **overrides) -> BarcodeCache:
+    options = dict(
+        max_entries=10,
+        ttl_seconds=60,
+        negative_ttl_seconds=5,
+        disk_path=str(tmp_path / "barcode_cache.sqlite3"),
+        disk_max_entries=100,
+    )
+    options.update(overrides)
+    return BarcodeCache(**options)
+
+
+async def test_disk_hit_is_promoted_to_memory(tmp_path):
+    cache = make_cache(tmp_path)
+    await cache.set("upc:1", {"name": "Milk"})
+    cache.memory.clear()
+
+    assert await cache.get("upc:1") == {"name": "Milk"}
+    assert await cache.get("upc:1") == {"name": "Milk"}
+    assert cache.stats.disk_hits == 1
+    assert cache.stats.memory_hits == 1
+    cache.close()
+
+
+async def test_disk_tier_is_pruned_every_n_stores(tmp_path):
+    cache = make_cache(tmp_path, disk_max_entries=3, disk_prune_every=5)
+    for index in range(4):
+        await cache.set(f"upc:{index}", {"n": index})
+    assert cache.disk.count() == 4
+
+    await cache.set("upc:4", {"n": 4})
+    assert cache.disk.count() == 3
+    assert cache.stats.evictions == 2
+    cache.close()
+
+
+async def test_expired_disk_rows_are_pruned(tmp_path):
+    cache = make_cache(tmp_path, disk_prune_every=2)
+    cache.disk.set("upc:old", {"n": 0}, time.time() - 1)
+
+    await cache.set("upc:1", {"n": 1})
+    await cache.set("upc:2", {"n": 2})
+    assert cache.disk.count() == 2
+    assert await cache.get_stale("upc:old") is None
+    cache.close()
+
+
+async def test_snapshot_counts_disk_entries(tmp_path):
+    cache = make_cache(tmp_path)
+    await cache.set("upc:1", {"n": 1})
+    await cache.set("upc:2", None, negative=True)
+    await cache.get("upc:1")
+    await cache.get("upc:3")
+
+    snapshot = await cache.snapshot()
+    assert snapshot["disk_entries"] == 2
+    assert snapshot["memory_entries"] == 2
+    assert snapshot["negative_stores"] == 1
+    assert snapshot["hit_ratio"] == 0.5
+    cache.close()
+
+
+def test_expired_entry_counts_one_expiration():
+    cache = BarcodeCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=5)
+    now = time.time()
+    cache.memory.set("upc:1", {"n": 1}, now - 1)
+
+    for _ in range(3):
+        assert cache.memory.get("upc:1", now) is None
+    assert cache.stats.expirations == 1
+    assert cache.memory.get("upc:1", now, allow_stale=True) == {"n": 1}
+
+    cache.memory.set("upc:1", {"n": 1}, now - 1)
+    cache.memory.get("upc:1", now)
+    assert cache.stats.expirations == 2
@@ -0,0 +1,211 @@
+"""Tests for merged, hedged and batched product lookups"""
+import json
+import time
+import pytest
+from src.config.http_client import OPEN_FOOD_FACTS, UPC_DATABASE
+from src.models.product import ProductInfo
+from src.services import barcode_service
+from src.services.barcode_service import is_generic_product_data, merge_product_data
+from src.utils.fake_upstream import OPEN_FOOD_FACTS_HOST, UPC_HOST
+
+BARCODE = "012345678905"
+GOOD = {
+    "product_name": "Oat Drink Barista", "brands": "Oatly", "categories": "Plant-based milks",
+    "quantity": "1 l", "nutriments": {"energy-kcal_100g": 59},
+}
+GENERIC = {"product_name": "Product", "nutriments": {"energy-kcal_100g": 59}}
+UPC = {"product_name": "Oatly Oat Drink", "brands": "Oatly", "categories": "Milk Substitutes", "image_url": "https://img/1.jpg"}
+
+
+def product(**fields) -> ProductInfo:
+    return ProductInfo(name=fields.pop("name", ""), **fields)
+
+
+async def timed_lookup():
+    started = time.perf_counter()
+    result = await barcode_service.lookup_product(BARCODE)
+    return result, time.perf_counter() - started
+
+
+async def test_good_open_food_facts_answer_does_not_wait_for_upc(fake_upstream):
+    fake = await fake_upstream(
+        products={BARCODE: GOOD}, upc_products={BARCODE: UPC},
+        latencies={OPEN_FOOD_FACTS_HOST: 0.01, UPC_HOST: 0.5},
+    )
+
+    result, elapsed = await timed_lookup()
+
+    assert result.source == OPEN_FOOD_FACTS and result.product.product_name == "Oat Drink Barista"
+    assert elapsed < 0.25
+    assert fake.calls[OPEN_FOOD_FACTS_HOST] == 1
+
+
+async def test_generic_open_food_facts_answer_is_merged_with_upc(fake_upstream):
+    await fake_upstream(
+        products={BARCODE: GENERIC}, upc_products={BARCODE: UPC},
+        latencies={OPEN_FOOD_FACTS_HOST: 0.01, UPC_HOST: 0.05},
+    )
+
+    result, _ = await timed_lookup()
+
+    assert result.found and result.source == "merged"
+    assert result.product.product_name == "Product"  # Open Food Facts wins where it has data
+    assert result.product.brands == "Oatly" and result.product.categories == "Milk Substitutes"
+    assert result.product.image_url == "https://img/1.jpg"
+    assert result.product.nutriments == {"energy-kcal_100g": 59}
+
+
+@pytest.mark.parametrize("hedge_delay, source", [(0.05, UPC_DATABASE), (0.4, "merged")])
+async def test_upc_answer_waits_only_the_hedge_delay_for_open_food_facts(fake_upstream, monkeypatch, hedge_delay, source):
+    monkeypatch.setattr(barcode_service.settings, "barcode_hedge_delay_seconds", hedge_delay)
+    await fake_upstream(
+        products={BARCODE: GOOD}, upc_products={BARCODE: UPC},
+        latencies={OPEN_FOOD_FACTS_HOST: 0.2, UPC_HOST: 0.01},
+    )
+
+    result, elapsed = await timed_lookup()
+
+    assert result.source == source
+    if source == UPC_DATABASE:
+        assert 0.05 <= elapsed < 0.15
+    else:
+        assert 0.2 <= elapsed < 0.35  # Open Food Facts arrived inside the hedge window
+
+
+async def test_latency_is_the_slower_upstream_not_the_sum(fake_upstream, monkeypatch):
+    monkeypatch.setattr(barcode_service.settings, "barcode_hedge_delay_seconds", 1.0)
+    await fake_upstream(
+        products={BARCODE: GENERIC}, upc_products={BARCODE: UPC},
+        latencies={OPEN_FOOD_FACTS_HOST: 0.15, UPC_HOST: 0.15},
+    )
+
+    result, elapsed = await timed_lookup()
+
+    assert result.source == "merged"
+    assert 0.15 <= elapsed < 0.25
+
+
+async def test_unknown_barcode_is_not_found(fake_upstream):
+    await fake_upstream()
+
+    result, _ = await timed_lookup()
+
+    assert not result.found and result.source is None and result.product is None
+
+
+@pytest.mark.parametrize("item, generic", [
+    (None, True),
+    (product(), True),
+    (product(name="Oat Drink", categories="Plant-based milks"), False),
+    (product(product_name="Oat Drink", categories="Plant-based milks"), False),
+    (product(name="Oat Drink", product_name="", categories="Plant-based milks"), False),  # name when product_name is empty
+    (product(product_name="Unknown Brand Milk", categories="Plant-based milks"), True),
+    (product(product_name="UNKNOWN", categories="Plant-based milks"), True),
+    (product(product_name="Dishes", categories="Plant-based milks"), True),
+    (product(product_name="product", categories="Plant-based milks"), True),
+    (product(product_name="Food", categories="Plant-based milks"), True),
+    (product(product_name="Food bag", categories="Plant-based milks"), False),  # Only exact generic names
+    (product(product_name="Ox", categories="Plant-based milks"), True),
+    (product(product_name="Oat", categories="Plant-based milks"), False),
+    (product(product_name="Oat Drink"), True),
+    (product(product_name="Oat Drink", categories="Milk"), True),
+    (product(product_name="Oat Drink", categories="Milks"), False),
+])
+def test_generic_product_detection(item, generic):
+    assert is_generic_product_data(item) is generic
+
+
+OFF = product(
+    name="Oat Drink", product_name="Oat Drink", generic_name="Oat beverage", quantity="1 l",
+    nutriments={"energy-kcal_100g": 59}, categories_tags=["en:plant-based-milks"],
+    ingredients_text="Water, oats", allergens="en:gluten", expiration_date="2026-12-01",
+)
+UPC_PRODUCT = product(
+    name="Oatly Oat Drink", product_name="Oatly Oat Drink", brands="Oatly", quantity="33.8 fl oz",
+    image_url="https://img/1.jpg", categories="Milk Substitutes",
+)
+
+
+@pytest.mark.parametrize("primary, fallback, expected", [
+    (None, None, None),
+    (OFF, None, OFF),
+    (None, UPC_PRODUCT, UPC_PRODUCT),
+    (OFF, UPC_PRODUCT, {
+        "name": "Oat Drink", "product_name": "Oat Drink", "generic_name": "Oat beverage",
+        "brands": "Oatly", "quantity": "1 l", "image_url": "https://img/1.jpg",
+        "nutriments": {"energy-kcal_100g": 59}, "categories": "Milk Substitutes",
+        "categories_tags": ["en:plant-based-milks"], "ingredients_text": "Water, oats",
+        "allergens": "en:gluten", "expiration_date": "2026-12-01",
+    }),
+    # product_name falls back to the fallback's product_name, then to either name
+    (product(name="Oat"), product(name="Oats", product_name="Oat Drink"), {"name": "Oat", "product_name": "Oat Drink"}),
+    (product(name="Oat"), product(name="Oats"), {"name": "Oat", "product_name": "Oat"}),
+    (product(), product(name="Oats"), {"name": "Oats", "product_name": "Oats"}),
+    # Open Food Facts-only fields never come from the fallback
+    (product(name="Oat"), product(name="Oats", generic_name="Drink", nutriments={"fat": 1}, categories_tags=["x"]),
+     {"generic_name": None, "nutriments": None, "categories_tags": None}),
+])
+def test_merge_product_data(primary, fallback, expected):
+    merged = merge_product_data(primary, fallback)
+
+    if expected is None or isinstance(expected, ProductInfo):
+        assert merged == expected
+    else:
+        assert {field: getattr(merged, field) for field in expected} == expected
+
+
+def batch(count: int):
+    return {f"00000000{index:04d}": dict(GOOD, product_name=f"Item {index}") for index in range(count)}
+
+
+async def test_batch_looks_up_each_distinct_barcode_once(fake_upstream):
+    products = batch(2)
+    first, second = products
+    fake = await fake_upstream(products=products)
+
+    results = [result async for result in barcode_service.lookup_products([first, f" {first} ", second, first, ""])]
+
+    assert sorted(result.barcode for result in results) == [first, second]
+    assert fake.calls[OPEN_FOOD_FACTS_HOST] == 2 and fake.calls[UPC_HOST] == 2
+
+
+async def test_batch_concurrency_is_capped(fake_upstream, monkeypatch):
+    monkeypatch.setattr(barcode_service.settings, "barcode_batch_concurrency", 3)
+    products = batch(12)
+    fake = await fake_upstream(products=products, latency=0.02)
+
+    results = [result async for result in barcode_service.lookup_products(list(products))]
+
+    assert len(results) == 12 and all(result.found for result in results)
+    assert fake.max_in_flight[OPEN_FOOD_FACTS_HOST] == 3
+
+
+async def test_slow_barcode_times_out_without_holding_back_the_rest(fake_upstream, monkeypatch):
+    monkeypatch.setattr(barcode_service.settings, "barcode_batch_item_timeout_seconds", 0.3)
+    products = batch(4)
+    slow, late, early, middle = products
+    await fake_upstream(products=products, latency=0.01, barcode_latencies={slow: 0.6, late: 0.2, early: 0.02, middle: 0.1})
+
+    started = time.perf_counter()
+    arrivals = [
+        (result, time.perf_counter() - started) async for result in barcode_service.lookup_products(list(products))
+    ]
+
+    assert [result.barcode for result, _ in arrivals] == [early, middle, late, slow]  # Completion order
+    assert all(result.found and elapsed < 0.28 for result, elapsed in arrivals[:3]), arrivals
+    timed_out, elapsed = arrivals[-1]
+    assert not timed_out.found and timed_out.error == "Lookup timed out"
+    assert 0.3 <= elapsed < 0.5
+
+
+async def test_batch_route_streams_ndjson_in_completion_order(fake_upstream, client):
+    products = batch(3)
+    slow, fast, middle = products
+    await fake_upstream(products=products, barcode_latencies={slow: 0.15, fast: 0.01, middle: 0.08})
+
+    response = await client.post("/api/barcode/batch", json={"barcodes": [slow, fast, middle, fast]})
+
+    assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["barcode"] for line in lines] == [fast, middle, slow]
+    assert all(line["found"] and line["error"] is None for line in lines)
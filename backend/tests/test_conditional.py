@@ -0,0 +1,94 @@
+"""Tests for conditional GETs on household-scoped reads"""
+from datetime import datetime, timezone
+from typing import Any
+import pytest
+from src.config.firebase import run_transaction
+from src.services import sync_service
+from src.services.access_cache import access_cache
+from src.services.expiry_index import expiry_indexes
+from src.services.user_loader import member_cache
+from src.utils.request_context import RequestScope
+
+
+@pytest.fixture
+async def household(client, auth_headers, create_household):
+    """A household of 60 items owned by u1 (u2 joins later), and the paths that carry ETags"""
+    household = await create_household(["u1"], outsiders=["u2"])
+    household_id = household["id"]
+    for i in range(60):
+        response = await client.post(
+            f"/api/items?household_id={household_id}", headers=auth_headers("u1"),
+            json={"name": f"Item {i}", "quantity": 1, "is_communal": i % 2 == 0},
+        )
+        assert response.status_code == 201, response.text
+    household["paths"] = [
+        f"/api/items?household_id={household_id}&limit=20",
+        f"/api/items/household/{household_id}/communal",
+        f"/api/households/{household_id}",
+        f"/api/households/{household_id}/members",
+    ]
+    return household
+
+
+async def current_etags(client, headers, paths):
+    etags = {}
+    for path in paths:
+        response = await client.get(path, headers=headers)
+        assert response.status_code == 200, response.text
+        etags[path] = response.headers["etag"]
+    return etags
+
+
+async def test_304_skips_the_inventory(db, client, auth_headers, household, monkeypatch):
+    etags = await current_etags(client, auth_headers("u1"), household["paths"])
+    expiry_indexes.invalidate()
+    member_cache.invalidate()
+    record_reads = RequestScope.record_reads
+    collections = []
+
+    def recording(scope: RequestScope, collection: str, *args: Any) -> None:
+        collections.append(collection)
+        record_reads(scope, collection, *args)
+
+    monkeypatch.setattr(RequestScope, "record_reads", recording)
+
+    for path in household["paths"]:
+        access_cache.invalidate()
+        collections.clear()
+        before = db.reads
+        response = await client.get(path, headers={**auth_headers("u1"), "If-None-Match": etags[path]})
+
+        assert response.status_code == 304 and not response.content, path
+        # users/u1 (access check) and households/{id} (version), no items
+        assert db.reads - before == 2, path
+        assert "items" not in collections and collections.count("households") == 1, (path, collections)
+        assert expiry_indexes.peek(household["id"]) is None, path
+
+
+async def test_service_write_changes_every_tag(client, auth_headers, household):
+    etags = await current_etags(client, auth_headers("u1"), household["paths"])
+
+    await client.post("/api/households/join", json={"invite_code": household["invite_code"]}, headers=auth_headers("u2"))
+
+    for path in household["paths"]:
+        response = await client.get(path, headers={**auth_headers("u1"), "If-None-Match": etags[path]})
+        assert response.status_code == 200 and response.headers["etag"] != etags[path], path
+
+
+async def test_direct_item_write_changes_the_tag(db, client, auth_headers, household):
+    path = household["paths"][0]
+    etag = (await client.get(path, headers=auth_headers("u1"))).headers["etag"]
+    items = [doc async for doc in db.collection("items").where("householdId", "==", household["id"]).limit(1).stream()]
+
+    # What the frontend's itemService.updateItem does, bypassing the API
+    async def update(transaction: Any) -> None:
+        version = await sync_service.next_version(transaction, household["id"])
+        transaction.update(items[0].reference, {
+            "quantity": 5, "updated_at": datetime.now(timezone.utc), sync_service.VERSION_FIELD: version,
+        })
+
+    await run_transaction(update)
+
+    response = await client.get(path, headers={**auth_headers("u1"), "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,179 @@
+"""Tests for household event streams"""
+import asyncio
+from typing import Any, Dict, List, Optional
+import pytest
+from src.main import app
+from src.services import event_hub as hub
+from src.utils.security import create_access_token
+
+HOUSEHOLDS = 2
+PER_HOUSEHOLD = 3
+
+
+class Connection:
+    """
+    One streaming request driven straight through the ASGI app (httpx's
+    ASGITransport buffers the whole body); collects chunks until disconnected
+    """
+
+    def __init__(self, path: str, user_id: str, last_event_id: Optional[str] = None):
+        headers = [(b"authorization", ("Bearer " + create_access_token({"sub": user_id})).encode())]
+        if last_event_id:
+            headers.append((b"last-event-id", last_event_id.encode()))
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "headers": headers, "client": ("test", 1), "server": ("test", 80),
+        }
+        self.status: Optional[int] = None
+        self.body = bytearray()
+        self.received = asyncio.Event()
+        self.closed = False
+        self._disconnect = asyncio.Event()
+        self._requested = False
+        self.task = asyncio.ensure_future(app(self.scope, self.receive, self.send))
+
+    async def receive(self) -> Dict[str, Any]:
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            self.body += message.get("body", b"")
+            self.closed = not message.get("more_body", False)
+            self.received.set()
+
+    async def wait_for(self, marker: bytes, timeout: float = 5.0) -> None:
+        async def poll() -> None:
+            while marker not in self.body and not self.closed:
+                self.received.clear()
+                await self.received.wait()
+        await asyncio.wait_for(poll(), timeout)
+        assert marker in self.body, (marker, bytes(self.body[-200:]))
+
+    async def responded(self) -> None:
+        while not self.closed and b"event: " not in self.body:
+            self.received.clear()
+            await asyncio.wait_for(self.received.wait(), 5)
+
+    async def disconnect(self) -> None:
+        self._disconnect.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+class StalledConnection(Connection):
+    """A client that goes away while the response headers are being sent"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.starting = asyncio.Event()
+        super().__init__(*args, **kwargs)
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            self.starting.set()
+            await asyncio.Future()  # Until the disconnect cancels the response
+        await super().send(message)
+
+
+@pytest.fixture
+async def households(db):
+    for h in range(HOUSEHOLDS):
+        await db.collection("households").document(f"h{h}").set({
+            "name": f"Household {h}", "created_by": f"u{h}-0", "version": 1,
+        })
+        for m in range(PER_HOUSEHOLD):
+            await db.collection("users").document(f"u{h}-{m}").set({
+                "name": f"User {h}-{m}", "email": f"u{h}-{m}@example.com", "household_id": f"h{h}",
+            })
+
+
+@pytest.fixture
+async def streams(households):
+    """One open stream per member, past its `ready` event"""
+    connections = [
+        Connection(f"/api/households/h{h}/events", f"u{h}-{m}")
+        for h in range(HOUSEHOLDS) for m in range(PER_HOUSEHOLD)
+    ]
+    await asyncio.gather(*(connection.wait_for(b"event: ready") for connection in connections))
+    yield connections
+    await asyncio.gather(*(connection.disconnect() for connection in connections if not connection.closed))
+    assert hub.event_hub.snapshot()["subscribers"] == 0
+
+
+async def test_one_publish_reaches_every_subscriber_of_the_household(streams: List[Connection]):
+    assert all(connection.status == 200 for connection in streams)
+    assert hub.event_hub.snapshot()["subscribers"] == HOUSEHOLDS * PER_HOUSEHOLD
+
+    hub.publish_members("h0", 2, joined=["someone"])
+
+    await asyncio.gather(*(connection.wait_for(b"event: members") for connection in streams[:PER_HOUSEHOLD]))
+    assert all(b"event: members" not in connection.body for connection in streams[PER_HOUSEHOLD:])
+
+
+async def test_idle_stream_gets_heartbeats(monkeypatch, streams: List[Connection]):
+    monkeypatch.setattr(hub.settings, "event_heartbeat_seconds", 0.05)
+    hub.publish_members("h0", 2, joined=["someone"])
+
+    await streams[0].wait_for(b": ping")
+
+
+async def test_full_household_refuses_streams(monkeypatch, streams: List[Connection]):
+    monkeypatch.setattr(hub.event_hub, "max_subscribers_per_household", PER_HOUSEHOLD)
+
+    extra = Connection("/api/households/h0/events", "u0-0")
+    await extra.responded()
+
+    assert extra.status == 429
+
+
+async def test_slow_consumer_is_told_to_resync(streams: List[Connection]):
+    laggard = streams[-1]
+    for version in range(3, 3 + hub.settings.event_queue_max_events + 10):
+        for queued in list(hub.event_hub._channels[f"h{HOUSEHOLDS - 1}"]):
+            queued.offer(hub.HouseholdEvent(hub.CHANGES, version, b"", frozenset()))
+
+    await laggard.wait_for(b"event: resync")
+
+
+async def test_removed_member_stream_closes(streams: List[Connection]):
+    removed = streams[PER_HOUSEHOLD]
+
+    hub.publish_members("h1", 2, left=["u1-0"])
+
+    await removed.wait_for(b"event: members")
+    await asyncio.wait_for(removed.task, 5)
+    assert removed.closed
+    assert hub.event_hub.subscribers("h1") == PER_HOUSEHOLD - 1
+
+
+async def test_resume_catches_up_from_the_token(households):
+    token = hub.change_token("h0", 1)
+    connection = Connection("/api/households/h0/events", "u0-0", last_event_id=token)
+
+    await connection.wait_for(b"event: changes")
+    assert connection.status == 200
+    await connection.disconnect()
+
+
+async def test_disconnect_before_the_first_chunk_leaves_no_subscription(households):
+    connection = StalledConnection("/api/households/h0/events", "u0-0")
+    await asyncio.wait_for(connection.starting.wait(), 5)
+
+    await connection.disconnect()
+
+    assert not connection.body
+    assert hub.event_hub.subscribers("h0") == 0
+
+
+@pytest.mark.parametrize("token", ["not-a-token", hub.change_token("h1", 1)])
+async def test_bad_resume_token_is_rejected_before_streaming(households, token):
+    connection = Connection("/api/households/h0/events", "u0-0", last_event_id=token)
+    await asyncio.wait_for(connection.task, 5)
+
+    assert connection.status == 400
+    assert hub.event_hub.subscribers("h0") == 0
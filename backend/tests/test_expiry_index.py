@@ -0,0 +1,150 @@
+"""Tests for the per-household expiry index"""
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import pytest
+from src.models.item import ItemResponse
+from src.services import item_service
+from src.services.expiry_index import ExpiryIndex, ExpiryIndexRegistry, expiry_indexes
+from src.utils.validators import is_date_expired, is_expiring_soon
+
+NOW = datetime.now(timezone.utc)
+
+
+def make_item(item_id: str, expiry_date=None, is_grocery: bool = False, household_id: str = "h1") -> ItemResponse:
+    return ItemResponse(
+        id=item_id, household_id=household_id, name=item_id, quantity=1, expiry_date=expiry_date,
+        is_communal=True, is_grocery=is_grocery, created_at=NOW, updated_at=NOW,
+    )
+
+
+def test_range_lookups_match_the_naive_filter():
+    rng = random.Random(42)
+    today = date.today()
+    items = [
+        make_item(
+            f"item{i}",
+            today + timedelta(days=rng.randint(-60, 120)) if rng.random() > 0.1 else None,
+            is_grocery=rng.random() < 0.05,
+        )
+        for i in range(2000)
+    ]
+    index = ExpiryIndex(items)
+
+    expiring = {i.id for i in items if not i.is_grocery and is_expiring_soon(i.expiry_date, 3)}
+    expired = {i.id for i in items if not i.is_grocery and is_date_expired(i.expiry_date)}
+    assert {i.id for i in index.expiring(today, 3)} == expiring
+    assert {i.id for i in index.expired(today)} == expired
+    assert len(index) == len(items)
+
+    ordered = index.between(None, None)
+    assert [i.expiry_date for i in ordered] == sorted(i.expiry_date for i in ordered)
+
+
+def test_upsert_and_remove_keep_the_order():
+    today = date(2026, 3, 1)
+    index = ExpiryIndex([make_item("a", today), make_item("b", today + timedelta(days=2))])
+
+    index.upsert(make_item("a", today + timedelta(days=5)))
+    index.upsert(make_item("c", today - timedelta(days=1)))
+    index.upsert(make_item("d", today, is_grocery=True))
+    assert [i.id for i in index.between(None, None)] == ["c", "b", "a"]
+    assert [i.id for i in index.expired(today)] == ["c"]
+    assert index.get("d") is not None
+
+    index.remove("c")
+    index.remove("missing")
+    assert [i.id for i in index.between(None, None)] == ["b", "a"]
+
+
+async def test_registry_refreshes_then_reloads_after_the_ttl():
+    registry = ExpiryIndexRegistry(max_households=2, ttl_seconds=60.0, refresh_seconds=5.0)
+    loads = refreshes = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        return ExpiryIndex([make_item(f"item{loads}")])
+
+    async def refresh(index):
+        nonlocal refreshes
+        refreshes += 1
+        index.refreshed_at = time.monotonic()
+        return index
+
+    first = await registry.get("h1", load, refresh)
+    assert await registry.get("h1", load, refresh) is first
+    assert registry.peek("h1") is first
+
+    first.refreshed_at -= 5.0
+    assert registry.peek("h1") is None
+    assert await registry.get("h1", load, refresh) is first and refreshes == 1
+
+    first.loaded_at -= 60.0
+    second = await registry.get("h1", load, refresh)
+    assert second is not first and loads == 2 and refreshes == 1
+
+
+async def test_registry_evicts_the_least_recently_used():
+    registry = ExpiryIndexRegistry(max_households=2, ttl_seconds=60.0, refresh_seconds=5.0)
+
+    async def load():
+        return ExpiryIndex()
+
+    for household_id in ("h1", "h2", "h1", "h3"):
+        await registry.get(household_id, load)
+    assert registry.peek("h2") is None
+    assert registry.peek("h1") is not None and registry.peek("h3") is not None
+
+
+@pytest.fixture
+async def household(db):
+    await db.collection("users").document("u1").set({"name": "Ann", "email": "ann@example.com", "household_id": "h1"})
+    await db.collection("households").document("h1").set({"name": "Flat", "created_by": "u1"})
+    return db
+
+
+async def direct_write(db, item_id: str, expiry_date: date, updated_at: Optional[datetime] = None) -> None:
+    """Written straight to Firestore, bypassing the API"""
+    await db.collection("items").document(item_id).set({
+        "name": item_id, "quantity": 1, "householdId": "h1", "ownerId": "u1", "isCommunal": True,
+        "isGrocery": False, "expiryDate": expiry_date.isoformat(), "updated_at": updated_at or datetime.now(timezone.utc),
+    })
+
+
+async def test_refresh_reads_only_items_written_since_the_last_sync(household):
+    yesterday = date.today() - timedelta(days=1)
+    for number in range(20):
+        await direct_write(household, f"old{number}", yesterday - timedelta(days=30), NOW - timedelta(hours=1))
+    index = await item_service.get_household_index("h1")
+
+    await direct_write(household, "direct", yesterday)
+    assert (await item_service.get_household_index("h1")).get("direct") is None
+
+    index.refreshed_at -= expiry_indexes.refresh_seconds
+    before = household.reads
+    refreshed = await item_service.get_household_index("h1")
+
+    assert refreshed is index and expiry_indexes.peek("h1") is index
+    assert [item.id for item in index.expired(date.today())][-1] == "direct"
+    assert household.reads - before == 2  # The household's version and the one changed item
+
+
+async def test_refresh_replays_api_deletes_and_the_ttl_catches_direct_ones(client, household, auth_headers, monkeypatch):
+    yesterday = date.today() - timedelta(days=1)
+    for item_id in ("api", "direct"):
+        await direct_write(household, item_id, yesterday)
+    index = await item_service.get_household_index("h1")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(expiry_indexes, "remove", lambda *args: None)  # Served by another instance
+        assert (await client.delete("/api/items/api", headers=auth_headers("u1"))).status_code == 204
+    await household.collection("items").document("direct").delete()
+    index.refreshed_at -= expiry_indexes.refresh_seconds
+    refreshed = await item_service.get_household_index("h1")
+
+    assert refreshed is index and [item.id for item in index.items()] == ["direct"]  # No tombstone to replay
+
+    index.loaded_at -= expiry_indexes.ttl_seconds
+    assert len(await item_service.get_household_index("h1")) == 0
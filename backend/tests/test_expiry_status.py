@@ -0,0 +1,62 @@
+"""Tests for batch expiry classification"""
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from src.models.item import ItemResponse
+from src.utils.expiry_status import (
+    EXPIRED,
+    EXPIRING_SOON,
+    NO_DATE,
+    SAFE,
+    classify_items,
+    classify_ordinals,
+    household_today,
+    to_ordinals,
+)
+from src.utils.validators import days_until_expiry, is_date_expired, is_expiring_soon
+
+TODAY = date(2026, 3, 15)
+
+
+@pytest.mark.parametrize("offset, days_left, expected", [
+    (-30, -30, EXPIRED),
+    (-1, -1, EXPIRED),
+    (0, 0, EXPIRING_SOON),
+    (3, 3, EXPIRING_SOON),
+    (4, 4, SAFE),
+    (60, 60, SAFE),
+    (None, None, NO_DATE),
+])
+def test_classify_ordinals(offset, days_left, expected):
+    expiry_date = TODAY + timedelta(days=offset) if offset is not None else None
+    assert classify_ordinals(to_ordinals([expiry_date]), TODAY, threshold_days=3) == ([days_left], [expected])
+
+
+def test_batch_matches_the_scalar_helpers():
+    today = date.today()
+    dates = [today + timedelta(days=offset) for offset in range(-10, 11)] + [None]
+
+    days_left, statuses = classify_ordinals(to_ordinals(dates), today, threshold_days=3)
+
+    for d, days, status in zip(dates, days_left, statuses):
+        if d is None:
+            assert (days, status) == (None, NO_DATE)
+            continue
+        assert days == days_until_expiry(d)
+        assert (status == EXPIRED) == is_date_expired(d)
+        assert (status == EXPIRING_SOON) == (is_expiring_soon(d, 3) and not is_date_expired(d))
+
+
+def test_classify_items_sets_fields_in_place():
+    now = datetime.now(timezone.utc)
+    items = [
+        ItemResponse(id=str(i), household_id="h1", name="x", quantity=1, expiry_date=d,
+                     is_communal=True, created_at=now, updated_at=now)
+        for i, d in enumerate([TODAY - timedelta(days=2), TODAY + timedelta(days=10), None])
+    ]
+
+    assert classify_items(items, TODAY, threshold_days=3) is items
+    assert [(i.days_until_expiry, i.expiry_status) for i in items] == [(-2, EXPIRED), (10, SAFE), (None, NO_DATE)]
+
+
+def test_household_today_falls_back_on_unknown_timezones():
+    assert household_today("Not/AZone") == household_today(None)
@@ -0,0 +1,35 @@
+"""Tests for FoodKeeper search"""
+import pytest
+from src.services.foodkeeper_service import default_json_path, load_foodkeeper_json
+
+EXTRA_QUERIES = [
+    "whole milk", "greek yogurt", "chicken breast boneless", "organic baby spinach",
+    "sharp cheddar cheese", "ground beef 80/20", "fresh strawberries", "sourdough bread",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return load_foodkeeper_json(default_json_path())
+
+
+def test_indexed_search_matches_linear_scan(index):
+    # Every fourth product keeps the reference scan quick
+    queries = [p.name + (f" {p.name_subtitle}" if p.name_subtitle else "") for p in index.products[::4]]
+    for query in queries + EXTRA_QUERIES:
+        assert index.search(query) == index.search_linear(query), query
+
+
+def test_category_boost_matches_linear_scan(index):
+    for query in EXTRA_QUERIES:
+        for category in ("Dairy Products & Eggs", "Produce"):
+            assert index.search(query, category) == index.search_linear(query, category), (query, category)
+
+
+async def test_search_route_rejects_long_queries(client):
+    response = await client.get("/api/foodkeeper/search", params={"q": "x" * 101})
+    assert response.status_code == 422
+
+    response = await client.get("/api/foodkeeper/search", params={"q": "whole milk"})
+    assert response.status_code == 200
+    assert response.json()["found"] is True
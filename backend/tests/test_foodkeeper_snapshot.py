@@ -0,0 +1,77 @@
+"""Tests for the memory-mapped FoodKeeper snapshot"""
+import pytest
+from src.services import foodkeeper_service, foodkeeper_snapshot
+from src.services.foodkeeper_service import default_json_path, load_foodkeeper_json
+from src.services.foodkeeper_snapshot import FORMAT_VERSION, MAGIC, SnapshotError, _PREAMBLE, build_snapshot, load_snapshot
+
+QUERIES = [
+    "whole milk", "greek yogurt", "chicken breast boneless", "organic baby spinach",
+    "sharp cheddar cheese", "ground beef 80/20", "fresh strawberries", "sourdough bread",
+]
+
+
+@pytest.fixture(scope="module")
+def json_index():
+    return load_foodkeeper_json(default_json_path())
+
+
+@pytest.fixture(scope="module")
+def snapshot(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("foodkeeper") / "foodkeeper.snapshot")
+    build_snapshot(default_json_path(), path)
+    return load_snapshot(path)
+
+
+def test_snapshot_matches_json(json_index, snapshot):
+    index = snapshot.index
+    assert snapshot.data_version == json_index.version
+    assert len(index) == len(json_index)
+    assert list(index.products) == list(json_index.products)
+    queries = QUERIES + [p.name for p in json_index.products[::7]]
+    for query in queries:
+        assert index.search(query) == json_index.search(query), query
+
+
+def test_rejects_files_that_are_not_snapshots(tmp_path):
+    empty = tmp_path / "empty.snapshot"
+    empty.write_bytes(b"")
+    garbage = tmp_path / "garbage.snapshot"
+    garbage.write_bytes(b"not a snapshot at all")
+
+    for path in (empty, garbage):
+        with pytest.raises(SnapshotError):
+            load_snapshot(str(path))
+
+
+@pytest.mark.parametrize("header", [
+    b"\xff\xfe{not utf-8",
+    b"{not json",
+    b"[1, 2, 3]",
+    b'{"data_version": 1}',
+])
+def test_rejects_a_corrupt_header(tmp_path, header):
+    path = tmp_path / "corrupt.snapshot"
+    path.write_bytes(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)) + header)
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+
+
+def test_rejects_a_header_longer_than_the_file(tmp_path):
+    path = tmp_path / "truncated.snapshot"
+    path.write_bytes(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 1000) + b"{}")
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+
+
+def test_corrupt_snapshot_falls_back_to_json(tmp_path, monkeypatch, json_index):
+    path = tmp_path / "corrupt.snapshot"
+    path.write_bytes(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 9) + b"{not json")
+    monkeypatch.setattr(foodkeeper_snapshot, "default_snapshot_path", lambda: str(path))
+    monkeypatch.setattr(foodkeeper_service, "_index", None)
+
+    index = foodkeeper_service.initialize_foodkeeper()
+
+    assert index is not None and len(index) == len(json_index)
+    assert list(index.products) == list(json_index.products)
@@ -0,0 +1,46 @@
+"""Tests for converting grocery-list items to pantry items"""
+from datetime import date
+import pytest
+
+HOUSEHOLD = "h1"
+USER = "u1"
+
+
+@pytest.fixture
+async def household(db):
+    await db.collection("users").document(USER).set({"name": "Ann", "email": "ann@example.com", "household_id": HOUSEHOLD})
+    await db.collection("households").document(HOUSEHOLD).set({"name": "Flat", "created_by": USER})
+    for item_id, name in (("milk", "Whole milk"), ("blank", ""), ("spaces", "  "), ("unnamed", None)):
+        data = {"householdId": HOUSEHOLD, "ownerId": USER, "quantity": 1, "isCommunal": True, "isGrocery": True}
+        if name is not None:
+            data["name"] = name
+        await db.collection("items").document(item_id).set(data)
+
+
+async def test_unnamed_items_are_converted_without_an_estimate(client, household, auth_headers):
+    response = await client.post(
+        f"/api/items/household/{HOUSEHOLD}/convert-groceries",
+        json={
+            "items": [{"item_id": "milk"}, {"item_id": "blank"}, {"item_id": "spaces"}, {"item_id": "unnamed"}],
+            "purchase_date": "2026-01-10",
+        },
+        headers=auth_headers(USER),
+    )
+
+    assert response.status_code == 200, response.text
+    items = {item["id"]: item for item in response.json()}
+    assert date.fromisoformat(items["milk"]["expiry_date"]) > date(2026, 1, 10)
+    for item_id in ("blank", "spaces", "unnamed"):
+        assert items[item_id]["expiry_date"] is None
+        assert items[item_id]["is_grocery"] is False
+
+
+async def test_explicit_expiry_date_is_kept_for_unnamed_items(client, household, auth_headers):
+    response = await client.post(
+        f"/api/items/household/{HOUSEHOLD}/convert-groceries",
+        json={"items": [{"item_id": "blank", "expiry_date": "2026-02-01"}]},
+        headers=auth_headers(USER),
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()[0]["expiry_date"] == "2026-02-01"
@@ -0,0 +1,43 @@
+"""Tests for the shared upstream HTTP clients"""
+import pytest
+from src.config import http_client
+from src.config.http_client import OPEN_FOOD_FACTS, UPC_DATABASE, close_http_clients, get_upstream_client
+from src.services import barcode_service
+
+BARCODES = ["012345678905", "036000291452", "5000112548167"]
+
+
+@pytest.fixture
+async def upstream(fake_upstream):
+    return await fake_upstream(products={barcode: {"product_name": "Oat Milk"} for barcode in BARCODES})
+
+
+async def test_lookups_reuse_one_client_per_upstream(upstream):
+    clients = {name: get_upstream_client(name) for name in (UPC_DATABASE, OPEN_FOOD_FACTS)}
+
+    for barcode in BARCODES:
+        await barcode_service.fetch_upc(barcode)
+        await barcode_service.fetch_openfoodfacts(barcode)
+
+    assert sum(upstream.calls.values()) == 2 * len(BARCODES)
+    assert all(get_upstream_client(name) is client for name, client in clients.items())
+    assert clients[UPC_DATABASE] is not clients[OPEN_FOOD_FACTS]
+
+
+async def test_close_releases_the_clients(upstream):
+    client = get_upstream_client(UPC_DATABASE)
+
+    await close_http_clients()
+
+    assert client.is_closed
+    assert http_client._clients == {}
+
+
+async def test_client_is_rebuilt_lazily_after_close(upstream):
+    client = get_upstream_client(UPC_DATABASE)
+    await close_http_clients()
+
+    rebuilt = get_upstream_client(UPC_DATABASE)
+
+    assert rebuilt is not client and not rebuilt.is_closed
+    assert get_upstream_client(UPC_DATABASE) is rebuilt
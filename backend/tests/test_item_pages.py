@@ -0,0 +1,94 @@
+"""Tests for cursor pagination of item listings"""
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+import pytest
+from src.config.firebase import BatchWriter
+from src.models.item import ItemFilter, ItemPageRequest, ItemResponse
+from src.services import item_service
+from src.services.expiry_index import expiry_indexes
+
+LISTINGS = {
+    "items": lambda page: item_service.get_items("h1", "u0", None, page),
+    "communal items": lambda page: item_service.get_items("h1", "u0", ItemFilter(is_communal=True), page),
+    "expiring": lambda page: item_service.get_expiring_items("h1", "u0", 5, page),
+    "expired": lambda page: item_service.get_expired_items("h1", "u0", page),
+    "personal": lambda page: item_service.get_personal_items("h1", "u0", page),
+    "communal": lambda page: item_service.get_communal_items("h1", "u0", page),
+}
+
+
+async def collect(fetch, order: str, limit: int, fields=None) -> List[ItemResponse]:
+    """Follow next cursors until the last page"""
+    items: List[ItemResponse] = []
+    cursor = None
+    while True:
+        result = await fetch(ItemPageRequest(order=order, limit=limit, cursor=cursor, fields=fields))
+        assert len(result.items) <= limit
+        items.extend(result.items)
+        cursor = result.next_cursor
+        if cursor is None:
+            return items
+
+
+@pytest.fixture
+async def household(db):
+    rng = random.Random(3)
+    today = date.today()
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    async with BatchWriter() as writer:
+        writer.set(db.collection("households").document("h1"), {"name": "Flat", "created_by": "u0"})
+        for user_id in ("u0", "u1"):
+            writer.set(db.collection("users").document(user_id), {"name": user_id.upper(), "household_id": "h1"})
+        for i in range(257):
+            expiry = today + timedelta(days=rng.randint(-10, 10)) if rng.random() > 0.15 else None
+            writer.set(db.collection(item_service.ITEMS_COLLECTION).document(f"item{i:03d}"), {
+                "name": f"Item {i}", "quantity": 1, "householdId": "h1",
+                "ownerId": rng.choice(("u0", "u1")), "ownerName": "",
+                "isCommunal": rng.random() < 0.5, "isGrocery": rng.random() < 0.1,
+                "expiryDate": expiry.isoformat() if expiry else "",
+                # Repeated timestamps exercise the document ID tie-breaker
+                "created_at": created + timedelta(minutes=rng.randint(0, 40)),
+            })
+    return db
+
+
+@pytest.mark.parametrize("order", list(item_service.ORDER_FIELDS))
+@pytest.mark.parametrize("listing", list(LISTINGS))
+async def test_query_and_index_pages_agree(household, listing, order):
+    fetch = LISTINGS[listing]
+    expiry_indexes.invalidate()
+    queried = await collect(fetch, order, 17)
+    await item_service.get_household_index("h1")
+    indexed = await collect(fetch, order, 17)
+    everything = (await fetch(ItemPageRequest(order=order, limit=1000))).items
+
+    ids = [item.id for item in everything]
+    assert [item.id for item in queried] == ids
+    assert [item.id for item in indexed] == ids
+    assert ids == [item.id for item in sorted(
+        everything, key=lambda item: item_service._order_key(item, order), reverse=order.startswith("-")
+    )]
+
+
+async def test_projection_keeps_requested_fields(household):
+    expiry_indexes.invalidate()
+    projected = await collect(LISTINGS["items"], "expiry_date", 50, ["name", "owner_name"])
+
+    assert len(projected) == 257
+    assert all(item.name and item.owner_name in ("U0", "U1") for item in projected)
+
+
+async def test_default_page_uses_the_configured_limit(household):
+    page = await item_service.get_items("h1", "u0")
+    assert len(page.items) == item_service.settings.items_page_default_limit
+    assert page.next_cursor is not None
+
+
+async def test_items_without_a_household_are_not_found(household, client, auth_headers):
+    await household.collection(item_service.ITEMS_COLLECTION).document("orphan").set({"name": "Lost", "quantity": 1})
+
+    for method in ("get", "put", "delete"):
+        kwargs = {"json": {"name": "Found"}} if method == "put" else {}
+        response = await client.request(method.upper(), "/api/items/orphan", headers=auth_headers("u0"), **kwargs)
+        assert response.status_code == 404, (method, response.text)
@@ -0,0 +1,57 @@
+"""Tests for the local embedded storage backend"""
+from datetime import datetime, timedelta, timezone
+from google.cloud.firestore_v1 import ArrayRemove, ArrayUnion, Increment
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.config.firebase import run_transaction
+
+
+async def test_transforms(db):
+    ref = db.collection("things").document("t1")
+    await ref.set({"tags": ["a", "b"], "count": 1})
+
+    await ref.update({"tags": ArrayUnion(["b", "c"]), "count": Increment(2)})
+    assert (await ref.get()).to_dict() == {"tags": ["a", "b", "c"], "count": 3}
+
+    await ref.update({"tags": ArrayRemove(["a"]), "missing": ArrayRemove(["x"])})
+    assert (await ref.get()).to_dict() == {"tags": ["b", "c"], "count": 3, "missing": []}
+
+
+async def test_query_filters_orders_and_cursors(db):
+    for i in range(10):
+        await db.collection("things").document(f"t{i}").set({"n": i % 4, "even": i % 2 == 0})
+
+    query = db.collection("things").where(filter=FieldFilter("even", "==", True)).order_by("n").order_by("__name__")
+    assert [doc.id for doc in await query.get()] == ["t0", "t4", "t8", "t2", "t6"]
+    assert [doc.id async for doc in query.start_after({"n": 0, "__name__": "t4"}).limit(2).stream()] == ["t8", "t2"]
+
+    projected = await query.select(["n"]).limit(1).get()
+    assert projected[0].to_dict() == {"n": 0}
+
+
+async def test_transaction_reads_a_document_reference(db):
+    ref = db.collection("counters").document("c1")
+    await ref.set({"value": 41})
+
+    async def bump(transaction):
+        snapshots = [snapshot async for snapshot in await transaction.get(ref)]
+        transaction.update(ref, {"value": snapshots[0].to_dict()["value"] + 1})
+        return len(snapshots)
+
+    assert await run_transaction(bump) == 1
+    assert (await ref.get()).to_dict() == {"value": 42}
+
+
+async def test_top_n_query_matches_the_full_scan(db):
+    noon = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    values = [3, None, "b", True, 3, 1.5, noon, "a", False, noon.astimezone(timezone(timedelta(hours=2))) - timedelta(minutes=1)]
+    for i, value in enumerate(values):
+        await db.collection("things").document(f"t{i}").set({"v": value, "group": "g" if i != 4 else "h", "flag": 1})
+    await db.collection("things").document("unset").set({"group": "g", "flag": 1})
+    await db.collection("things").document("bool").set({"v": 2, "group": "g", "flag": True})
+
+    for direction in ("ASCENDING", "DESCENDING"):
+        query = db.collection("things").where("group", "==", "g").where("flag", "==", 1).order_by("v", direction=direction)
+        scanned = [doc.id for doc in await query.order_by("__name__", direction=direction).get()]
+        assert [doc.id for doc in await query.limit(4).get()] == scanned[:4]
+        assert (await query.select(["v"]).limit(1).get())[0].to_dict().keys() == {"v"}
+    assert "unset" not in scanned and "bool" not in scanned and "t4" not in scanned
@@ -0,0 +1,71 @@
+"""Tests for pooled password hashing and registration"""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.services.password_hasher import PasswordHasher, password_hasher
+
+CREDENTIALS = {"email": "a@example.com", "password": "secret"}
+
+
+@pytest.fixture
+async def user(client, monkeypatch):
+    """A registered user; bcrypt at its lowest cost to keep the tests fast"""
+    monkeypatch.setattr(password_hasher, "rehashed", 0)
+    monkeypatch.setattr("src.services.password_hasher.settings.password_bcrypt_rounds", 4)
+    response = await client.post("/api/auth/register", json={**CREDENTIALS, "name": "A", "household_name": "Flat"})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def test_login_does_not_block_the_event_loop(client, user, monkeypatch, loop_blocking):
+    monkeypatch.setattr("src.services.password_hasher.settings.password_bcrypt_rounds", 10)
+    await client.post("/api/auth/login", json=CREDENTIALS)  # Rehash at cost 10
+    loop_blocking.slowest = 0.0
+
+    responses = await asyncio.gather(*(client.post("/api/auth/login", json=CREDENTIALS) for _ in range(4)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert loop_blocking.slowest < 0.05, f"event loop blocked by {loop_blocking.slowest_name}"
+
+
+async def test_burst_beyond_the_cap_is_shed():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+
+    results = await asyncio.gather(*(hasher.hash("secret") for _ in range(6)), return_exceptions=True)
+    hasher.close()
+
+    shed = [result for result in results if isinstance(result, HTTPException)]
+    assert len(shed) == 4 and hasher.rejected == 4
+    assert all(error.status_code == 503 and error.headers["Retry-After"] for error in shed)
+    assert hasher.pending == 0
+
+
+async def test_cost_change_rehashes_once_on_login(db, client, user, monkeypatch):
+    monkeypatch.setattr("src.services.password_hasher.settings.password_bcrypt_rounds", 5)
+
+    for _ in range(2):
+        assert (await client.post("/api/auth/login", json=CREDENTIALS)).status_code == 200
+
+    stored = (await db.collection("users").document(user["id"]).get()).to_dict()["password_hash"]
+    assert stored.startswith("$2b$05$")
+    assert password_hasher.rehashed == 1
+
+
+async def test_wrong_password_and_unknown_email_are_rejected_alike(client, user):
+    wrong = await client.post("/api/auth/login", json={**CREDENTIALS, "password": "nope"})
+    unknown = await client.post("/api/auth/login", json={**CREDENTIALS, "email": "b@example.com"})
+
+    assert wrong.status_code == unknown.status_code == 401
+
+
+async def test_concurrent_registrations_claim_an_email_once(db, client, monkeypatch):
+    monkeypatch.setattr("src.services.password_hasher.settings.password_bcrypt_rounds", 4)
+
+    responses = await asyncio.gather(*(
+        client.post("/api/auth/register", json={**CREDENTIALS, "name": f"A{i}"}) for i in range(5)
+    ))
+
+    assert sorted(response.status_code for response in responses) == [201, 400, 400, 400, 400]
+    users = await db.collection("users").where(filter=FieldFilter("email", "==", CREDENTIALS["email"])).get()
+    assert len(users) == 1
@@ -0,0 +1,184 @@
+"""Tests for FIFO payment allocation"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+import pytest
+from src.services import payment_allocator as allocator
+from src.services.balance_service import EXPENSES_COLLECTION, HOUSEHOLDS_COLLECTION, PAYMENTS_COLLECTION
+
+Row = Tuple[str, int, int, str]  # Expense ID, u2's amount, u2's settled cents, expense status
+
+
+@pytest.fixture
+async def household(client, auth_headers, create_household):
+    """u1 paid for 30 expenses shared with u2 and u3, oldest first in `expenses`"""
+    household = await create_household(["u1", "u2", "u3"])
+    rng = random.Random(25)
+    household["expenses"] = []
+    for _ in range(30):
+        response = await client.post("/api/expenses", headers=auth_headers("u1"), json={
+            "household_id": household["id"], "created_by": "u1", "payer_id": "u1",
+            "total_cents": rng.randint(100, 3000), "participants": ["u1", "u2", "u3"],
+        })
+        household["expenses"].append(response.json())
+    household["owed"] = sum(
+        entry["amount_cents"] for expense in household["expenses"] for entry in expense["entries"] if entry["user_id"] == "u2"
+    )
+    return household
+
+
+@pytest.fixture
+def pay(client, auth_headers, household):
+    """Record a payment from u2 to u1"""
+    async def pay(cents: int, **extra: Any) -> Dict[str, Any]:
+        response = await client.post("/api/expenses/payments", headers=auth_headers("u2"), json={
+            "household_id": household["id"], "from_user": "u2", "to_user": "u1", "total_cents": cents, **extra,
+        })
+        assert response.status_code == 201, response.text
+        return response.json()
+    return pay
+
+
+def expenses(db, household: Dict[str, Any]) -> Any:
+    return db.collection(HOUSEHOLDS_COLLECTION).document(household["id"]).collection(EXPENSES_COLLECTION)
+
+
+async def settled_by_expense(db, household: Dict[str, Any]) -> List[Row]:
+    rows = {doc.id: doc.to_dict() async for doc in expenses(db, household).stream()}
+    return [
+        (expense["id"], entry["amountCents"], entry["settledCents"], rows[expense["id"]]["status"])
+        for expense in household["expenses"] for entry in rows[expense["id"]]["entries"] if entry["userId"] == "u2"
+    ]
+
+
+def assert_fifo(rows: List[Row], expected: int) -> None:
+    """u2 settled exactly `expected` cents: a prefix of whole entries, then at most one partial one"""
+    assert sum(settled for _, _, settled, _ in rows) == expected, (rows, expected)
+    partial = [i for i, (_, amount, settled, _) in enumerate(rows) if 0 < settled < amount]
+    assert len(partial) <= 1, rows
+    boundary = partial[0] if partial else sum(1 for _, amount, settled, _ in rows if settled == amount)
+    assert all(settled == amount for _, amount, settled, _ in rows[:boundary]), rows
+    assert all(settled == 0 for _, _, settled, _ in rows[boundary + bool(partial):]), rows
+    for _, _, settled, status in rows:
+        assert status == (allocator.OPEN if settled == 0 else allocator.PARTIALLY_SETTLED), rows  # u3 hasn't paid
+
+
+def test_heap_allocation_matches_a_sorted_scan():
+    rng = random.Random(25)
+    users = [f"u{i}" for i in range(4)]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    docs = [(f"e{i}", {
+        "payerId": rng.choice(users), "status": allocator.OPEN, "createdAt": start + timedelta(minutes=rng.randrange(10 ** 4)),
+        "entries": [{"userId": user_id, "amountCents": rng.randint(100, 5000), "settledCents": 0} for user_id in users],
+    }) for i in range(200)]
+    index = allocator.OpenEntries(docs)
+    open_cents = {
+        (expense_id, entry["userId"]): entry["amountCents"] for expense_id, data in docs for entry in data["entries"]
+    }
+
+    for _ in range(100):
+        debtor, creditor = rng.sample(users, 2)
+        payment = cents = rng.randint(1000, 10000)
+        expected = []
+        for _, expense_id in sorted((data["createdAt"], expense_id) for expense_id, data in docs if data["payerId"] == creditor):
+            amount = min(open_cents[expense_id, debtor], cents)
+            if amount > 0:
+                expected.append((expense_id, amount))
+                open_cents[expense_id, debtor] -= amount
+                cents -= amount
+
+        assert [(a.expense_id, a.amount_cents) for a in index.allocate(debtor, creditor, payment)] == expected
+
+
+async def test_concurrent_payments_settle_the_oldest_entries_first(db, household, pay):
+    amounts = [random.Random(i).randint(100, household["owed"] // 20) for i in range(12)]
+
+    payments = await asyncio.gather(*(pay(cents) for cents in amounts))
+
+    assert all(payment["allocated_cents"] == payment["total_cents"] for payment in payments), payments
+    assert_fifo(await settled_by_expense(db, household), sum(amounts))
+
+
+async def test_entry_settled_behind_the_index_is_replanned(db, household, pay):
+    await pay(1000)
+    rows = await settled_by_expense(db, household)
+    target = next(expense_id for expense_id, amount, settled, _ in rows if settled < amount)
+    entries = (await expenses(db, household).document(target).get()).to_dict()["entries"]
+    for entry in entries:
+        if entry["userId"] == "u2":
+            frontend_paid = entry["amountCents"] - entry["settledCents"]
+            entry["settledCents"] = entry["amountCents"]
+    await expenses(db, household).document(target).update({"entries": entries, "status": allocator.PARTIALLY_SETTLED})
+    conflicts = allocator.open_entries.conflicts
+
+    payment = await pay(50)
+
+    assert payment["allocated_cents"] == 50 and allocator.open_entries.conflicts == conflicts + 1, payment
+    assert_fifo(await settled_by_expense(db, household), 1000 + frontend_paid + 50)
+
+
+async def test_explicit_applies_to_skips_the_queue(client, auth_headers, household, pay):
+    last = household["expenses"][-1]["id"]
+
+    payment = await pay(10, applies_to=[{"expense_id": last, "user_id": "u2", "amount_cents": 10}])
+    bad = await client.post("/api/expenses/payments", headers=auth_headers("u2"), json={
+        "household_id": household["id"], "from_user": "u2", "to_user": "u1", "total_cents": 10,
+        "applies_to": [{"expense_id": last, "user_id": "u3", "amount_cents": 10}],
+    })
+
+    assert payment["applies_to"] == [{"expense_id": last, "user_id": "u2", "amount_cents": 10}], payment
+    assert bad.status_code == 400, bad.text
+
+
+@pytest.mark.parametrize("applies_to, allocated", [(None, 75), ([{"expenseId": "e", "userId": "u2", "amountCents": 75}], 0)])
+async def test_frontend_payment_is_allocated_only_without_applies_to(db, client, auth_headers, household, applies_to, allocated):
+    ref = db.collection(HOUSEHOLDS_COLLECTION).document(household["id"]).collection(PAYMENTS_COLLECTION).document()
+    await ref.set({"fromUser": "u2", "toUser": "u1", "totalCents": 75, "appliesTo": applies_to, "status": "completed"})
+    path = f"/api/expenses/payments/{ref.id}/process?household_id={household['id']}"
+
+    processed = (await client.post(path, headers=auth_headers("u2"))).json()
+    again = (await client.post(path, headers=auth_headers("u2"))).json()
+
+    assert processed["allocated_cents"] == again["allocated_cents"] == allocated, (processed, again)
+
+
+async def test_overpayment_stays_unallocated(db, client, auth_headers, household, pay):
+    payment = await pay(household["owed"] + 500)
+
+    assert payment["allocated_cents"] == household["owed"], payment
+    assert all(settled == amount for _, amount, settled, _ in await settled_by_expense(db, household))
+    for expense in household["expenses"]:
+        owed = next(entry["amount_cents"] for entry in expense["entries"] if entry["user_id"] == "u3")
+        await client.post("/api/expenses/payments", headers=auth_headers("u3"), json={
+            "household_id": household["id"], "from_user": "u3", "to_user": "u1", "total_cents": owed,
+        })
+    assert {status for *_, status in await settled_by_expense(db, household)} == {allocator.SETTLED}
+
+
+async def test_failed_allocation_keeps_the_payment_and_what_was_applied(client, auth_headers, household, pay, monkeypatch):
+    commit = allocator.run_transaction
+    calls = 0
+
+    async def failing(*args: Any) -> Any:
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("storage unavailable")
+        return await commit(*args)
+
+    monkeypatch.setattr(allocator, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(allocator, "run_transaction", failing)
+
+    payment = await pay(household["owed"])
+
+    first_two = [
+        next(entry["amount_cents"] for entry in expense["entries"] if entry["user_id"] == "u2")
+        for expense in household["expenses"][:2]
+    ]
+    assert payment["allocated_cents"] == sum(first_two), payment
+    assert allocator.open_entries.snapshot()["households"] == 0  # Reservations dropped with the index
+
+    path = f"/api/expenses/payments/{payment['id']}/process?household_id={household['id']}"
+    resumed = (await client.post(path, headers=auth_headers("u2"))).json()
+    assert resumed["allocated_cents"] == household["owed"], resumed
@@ -0,0 +1,177 @@
+"""Tests for the upstream circuit breakers, adaptive limits and retry budgets"""
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from src.config.http_client import OPEN_FOOD_FACTS, UPC_DATABASE
+from src.services import barcode_service
+from src.services.barcode_cache import get_barcode_cache, make_key
+from src.utils.fake_upstream import OPEN_FOOD_FACTS_HOST, UPC_HOST
+from src.utils.resilience import CLOSED, OPEN, AIMDLimiter, CircuitBreaker, RetryBudget, UpstreamGuard
+
+GOOD = {"product_name": "Oat Drink", "brands": "Oatly", "categories": "Plant-based milks"}
+BARCODES = [f"00000000{index:04d}" for index in range(40)]
+
+
+def guard(**overrides) -> UpstreamGuard:
+    """A guard with the breaker at 3 failures and no retries, unless overridden"""
+    options = dict(
+        limiter=AIMDLimiter(initial=8, minimum=1, maximum=16, latency_threshold=1.0),
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60.0),
+        budget=RetryBudget(ratio=0.0, max_tokens=2.0),
+        max_retries=0,
+        retry_backoff=0.0,
+    )
+    options.update(overrides)
+    return UpstreamGuard(name="test", **options)
+
+
+@pytest.fixture
+def guards(monkeypatch):
+    """Fresh guards for both upstreams; `guards.install(name, **overrides)` swaps in a custom one"""
+    class Guards(dict):
+        def install(self, name: str, **overrides) -> UpstreamGuard:
+            self[name] = guard(**overrides)
+            monkeypatch.setitem(barcode_service.guards, name, self[name])
+            return self[name]
+
+    installed = Guards()
+    for name in (UPC_DATABASE, OPEN_FOOD_FACTS):
+        installed.install(name)
+    return installed
+
+
+async def fail_upc(times: int, status: int) -> None:
+    for barcode in BARCODES[:times]:
+        with pytest.raises(HTTPException) as error:
+            await barcode_service.lookup_upc(barcode)
+        assert error.value.status_code == status
+
+
+@pytest.mark.parametrize("failure, status", [("throttled", 429), ("timeout", 504)])
+async def test_breaker_opens_after_repeated_failures_and_fails_fast(fake_upstream, guards, monkeypatch, failure, status):
+    monkeypatch.setattr(barcode_service.settings, "upc_timeout_seconds", 0.05)
+    if failure == "throttled":
+        fake = await fake_upstream(products={BARCODES[-1]: GOOD}, throttle_rates={UPC_HOST: 1.0})
+    else:
+        fake = await fake_upstream(products={BARCODES[-1]: GOOD}, latencies={UPC_HOST: 1.0})
+
+    await fail_upc(3, status)
+    calls = fake.calls[UPC_HOST]
+    started = time.perf_counter()
+    with pytest.raises(HTTPException) as error:
+        await barcode_service.lookup_upc(BARCODES[-1])
+
+    assert guards[UPC_DATABASE].breaker.state == OPEN
+    assert error.value.status_code == 503 and "circuit open" in error.value.detail
+    assert fake.calls[UPC_HOST] == calls  # Rejected without reaching the upstream
+    assert time.perf_counter() - started < 0.02
+
+
+async def test_open_breaker_serves_a_stale_cache_entry(fake_upstream, guards):
+    fake = await fake_upstream(products={BARCODES[-1]: GOOD}, throttle_rates={UPC_HOST: 1.0})
+    stale = {"code": "OK", "total": 1, "items": [{"title": "Oat Drink"}]}
+    get_barcode_cache().memory.set(make_key(UPC_DATABASE, BARCODES[-1]), stale, expires_at=time.time() - 1)
+    await fail_upc(3, 429)
+    calls = fake.calls[UPC_HOST]
+
+    assert await barcode_service.lookup_upc(BARCODES[-1]) == stale
+    assert fake.calls[UPC_HOST] == calls
+
+
+async def test_open_breaker_leaves_product_lookups_to_the_other_upstream(fake_upstream, guards):
+    fake = await fake_upstream(
+        products={barcode: GOOD for barcode in BARCODES}, throttle_rates={OPEN_FOOD_FACTS_HOST: 1.0},
+    )
+    for barcode in BARCODES[:3]:
+        await barcode_service.lookup_product(barcode)
+    assert guards[OPEN_FOOD_FACTS].breaker.state == OPEN
+    calls = fake.calls[OPEN_FOOD_FACTS_HOST]
+
+    result = await barcode_service.lookup_product(BARCODES[-1])
+
+    assert result.found and result.source == UPC_DATABASE
+    assert fake.calls[OPEN_FOOD_FACTS_HOST] == calls
+
+
+async def test_breaker_closes_after_a_healthy_probe(fake_upstream, guards):
+    breaker = guards.install(UPC_DATABASE, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.05)).breaker
+    fake = await fake_upstream(products={barcode: GOOD for barcode in BARCODES}, throttle_rates={UPC_HOST: 1.0})
+    await fail_upc(3, 429)
+    fake.throttle_rates.clear()
+    await asyncio.sleep(0.06)
+    calls = fake.calls[UPC_HOST]
+
+    await barcode_service.lookup_upc(BARCODES[-1])
+
+    assert fake.calls[UPC_HOST] == calls + 1 and breaker.state == CLOSED
+
+
+async def test_limit_shrinks_on_throttling_and_grows_on_success(fake_upstream, guards):
+    limiter = guards[UPC_DATABASE].limiter
+    fake = await fake_upstream(products={barcode: GOOD for barcode in BARCODES}, throttle_rates={UPC_HOST: 1.0})
+
+    await fail_upc(2, 429)
+    assert limiter.limit == 2  # 8 -> 4 -> 2
+
+    fake.throttle_rates.clear()
+    for barcode in BARCODES[2:12]:
+        await barcode_service.lookup_upc(barcode)
+
+    assert 4 < limiter.limit < 8  # Roughly one slot per window of healthy calls
+
+
+async def test_slow_answers_count_as_overload(fake_upstream, guards):
+    limiter = guards[UPC_DATABASE].limiter
+    limiter.latency_threshold = 0.02
+    await fake_upstream(products={barcode: GOOD for barcode in BARCODES}, latencies={UPC_HOST: 0.03})
+
+    await barcode_service.lookup_upc(BARCODES[0])
+
+    assert limiter.limit == 4
+
+
+async def test_calls_beyond_the_limit_are_rejected(fake_upstream, guards):
+    guards.install(UPC_DATABASE, limiter=AIMDLimiter(initial=2, minimum=1, maximum=4, latency_threshold=1.0))
+    fake = await fake_upstream(products={barcode: GOOD for barcode in BARCODES}, latencies={UPC_HOST: 0.05})
+
+    results = await asyncio.gather(*(barcode_service.lookup_upc(barcode) for barcode in BARCODES[:4]), return_exceptions=True)
+
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(rejected) == 2 and all("concurrency limit" in error.detail for error in rejected)
+    assert fake.max_in_flight[UPC_HOST] == 2
+
+
+async def test_retries_stop_once_the_budget_is_spent(fake_upstream, guards):
+    budget = guards.install(
+        UPC_DATABASE, max_retries=1,
+        breaker=CircuitBreaker(failure_threshold=100, reset_timeout=60.0),
+        budget=RetryBudget(ratio=0.0, max_tokens=2.0),
+    ).budget
+    fake = await fake_upstream(products={barcode: GOOD for barcode in BARCODES}, throttle_rates={UPC_HOST: 1.0})
+
+    calls = []
+    for barcode in BARCODES[:4]:
+        before = fake.calls[UPC_HOST]
+        with pytest.raises(HTTPException):
+            await barcode_service.lookup_upc(barcode)
+        calls.append(fake.calls[UPC_HOST] - before)
+
+    assert calls == [2, 2, 1, 1]
+    assert budget.retries == 2 and budget.exhausted == 2
+
+
+async def test_upstreams_route_reports_the_state(fake_upstream, guards, client):
+    await fake_upstream(products={barcode: GOOD for barcode in BARCODES}, throttle_rates={UPC_HOST: 1.0})
+    await fail_upc(3, 429)
+    await barcode_service.lookup_openfoodfacts(BARCODES[0])
+
+    response = await client.get("/api/barcode/upstreams")
+
+    assert response.status_code == 200
+    upc, off = response.json()[UPC_DATABASE], response.json()[OPEN_FOOD_FACTS]
+    assert upc["breaker"]["state"] == OPEN and upc["breaker"]["times_opened"] == 1
+    assert upc["breaker"]["retry_in_seconds"] > 0
+    assert upc["limiter"] == {"limit": 1, "in_flight": 0, "rejected": 0}
+    assert upc["retry_budget"] == {"tokens": 2.0, "retries": 0, "exhausted": 0}
+    assert off["breaker"]["state"] == CLOSED and off["limiter"]["limit"] == 8
@@ -0,0 +1,58 @@
+"""Tests for settle-up suggestions"""
+from typing import Dict, List
+from hypothesis import given, strategies as st
+from src.models.expense import SettleUpPlan
+from src.services.settle_service import EXACT, GREEDY, settle_up
+
+
+@st.composite
+def round_balances(draw, max_members: int = 12) -> Dict[str, int]:
+    """Balances in a few round amounts, where subgroups often settle among themselves"""
+    amounts: List[int] = draw(st.lists(st.integers(-6, 6).map(lambda units: units * 250), min_size=1, max_size=max_members - 1))
+    return {f"u{i}": cents for i, cents in enumerate(amounts + [-sum(amounts)])}
+
+
+def remaining(balances: Dict[str, int], plan: SettleUpPlan) -> Dict[str, int]:
+    after = dict(balances)
+    for transfer in plan.transfers:
+        assert transfer.amount_cents > 0 and transfer.from_user != transfer.to_user
+        after[transfer.from_user] += transfer.amount_cents
+        after[transfer.to_user] -= transfer.amount_cents
+    return {user_id: cents for user_id, cents in after.items() if cents}
+
+
+@given(round_balances())
+def test_both_plans_settle_every_balance(balances):
+    exact = settle_up("h1", balances, max_exact_members=12)
+    greedy = settle_up("h1", balances, max_exact_members=12, exact=False)
+
+    assert remaining(balances, exact) == remaining(balances, greedy) == {}
+    assert exact.method == EXACT and exact.optimal
+
+
+@given(round_balances())
+def test_exact_is_never_worse_than_greedy(balances):
+    exact = settle_up("h1", balances, max_exact_members=12)
+    greedy = settle_up("h1", balances, max_exact_members=12, exact=False)
+
+    assert len(exact.transfers) <= len(greedy.transfers) <= max(sum(1 for cents in balances.values() if cents) - 1, 0)
+
+
+def test_exact_finds_subgroups_that_settle_among_themselves():
+    # {b, c, f} and {a, d, e} each settle in two transfers; greedy starts with f paying b and needs five
+    balances = {"a": -300, "b": 900, "c": 500, "d": -400, "e": 700, "f": -1400}
+
+    exact = settle_up("h1", balances, max_exact_members=12)
+    greedy = settle_up("h1", balances, max_exact_members=12, exact=False)
+
+    assert len(exact.transfers) == 4 and len(greedy.transfers) == 5
+
+
+def test_large_groups_fall_back_to_greedy():
+    balances = {f"u{i}": 100 * (i + 1) for i in range(20)}
+    balances["u0"] -= sum(balances.values())
+
+    plan = settle_up("h1", balances, max_exact_members=12)
+
+    assert plan.method == GREEDY and not plan.optimal
+    assert remaining(balances, plan) == {}
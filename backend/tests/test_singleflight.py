@@ -0,0 +1,83 @@
+"""Tests for single-flight coalescing of barcode lookups"""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.services import barcode_service
+from src.utils.fake_upstream import UPC_HOST
+from src.utils.singleflight import SingleFlight
+
+BARCODE = "012345678905"
+
+
+@pytest.fixture
+async def upstream(fake_upstream):
+    """Slow fake upstream behind a fresh, memory-only barcode cache"""
+    return await fake_upstream(latency=0.05, products={BARCODE: {"product_name": "Oat Milk"}})
+
+
+async def test_concurrent_lookups_make_one_upstream_call(upstream):
+    results = await asyncio.gather(*(barcode_service.lookup_upc(BARCODE) for _ in range(50)))
+
+    assert upstream.calls[UPC_HOST] == 1
+    assert all(result == results[0] for result in results)
+    assert results[0]["items"][0]["title"] == "Oat Milk"
+
+
+async def test_spellings_of_one_barcode_share_the_call(upstream):
+    await asyncio.gather(
+        barcode_service.lookup_upc(BARCODE),
+        barcode_service.lookup_upc(f" {BARCODE} "),
+    )
+
+    assert upstream.calls[UPC_HOST] == 1
+
+
+async def test_different_barcodes_are_not_coalesced(upstream):
+    await asyncio.gather(
+        barcode_service.lookup_upc(BARCODE),
+        barcode_service.lookup_upc("036000291452"),
+    )
+
+    assert upstream.calls[UPC_HOST] == 2
+
+
+async def test_sequential_lookups_after_completion_hit_the_cache(upstream):
+    await barcode_service.lookup_upc(BARCODE)
+    await barcode_service.lookup_upc(BARCODE)
+
+    assert upstream.calls[UPC_HOST] == 1
+
+
+async def test_error_is_raised_in_every_caller():
+    flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=504, detail="timeout")
+
+    results = await asyncio.gather(*(flight.do("k", failing) for _ in range(5)), return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(result, HTTPException) and result.status_code == 504 for result in results)
+    assert flight.snapshot() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", slow))
+    second = asyncio.ensure_future(flight.do("k", slow))
+    await started.wait()
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
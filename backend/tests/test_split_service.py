@@ -0,0 +1,106 @@
+"""Tests for expense split canonicalization"""
+from fractions import Fraction
+from typing import Any, Dict
+import pytest
+from fastapi import HTTPException
+from hypothesis import given, strategies as st
+from src.models.expense import ExpenseCreate
+from src.services.split_service import allocate_cents, split_expense, split_expenses
+
+USERS = [f"u{i}" for i in range(12)]
+TOTALS = st.one_of(
+    st.sampled_from([0, 1, -1, 7, 99, 100, 1001, 10 ** 15 + 1]),
+    st.integers(min_value=-10 ** 9, max_value=10 ** 12),
+)
+WEIGHTS = st.one_of(
+    st.sampled_from([0, 1, 2, 0.5, 1 / 3, 2 / 3]),
+    st.floats(min_value=0, max_value=10, allow_nan=False),
+    st.integers(min_value=1, max_value=10 ** 6),
+)
+
+
+@st.composite
+def expenses(draw: Any, method: str) -> ExpenseCreate:
+    participants = draw(st.lists(st.sampled_from(USERS), min_size=1, max_size=len(USERS), unique=True))
+    total_cents = draw(TOTALS)
+    shares = custom_amounts = None
+    if method == "shares":
+        shares = {user_id: draw(WEIGHTS) for user_id in participants}
+        shares[participants[0]] = shares[participants[0]] or 1
+    if method == "custom":
+        cut = sorted(draw(st.integers(0, abs(total_cents))) for _ in participants[1:])
+        parts = [b - a for a, b in zip([0] + cut, cut + [abs(total_cents)])]
+        sign = -1 if total_cents < 0 else 1
+        custom_amounts = {user_id: sign * part for user_id, part in zip(participants, parts)}
+    return ExpenseCreate(
+        household_id="h1", created_by="u0", payer_id=draw(st.sampled_from(USERS)), total_cents=total_cents,
+        participants=participants + participants[:1], method=method,
+        shares=shares, custom_amounts=custom_amounts,
+    )
+
+
+ANY_EXPENSE = st.sampled_from(["equal", "shares", "custom", "payer"]).flatmap(expenses)
+
+
+@given(ANY_EXPENSE)
+def test_entries_sum_to_the_total(expense):
+    split = split_expense(expense)
+
+    assert sum(entry.amount_cents for entry in split.entries) == expense.total_cents
+    assert len(set(split.participants)) == len(split.participants) == len(split.entries)
+    assert split_expense(expense) == split
+
+
+@given(st.sampled_from(["equal", "shares"]).flatmap(expenses))
+def test_each_share_is_within_a_cent_of_exact(expense):
+    split = split_expense(expense)
+
+    shares = expense.shares or {}
+    weights = [Fraction(shares.get(user_id, 0)) if expense.shares else Fraction(1) for user_id in split.participants]
+    for entry, weight in zip(split.entries, weights):
+        exact = expense.total_cents * weight / sum(weights)
+        assert abs(entry.amount_cents - exact) < 1
+        assert weight or entry.amount_cents == 0
+    assert abs(split.rounding_adjustment_cents) < len(split.entries)
+
+
+@pytest.mark.parametrize("total_cents, weights, amounts, rounding", [
+    (100, [1, 1, 1], [34, 33, 33], 1),
+    (-100, [1, 1, 1], [-34, -33, -33], -1),
+    (-7, [1, 2], [-2, -5], -1),
+    (-1, [1, 1, 1, 1], [-1, 0, 0, 0], -1),
+])
+def test_negative_totals_mirror_positive_ones(total_cents, weights, amounts, rounding):
+    assert allocate_cents(total_cents, weights) == (amounts, rounding)
+
+
+@pytest.mark.parametrize("bad", [
+    {"method": "equal", "participants": []},
+    {"method": "shares", "participants": ["a"], "shares": {"a": 0}},
+    {"method": "shares", "participants": ["a"], "shares": {"a": -1}},
+    {"method": "shares", "participants": ["a"], "shares": {"a": 1, "b": 1}},
+    {"method": "custom", "participants": ["a"], "custom_amounts": {"a": 99}},
+    {"method": "split-the-difference", "participants": ["a"]},
+])
+def test_invalid_expense_is_a_400_naming_its_position(bad: Dict[str, Any]):
+    valid = ExpenseCreate(household_id="h1", created_by="a", payer_id="a", total_cents=100, participants=["a"])
+    expense = ExpenseCreate(household_id="h1", created_by="a", payer_id="a", total_cents=100, **bad)
+
+    with pytest.raises(HTTPException) as error:
+        split_expenses([valid, expense])
+
+    assert error.value.status_code == 400
+    assert error.value.detail.startswith("Expense 1: ")
+
+
+async def test_split_route_rejects_an_invalid_batch(db, client, auth_headers):
+    await db.collection("users").document("a").set({"name": "A", "email": "a@example.com", "household_id": "h1"})
+    expense = {"household_id": "h1", "created_by": "a", "payer_id": "a", "total_cents": 100}
+
+    response = await client.post("/api/expenses/split", headers=auth_headers("a"), json={"expenses": [
+        {**expense, "participants": ["a"]},
+        {**expense, "participants": ["a"], "method": "custom", "custom_amounts": {"a": 99}},
+    ]})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Expense 1: ")
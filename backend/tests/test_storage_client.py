@@ -0,0 +1,61 @@
+"""Tests for the process-wide storage client and its batching helpers"""
+import asyncio
+import gc
+from datetime import date, timedelta
+from src.config import firebase
+from src.services import item_service
+
+
+async def seed_household(db, count: int) -> list:
+    await db.collection("users").document("u1").set({"name": "Ann", "household_id": "h1"})
+    await db.collection("households").document("h1").set({"name": "Kitchen"})
+    refs = [db.collection("items").document(f"seed{i}") for i in range(count)]
+    async with firebase.BatchWriter() as writer:
+        for i, ref in enumerate(refs):
+            writer.set(ref, {
+                "name": f"Item {i}", "quantity": 1, "householdId": "h1", "ownerId": "u1",
+                "isCommunal": i % 2 == 0, "isGrocery": False,
+                "expiryDate": (date.today() + timedelta(days=i % 30 - 5)).isoformat(),
+            })
+    assert writer.batches == -(-count // firebase.FIRESTORE_BATCH_LIMIT)
+    return refs
+
+
+async def test_client_is_process_wide(db):
+    assert firebase.get_firestore_client() is db
+    assert firebase.initialize_firebase() is db
+
+
+async def test_batch_writes_and_batched_reads(db):
+    refs = await seed_household(db, 1200)
+
+    snapshots = await firebase.get_documents(refs[::-1])
+
+    assert [s.id for s in snapshots] == [r.id for r in refs[::-1]]
+    assert all(s.exists for s in snapshots)
+
+
+async def test_concurrent_requests_do_not_block_the_event_loop(client, auth_headers, loop_blocking):
+    await seed_household(firebase.get_firestore_client(), 1200)
+    headers = auth_headers("u1")
+    # Warm up first-request costs (lazy imports, route setup, the household's
+    # expiry index) outside the measurement
+    await client.get("/api/items/household/h1/expired", headers=headers)
+    await item_service.get_household_index("h1")
+    loop_blocking.slowest = 0.0
+    # Full GC passes over the imported SDKs are pauses, not blocking calls
+    gc.freeze()
+    try:
+        responses = await asyncio.gather(*(
+            client.get("/api/items/household/h1/expiring", headers=headers) if i % 2 else
+            client.post("/api/items?household_id=h1", headers=headers, json={
+                "name": f"New {i}", "quantity": 1, "is_communal": True,
+                "expiry_date": (date.today() + timedelta(days=1)).isoformat(),
+            })
+            for i in range(400)
+        ))
+    finally:
+        gc.unfreeze()
+
+    assert {r.status_code for r in responses} <= {200, 201}
+    assert loop_blocking.slowest < 0.05, f"event loop blocked by {loop_blocking.slowest_name}"
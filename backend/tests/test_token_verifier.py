@@ -0,0 +1,114 @@
+"""Tests for bearer token verification and its caches"""
+import json
+import time
+from typing import Any, List
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from src.config.http_client import close_http_clients, initialize_http_clients
+from src.config.settings import settings
+from src.services import token_verifier as verifier
+from src.utils.security import create_access_token
+
+PRIVATE_PEM = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+)
+
+
+def firebase_token(kid: str = "k1", **overrides: Any) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": verifier.FIREBASE_ISSUER + settings.firebase_project_id,
+        "aud": settings.firebase_project_id,
+        "sub": "u1",
+        "iat": now,
+        "auth_time": now,
+        "exp": now + 3600,
+        **overrides,
+    }
+    return jwt.encode(claims, PRIVATE_PEM.decode(), algorithm=verifier.FIREBASE_ALGORITHM, headers={"kid": kid})
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    yield
+    verifier.verified_tokens.clear()
+
+
+@pytest.fixture
+async def key_requests(monkeypatch) -> List[str]:
+    """Google's signing keys served offline; the list records each key fetch"""
+    monkeypatch.setattr(settings, "firebase_auth_enabled", True)
+    public_jwk = {
+        **jwk.construct(PRIVATE_PEM, algorithm=verifier.FIREBASE_ALGORITHM).public_key().to_dict(),
+        "kid": "k1", "use": "sig",
+    }
+    requests: List[str] = []
+
+    def google(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(
+            200,
+            content=json.dumps({"keys": [public_jwk]}),
+            headers={"Cache-Control": "public, max-age=21600, must-revalidate, no-transform"},
+        )
+
+    await initialize_http_clients(transport=httpx.MockTransport(google))
+    yield requests
+    await verifier.close_token_verifier()
+    await close_http_clients()
+
+
+async def test_firebase_token_is_verified_once(key_requests):
+    token = firebase_token()
+    hits = verifier.verified_tokens.hits
+
+    for _ in range(5):
+        claims = await verifier.verify_token(token)
+        assert claims is not None and claims["sub"] == "u1"
+
+    assert len(verifier.verified_tokens) == 1
+    assert verifier.verified_tokens.hits - hits == 4
+    assert len(key_requests) == 1
+
+
+async def test_api_token_is_verified():
+    claims = await verifier.verify_token(create_access_token({"sub": "u2"}))
+
+    assert claims is not None and claims["sub"] == "u2"
+
+
+@pytest.mark.parametrize("token", [
+    lambda: firebase_token(aud="someone-else"),
+    lambda: firebase_token(exp=int(time.time()) - 1),
+    lambda: firebase_token()[:-4] + "AAAA",
+    lambda: "not a token",
+])
+async def test_rejections_are_not_cached(key_requests, token):
+    assert await verifier.verify_token(token()) is None
+    assert len(verifier.verified_tokens) == 0
+
+
+async def test_unknown_kid_refetches_keys_at_most_once(key_requests):
+    assert await verifier.verify_token(firebase_token()) is not None
+
+    for _ in range(10):
+        assert await verifier.verify_token(firebase_token(kid="nope")) is None
+
+    assert len(key_requests) == 1
+
+
+async def test_authenticated_request_with_firebase_token(db, client, key_requests):
+    await db.collection("users").document("u1").set({"name": "u1", "email": "u1@example.com", "household_id": "h1"})
+    await db.collection("households").document("h1").set({"name": "Flat", "created_by": "u1", "version": 1})
+    headers = {"Authorization": f"Bearer {firebase_token()}"}
+    hits = verifier.verified_tokens.hits
+
+    for _ in range(3):
+        response = await client.get("/api/households/h1/members", headers=headers)
+        assert response.status_code == 200, response.text
+
+    assert len(key_requests) == 1
+    assert verifier.verified_tokens.hits - hits == 2
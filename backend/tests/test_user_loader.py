@@ -0,0 +1,69 @@
+"""Tests for batched user lookups: 500 items cost O(1) user reads"""
+from datetime import date, timedelta
+import pytest
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from src.config.firebase import BatchWriter
+from src.models.item import ItemPageRequest
+from src.services import household_service, item_service
+from src.services.user_loader import USERS_COLLECTION
+from src.utils.request_context import request_scope
+
+OWNERS = [f"u{i}" for i in range(10)]
+ITEMS = 500
+
+
+@pytest.fixture
+async def household(db):
+    async with BatchWriter() as writer:
+        writer.set(db.collection("households").document("h1"), {"name": "Flat", "created_by": "u0"})
+        for i, owner in enumerate(OWNERS):
+            # u8 and u9 have left the household but still own items
+            writer.set(db.collection("users").document(owner), {
+                "name": f"User {i}", "email": f"u{i}@example.com",
+                "household_id": "h1" if i < 8 else None,
+            })
+        for i in range(ITEMS):
+            writer.set(db.collection("items").document(f"item{i}"), {
+                "name": f"Item {i}", "quantity": 1, "householdId": "h1",
+                "ownerId": OWNERS[i % len(OWNERS)], "ownerName": "stale",
+                "isCommunal": i % 2 == 0, "isGrocery": False,
+                "expiryDate": (date.today() + timedelta(days=i % 20 - 5)).isoformat(),
+                "created_at": SERVER_TIMESTAMP,
+            })
+    return db
+
+
+async def test_owner_names_cost_one_member_query_and_one_batch(household):
+    # Cold: one member query plus one batched read for the two former members.
+    # Warm: the member cache answers, only the former members are re-read
+    for _ in ("cold", "warm"):
+        with request_scope() as scope:
+            items = (await item_service.get_items("h1", "u0", page=ItemPageRequest(limit=ITEMS))).items
+
+        assert len(items) == ITEMS
+        assert all(item.owner_name == f"User {item.owner_id[1:]}" for item in items)
+        assert scope.reads.get(USERS_COLLECTION, 0) <= len(OWNERS)
+        assert scope.round_trips.get(USERS_COLLECTION, 0) <= 2
+
+
+async def test_household_members_cost_one_round_trip(household):
+    with request_scope() as scope:
+        members = await household_service.get_household_members("h1", "u0")
+
+    assert sorted(m.id for m in members) == OWNERS[:8]
+    assert [m.id for m in members if m.is_admin] == ["u0"]
+    assert scope.round_trips.get(USERS_COLLECTION, 0) <= 1
+
+
+async def test_storage_read_headers_stay_flat_in_item_count(client, household, auth_headers):
+    response = await client.get(f"/api/items?household_id=h1&limit={ITEMS}", headers=auth_headers("u0"))
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == ITEMS
+    # Every item is read once; users, membership and the household add a constant
+    assert int(response.headers["x-storage-reads"]) <= ITEMS + len(OWNERS) + 5
+    assert int(response.headers["x-storage-round-trips"]) <= 8
+
+    response = await client.get("/api/households/h1/members", headers=auth_headers("u0"))
+    assert response.status_code == 200, response.text
+    assert int(response.headers["x-storage-round-trips"]) <= 3
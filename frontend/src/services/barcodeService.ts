@@ -146,6 +146,43 @@ async function fetchFromUPCDatabase(barcode: string): Promise<ProductInfo | null
   }
 }
 
+/**
+ * Fetches merged product information from the backend, which queries
+ * Open Food Facts and UPC Database concurrently
+ * @param barcode - The UPC/EAN barcode number
+ * @returns Product information, null if not found, or undefined if the backend is unavailable
+ */
+async function fetchFromMergedLookup(barcode: string): Promise<ProductInfo | null | undefined> {
+  try {
+    const response = await fetch(
+      `${API_BASE_URL}/api/barcode/product/${encodeURIComponent(barcode)}`,
+      {
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      }
+    );
+
+    if (!response.ok) {
+      console.error('Merged product lookup error:', response.statusText);
+      return undefined;
+    }
+
+    const data: { found: boolean; source?: string; product?: ProductInfo } = await response.json();
+
+    if (!data.found || !data.product) {
+      console.log('No product data found in any source');
+      return null;
+    }
+
+    console.log('Using product data from backend:', data.source);
+    return data.product;
+  } catch (error) {
+    console.error('Error fetching merged product lookup:', error);
+    return undefined;
+  }
+}
+
 /**
  * Checks if product data is too generic or incomplete
  */
@@ -199,6 +236,14 @@ function mergeProductData(primary: ProductInfo | null, fallback: ProductInfo | n
 export async function fetchProductByBarcode(barcode: string): Promise<ProductInfo | null> {
   console.log('Fetching product for barcode:', barcode);
 
+  // Prefer the backend's merged lookup: it queries both sources concurrently
+  // and merges server-side, so we only pay for one round trip
+  const serverProduct = await fetchFromMergedLookup(barcode);
+  if (serverProduct !== undefined) {
+    return serverProduct;
+  }
+
+  // Backend unavailable - fall back to querying the sources from the browser
   // Try Open Food Facts first (better for nutrition data)
   const openFoodProduct = await fetchFromOpenFoodFacts(barcode);
 
@@ -1,15 +1,14 @@
 import {
   collection,
   doc,
-  addDoc,
-  updateDoc,
-  deleteDoc,
   query,
   where,
   getDocs,
   onSnapshot,
+  runTransaction,
   serverTimestamp,
   Timestamp,
+  Transaction,
   orderBy,
 } from 'firebase/firestore';
 import { db } from '@/lib/firebase';
@@ -27,12 +26,29 @@ export interface ItemData {
   reserved_by?: string | null;
   created_at?: Timestamp;
   updated_at?: Timestamp;
+  version?: number;
 }
 
 export interface Item extends ItemData {
   id: string;
 }
 
+/**
+ * Bump the household's change version (households/{id}.version) inside an
+ * item write, the way the backend's sync_service does. The backend's change
+ * feed, ETags and expiry indexes rely on every item write moving it, and
+ * firestore.rules rejects item writes that don't.
+ *
+ * Must be called after the transaction's other reads.
+ */
+const nextVersion = async (transaction: Transaction, householdId: string): Promise<number> => {
+  const householdRef = doc(db, 'households', householdId);
+  const household = await transaction.get(householdRef);
+  const version = ((household.data()?.version as number | undefined) ?? 0) + 1;
+  transaction.update(householdRef, { version });
+  return version;
+};
+
 /**
  * Add a new item to Firestore
  */
@@ -40,10 +56,15 @@ export const addItem = async (
   itemData: Omit<ItemData, 'created_at' | 'updated_at'>
 ): Promise<string> => {
   try {
-    const docRef = await addDoc(collection(db, 'items'), {
-      ...itemData,
-      created_at: serverTimestamp(),
-      updated_at: serverTimestamp(),
+    const docRef = doc(collection(db, 'items'));
+    await runTransaction(db, async (transaction) => {
+      const version = await nextVersion(transaction, itemData.householdId);
+      transaction.set(docRef, {
+        ...itemData,
+        created_at: serverTimestamp(),
+        updated_at: serverTimestamp(),
+        version,
+      });
     });
     return docRef.id;
   } catch (error) {
@@ -61,9 +82,17 @@ export const updateItem = async (
 ): Promise<void> => {
   try {
     const itemRef = doc(db, 'items', itemId);
-    await updateDoc(itemRef, {
-      ...updates,
-      updated_at: serverTimestamp(),
+    await runTransaction(db, async (transaction) => {
+      const item = await transaction.get(itemRef);
+      if (!item.exists()) {
+        throw new Error('Item not found');
+      }
+      const version = await nextVersion(transaction, item.data().householdId);
+      transaction.update(itemRef, {
+        ...updates,
+        updated_at: serverTimestamp(),
+        version,
+      });
     });
   } catch (error) {
     console.error('Error updating item:', error);
@@ -72,12 +101,24 @@ export const updateItem = async (
 };
 
 /**
- * Delete an item
+ * Delete an item, leaving a tombstone so change feeds see the delete
  */
 export const deleteItem = async (itemId: string): Promise<void> => {
   try {
     const itemRef = doc(db, 'items', itemId);
-    await deleteDoc(itemRef);
+    await runTransaction(db, async (transaction) => {
+      const item = await transaction.get(itemRef);
+      if (!item.exists()) {
+        return;
+      }
+      const householdId = item.data().householdId;
+      const version = await nextVersion(transaction, householdId);
+      transaction.delete(itemRef);
+      transaction.set(doc(db, 'households', householdId, 'itemTombstones', itemId), {
+        version,
+        deletedAt: serverTimestamp(),
+      });
+    });
   } catch (error) {
     console.error('Error deleting item:', error);
     throw error;